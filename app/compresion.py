@@ -0,0 +1,159 @@
+"""Compresión de las respuestas HTTP (Brotli o gzip) según Accept-Encoding.
+
+Los listados JSON y el JavaScript del cliente web son texto muy repetitivo:
+comprimidos ocupan entre 5 y 10 veces menos. Se comprimen solo los tipos de
+texto a partir de `settings.compresion_minimo_bytes` (por debajo, la cabecera
+y el coste de CPU no compensan). Brotli se usa si el cliente lo acepta y el
+paquete `brotli` está instalado (dependencia opcional); si no, gzip.
+
+Las respuestas que ya traen Content-Encoding (los ficheros precomprimidos de
+/static) se envían tal cual.
+"""
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+from typing import Dict, Optional
+import zlib
+from .config import settings
+
+# Tipos que merece la pena comprimir (además de text/*, salvo event-stream)
+TIPOS_COMPRIMIBLES = {
+    "application/json",
+    "application/javascript",
+    "application/xml",
+    "image/svg+xml",
+}
+
+def importar_brotli():
+    """brotli si está instalado (sin él se comprime con gzip)"""
+    try:
+        import brotli
+        return brotli
+    except ImportError:
+        return None
+
+def codificaciones_aceptadas(accept_encoding: str) -> Dict[str, float]:
+    """Codificaciones de Accept-Encoding con su peso q ("br;q=0" las excluye)"""
+    aceptadas = {}
+    for parte in accept_encoding.split(","):
+        nombre, _, parametros = parte.strip().partition(";")
+        peso = 1.0
+        parametros = parametros.strip()
+        if parametros.startswith("q="):
+            try:
+                peso = float(parametros[2:])
+            except ValueError:
+                peso = 0.0
+        if nombre:
+            aceptadas[nombre.strip().lower()] = peso
+    return aceptadas
+
+def elegir_codificacion(accept_encoding: str, brotli_disponible: bool) -> Optional[str]:
+    """Mejor codificación soportada por ambos extremos: "br", "gzip" o None"""
+    aceptadas = codificaciones_aceptadas(accept_encoding)
+    comodin = aceptadas.get("*", 0.0)
+    candidatas = (["br"] if brotli_disponible else []) + ["gzip"]
+    for codificacion in candidatas:
+        if aceptadas.get(codificacion, comodin) > 0:
+            return codificacion
+    return None
+
+def es_comprimible(content_type: str) -> bool:
+    tipo = content_type.split(";")[0].strip().lower()
+    if tipo == "text/event-stream":
+        return False
+    return tipo.startswith("text/") or tipo in TIPOS_COMPRIMIBLES or tipo.endswith(("+json", "+xml"))
+
+class _Compresor:
+    """Interfaz común de gzip (zlib) y Brotli para comprimir por trozos"""
+
+    def __init__(self, codificacion: str, brotli=None):
+        if codificacion == "br":
+            self._objeto = brotli.Compressor(quality=settings.compresion_nivel_brotli)
+            self._comprimir, self._terminar = self._objeto.process, self._objeto.finish
+        else:
+            # wbits=31: formato gzip (cabecera y CRC)
+            self._objeto = zlib.compressobj(settings.compresion_nivel_gzip, zlib.DEFLATED, 31)
+            self._comprimir, self._terminar = self._objeto.compress, self._objeto.flush
+
+    def comprimir(self, datos: bytes) -> bytes:
+        return self._comprimir(datos)
+
+    def terminar(self) -> bytes:
+        return self._terminar()
+
+class CompresionMiddleware:
+    """Middleware ASGI que comprime con Brotli o gzip las respuestas de texto grandes"""
+
+    def __init__(self, app: ASGIApp, minimo_bytes: Optional[int] = None) -> None:
+        self.app = app
+        self.minimo_bytes = settings.compresion_minimo_bytes if minimo_bytes is None else minimo_bytes
+        self.brotli = importar_brotli()
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] == "http":
+            codificacion = elegir_codificacion(
+                Headers(scope=scope).get("accept-encoding", ""), self.brotli is not None
+            )
+            if codificacion:
+                await _RespuestaComprimida(self, codificacion)(scope, receive, send)
+                return
+        await self.app(scope, receive, send)
+
+class _RespuestaComprimida:
+    """Retiene el inicio de la respuesta hasta ver el primer trozo del cuerpo"""
+
+    def __init__(self, middleware: CompresionMiddleware, codificacion: str) -> None:
+        self.middleware = middleware
+        self.codificacion = codificacion
+        self.send: Send = None
+        self.inicio: Message = {}
+        self.comprimir = False
+        self.compresor: Optional[_Compresor] = None
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        self.send = send
+        await self.middleware.app(scope, receive, self.enviar)
+
+    async def enviar(self, mensaje: Message) -> None:
+        if mensaje["type"] == "http.response.start":
+            self.inicio = mensaje
+            cabeceras = Headers(raw=mensaje["headers"])
+            self.comprimir = (
+                "content-encoding" not in cabeceras and es_comprimible(cabeceras.get("content-type", ""))
+            )
+            return
+        if mensaje["type"] != "http.response.body":
+            await self.send(mensaje)
+            return
+
+        cuerpo = mensaje.get("body", b"")
+        hay_mas = mensaje.get("more_body", False)
+        if self.compresor is None:
+            if not self.comprimir or (len(cuerpo) < self.middleware.minimo_bytes and not hay_mas):
+                if self.inicio:
+                    if self.comprimir:
+                        # Pequeña ahora, comprimida con otro contenido: las caches deben distinguirlo
+                        MutableHeaders(raw=self.inicio["headers"]).add_vary_header("Accept-Encoding")
+                    await self.send(self.inicio)
+                    self.inicio = {}
+                await self.send(mensaje)
+                return
+            self.compresor = _Compresor(self.codificacion, self.middleware.brotli)
+            cabeceras = MutableHeaders(raw=self.inicio["headers"])
+            cabeceras["Content-Encoding"] = self.codificacion
+            cabeceras.add_vary_header("Accept-Encoding")
+            if hay_mas:
+                del cabeceras["Content-Length"]
+            else:
+                cuerpo = self.compresor.comprimir(cuerpo) + self.compresor.terminar()
+                cabeceras["Content-Length"] = str(len(cuerpo))
+                await self.send(self.inicio)
+                await self.send({"type": "http.response.body", "body": cuerpo})
+                return
+            await self.send(self.inicio)
+
+        # Respuesta en streaming: cada trozo comprimido según llega
+        comprimido = self.compresor.comprimir(cuerpo)
+        if not hay_mas:
+            comprimido += self.compresor.terminar()
+        await self.send({"type": "http.response.body", "body": comprimido, "more_body": hay_mas})
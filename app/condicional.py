@@ -0,0 +1,36 @@
+from fastapi import Request, Response
+from typing import Any, Callable, Optional
+
+# Cabeceras de las peticiones condicionales del catálogo
+CABECERA_ETAG = "ETag"
+# El navegador guarda la respuesta pero la revalida siempre con If-None-Match
+CACHE_CONTROL_CATALOGO = "no-cache"
+
+def formatear_etag(huella: str) -> str:
+    """ETag débil: identifica el contenido, no los bytes exactos (compresión, orden de claves)"""
+    return f'W/"{huella}"'
+
+def _opaca(etag: str) -> str:
+    etag = etag.strip()
+    return etag[2:] if etag.startswith("W/") else etag
+
+def coincide_etag(if_none_match: Optional[str], etag: str) -> bool:
+    """Comparación débil de If-None-Match (lista separada por comas o `*`)"""
+    if not if_none_match:
+        return False
+    valores = [valor.strip() for valor in if_none_match.split(",")]
+    return "*" in valores or any(_opaca(valor) == _opaca(etag) for valor in valores)
+
+def responder_condicional(request: Request, response: Response, cacheado: Callable, *args, **kwargs) -> Any:
+    """Responder una lectura cacheada con ETag (decorada con CacheDecorator(etag=True)).
+
+    La huella se calculó al guardar el resultado en cache: si coincide con
+    If-None-Match se devuelve 304 sin serializar el contenido ni consultar la
+    base de datos; si no, se añade la cabecera ETag y se devuelve el resultado.
+    """
+    huella, resultado = cacheado.con_etag(*args, **kwargs)
+    cabeceras = {CABECERA_ETAG: formatear_etag(huella), "Cache-Control": CACHE_CONTROL_CATALOGO}
+    if coincide_etag(request.headers.get("if-none-match"), cabeceras[CABECERA_ETAG]):
+        return Response(status_code=304, headers=cabeceras)
+    response.headers.update(cabeceras)
+    return resultado
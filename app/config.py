@@ -1,9 +1,25 @@
 from pydantic_settings import BaseSettings
-from typing import Optional
+from typing import List, Optional
 
 class Settings(BaseSettings):
     # Database
     database_url: str = "sqlite:///./data/reservas.db"
+    # Pool de conexiones por worker (PostgreSQL; en SQLite solo pool_size/max_overflow/timeout).
+    # Conexiones máximas contra el servidor = workers × (pool_size + max_overflow)
+    database_pool_size: int = 5
+    database_max_overflow: int = 10
+    database_pool_timeout: int = 30  # segundos esperando una conexión libre
+    database_pool_recycle: int = 1800  # segundos antes de renovar una conexión (cortes de proxies/firewalls)
+    database_pool_pre_ping: bool = True  # comprobar la conexión al sacarla del pool
+    # Réplica para las sesiones de solo lectura (vacío = pool de lectura sobre el fichero SQLite o el engine principal).
+    # Las lecturas que deben ver la escritura recién hecha (p.ej. GET tras crear) siguen en el principal
+    database_replica_url: str = ""
+    database_echo: bool = False  # registrar cada sentencia SQL (solo para depurar: domina el tiempo de petición)
+    # Perfil del motor SQLite: "produccion" (WAL y los pragmas de abajo en cada conexión) o "basico" (valores por defecto)
+    sqlite_perfil: str = "produccion"
+    sqlite_busy_timeout_ms: int = 5000  # espera por el bloqueo de escritura antes de "database is locked"
+    sqlite_cache_size_kb: int = 65536  # cache de páginas por conexión
+    sqlite_mmap_size: int = 256 * 1024 * 1024  # bytes del fichero leídos por mmap
     
     # JWT
     secret_key: str = "tu-clave-secreta-muy-larga-y-segura-para-sqlite"
@@ -15,7 +31,67 @@ class Settings(BaseSettings):
     debug: bool = True
     host: str = "0.0.0.0"
     port: int = 8000
+
+    # Servidor de producción (python -m app.servidor; el __main__ de cada app es solo para desarrollo)
+    servidor_app: str = "app.main_sqlite:app"
+    servidor_workers: int = 0  # procesos worker (0 = uno por núcleo)
+    servidor_loop: str = "auto"  # "uvloop", "asyncio" o "auto" (uvloop si está instalado)
+    servidor_http: str = "auto"  # "httptools", "h11" o "auto" (httptools si está instalado)
+    servidor_keep_alive: int = 65  # segundos con la conexión inactiva abierta (más que el balanceador, p.ej. 60 en ALB)
+    servidor_backlog: int = 2048  # conexiones pendientes de aceptar en el socket (limitado por net.core.somaxconn)
+    servidor_limite_concurrencia: int = 0  # conexiones+tareas por worker antes de responder 503 (0 = sin límite)
+    servidor_apagado_segundos: int = 20  # espera a peticiones en curso y colas al apagar (menor que el stop de Docker)
+
+    # Compresión de respuestas y ficheros estáticos
+    compresion_minimo_bytes: int = 1024  # por debajo no compensa comprimir
+    compresion_nivel_gzip: int = 6
+    compresion_nivel_brotli: int = 4  # 0-11; los niveles altos son para precomprimir, no por petición
+    estaticos_max_age: int = 31536000  # segundos de cache de las URLs versionadas (un año)
+    
+    # Archivo de reservas históricas
+    archivo_reservas_dias: int = 365  # antigüedad mínima (desde la fecha de fin) para archivar
+    archivo_reservas_lote: int = 1000  # reservas movidas por transacción
+    
+    # Cache en memoria
+    cache_max_entradas: int = 10000
+    cache_max_bytes: int = 64 * 1024 * 1024  # presupuesto aproximado (tamaño serializado)
+    cache_obsolescencia_estadisticas: int = 1800  # segundos que se sirve una estadística vencida mientras se refresca
+    cache_obsolescencia_predicciones: int = 7200  # ídem para predicciones (0 = caducidad estricta)
+    # TTL (segundos) de las lecturas cacheadas por endpoint; las escrituras las invalidan antes
+    cache_ttl_servicios: int = 600  # /servicios/
+    cache_ttl_recursos: int = 600  # /recursos/ y /recursos/disponibles
+    cache_ttl_horarios: int = 900  # /horarios/semana/{recurso_id}
+    cache_ttl_precios: int = 300  # /api/precios/servicio/{servicio_id}
+    cache_ttl_disponibilidad: int = 60  # /reservas/disponibilidad y /horarios/disponibilidad
+    # Segundo nivel compartido por los workers del host (fichero SQLite; vacío = desactivado,
+    # salvo con varios workers: app.servidor crea uno temporal)
+    cache_compartido_ruta: str = ""
+    cache_compartido_max_entradas: int = 50000
+    # Segundos entre lecturas del registro de invalidaciones: es la ventana en la que
+    # un worker aún puede servir una entrada que otro ya invalidó (el propio, nunca)
+    cache_compartido_sincronizacion: float = 0.5
+    cache_compartido_retencion_invalidaciones: int = 3600  # segundos que se conserva el registro
     
+    # Predicciones
+    prediccion_modelo_ttl: int = 90000  # segundos; algo más de un día para solapar con el precálculo
+    prediccion_precalculo_activo: bool = True
+    prediccion_precalculo_hora: int = 3  # hora local del precálculo nocturno
+    prediccion_lote_dias: int = 30  # días futuros que guarda el lote nocturno
+    prediccion_lote_procesos: int = 0  # procesos para ajustar modelos (0 = según núcleos y nº de servicios)
+
+    # Contador de consultas SQL por petición (detector de N+1)
+    consultas_presupuesto: int = 25  # sentencias por petición; por encima se registra un aviso
+    consultas_umbral_repeticion: int = 10  # ejecuciones de una misma sentencia en una petición que indican un N+1
+    consultas_cabeceras: Optional[bool] = None  # X-DB-Queries y X-DB-Time-Ms (None = solo con DEBUG)
+
+    # Métricas en formato Prometheus (/metrics)
+    metricas_activas: bool = True
+    metricas_token: str = ""  # Bearer exigido en /metrics (vacío = abierto; restríngelo en el proxy)
+    # Límites (segundos) de los histogramas de latencia; en el entorno como JSON: METRICAS_BUCKETS='[0.01, 0.1, 1]'
+    metricas_buckets: List[float] = [0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0]
+    metricas_colas_intervalo: int = 15  # segundos que se reutiliza el recuento de colas (consultas a la BD)
+    metricas_ventana_webhooks: int = 3600  # segundos hacia atrás de las entregas de webhooks fallidas
+
     class Config:
         env_file = ".env"
         case_sensitive = False
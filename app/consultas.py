@@ -0,0 +1,167 @@
+"""Contador de consultas SQL por petición y detector de N+1.
+
+`ConsultasMiddleware` abre una medición por petición y los eventos de
+SQLAlchemy (registrados en la clase Engine, así que cubren el engine de
+escritura, el de lectura, los asíncronos y los de las pruebas) suman cada
+sentencia y su tiempo a la medición de la petición en curso. La medición vive
+en un ContextVar: los manejadores `def` del threadpool la heredan, los hilos
+propios (refrescos del cache, lote de predicciones) no cuentan.
+
+Con DEBUG (o `consultas_cabeceras`) la respuesta lleva X-DB-Queries y
+X-DB-Time-Ms. Las peticiones que superan `consultas_presupuesto`, o que
+ejecutan una misma sentencia `consultas_umbral_repeticion` veces o más (el
+patrón N+1: una consulta dentro de un bucle), se registran con un aviso.
+
+`limite_consultas` (y la fixture `max_consultas` de conftest.py) comprueba en
+las pruebas el máximo de consultas de cada petición.
+"""
+from collections import Counter
+from contextlib import contextmanager
+from contextvars import ContextVar
+from starlette.datastructures import MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from typing import Callable, Iterator, List, Optional, Tuple
+import logging
+import threading
+import time
+from .config import settings
+
+logger = logging.getLogger(__name__)
+
+CABECERA_CONSULTAS = "X-DB-Queries"
+CABECERA_TIEMPO = "X-DB-Time-Ms"
+
+class MedicionConsultas:
+    """Sentencias SQL y tiempo de base de datos de una petición"""
+
+    def __init__(self, metodo: str = "", ruta: str = ""):
+        self.metodo = metodo
+        self.ruta = ruta
+        self.total = 0
+        self.segundos = 0.0
+        self.sentencias: Counter = Counter()
+
+    @property
+    def milisegundos(self) -> float:
+        return self.segundos * 1000
+
+    def repetidas(self, umbral: Optional[int] = None) -> List[Tuple[str, int]]:
+        """Sentencias ejecutadas al menos `umbral` veces (candidatas a N+1), de más a menos"""
+        umbral = settings.consultas_umbral_repeticion if umbral is None else umbral
+        return [(sql, veces) for sql, veces in self.sentencias.most_common() if veces >= umbral]
+
+    def resumen(self) -> str:
+        lineas = [f"{self.metodo} {self.ruta}: {self.total} consultas en {self.milisegundos:.1f} ms"]
+        for sql, veces in self.repetidas():
+            lineas.append(f"  {veces}x {' '.join(sql.split())[:200]}")
+        return "\n".join(lineas)
+
+_medicion: ContextVar[Optional[MedicionConsultas]] = ContextVar("medicion_consultas", default=None)
+_instrumentado = False
+_bloqueo = threading.Lock()
+
+# Funciones llamadas con cada medición terminada (las usa limite_consultas)
+_observadores: List[Callable[[MedicionConsultas], None]] = []
+
+def _antes(conn, cursor, statement, parameters, context, executemany):
+    if _medicion.get() is not None:
+        # Una conexión ejecuta sus sentencias de una en una
+        conn.info["consultas_inicio"] = time.perf_counter()
+
+def _despues(conn, cursor, statement, parameters, context, executemany):
+    medicion = _medicion.get()
+    if medicion is None:
+        return
+    inicio = conn.info.pop("consultas_inicio", None)
+    if inicio is not None:
+        medicion.segundos += time.perf_counter() - inicio
+    medicion.total += 1
+    medicion.sentencias[statement] += 1
+
+def instrumentar_engines():
+    """Registrar (una vez) los eventos de SQLAlchemy en todos los engines"""
+    global _instrumentado
+    with _bloqueo:
+        if not _instrumentado:
+            event.listen(Engine, "before_cursor_execute", _antes)
+            event.listen(Engine, "after_cursor_execute", _despues)
+            _instrumentado = True
+
+@contextmanager
+def medir_consultas(metodo: str = "", ruta: str = "") -> Iterator[MedicionConsultas]:
+    """Medir las consultas ejecutadas en este contexto (fuera de una petición: scripts, pruebas)"""
+    instrumentar_engines()
+    medicion = MedicionConsultas(metodo, ruta)
+    token = _medicion.set(medicion)
+    try:
+        yield medicion
+    finally:
+        _medicion.reset(token)
+
+class ConsultasMiddleware:
+    """Middleware ASGI que mide las consultas SQL de cada petición"""
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        presupuesto: Optional[int] = None,
+        cabeceras: Optional[bool] = None
+    ) -> None:
+        self.app = app
+        self.presupuesto = settings.consultas_presupuesto if presupuesto is None else presupuesto
+        if cabeceras is None:
+            cabeceras = settings.debug if settings.consultas_cabeceras is None else settings.consultas_cabeceras
+        self.cabeceras = cabeceras
+        instrumentar_engines()
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        async def enviar(mensaje: Message) -> None:
+            if mensaje["type"] == "http.response.start" and self.cabeceras:
+                # Las consultas posteriores (cuerpos en streaming) no llegan a la cabecera
+                cabeceras = MutableHeaders(raw=mensaje["headers"])
+                cabeceras[CABECERA_CONSULTAS] = str(medicion.total)
+                cabeceras[CABECERA_TIEMPO] = f"{medicion.milisegundos:.1f}"
+            await send(mensaje)
+
+        with medir_consultas(scope["method"], scope["path"]) as medicion:
+            try:
+                await self.app(scope, receive, enviar)
+            finally:
+                self._registrar(medicion)
+
+    def _registrar(self, medicion: MedicionConsultas) -> None:
+        if medicion.total > self.presupuesto or medicion.repetidas():
+            logger.warning("Consultas por encima del presupuesto (%d) o repetidas (N+1):\n%s",
+                           self.presupuesto, medicion.resumen())
+        for observador in list(_observadores):
+            observador(medicion)
+
+@contextmanager
+def limite_consultas(maximo: int) -> Iterator[List[MedicionConsultas]]:
+    """Fallar si alguna petición del bloque ejecuta más de `maximo` consultas SQL.
+
+    Mide las peticiones que pasan por ConsultasMiddleware (TestClient incluido,
+    aunque ejecute la app en otro hilo).
+
+        with limite_consultas(2):
+            cliente.get("/servicios/")
+    """
+    peticiones: List[MedicionConsultas] = []
+    _observadores.append(peticiones.append)
+    try:
+        yield peticiones
+    finally:
+        _observadores.remove(peticiones.append)
+    if not peticiones:
+        raise AssertionError("Ninguna petición medida: la app debe incluir ConsultasMiddleware")
+    excedidas = [medicion for medicion in peticiones if medicion.total > maximo]
+    if excedidas:
+        raise AssertionError(
+            f"Más de {maximo} consultas por petición:\n" + "\n".join(m.resumen() for m in excedidas)
+        )
@@ -0,0 +1,175 @@
+"""Engine, sesiones y Base declarativa de la aplicación.
+
+Un único engine construido a partir de `settings.database_url`:
+
+- SQLite en fichero: pool de conexiones reutilizadas entre hilos (cada una
+  conserva su cache de páginas) con los pragmas del perfil
+  `settings.sqlite_perfil`; se crea el directorio del fichero si no existe.
+- SQLite en memoria: una única conexión compartida (StaticPool), para que
+  todas las sesiones vean la misma base de datos.
+- PostgreSQL y demás: QueuePool dimensionado por `database_pool_*`. Cada
+  worker tiene su propio pool, así que el máximo de conexiones contra el
+  servidor es workers × (pool_size + max_overflow).
+
+Las lecturas pesadas (catálogo, disponibilidad, estadísticas) usan sesiones
+de solo lectura (`get_db_lectura`) de otro engine: la réplica de
+`settings.database_replica_url` o, en SQLite en fichero, un pool propio en
+modo WAL y query_only sobre el mismo fichero; así no ocupan las conexiones
+de las escrituras de reservas ni las bloquean.
+
+Las lecturas que se guardan en el cache con invalidación usan `get_db_cache`:
+las sesiones de lectura sin réplica (ven cada commit) o, con réplica, el
+engine principal; una réplica atrasada volvería a llenar una entrada recién
+invalidada con los datos anteriores hasta su TTL.
+
+db.py, db_sqlite.py y db_sqlite_clean.py reexportan estos objetos.
+"""
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import Engine, make_url
+from sqlalchemy.ext.declarative import declarative_base
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+from typing import List, Optional
+import os
+from .config import settings
+
+PERFILES_SQLITE = ("produccion", "basico")
+
+def pragmas_sqlite(perfil: str) -> List[str]:
+    """Pragmas que se ejecutan en cada conexión nueva según el perfil.
+
+    "produccion": WAL (los lectores no bloquean al escritor), synchronous=NORMAL
+    (sin fsync por commit; en WAL no compromete la integridad, solo los últimos
+    commits ante un corte de luz), espera por el bloqueo en lugar de fallar, y
+    cache de páginas, mmap y temporales en memoria. "basico" deja los valores
+    por defecto de SQLite.
+    """
+    if perfil not in PERFILES_SQLITE:
+        raise ValueError(f"Perfil SQLite desconocido: {perfil!r} (opciones: {', '.join(PERFILES_SQLITE)})")
+    if perfil == "basico":
+        return []
+    return [
+        "PRAGMA journal_mode=WAL",
+        "PRAGMA synchronous=NORMAL",
+        f"PRAGMA busy_timeout={settings.sqlite_busy_timeout_ms}",
+        f"PRAGMA cache_size=-{settings.sqlite_cache_size_kb}",
+        f"PRAGMA mmap_size={settings.sqlite_mmap_size}",
+        "PRAGMA temp_store=MEMORY",
+    ]
+
+def configurar_sqlite(engine: Engine, perfil: Optional[str] = None) -> Engine:
+    """Aplicar los pragmas del perfil (por defecto settings.sqlite_perfil) a cada conexión del engine"""
+    pragmas = pragmas_sqlite(perfil or settings.sqlite_perfil)
+    if pragmas:
+        @event.listens_for(engine, "connect")
+        def aplicar_pragmas(conexion_dbapi, _registro):
+            cursor = conexion_dbapi.cursor()
+            for pragma in pragmas:
+                cursor.execute(pragma)
+            cursor.close()
+    return engine
+
+def crear_engine(database_url: Optional[str] = None, echo: Optional[bool] = None) -> Engine:
+    """Engine para la URL indicada (por defecto settings.database_url) con la estrategia de conexión de su motor"""
+    url = make_url(database_url or settings.database_url)
+    echo = settings.database_echo if echo is None else echo
+
+    if url.get_backend_name() == "sqlite":
+        # FastAPI usa la sesión desde hilos del threadpool distintos al que la abrió
+        argumentos = {"connect_args": {"check_same_thread": False}, "echo": echo}
+        if url.database in (None, "", ":memory:"):
+            return create_engine(url, poolclass=StaticPool, **argumentos)
+        os.makedirs(os.path.dirname(os.path.abspath(url.database)), exist_ok=True)
+        return configurar_sqlite(create_engine(
+            url,
+            pool_size=settings.database_pool_size,
+            max_overflow=settings.database_max_overflow,
+            pool_timeout=settings.database_pool_timeout,
+            **argumentos
+        ))
+
+    return create_engine(
+        url,
+        pool_size=settings.database_pool_size,
+        max_overflow=settings.database_max_overflow,
+        pool_timeout=settings.database_pool_timeout,
+        pool_recycle=settings.database_pool_recycle,
+        pool_pre_ping=settings.database_pool_pre_ping,
+        echo=echo
+    )
+
+def es_sqlite_en_fichero(url) -> bool:
+    url = make_url(url)
+    return url.get_backend_name() == "sqlite" and url.database not in (None, "", ":memory:")
+
+def configurar_solo_lectura(engine: Engine) -> Engine:
+    """Conexiones SQLite en WAL (los lectores no bloquean al escritor) que rechazan escrituras"""
+    @event.listens_for(engine, "connect")
+    def solo_lectura(conexion_dbapi, _registro):
+        cursor = conexion_dbapi.cursor()
+        cursor.execute("PRAGMA journal_mode=WAL")
+        cursor.execute("PRAGMA query_only=ON")
+        cursor.close()
+
+    return engine
+
+def crear_engine_lectura(engine_escritura: Engine) -> Engine:
+    """Engine de las sesiones de solo lectura (el de escritura si no hay alternativa)"""
+    if settings.database_replica_url:
+        return crear_engine(settings.database_replica_url)
+    if not es_sqlite_en_fichero(engine_escritura.url):
+        return engine_escritura
+    # Pool propio sobre el mismo fichero
+    return configurar_solo_lectura(crear_engine(engine_escritura.url))
+
+def elegir_engine_cache(engine_escritura: Engine, engine_lectura: Engine) -> Engine:
+    """Engine de las lecturas que se guardan en cache: el de lectura salvo que sea una réplica"""
+    return engine_escritura if settings.database_replica_url else engine_lectura
+
+# Engine de la aplicación, de las lecturas y de las lecturas que se cachean
+engine = crear_engine()
+engine_lectura = crear_engine_lectura(engine)
+engine_cache = elegir_engine_cache(engine, engine_lectura)
+
+# Crear sesión local
+SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+SessionLectura = sessionmaker(autocommit=False, autoflush=False, bind=engine_lectura)
+SessionCache = sessionmaker(autocommit=False, autoflush=False, bind=engine_cache)
+
+def cerrar_engines():
+    """Cerrar las conexiones de los pools síncronos (al apagar la aplicación)"""
+    engine_lectura.dispose()
+    engine.dispose()
+
+@event.listens_for(SessionLectura, "before_flush")
+@event.listens_for(SessionCache, "before_flush")
+def _rechazar_escrituras(sesion, _contexto, _instancias):
+    # También cuando lectura y escritura comparten engine (sin réplica ni fichero SQLite)
+    raise RuntimeError("Las sesiones de solo lectura no admiten escrituras: usa get_db")
+
+# Base para modelos
+Base = declarative_base()
+
+# Dependency para obtener sesión de base de datos
+def get_db():
+    db = SessionLocal()
+    try:
+        yield db
+    finally:
+        db.close()
+
+# Dependency para las lecturas que pueden ir a la réplica (puede ir algo atrasada)
+def get_db_lectura():
+    db = SessionLectura()
+    try:
+        yield db
+    finally:
+        db.close()
+
+# Dependency para las lecturas que se guardan en cache: nunca de una réplica atrasada
+def get_db_cache():
+    db = SessionCache()
+    try:
+        yield db
+    finally:
+        db.close()
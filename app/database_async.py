@@ -0,0 +1,122 @@
+"""Acceso asíncrono a la base de datos (AsyncSession) para los endpoints más consultados.
+
+Los manejadores `async def` se ejecutan en el bucle de eventos: una consulta
+con la Session síncrona lo bloquea y detiene todas las peticiones del worker
+mientras dura. Los endpoints calientes de solo lectura usan en su lugar
+`get_db_async_lectura`, con aiosqlite (SQLite) o asyncpg (PostgreSQL); el resto
+de manejadores son `def` normales, que FastAPI ejecuta en el threadpool.
+
+El engine se crea en la primera petición: el driver asíncrono solo hace falta
+si se usan estos endpoints. Lee de la réplica configurada o, en SQLite en
+fichero, con conexiones en WAL y query_only como las sesiones de lectura
+síncronas. Como `get_db_cache`, `get_db_async_cache` no lee de la réplica: con
+una configurada abre un segundo engine sobre la base de datos principal.
+"""
+from fastapi import HTTPException
+from sqlalchemy.engine import URL, make_url
+from sqlalchemy.ext.asyncio import AsyncEngine, async_sessionmaker, create_async_engine
+from sqlalchemy.pool import AsyncAdaptedQueuePool, StaticPool
+from typing import Dict, Optional
+import threading
+from .config import settings
+from .database import configurar_solo_lectura, configurar_sqlite, es_sqlite_en_fichero
+
+# Driver asíncrono de cada motor (paquete que lo instala)
+DRIVERS_ASYNC = {
+    "sqlite": ("aiosqlite", "aiosqlite"),
+    "postgresql": ("asyncpg", "asyncpg"),
+}
+
+def url_async(database_url) -> URL:
+    """URL equivalente con el driver asíncrono del motor"""
+    url = make_url(database_url)
+    backend = url.get_backend_name()
+    if backend not in DRIVERS_ASYNC:
+        raise ValueError(f"Sin driver asíncrono para {backend!r} (soportados: {', '.join(DRIVERS_ASYNC)})")
+    return url.set(drivername=f"{backend}+{DRIVERS_ASYNC[backend][0]}")
+
+def crear_engine_async(database_url=None, solo_lectura: bool = False) -> AsyncEngine:
+    """Engine asíncrono con la misma estrategia de conexión que database.crear_engine"""
+    url = url_async(database_url or settings.database_url)
+    paquete = DRIVERS_ASYNC[url.get_backend_name()][1]
+    try:
+        __import__(paquete)
+    except ImportError:
+        raise HTTPException(
+            status_code=500,
+            detail=f"El acceso asíncrono requiere '{paquete}'. Instálelo con: pip install {paquete}"
+        )
+
+    if url.get_backend_name() == "sqlite":
+        if not es_sqlite_en_fichero(url):
+            return create_async_engine(url, poolclass=StaticPool, echo=settings.database_echo)
+        # Sin pool (valor por defecto de aiosqlite) cada sesión abriría una conexión y su hilo
+        engine = create_async_engine(
+            url,
+            poolclass=AsyncAdaptedQueuePool,
+            pool_size=settings.database_pool_size,
+            max_overflow=settings.database_max_overflow,
+            pool_timeout=settings.database_pool_timeout,
+            echo=settings.database_echo
+        )
+        configurar_sqlite(engine.sync_engine)
+        if solo_lectura:
+            configurar_solo_lectura(engine.sync_engine)
+        return engine
+
+    return create_async_engine(
+        url,
+        pool_size=settings.database_pool_size,
+        max_overflow=settings.database_max_overflow,
+        pool_timeout=settings.database_pool_timeout,
+        pool_recycle=settings.database_pool_recycle,
+        pool_pre_ping=settings.database_pool_pre_ping,
+        echo=settings.database_echo
+    )
+
+_bloqueo = threading.Lock()
+# Fábricas de AsyncSession de solo lectura por base de datos ("lectura", "principal")
+_sesiones: Dict[str, async_sessionmaker] = {}
+
+def _fabrica(nombre: str, database_url: str) -> async_sessionmaker:
+    """Fábrica de AsyncSession de solo lectura sobre `database_url` (crea el engine la primera vez)"""
+    sesiones = _sesiones.get(nombre)
+    if sesiones is None:
+        with _bloqueo:
+            sesiones = _sesiones.get(nombre)
+            if sesiones is None:
+                engine = crear_engine_async(database_url, solo_lectura=True)
+                sesiones = _sesiones[nombre] = async_sessionmaker(engine, expire_on_commit=False, autoflush=False)
+    return sesiones
+
+def sesiones_async_lectura() -> async_sessionmaker:
+    """Fábrica de AsyncSession de solo lectura (réplica si está configurada)"""
+    return _fabrica("lectura", settings.database_replica_url or settings.database_url)
+
+def sesiones_async_cache() -> async_sessionmaker:
+    """Fábrica de AsyncSession para las lecturas que se guardan en cache (nunca la réplica)"""
+    if not settings.database_replica_url:
+        return sesiones_async_lectura()
+    return _fabrica("principal", settings.database_url)
+
+def engine_async_lectura() -> Optional[AsyncEngine]:
+    """Engine asíncrono de lectura si ya se ha creado (sin crearlo)"""
+    sesiones = _sesiones.get("lectura")
+    return sesiones.kw["bind"] if sesiones is not None else None
+
+async def cerrar_engines_async():
+    """Cerrar las conexiones de los engines asíncronos (al apagar la aplicación)"""
+    for nombre in list(_sesiones):
+        sesiones = _sesiones.pop(nombre, None)
+        if sesiones is not None:
+            await sesiones.kw["bind"].dispose()
+
+# Dependency para las lecturas asíncronas de los endpoints calientes
+async def get_db_async_lectura():
+    async with sesiones_async_lectura()() as db:
+        yield db
+
+# Dependency para las lecturas asíncronas que se guardan en cache
+async def get_db_async_cache():
+    async with sesiones_async_cache()() as db:
+        yield db
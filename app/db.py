@@ -1,21 +1,2 @@
-from sqlalchemy import create_engine
-from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import sessionmaker
-from .config import settings
-
-# Create database engine
-engine = create_engine(settings.database_url)
-
-# Create SessionLocal class
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
-
-# Create Base class
-Base = declarative_base()
-
-# Dependency to get database session
-def get_db():
-    db = SessionLocal()
-    try:
-        yield db
-    finally:
-        db.close()
+"""Compatibilidad: mismo engine y Base que el resto de la aplicación (ver database.py)"""
+from .database import engine, SessionLocal, Base, get_db, SessionLectura, get_db_lectura, SessionCache, get_db_cache
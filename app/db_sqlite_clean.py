@@ -1,27 +1,6 @@
-from sqlalchemy import create_engine
-from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import sessionmaker
-
-# Configuración para SQLite
-DATABASE_URL = "sqlite:///./data/reservas.db"
-
-# Crear engine SQLite
-engine = create_engine(
-    DATABASE_URL,
-    connect_args={"check_same_thread": False},
-    echo=True  # Mostrar SQL en modo debug
+"""Compatibilidad: los modelos y las rutas importan de aquí; todo vive en database.py"""
+from .database import (
+    engine, SessionLocal, Base, get_db, crear_engine,
+    engine_lectura, SessionLectura, get_db_lectura, crear_engine_lectura, SessionCache, get_db_cache,
+    configurar_sqlite, pragmas_sqlite, PERFILES_SQLITE
 )
-
-# Crear sesión local
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
-
-# Base para modelos
-Base = declarative_base()
-
-# Dependency para obtener sesión de base de datos
-def get_db():
-    db = SessionLocal()
-    try:
-        yield db
-    finally:
-        db.close()
@@ -0,0 +1,122 @@
+"""Ficheros estáticos con nombres versionados por contenido y variantes precomprimidas.
+
+Cada fichero de /static se publica también como `nombre.<huella>.ext`, donde
+la huella depende de su contenido: esas URLs no cambian nunca de contenido y
+se sirven con `Cache-Control: public, max-age=…, immutable`, así que el
+navegador no vuelve a pedirlas hasta que un despliegue cambia el fichero (y
+con él la huella). Las URLs sin huella se revalidan en cada uso (`no-cache`
+con ETag/Last-Modified). El HTML del cliente web se reescribe para enlazar las
+URLs versionadas.
+
+Si existen `fichero.br` o `fichero.gz` (scripts/precomprimir_estaticos.py) y
+el cliente los acepta, se envían con su Content-Encoding en lugar de
+comprimir en cada petición.
+"""
+from fastapi.staticfiles import StaticFiles
+from starlette.datastructures import Headers
+from starlette.responses import Response
+from starlette.types import Scope
+from typing import Dict, Optional, Set, Tuple
+import functools
+import hashlib
+import os
+import posixpath
+import re
+from .compresion import codificaciones_aceptadas
+from .config import settings
+
+CACHE_INMUTABLE = f"public, max-age={settings.estaticos_max_age}, immutable"
+CACHE_REVALIDAR = "no-cache"
+
+# Variantes precomprimidas por orden de preferencia
+PRECOMPRIMIDOS = (("br", ".br"), ("gzip", ".gz"))
+PATRON_VERSIONADO = re.compile(r"^(?P<base>.+)\.(?P<huella>[0-9a-f]{12})(?P<extension>\.[^./]+)$")
+
+def huella_fichero(ruta: str) -> str:
+    """12 caracteres hexadecimales que cambian con el contenido del fichero"""
+    resumen = hashlib.blake2b(digest_size=6)
+    with open(ruta, "rb") as fichero:
+        for bloque in iter(lambda: fichero.read(1 << 16), b""):
+            resumen.update(bloque)
+    return resumen.hexdigest()
+
+def nombre_versionado(nombre: str, huella: str) -> str:
+    base, extension = posixpath.splitext(nombre)
+    return f"{base}.{huella}{extension}"
+
+class EstaticosVersionados(StaticFiles):
+    """StaticFiles con URLs versionadas por contenido y variantes .br/.gz"""
+
+    def __init__(self, *, directory: str, prefijo: str = "/static/", **kwargs) -> None:
+        super().__init__(directory=directory, **kwargs)
+        self.prefijo = prefijo
+        self.versiones: Dict[str, str] = {}  # nombre -> nombre versionado
+        self.originales: Dict[str, str] = {}  # nombre versionado -> nombre
+        self.precomprimidos: Set[str] = set()  # variantes .br/.gz al día con su original
+        self.actualizar()
+
+    def actualizar(self) -> None:
+        """Calcular huellas y variantes (al arrancar; tras copiar ficheros nuevos)"""
+        versiones, precomprimidos = {}, set()
+        extensiones = tuple(extension for _, extension in PRECOMPRIMIDOS)
+        for raiz, _, ficheros in os.walk(self.directory):
+            for fichero in ficheros:
+                ruta = os.path.join(raiz, fichero)
+                relativo = os.path.relpath(ruta, self.directory).replace(os.sep, "/")
+                if not fichero.endswith(extensiones):
+                    versiones[relativo] = nombre_versionado(relativo, huella_fichero(ruta))
+                    continue
+                original = os.path.splitext(ruta)[0]
+                # Una variante más antigua que su original está obsoleta
+                if os.path.isfile(original) and os.path.getmtime(ruta) >= os.path.getmtime(original):
+                    precomprimidos.add(relativo)
+        self.versiones = versiones
+        self.originales = {versionado: nombre for nombre, versionado in versiones.items()}
+        self.precomprimidos = precomprimidos
+        self._html_versionado.cache_clear()
+
+    def url(self, nombre: str) -> str:
+        """URL versionada de un fichero (la normal si no existe)"""
+        return self.prefijo + self.versiones.get(nombre, nombre)
+
+    def html_versionado(self, ruta: str) -> Tuple[str, str]:
+        """(HTML con los enlaces a /static versionados, huella del resultado)"""
+        return self._html_versionado(ruta, os.stat(ruta).st_mtime_ns)
+
+    @functools.lru_cache(maxsize=8)
+    def _html_versionado(self, ruta: str, _mtime: int) -> Tuple[str, str]:
+        with open(ruta, encoding="utf-8") as fichero:
+            html = fichero.read()
+        patron = re.compile(re.escape(self.prefijo) + r"([\w./-]+)")
+        html = patron.sub(lambda m: self.url(m.group(1)), html)
+        return html, hashlib.blake2b(html.encode(), digest_size=8).hexdigest()
+
+    def _codificacion_precomprimida(self, nombre: str, scope: Scope) -> Optional[Tuple[str, str]]:
+        aceptadas = codificaciones_aceptadas(Headers(scope=scope).get("accept-encoding", ""))
+        for codificacion, extension in PRECOMPRIMIDOS:
+            if aceptadas.get(codificacion, aceptadas.get("*", 0.0)) > 0 and nombre + extension in self.precomprimidos:
+                return codificacion, extension
+        return None
+
+    async def get_response(self, path: str, scope: Scope) -> Response:
+        relativo = path.replace(os.sep, "/")
+        nombre = self.originales.get(relativo)
+        cache = CACHE_INMUTABLE if nombre else CACHE_REVALIDAR
+        if nombre is None:
+            # Huella de otro despliegue (HTML antiguo): contenido actual, sin cache largo
+            coincidencia = PATRON_VERSIONADO.match(relativo)
+            candidato = coincidencia and coincidencia["base"] + coincidencia["extension"]
+            nombre = candidato if candidato in self.versiones else relativo
+
+        variante = self._codificacion_precomprimida(nombre, scope)
+        if variante:
+            codificacion, extension = variante
+            # FileResponse deduce el Content-Type del nombre sin la extensión de compresión
+            respuesta = await super().get_response(nombre + extension, scope)
+            respuesta.headers["Content-Encoding"] = codificacion
+        else:
+            respuesta = await super().get_response(nombre, scope)
+        if any(nombre + extension in self.precomprimidos for _, extension in PRECOMPRIMIDOS):
+            respuesta.headers.add_vary_header("Accept-Encoding")
+        respuesta.headers["Cache-Control"] = cache
+        return respuesta
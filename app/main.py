@@ -1,18 +1,31 @@
+from contextlib import asynccontextmanager
 from fastapi import FastAPI, Depends
 from fastapi.middleware.cors import CORSMiddleware
+from .compresion import CompresionMiddleware
+from .consultas import CABECERA_CONSULTAS, CABECERA_TIEMPO, ConsultasMiddleware
+from .metricas import MetricasMiddleware
 from .config import settings
-from .db import engine, Base
+from .servidor import apagado_ordenado
 from .routes import (
     cliente_router,
     servicio_router,
     recurso_router,
     reserva_router,
     precio_router,
-    auth_router
+    auth_router,
+    metricas_router
 )
 
-# Create database tables
-Base.metadata.create_all(bind=engine)
+@asynccontextmanager
+async def ciclo_de_vida(app: FastAPI):
+    """Arranque y parada del microservicio.
+
+    El esquema lo gestiona Alembic (`alembic upgrade head`): importar la
+    aplicación no toca la base de datos.
+    """
+    yield
+    # Vaciar el trabajo en segundo plano y cerrar las conexiones
+    await apagado_ordenado()
 
 # Create FastAPI app
 app = FastAPI(
@@ -20,7 +33,8 @@ app = FastAPI(
     description="Microservicio de gestión de reservas para ecommerce, citas médicas, alquileres, etc.",
     version="1.0.0",
     docs_url="/docs",
-    redoc_url="/redoc"
+    redoc_url="/redoc",
+    lifespan=ciclo_de_vida
 )
 
 # Add CORS middleware
@@ -30,8 +44,19 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor", CABECERA_CONSULTAS, CABECERA_TIEMPO],
 )
 
+# Comprimir las respuestas de texto grandes (Brotli o gzip)
+app.add_middleware(CompresionMiddleware)
+
+# Contar las consultas SQL de cada petición (cabeceras en debug, aviso si hay N+1)
+app.add_middleware(ConsultasMiddleware)
+
+# Latencias por ruta y peticiones en curso para /metrics (el último añadido envuelve a los demás)
+if settings.metricas_activas:
+    app.add_middleware(MetricasMiddleware)
+
 # Include routers
 app.include_router(auth_router)
 app.include_router(cliente_router)
@@ -39,6 +64,8 @@ app.include_router(servicio_router)
 app.include_router(recurso_router)
 app.include_router(reserva_router)
 app.include_router(precio_router)
+if settings.metricas_activas:
+    app.include_router(metricas_router)
 
 @app.get("/")
 async def root():
@@ -57,6 +84,7 @@ async def health_check():
 
 if __name__ == "__main__":
     import uvicorn
+    # Development only; in production: python -m app.servidor
     uvicorn.run(
         "app.main:app",
         host=settings.host,
@@ -1,9 +1,15 @@
-from fastapi import FastAPI, Depends
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, Depends, Request
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.staticfiles import StaticFiles
-from fastapi.responses import FileResponse
+from fastapi.responses import HTMLResponse, Response
+from .compresion import CompresionMiddleware
+from .consultas import CABECERA_CONSULTAS, CABECERA_TIEMPO, ConsultasMiddleware
+from .metricas import MetricasMiddleware
+from .condicional import CABECERA_ETAG, coincide_etag, formatear_etag
 from .config import settings
-from .db_sqlite_clean import engine, Base
+from .estaticos import CACHE_REVALIDAR, EstaticosVersionados
+from .database import SessionLocal
+from .servidor import apagado_ordenado
 from .routes import (
     cliente_router,
     servicio_router,
@@ -14,11 +20,30 @@ from .routes import (
     horario_router,
     precio_dinamico_router,
     pago_router,
-    integracion_router
+    integracion_router,
+    prediccion_router,
+    cache_router,
+    metricas_router
 )
 
-# Crear tablas de base de datos
-Base.metadata.create_all(bind=engine)
+@asynccontextmanager
+async def ciclo_de_vida(app: FastAPI):
+    """Arranque y parada del microservicio.
+
+    El esquema lo gestiona Alembic (`alembic upgrade head`): importar la
+    aplicación no toca la base de datos. El lote de predicciones (numpy) solo
+    se carga si el precálculo está activo.
+    """
+    precalculo = None
+    if settings.prediccion_precalculo_activo:
+        from .services.prediccion_lote_service import precalculo_nocturno as precalculo
+        # Genera las predicciones de todos los servicios y programa el lote nocturno
+        precalculo.start(SessionLocal)
+    try:
+        yield
+    finally:
+        # Vaciar el trabajo en segundo plano y cerrar las conexiones
+        await apagado_ordenado(precalculo)
 
 # Crear aplicación FastAPI
 app = FastAPI(
@@ -26,6 +51,7 @@ app = FastAPI(
     description="Microservicio de reservas con sistema de precios dinámicos y Sprint 5: Integraciones y Pagos",
     version="2.0.0",
     debug=settings.debug,
+    lifespan=ciclo_de_vida,
     openapi_tags=[
         {
             "name": "clientes",
@@ -62,6 +88,14 @@ app = FastAPI(
         {
             "name": "integraciones",
             "description": "Sistema de integraciones externas, notificaciones y webhooks"
+        },
+        {
+            "name": "predicciones",
+            "description": "Predicciones de demanda generadas por el lote nocturno"
+        },
+        {
+            "name": "cache",
+            "description": "Estadísticas del cache de lecturas por endpoint"
         }
     ]
 )
@@ -73,10 +107,22 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor", "ETag", CABECERA_CONSULTAS, CABECERA_TIEMPO],
 )
 
-# Montar archivos estáticos
-app.mount("/static", StaticFiles(directory="static"), name="static")
+# Comprimir las respuestas de texto grandes (Brotli o gzip)
+app.add_middleware(CompresionMiddleware)
+
+# Contar las consultas SQL de cada petición (cabeceras en debug, aviso si hay N+1)
+app.add_middleware(ConsultasMiddleware)
+
+# Latencias por ruta y peticiones en curso para /metrics (el último añadido envuelve a los demás)
+if settings.metricas_activas:
+    app.add_middleware(MetricasMiddleware)
+
+# Montar archivos estáticos (URLs versionadas por contenido y variantes precomprimidas)
+estaticos = EstaticosVersionados(directory="static")
+app.mount("/static", estaticos, name="static")
 
 # Incluir routers
 app.include_router(auth_router)
@@ -89,6 +135,10 @@ app.include_router(horario_router)
 app.include_router(precio_dinamico_router)
 app.include_router(pago_router)
 app.include_router(integracion_router)
+app.include_router(prediccion_router)
+app.include_router(cache_router)
+if settings.metricas_activas:
+    app.include_router(metricas_router)
 
 @app.get("/")
 async def root():
@@ -102,9 +152,13 @@ async def root():
     }
 
 @app.get("/cliente-web")
-async def cliente_web():
-    """Servir la página principal del cliente web"""
-    return FileResponse("cliente_web.html")
+def cliente_web(request: Request):
+    """Servir la página principal del cliente web (enlaza los estáticos versionados)"""
+    html, huella = estaticos.html_versionado("cliente_web.html")
+    cabeceras = {CABECERA_ETAG: formatear_etag(huella), "Cache-Control": CACHE_REVALIDAR}
+    if coincide_etag(request.headers.get("if-none-match"), cabeceras[CABECERA_ETAG]):
+        return Response(status_code=304, headers=cabeceras)
+    return HTMLResponse(html, headers=cabeceras)
 
 @app.get("/health")
 async def health_check():
@@ -118,6 +172,7 @@ async def health_check():
 
 if __name__ == "__main__":
     import uvicorn
+    # Solo desarrollo; en producción: python -m app.servidor
     uvicorn.run(
         "app.main_sqlite:app",
         host=settings.host,
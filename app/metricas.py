@@ -0,0 +1,308 @@
+"""Métricas del microservicio en formato de texto de Prometheus (/metrics).
+
+`MetricasMiddleware` mide cada petición HTTP: histograma de latencias y
+contador de respuestas por ruta (la plantilla, p.ej. /reservas/{reserva_id},
+no la URL: el número de series no crece con los ids) y peticiones en curso.
+
+Cada hilo suma en su propio fragmento del registro, sin bloqueos en el camino
+de la petición (en la práctica, el hilo del bucle de eventos de cada worker);
+al exponer se suman los fragmentos de todos los hilos. El coste por petición
+son dos lecturas del reloj y unas pocas operaciones sobre diccionarios.
+
+Al exponer se añaden además las métricas que ya se llevan en otro sitio:
+- pools de conexiones de los engines (en uso, libres, desbordamiento),
+- aciertos del cache (general y por prefijo, de CacheService),
+- colas: notificaciones pendientes de envío y entregas de webhooks fallidas
+  recientes (consultas a la BD, reutilizadas `metricas_colas_intervalo` s).
+
+Cada worker expone sus propios contadores: con varios workers cada scrape
+llega a uno de ellos.
+"""
+from bisect import bisect_left
+from datetime import datetime, timedelta
+from sqlalchemy import and_, func
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.orm import Session
+from sqlalchemy.pool import QueuePool
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+from typing import Dict, Iterable, List, NamedTuple, Optional, Sequence, Tuple
+import logging
+import threading
+import time
+from .config import settings
+
+logger = logging.getLogger(__name__)
+
+TIPO_CONTENIDO = "text/plain; version=0.0.4"  # Starlette añade el charset
+
+# Etiqueta de las peticiones que no llegan a ninguna ruta (404)
+SIN_RUTA = "sin_ruta"
+
+Etiquetas = Tuple[Tuple[str, str], ...]
+
+class Familia(NamedTuple):
+    """Una métrica de Prometheus con todas sus series"""
+    nombre: str
+    tipo: str  # counter, gauge o histogram
+    ayuda: str
+    muestras: List[Tuple[str, Etiquetas, float]]  # (sufijo del nombre, etiquetas, valor)
+
+class _Fragmento:
+    """Contadores de un hilo: solo ese hilo los modifica"""
+    __slots__ = ("histogramas", "respuestas", "en_curso")
+
+    def __init__(self):
+        # (metodo, ruta) -> [peticiones por bucket..., +Inf, suma de segundos]
+        self.histogramas: Dict[Tuple[str, str], list] = {}
+        # (metodo, ruta, estado) -> respuestas
+        self.respuestas: Dict[Tuple[str, str, int], int] = {}
+        self.en_curso = 0
+
+class RegistroMetricas:
+    """Latencias y peticiones HTTP agregadas por hilo"""
+
+    def __init__(self, buckets: Optional[Sequence[float]] = None):
+        self.buckets = tuple(sorted(settings.metricas_buckets if buckets is None else buckets))
+        self._local = threading.local()
+        self._fragmentos: List[_Fragmento] = []
+        self._bloqueo = threading.Lock()  # solo al crear el fragmento de un hilo nuevo
+
+    def fragmento(self) -> _Fragmento:
+        """Fragmento del hilo actual (se crea la primera vez)"""
+        try:
+            return self._local.fragmento
+        except AttributeError:
+            fragmento = self._local.fragmento = _Fragmento()
+            with self._bloqueo:
+                self._fragmentos.append(fragmento)
+            return fragmento
+
+    def observar(
+        self, metodo: str, ruta: str, estado: int, segundos: float,
+        fragmento: Optional[_Fragmento] = None
+    ) -> None:
+        """Registrar una petición terminada"""
+        fragmento = fragmento or self.fragmento()
+        histograma = fragmento.histogramas.get((metodo, ruta))
+        if histograma is None:
+            histograma = fragmento.histogramas[(metodo, ruta)] = [0] * (len(self.buckets) + 1) + [0.0]
+        histograma[bisect_left(self.buckets, segundos)] += 1
+        histograma[-1] += segundos
+        clave = (metodo, ruta, estado)
+        fragmento.respuestas[clave] = fragmento.respuestas.get(clave, 0) + 1
+
+    def familias(self) -> List[Familia]:
+        """Sumar los fragmentos de todos los hilos"""
+        with self._bloqueo:
+            fragmentos = list(self._fragmentos)
+        histogramas: Dict[Tuple[str, str], list] = {}
+        respuestas: Dict[Tuple[str, str, int], int] = {}
+        en_curso = 0
+        for fragmento in fragmentos:
+            # list() copia el diccionario de una vez aunque su hilo siga sumando
+            for clave, histograma in list(fragmento.histogramas.items()):
+                acumulado = histogramas.setdefault(clave, [0] * (len(self.buckets) + 1) + [0.0])
+                for i, valor in enumerate(histograma):
+                    acumulado[i] += valor
+            for clave, total in list(fragmento.respuestas.items()):
+                respuestas[clave] = respuestas.get(clave, 0) + total
+            en_curso += fragmento.en_curso
+
+        duracion = Familia("reservas_http_duracion_segundos", "histogram",
+                           "Latencia de las peticiones HTTP por ruta", [])
+        for (metodo, ruta), histograma in sorted(histogramas.items()):
+            acumuladas = 0
+            for limite, peticiones in zip(self.buckets + (float("inf"),), histograma):
+                acumuladas += peticiones
+                duracion.muestras.append(
+                    ("_bucket", (("metodo", metodo), ("ruta", ruta), ("le", _numero(limite))), acumuladas)
+                )
+            duracion.muestras.append(("_sum", (("metodo", metodo), ("ruta", ruta)), histograma[-1]))
+            duracion.muestras.append(("_count", (("metodo", metodo), ("ruta", ruta)), acumuladas))
+
+        return [
+            duracion,
+            Familia("reservas_http_respuestas_total", "counter", "Respuestas HTTP por ruta y código de estado", [
+                ("", (("metodo", metodo), ("ruta", ruta), ("estado", str(estado))), total)
+                for (metodo, ruta, estado), total in sorted(respuestas.items())
+            ]),
+            Familia("reservas_http_peticiones_en_curso", "gauge", "Peticiones HTTP en curso", [("", (), en_curso)]),
+        ]
+
+# Registro de la aplicación (uno por proceso worker)
+metricas_http = RegistroMetricas()
+
+def plantilla_ruta(scope: Scope, raiz: str = "") -> str:
+    """Ruta de FastAPI que atendió la petición, o el punto de montaje (/static)"""
+    ruta = scope.get("route")
+    if ruta is not None:
+        return ruta.path
+    # Las aplicaciones montadas solo amplían root_path
+    montaje = scope.get("root_path", "")[len(raiz):]
+    return f"{montaje}/{{ruta}}" if montaje else SIN_RUTA
+
+class MetricasMiddleware:
+    """Middleware ASGI que registra la latencia y el estado de cada petición"""
+
+    def __init__(self, app: ASGIApp, registro: Optional[RegistroMetricas] = None) -> None:
+        self.app = app
+        self.registro = registro or metricas_http
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        estado = 500  # si la aplicación falla sin responder
+
+        async def enviar(mensaje: Message) -> None:
+            nonlocal estado
+            if mensaje["type"] == "http.response.start":
+                estado = mensaje["status"]
+            await send(mensaje)
+
+        raiz = scope.get("root_path", "")
+        fragmento = self.registro.fragmento()
+        fragmento.en_curso += 1
+        inicio = time.perf_counter()
+        try:
+            await self.app(scope, receive, enviar)
+        finally:
+            segundos = time.perf_counter() - inicio
+            fragmento.en_curso -= 1
+            self.registro.observar(scope["method"], plantilla_ruta(scope, raiz), estado, segundos, fragmento)
+
+def metricas_pools() -> List[Familia]:
+    """Conexiones de los pools de los engines (los StaticPool de SQLite no tienen contadores)"""
+    from .database import engine, engine_lectura
+    from .database_async import engine_async_lectura
+
+    engines = [("escritura", engine), ("lectura", engine_lectura)]
+    engine_async = engine_async_lectura()
+    if engine_async is not None:
+        engines.append(("lectura_async", engine_async.sync_engine))
+
+    tamano = Familia("reservas_db_pool_tamano", "gauge", "Conexiones fijas del pool de cada engine", [])
+    conexiones = Familia("reservas_db_pool_conexiones", "gauge", "Conexiones del pool por estado", [])
+    vistos = set()
+    for nombre, engine_pool in engines:
+        pool = engine_pool.pool
+        if id(pool) in vistos or not isinstance(pool, QueuePool):
+            continue
+        vistos.add(id(pool))
+        tamano.muestras.append(("", (("engine", nombre),), pool.size()))
+        for estado, valor in (
+            ("en_uso", pool.checkedout()),
+            ("libres", pool.checkedin()),
+            ("desbordamiento", max(pool.overflow(), 0)),
+        ):
+            conexiones.muestras.append(("", (("engine", nombre), ("estado", estado)), valor))
+    return [tamano, conexiones]
+
+def metricas_cache() -> List[Familia]:
+    """Aciertos y ocupación de CacheService"""
+    from .services.cache_service import cache_service
+
+    general = cache_service.get_stats()
+    por_prefijo = cache_service.get_stats_por_prefijo()
+    resultados = (("hit", "hits"), ("stale_hit", "stale_hits"), ("miss", "misses"))
+    return [
+        Familia("reservas_cache_consultas_total", "counter", "Lecturas del cache por resultado", [
+            ("", (("resultado", resultado),), general[campo]) for resultado, campo in resultados
+        ]),
+        Familia("reservas_cache_ratio_aciertos", "gauge", "Lecturas servidas desde el cache (vigentes u obsoletas)", [
+            ("", (), general["hit_ratio"])
+        ]),
+        Familia("reservas_cache_prefijo_consultas_total", "counter", "Lecturas del cache por prefijo y resultado", [
+            ("", (("prefijo", prefijo), ("resultado", resultado)), contadores[campo])
+            for prefijo, contadores in por_prefijo.items() for resultado, campo in resultados
+        ]),
+        Familia("reservas_cache_prefijo_ratio_aciertos", "gauge", "Ratio de aciertos del cache por prefijo", [
+            ("", (("prefijo", prefijo),), contadores["hit_ratio"]) for prefijo, contadores in por_prefijo.items()
+        ]),
+        Familia("reservas_cache_entradas", "gauge", "Entradas en el cache", [("", (), general["total_entries"])]),
+        Familia("reservas_cache_bytes", "gauge", "Tamaño estimado del cache", [
+            ("", (), general["estimated_memory_bytes"])
+        ]),
+        Familia("reservas_cache_expulsiones_total", "counter", "Entradas expulsadas por falta de espacio", [
+            ("", (), general["evictions"])
+        ]),
+        Familia("reservas_cache_recalculos_en_curso", "gauge", "Recálculos de entradas en curso", [
+            ("", (), general["in_flight"])
+        ]),
+    ]
+
+_colas: Dict[str, object] = {"contadas": None, "familias": []}
+_bloqueo_colas = threading.Lock()
+
+def metricas_colas(db: Session, intervalo: Optional[int] = None) -> List[Familia]:
+    """Notificaciones pendientes y webhooks fallidos (recuento reutilizado durante `intervalo` s)"""
+    intervalo = settings.metricas_colas_intervalo if intervalo is None else intervalo
+    with _bloqueo_colas:
+        contadas = _colas["contadas"]
+        if contadas is not None and time.monotonic() - contadas < intervalo:
+            return _colas["familias"]
+        try:
+            familias = _contar_colas(db)
+        except SQLAlchemyError as e:
+            # Sin esta parte el resto de métricas sigue disponible
+            logger.warning("No se pudieron contar las colas: %s", e)
+            familias = []
+        _colas.update(contadas=time.monotonic(), familias=familias)
+        return familias
+
+def _contar_colas(db: Session) -> List[Familia]:
+    from .models.integracion import Notificacion, WebhookLog
+
+    reintentable = Notificacion.intentos < Notificacion.max_intentos
+    pendientes = dict(
+        db.query(reintentable, func.count(Notificacion.id))
+        .filter(Notificacion.enviada == False)
+        .group_by(reintentable)
+        .all()
+    )
+    desde = datetime.now() - timedelta(seconds=settings.metricas_ventana_webhooks)
+    webhooks_fallidos = db.query(func.count(WebhookLog.id)).filter(
+        and_(WebhookLog.exitoso == False, WebhookLog.created_at >= desde)
+    ).scalar()
+    return [
+        Familia("reservas_notificaciones_pendientes", "gauge", "Notificaciones sin enviar", [
+            ("", (("estado", "reintentable"),), pendientes.get(True, 0)),
+            ("", (("estado", "agotada"),), pendientes.get(False, 0)),
+        ]),
+        Familia(
+            "reservas_webhooks_entregas_fallidas", "gauge",
+            f"Entregas de webhooks fallidas en los últimos {settings.metricas_ventana_webhooks} segundos",
+            [("", (), webhooks_fallidos)]
+        ),
+    ]
+
+def exponer(db: Optional[Session] = None, registro: Optional[RegistroMetricas] = None) -> str:
+    """Todas las métricas en el formato de texto de Prometheus"""
+    familias = (registro or metricas_http).familias() + metricas_pools() + metricas_cache()
+    if db is not None:
+        familias += metricas_colas(db)
+    return formatear(familias)
+
+def formatear(familias: Iterable[Familia]) -> str:
+    lineas = []
+    for familia in familias:
+        lineas.append(f"# HELP {familia.nombre} {familia.ayuda}")
+        lineas.append(f"# TYPE {familia.nombre} {familia.tipo}")
+        for sufijo, etiquetas, valor in familia.muestras:
+            if etiquetas:
+                texto = ",".join(f'{clave}="{_escapar(valor_etiqueta)}"' for clave, valor_etiqueta in etiquetas)
+                lineas.append(f"{familia.nombre}{sufijo}{{{texto}}} {_numero(valor)}")
+            else:
+                lineas.append(f"{familia.nombre}{sufijo} {_numero(valor)}")
+    return "\n".join(lineas) + "\n"
+
+def _escapar(valor: str) -> str:
+    return valor.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+def _numero(valor: float) -> str:
+    if valor == float("inf"):
+        return "+Inf"
+    if isinstance(valor, float) and not valor.is_integer():
+        return repr(valor)
+    return str(int(valor))
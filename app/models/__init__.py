@@ -2,11 +2,13 @@ from .cliente import Cliente
 from .servicio import Servicio
 from .recurso import Recurso
 from .reserva import Reserva
+from .reserva_archivo import ReservaArchivada, ReservaHistorica
 from .precio import Precio, TipoPrecio, Moneda
 from .usuario import Usuario
 from .horario import HorarioRecurso
 from .precio_dinamico import ReglaPrecio, HistorialPrecio, ConfiguracionPrecio
 from .pago import Pago, Factura, Reembolso, EstadoPago, MetodoPago
+from .prediccion import PrediccionDemanda
 from .integracion import (
     Integracion, Notificacion, SincronizacionGoogleCalendar, 
     Webhook, WebhookLog, TipoIntegracion, EstadoIntegracion, 
@@ -18,6 +20,8 @@ __all__ = [
     "Servicio", 
     "Recurso",
     "Reserva",
+    "ReservaArchivada",
+    "ReservaHistorica",
     "Precio",
     "TipoPrecio",
     "Moneda",
@@ -38,5 +42,6 @@ __all__ = [
     "WebhookLog",
     "TipoIntegracion",
     "EstadoIntegracion",
-    "TipoNotificacion"
+    "TipoNotificacion",
+    "PrediccionDemanda"
 ]
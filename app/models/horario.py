@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Time, Boolean, ForeignKey, CheckConstraint
+from sqlalchemy import Column, Integer, String, Time, Boolean, ForeignKey, CheckConstraint, Index
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from ..db_sqlite_clean import Base
@@ -27,12 +27,14 @@ class HorarioRecurso(Base):
     created_at = Column(String, default=lambda: func.now().strftime("%H:%M:%S"))
     updated_at = Column(String, onupdate=lambda: func.now().strftime("%H:%M:%S"))
     
-    # Check constraints
+    # Check constraints e índices
     __table_args__ = (
         CheckConstraint(dia_semana >= 0, name='check_dia_semana_min'),
         CheckConstraint(dia_semana <= 6, name='check_dia_semana_max'),
         CheckConstraint(duracion_slot_minutos > 0, name='check_duracion_slot'),
         CheckConstraint(pausa_entre_slots >= 0, name='check_pausa_slots'),
+        # Horario de un recurso para un día concreto
+        Index('ix_horarios_recursos_recurso_dia', 'recurso_id', 'dia_semana'),
     )
     
     # Relationships
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, DateTime, Boolean, ForeignKey, Text, Enum, JSON, Float
+from sqlalchemy import Column, Integer, String, DateTime, Boolean, ForeignKey, Text, Enum, JSON, Float, Index
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from ..db_sqlite_clean import Base
@@ -91,6 +91,12 @@ class Notificacion(Base):
     created_at = Column(DateTime, default=func.now())
     updated_at = Column(DateTime, onupdate=func.now())
     
+    # Índices
+    __table_args__ = (
+        # Cola de notificaciones pendientes de envío
+        Index('ix_notificaciones_enviada_intentos', 'enviada', 'intentos'),
+    )
+    
     # Relaciones
     integracion = relationship("Integracion", back_populates="notificaciones")
     reserva = relationship("Reserva", back_populates="notificaciones")
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Float, DateTime, Boolean, ForeignKey, Text, Enum
+from sqlalchemy import Column, Integer, String, Float, DateTime, Boolean, ForeignKey, Text, Enum, Index
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from ..db_sqlite_clean import Base
@@ -46,10 +46,16 @@ class Pago(Base):
     metadatos_pago = Column(Text, nullable=True)  # JSON string para datos adicionales
     
     # Timestamps
-    fecha_creacion = Column(DateTime, default=func.now())
+    fecha_creacion = Column(DateTime, nullable=False, default=func.now(), server_default=func.now())  # clave del cursor
     fecha_actualizacion = Column(DateTime, onupdate=func.now())
     fecha_pago = Column(DateTime, nullable=True)
     
+    # Índices
+    __table_args__ = (
+        # Paginación por cursor sobre (fecha_creacion, id)
+        Index('ix_pagos_fecha_creacion_id', 'fecha_creacion', 'id'),
+    )
+    
     # Relaciones SQLAlchemy
     reserva = relationship("Reserva", back_populates="pagos")
     cliente = relationship("Cliente", back_populates="pagos")
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Float, ForeignKey, DateTime, Boolean, Text, Enum
+from sqlalchemy import Column, Integer, String, Float, ForeignKey, DateTime, Boolean, Text, Enum, Index
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from ..db_sqlite_clean import Base
@@ -43,7 +43,7 @@ class Precio(Base):
     
     # Configuración del precio
     activo = Column(Boolean, default=True)
-    prioridad = Column(Integer, default=0)  # Prioridad para aplicar precios
+    prioridad = Column(Integer, nullable=False, default=0, server_default="0")  # Prioridad para aplicar precios (clave del cursor)
     
     # Fechas de validez
     fecha_inicio = Column(DateTime, nullable=True)
@@ -63,6 +63,14 @@ class Precio(Base):
     created_at = Column(DateTime, default=func.now())
     updated_at = Column(DateTime, onupdate=func.now())
     
+    # Índices
+    __table_args__ = (
+        # Paginación por cursor sobre (prioridad, id)
+        Index('ix_precios_prioridad_id', 'prioridad', 'id'),
+        # Búsqueda de precios activos por servicio y tipo (p.ej. precio base)
+        Index('ix_precios_servicio_activo_tipo', 'servicio_id', 'activo', 'tipo_precio'),
+    )
+    
     # Relationships
     servicio = relationship("Servicio", back_populates="precios")
     recurso = relationship("Recurso", back_populates="precios")
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Float, Boolean, DateTime, ForeignKey, Text, Enum as SQLEnum
+from sqlalchemy import Column, Integer, String, Float, Boolean, DateTime, ForeignKey, Text, Index, Enum as SQLEnum
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from enum import Enum
@@ -54,6 +54,12 @@ class ReglaPrecio(Base):
     created_at = Column(DateTime, default=func.now())
     updated_at = Column(DateTime, onupdate=func.now())
     
+    # Índices
+    __table_args__ = (
+        # Reglas activas ordenadas por prioridad
+        Index('ix_reglas_precios_activa_prioridad', 'activa', 'prioridad'),
+    )
+    
     def __repr__(self):
         return f"<ReglaPrecio(nombre={self.nombre}, tipo={self.tipo_regla}, modificador={self.valor_modificador})>"
 
@@ -0,0 +1,22 @@
+from sqlalchemy import Column, Integer, String, Float, Date, DateTime, ForeignKey, UniqueConstraint
+from sqlalchemy.sql import func
+from ..db_sqlite_clean import Base
+
+class PrediccionDemanda(Base):
+    """Predicción diaria de reservas por servicio y algoritmo (generada por el lote nocturno)"""
+    __tablename__ = "predicciones_demanda"
+    
+    id = Column(Integer, primary_key=True, index=True)
+    servicio_id = Column(Integer, ForeignKey("servicios.id"), nullable=False)
+    algoritmo = Column(String(20), nullable=False)  # arima, estacional, ml
+    fecha = Column(Date, nullable=False)
+    prediccion = Column(Float, nullable=False)
+    generada_at = Column(DateTime, default=func.now())
+    
+    # Una predicción por servicio, algoritmo y día; su índice sirve las consultas de la API
+    __table_args__ = (
+        UniqueConstraint('servicio_id', 'algoritmo', 'fecha', name='uq_predicciones_servicio_algoritmo_fecha'),
+    )
+    
+    def __repr__(self):
+        return f"<PrediccionDemanda(servicio_id={self.servicio_id}, algoritmo={self.algoritmo}, fecha={self.fecha}, prediccion={self.prediccion})>"
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, CheckConstraint
+from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, CheckConstraint, Index, text
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from ..db_sqlite_clean import Base
@@ -16,9 +16,25 @@ class Reserva(Base):
     created_at = Column(DateTime, default=func.now())
     updated_at = Column(DateTime, onupdate=func.now())
     
-    # Check constraint for estado values
+    # Check constraint for estado values and indexes
     __table_args__ = (
         CheckConstraint(estado.in_(['pendiente', 'confirmada', 'cancelada']), name='check_estado'),
+        # Keyset pagination on (fecha_hora_inicio, id)
+        Index('ix_reservas_inicio_id', 'fecha_hora_inicio', 'id'),
+        # Overlap checks: recurso_id + estado + time range
+        Index('ix_reservas_recurso_estado_inicio_fin', 'recurso_id', 'estado', 'fecha_hora_inicio', 'fecha_hora_fin'),
+        # Partial index over active bookings only (used by PostgreSQL, where
+        # the cancelled-state filter reaches the planner as a literal)
+        Index(
+            'ix_reservas_activas_recurso_inicio_fin', 'recurso_id', 'fecha_hora_inicio', 'fecha_hora_fin',
+            sqlite_where=text("estado != 'cancelada'"),
+            postgresql_where=text("estado <> 'cancelada'")
+        ),
+        # Analytics: servicio_id + date range
+        Index('ix_reservas_servicio_inicio', 'servicio_id', 'fecha_hora_inicio'),
+        # AUTOINCREMENT in SQLite: ids of archived bookings (moved to
+        # reservas_archivadas) are never handed out again
+        {'sqlite_autoincrement': True},
     )
     
     # Relationships
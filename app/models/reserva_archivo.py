@@ -0,0 +1,89 @@
+from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Index, MetaData, Table, DDL, event, inspect
+from sqlalchemy.sql import func
+from ..db_sqlite_clean import Base
+
+# Columnas comunes a la tabla activa y al archivo (mismo orden en ambas ramas de la vista)
+COLUMNAS_HISTORICO = [
+    "id", "cliente_id", "servicio_id", "recurso_id",
+    "fecha_hora_inicio", "fecha_hora_fin", "estado", "created_at", "updated_at"
+]
+
+NOMBRE_VISTA_HISTORICO = "reservas_historico"
+
+class ReservaArchivada(Base):
+    """Reserva histórica (finalizada o cancelada) movida fuera de la tabla activa.
+
+    Conserva el id original, de modo que la vista de histórico no tiene duplicados
+    y los identificadores siguen siendo válidos en informes y exportaciones.
+    """
+    __tablename__ = "reservas_archivadas"
+
+    id = Column(Integer, primary_key=True, autoincrement=False)
+    cliente_id = Column(Integer, ForeignKey("clientes.id"), nullable=False)
+    servicio_id = Column(Integer, ForeignKey("servicios.id"), nullable=False)
+    recurso_id = Column(Integer, ForeignKey("recursos.id"), nullable=False)
+    fecha_hora_inicio = Column(DateTime, nullable=False)
+    fecha_hora_fin = Column(DateTime, nullable=False)
+    estado = Column(String, nullable=False)
+    created_at = Column(DateTime)
+    updated_at = Column(DateTime)
+    archivada_at = Column(DateTime, default=func.now())
+
+    # Índices para las consultas analíticas por rango de fechas
+    __table_args__ = (
+        Index('ix_reservas_archivadas_inicio', 'fecha_hora_inicio'),
+        Index('ix_reservas_archivadas_servicio_inicio', 'servicio_id', 'fecha_hora_inicio'),
+        Index('ix_reservas_archivadas_recurso_inicio', 'recurso_id', 'fecha_hora_inicio'),
+    )
+
+    def __repr__(self):
+        return f"<ReservaArchivada(id={self.id}, estado={self.estado}, inicio={self.fecha_hora_inicio})>"
+
+# ===== VISTA DE HISTÓRICO (reservas activas + archivadas) =====
+
+_columnas_vista = ", ".join(COLUMNAS_HISTORICO)
+SQL_CREAR_VISTA_HISTORICO = (
+    f"CREATE VIEW {NOMBRE_VISTA_HISTORICO} AS "
+    f"SELECT {_columnas_vista} FROM reservas "
+    f"UNION ALL "
+    f"SELECT {_columnas_vista} FROM reservas_archivadas"
+)
+SQL_ELIMINAR_VISTA_HISTORICO = f"DROP VIEW IF EXISTS {NOMBRE_VISTA_HISTORICO}"
+
+def _vista_no_existe(ddl, target, bind, **kw):
+    return NOMBRE_VISTA_HISTORICO not in inspect(bind).get_view_names()
+
+# create_all/drop_all gestionan también la vista
+event.listen(
+    Base.metadata, "after_create",
+    DDL(SQL_CREAR_VISTA_HISTORICO).execute_if(callable_=_vista_no_existe)
+)
+event.listen(Base.metadata, "before_drop", DDL(SQL_ELIMINAR_VISTA_HISTORICO))
+
+# La vista se declara en un MetaData propio para que create_all no la cree como tabla
+_metadata_vistas = MetaData()
+
+reservas_historico = Table(
+    NOMBRE_VISTA_HISTORICO,
+    _metadata_vistas,
+    Column("id", Integer, primary_key=True),
+    Column("cliente_id", Integer),
+    Column("servicio_id", Integer),
+    Column("recurso_id", Integer),
+    Column("fecha_hora_inicio", DateTime),
+    Column("fecha_hora_fin", DateTime),
+    Column("estado", String),
+    Column("created_at", DateTime),
+    Column("updated_at", DateTime),
+)
+
+class ReservaHistorica(Base):
+    """Vista de solo lectura sobre todas las reservas (activas y archivadas).
+
+    Las consultas analíticas usan este modelo para ver el histórico completo
+    sin saber qué reservas se han archivado.
+    """
+    __table__ = reservas_historico
+
+    def __repr__(self):
+        return f"<ReservaHistorica(id={self.id}, estado={self.estado}, inicio={self.fecha_hora_inicio})>"
@@ -0,0 +1,72 @@
+from sqlalchemy import tuple_, literal
+from sqlalchemy.orm import Query
+from fastapi import HTTPException
+from datetime import datetime
+from typing import Any, List, Optional, Sequence, Tuple
+import base64
+import json
+
+# Cabecera HTTP con el token de la página siguiente
+CABECERA_SIGUIENTE_CURSOR = "X-Next-Cursor"
+
+def codificar_cursor(valores: Sequence[Any]) -> str:
+    """Codificar los valores de la clave de la última fila en un token opaco"""
+    serializables = []
+    for valor in valores:
+        if isinstance(valor, datetime):
+            serializables.append({"dt": valor.isoformat()})
+        else:
+            serializables.append(valor)
+    contenido = json.dumps(serializables, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(contenido).decode().rstrip("=")
+
+def decodificar_cursor(cursor: str, num_columnas: int) -> List[Any]:
+    """Decodificar un token de cursor; lanza 400 si está mal formado"""
+    try:
+        relleno = "=" * (-len(cursor) % 4)
+        valores = json.loads(base64.urlsafe_b64decode(cursor + relleno))
+        if not isinstance(valores, list) or len(valores) != num_columnas:
+            raise ValueError("número de columnas incorrecto")
+        return [
+            datetime.fromisoformat(valor["dt"]) if isinstance(valor, dict) else valor
+            for valor in valores
+        ]
+    except (ValueError, TypeError, KeyError):
+        raise HTTPException(status_code=400, detail="Cursor de paginación inválido")
+
+def paginar_keyset(
+    query: Query,
+    columnas: Sequence,
+    limit: int,
+    cursor: Optional[str] = None,
+    descendente: bool = False
+) -> Tuple[List[Any], Optional[str]]:
+    """Paginar por clave (keyset) en lugar de offset.
+
+    `columnas` es la clave de ordenación única, p.ej. (fecha_hora_inicio, id);
+    debe existir un índice compuesto con esas columnas para que cualquier página
+    cueste lo mismo que la primera. Devuelve (filas, siguiente_cursor).
+
+    Las columnas de la clave deben ser NOT NULL: la comparación con el cursor
+    es NULL para una clave nula y esas filas no aparecerían en ninguna página.
+    """
+    for columna in columnas:
+        if getattr(columna.expression, "nullable", False):
+            raise ValueError(f"La clave del cursor no admite nulos: {columna} debe ser NOT NULL")
+
+    if cursor:
+        valores = decodificar_cursor(cursor, len(columnas))
+        clave = tuple_(*columnas)
+        referencia = tuple_(*[literal(valor, columna.type) for valor, columna in zip(valores, columnas)])
+        query = query.filter(clave < referencia if descendente else clave > referencia)
+
+    orden = [columna.desc() if descendente else columna.asc() for columna in columnas]
+    filas = query.order_by(*orden).limit(limit + 1).all()
+
+    siguiente_cursor = None
+    if len(filas) > limit:
+        filas = filas[:limit]
+        ultima = filas[-1]
+        siguiente_cursor = codificar_cursor([getattr(ultima, columna.key) for columna in columnas])
+
+    return filas, siguiente_cursor
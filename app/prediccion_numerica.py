@@ -0,0 +1,377 @@
+"""Núcleo numérico de las predicciones de demanda.
+
+Funciones vectorizadas con NumPy que comparten los tres algoritmos de
+PrediccionService: serie diaria densa (días sin reservas = 0), medias móviles
+con suma acumulada, ajuste polinómico por mínimos cuadrados y agregación por
+día de la semana y mes. EstadoPrediccion mantiene esos mismos ajustes de
+forma incremental.
+"""
+from contextlib import contextmanager
+from dataclasses import dataclass
+from datetime import date, timedelta
+from typing import Iterable, Tuple, Any, Dict, Optional
+import threading
+import numpy as np
+
+# Ventanas (en días) de los ajustes de cada algoritmo
+VENTANA_ARIMA = 120
+VENTANA_MEDIA_MOVIL = 7
+VENTANA_FACTORES_SEMANA = 90
+VENTANA_ML = 180
+
+@dataclass(frozen=True)
+class SerieDiaria:
+    """Reservas por día en [inicio, inicio + len(valores))"""
+    inicio: date
+    valores: np.ndarray
+
+    def __len__(self) -> int:
+        return len(self.valores)
+
+    @property
+    def dias_con_reservas(self) -> int:
+        return int(np.count_nonzero(self.valores))
+
+    @property
+    def dias_semana(self) -> np.ndarray:
+        """Día de la semana de cada posición (0 = lunes), como date.weekday()"""
+        return (np.arange(len(self.valores)) + self.inicio.weekday()) % 7
+
+    @property
+    def meses(self) -> np.ndarray:
+        """Mes (1-12) de cada posición"""
+        fechas = np.datetime64(self.inicio, "D") + np.arange(len(self.valores))
+        return fechas.astype("datetime64[M]").astype(int) % 12 + 1
+
+    def ultimos(self, dias: int) -> "SerieDiaria":
+        """Subserie con los últimos `dias` días"""
+        dias = min(dias, len(self.valores))
+        return SerieDiaria(
+            inicio=self.inicio + timedelta(days=len(self.valores) - dias),
+            valores=self.valores[len(self.valores) - dias:]
+        )
+
+def serie_diaria_densa(filas: Iterable[Tuple[Any, int]], inicio: date, fin: date) -> SerieDiaria:
+    """Construir la serie diaria densa de [inicio, fin] a partir de filas (fecha, total).
+
+    `fecha` puede ser un date o una cadena 'YYYY-MM-DD' (func.date en SQLite);
+    los días sin filas quedan a cero y las fechas fuera del rango se descartan.
+    """
+    dias = (fin - inicio).days + 1
+    valores = np.zeros(max(dias, 0), dtype=np.float64)
+    filas = list(filas)
+    if not filas or dias <= 0:
+        return SerieDiaria(inicio=inicio, valores=valores)
+
+    fechas = np.array([str(fecha)[:10] for fecha, _ in filas], dtype="datetime64[D]")
+    totales = np.array([total for _, total in filas], dtype=np.float64)
+    posiciones = (fechas - np.datetime64(inicio, "D")).astype(int)
+    en_rango = (posiciones >= 0) & (posiciones < dias)
+    np.add.at(valores, posiciones[en_rango], totales[en_rango])
+    return SerieDiaria(inicio=inicio, valores=valores)
+
+def medias_moviles(valores: np.ndarray, ventana: int) -> np.ndarray:
+    """Media de cada ventana de `ventana` días anterior a cada posición.
+
+    El elemento k es la media de valores[k:k + ventana], es decir, la media de
+    los `ventana` días previos al día k + ventana (O(n) con suma acumulada).
+    """
+    if len(valores) <= ventana:
+        return np.empty(0, dtype=np.float64)
+    acumulada = np.concatenate(([0.0], np.cumsum(valores, dtype=np.float64)))
+    return (acumulada[ventana:len(valores)] - acumulada[:len(valores) - ventana]) / ventana
+
+def ajuste_polinomico(y: np.ndarray, grado: int) -> np.ndarray:
+    """Coeficientes (de mayor a menor grado) del polinomio que ajusta y(x), x = 0..n-1.
+
+    Resuelve el problema de mínimos cuadrados con `np.linalg.lstsq` (SVD), que
+    es estable aunque la matriz de Vandermonde esté mal condicionada.
+    """
+    y = np.asarray(y, dtype=np.float64)
+    x = np.arange(len(y), dtype=np.float64)
+    coeficientes, _, _, _ = np.linalg.lstsq(np.vander(x, grado + 1), y, rcond=None)
+    return coeficientes
+
+def evaluar_polinomio(coeficientes: np.ndarray, x: np.ndarray) -> np.ndarray:
+    """Evaluar el polinomio en los puntos x"""
+    return np.polyval(coeficientes, np.asarray(x, dtype=np.float64))
+
+def metricas_ajuste(y: np.ndarray, y_pred: np.ndarray) -> Tuple[float, float, float]:
+    """(mse, rmse, r2) del ajuste"""
+    residuos = y - y_pred
+    mse = float(np.mean(residuos ** 2))
+    ss_tot = float(np.sum((y - np.mean(y)) ** 2))
+    r2 = 1 - float(np.sum(residuos ** 2)) / ss_tot if ss_tot > 0 else 0.0
+    return mse, float(np.sqrt(mse)), r2
+
+def factores_dia_semana(serie: SerieDiaria) -> np.ndarray:
+    """Factor de cada día de la semana: (reservas del día / total) / (1/7)"""
+    por_dia = np.bincount(serie.dias_semana, weights=serie.valores, minlength=7)
+    total = por_dia.sum()
+    if total == 0:
+        return np.ones(7)
+    return por_dia / total * 7
+
+def matriz_mes_dia_semana(serie: SerieDiaria) -> np.ndarray:
+    """Reservas acumuladas por mes (filas 0-11) y día de la semana (columnas 0-6)"""
+    matriz = np.zeros((12, 7), dtype=np.float64)
+    np.add.at(matriz, (serie.meses - 1, serie.dias_semana), serie.valores)
+    return matriz
+
+def factores_mes_dia_semana(matriz: np.ndarray) -> np.ndarray:
+    """Factor de cada celda respecto a la media de su mes (1 si el mes no tiene reservas)"""
+    promedios_mes = matriz.mean(axis=1, keepdims=True)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        factores = np.where(promedios_mes > 0, matriz / promedios_mes, 1.0)
+    return factores
+
+class EstadoPrediccion:
+    """Estado incremental de los modelos de predicción de un servicio.
+
+    Guarda las reservas diarias de la ventana histórica (hasta ayer) en un
+    buffer circular, las reservas de hoy en adelante por fecha y, por cada
+    ventana de ajuste, las sumas que necesitan los modelos: momentos de las
+    dos regresiones, sumas de cuadrados, días con reservas y contadores por
+    día de la semana y mes.
+
+    `registrar` aplica una reserva nueva (+1) o retirada (-1) en O(1).
+    `avanzar` desplaza las ventanas al cambiar de día: las reservas futuras de
+    los días que entran pasan al buffer y las sumas se recalculan desde él (un
+    recorrido vectorizado al día, que además descarta el error de redondeo
+    acumulado), sin volver a consultar la base de datos.
+
+    Cada estado tiene su propio lock: las mutaciones y lecturas de un servicio
+    no esperan a las de los demás. `bloqueado()` agrupa varias lecturas en una
+    instantánea coherente.
+    """
+
+    def __init__(self, serie: SerieDiaria, futuras: Optional[Dict[date, float]] = None):
+        self._dias = len(serie)
+        self.hoy = serie.inicio + timedelta(days=self._dias)
+        self._buffer = np.array(serie.valores, dtype=np.float64)
+        self._origen = 0  # posición del buffer del día más antiguo
+        self.futuras: Dict[date, float] = dict(futuras or {})
+        self._lock = threading.RLock()
+        self._preparar_pesos()
+        self._recalcular()
+
+    def __getstate__(self):
+        estado = self.__dict__.copy()
+        estado.pop("_lock")
+        return estado
+
+    def __setstate__(self, estado):
+        self.__dict__.update(estado)
+        self._lock = threading.RLock()
+
+    @property
+    def inicio(self) -> date:
+        return self.hoy - timedelta(days=self._dias)
+
+    @property
+    def serie(self) -> SerieDiaria:
+        """Serie diaria de la ventana histórica completa"""
+        with self._lock:
+            return SerieDiaria(inicio=self.inicio, valores=np.roll(self._buffer, -self._origen))
+
+    def _preparar_pesos(self):
+        """Pesos de cada posición de ventana en las sumas de los modelos (fijos por tamaño)"""
+        # ARIMA: suma, suma de medias móviles, suma de x·media y último promedio
+        self._n_arima = min(VENTANA_ARIMA, self._dias)
+        self._num_medias = max(self._n_arima - VENTANA_MEDIA_MOVIL, 0)
+        j = np.arange(self._n_arima)
+        # Medias móviles k (0..num_medias-1) que incluyen la posición j
+        k_min = np.maximum(0, j - VENTANA_MEDIA_MOVIL + 1)
+        k_max = np.minimum(j, self._num_medias - 1)
+        medias = np.maximum(k_max - k_min + 1, 0)
+        ultimo = np.zeros(self._n_arima)
+        if self._num_medias:
+            ultimo[self._num_medias - 1:self._num_medias - 1 + VENTANA_MEDIA_MOVIL] = 1 / VENTANA_MEDIA_MOVIL
+        self._pesos_arima = np.vstack([
+            np.ones(self._n_arima),
+            medias / VENTANA_MEDIA_MOVIL,
+            medias * (k_min + k_max) / 2 / VENTANA_MEDIA_MOVIL,
+            ultimo
+        ])
+
+        # ML: momentos t², t, 1 con t = x / (n - 1) en [0, 1] para que el sistema
+        # normal 3x3 esté bien condicionado
+        self._n_ml = min(VENTANA_ML, self._dias)
+        self._escala_ml = max(self._n_ml - 1, 1)
+        t = np.arange(self._n_ml) / self._escala_ml
+        self._pesos_ml = np.vstack([t ** 2, t, np.ones(self._n_ml)])
+        self._normal_ml = self._pesos_ml @ self._pesos_ml.T
+
+        self._n_factores = min(VENTANA_FACTORES_SEMANA, self._dias)
+
+    def _recalcular(self):
+        """Recalcular todas las sumas desde el buffer"""
+        serie = self.serie
+        valores = serie.valores
+        arima = valores[self._dias - self._n_arima:]
+        ml = valores[self._dias - self._n_ml:]
+
+        self._sumas_arima = self._pesos_arima @ arima
+        self._cuadrados_arima = float(arima @ arima)
+        self._no_nulos_arima = int(np.count_nonzero(arima))
+
+        self._sumas_ml = self._pesos_ml @ ml
+        self._cuadrados_ml = float(ml @ ml)
+        self._no_nulos_ml = int(np.count_nonzero(ml))
+
+        self._por_dia_semana = np.bincount(
+            serie.dias_semana[self._dias - self._n_factores:],
+            weights=valores[self._dias - self._n_factores:], minlength=7
+        ).astype(np.float64)
+        self._matriz = matriz_mes_dia_semana(serie)
+
+    def avanzar(self, hoy: date):
+        """Desplazar las ventanas hasta `hoy` (sin efecto si ya está al día)"""
+        with self._lock:
+            dias_pasados = (hoy - self.hoy).days
+            if dias_pasados <= 0:
+                return
+            if dias_pasados >= self._dias:
+                inicio = hoy - timedelta(days=self._dias)
+                self._buffer = np.array(
+                    [self.futuras.pop(inicio + timedelta(days=i), 0.0) for i in range(self._dias)],
+                    dtype=np.float64
+                )
+                self._origen = 0
+            else:
+                for i in range(dias_pasados):
+                    # El día más antiguo sale y su posición pasa a ser el día que entra
+                    self._buffer[self._origen] = self.futuras.pop(self.hoy + timedelta(days=i), 0.0)
+                    self._origen = (self._origen + 1) % self._dias
+            self.futuras = {fecha: total for fecha, total in self.futuras.items() if fecha >= hoy}
+            self.hoy = hoy
+            self._recalcular()
+
+    def registrar(self, fecha: date, delta: float = 1.0):
+        """Sumar `delta` reservas al día `fecha` actualizando las sumas en O(1)"""
+        with self._lock:
+            if fecha >= self.hoy:
+                total = self.futuras.get(fecha, 0.0) + delta
+                if total:
+                    self.futuras[fecha] = total
+                else:
+                    self.futuras.pop(fecha, None)
+                return
+
+            posicion = (fecha - self.inicio).days
+            if posicion < 0:
+                return  # fuera de la ventana histórica
+
+            indice = (self._origen + posicion) % self._dias
+            anterior = self._buffer[indice]
+            nuevo = anterior + delta
+            self._buffer[indice] = nuevo
+            cambio_cuadrado = nuevo * nuevo - anterior * anterior
+            cambio_no_nulos = int(nuevo != 0) - int(anterior != 0)
+
+            j = posicion - (self._dias - self._n_arima)
+            if j >= 0:
+                self._sumas_arima += delta * self._pesos_arima[:, j]
+                self._cuadrados_arima += cambio_cuadrado
+                self._no_nulos_arima += cambio_no_nulos
+
+            j = posicion - (self._dias - self._n_ml)
+            if j >= 0:
+                self._sumas_ml += delta * self._pesos_ml[:, j]
+                self._cuadrados_ml += cambio_cuadrado
+                self._no_nulos_ml += cambio_no_nulos
+
+            if posicion >= self._dias - self._n_factores:
+                self._por_dia_semana[fecha.weekday()] += delta
+            self._matriz[fecha.month - 1, fecha.weekday()] += delta
+
+    # ===== LECTURA DE LOS AJUSTES =====
+
+    @contextmanager
+    def bloqueado(self):
+        """Leer varios ajustes sin que una mutación se intercale entre ellos"""
+        with self._lock:
+            yield self
+
+    def dias_con_reservas_arima(self) -> int:
+        return self._no_nulos_arima
+
+    def dias_con_reservas_ml(self) -> int:
+        return self._no_nulos_ml
+
+    def ajuste_arima(self) -> Dict[str, float]:
+        """Media, desviación y tendencia lineal de las medias móviles de la ventana ARIMA"""
+        with self._lock:
+            n = self._n_arima
+            suma, suma_medias, suma_x_medias, ultimo = (float(v) for v in self._sumas_arima)
+            media = suma / n
+            varianza = (self._cuadrados_arima - suma * suma / n) / (n - 1) if n > 1 else 0.0
+
+            k = self._num_medias
+            if k > 1:
+                suma_x = k * (k - 1) / 2
+                suma_x2 = (k - 1) * k * (2 * k - 1) / 6
+                pendiente = (k * suma_x_medias - suma_x * suma_medias) / (k * suma_x2 - suma_x * suma_x)
+                intercepto = (suma_medias - pendiente * suma_x) / k
+            else:
+                pendiente, intercepto = 0.0, media
+
+            return {
+                "dias": n,
+                "total": suma,
+                "media": media,
+                "desviacion": float(np.sqrt(max(varianza, 0.0))),
+                "pendiente": pendiente,
+                "intercepto": intercepto,
+                "ultimo_promedio": ultimo if k else media
+            }
+
+    def factores_dia_semana(self) -> np.ndarray:
+        """Igual que factores_dia_semana() sobre los últimos 90 días"""
+        with self._lock:
+            total = self._por_dia_semana.sum()
+            if total == 0:
+                return np.ones(7)
+            return self._por_dia_semana / total * 7
+
+    def matriz_mes_dia_semana(self) -> np.ndarray:
+        with self._lock:
+            return self._matriz.copy()
+
+    def ajuste_cuadratico(self) -> Dict[str, Any]:
+        """Regresión cuadrática de la ventana ML resolviendo el sistema normal 3x3"""
+        with self._lock:
+            n = self._n_ml
+            sumas = self._sumas_ml.copy()
+            cuadrados = self._cuadrados_ml
+
+        theta = np.linalg.lstsq(self._normal_ml, sumas, rcond=None)[0]
+        escala = self._escala_ml
+        coeficientes = (float(theta[0]) / escala ** 2, float(theta[1]) / escala, float(theta[2]))
+
+        suma = float(sumas[2])
+        # En la solución de mínimos cuadrados, SSE = Σy² - θ·(Tᵀy)
+        sse = max(cuadrados - float(theta @ sumas), 0.0)
+        ss_tot = cuadrados - suma * suma / n
+        mse = sse / n
+        r2 = 1 - sse / ss_tot if ss_tot > 1e-9 else 0.0
+        return {
+            "dias": n,
+            "total": suma,
+            "media": suma / n,
+            "coeficientes": coeficientes,
+            "metricas": (mse, float(np.sqrt(mse)), r2)
+        }
+
+def estado_desde_filas(filas: Iterable[Tuple[Any, int]], hoy: date, dias_historico: int) -> EstadoPrediccion:
+    """Estado incremental a partir de filas (fecha, total) desde hoy - dias_historico en adelante"""
+    historico = []
+    futuras: Dict[date, float] = {}
+    for fecha, total in filas:
+        fecha = date.fromisoformat(str(fecha)[:10])
+        if fecha >= hoy:
+            futuras[fecha] = futuras.get(fecha, 0.0) + float(total)
+        else:
+            historico.append((fecha, total))
+    inicio = hoy - timedelta(days=dias_historico)
+    return EstadoPrediccion(serie_diaria_densa(historico, inicio, hoy - timedelta(days=1)), futuras)
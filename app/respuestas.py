@@ -0,0 +1,63 @@
+"""Respuestas JSON rápidas para listados grandes (opt-in con `?rapido=true`).
+
+El camino normal carga objetos ORM, FastAPI los valida con el `response_model`
+de Pydantic y los codifica con `json` de la biblioteca estándar. El camino
+rápido selecciona solo las columnas del esquema de respuesta como tuplas (sin
+instanciar modelos ORM ni Pydantic), construye los diccionarios directamente y
+los serializa con orjson. El JSON resultante es el mismo: las columnas son las
+de los campos del esquema y orjson escribe fechas, enums y floats igual que
+Pydantic.
+"""
+from decimal import Decimal
+from fastapi import HTTPException
+from fastapi.responses import JSONResponse
+from pydantic import BaseModel
+from typing import Any, Dict, List, Optional, Sequence, Type
+from .paginacion import CABECERA_SIGUIENTE_CURSOR
+
+DESCRIPCION_RAPIDO = "Columnas sin ORM ni validación, serializadas con orjson (mismo JSON)"
+
+def _importar_orjson():
+    """Importar orjson bajo demanda (dependencia opcional)"""
+    try:
+        import orjson
+        return orjson
+    except ImportError:
+        raise HTTPException(
+            status_code=500,
+            detail="Las respuestas rápidas requieren 'orjson'. Instálelo con: pip install orjson"
+        )
+
+def _por_defecto(valor: Any) -> Any:
+    """Tipos que orjson no serializa por sí mismo"""
+    if isinstance(valor, BaseModel):
+        # Los valores de los campos (orjson recorre los modelos anidados): varias
+        # veces más rápido que model_dump(). Los esquemas de respuesta de la API
+        # no usan alias ni campos calculados, así que el JSON es el mismo.
+        return vars(valor)
+    if isinstance(valor, Decimal):
+        return float(valor)
+    raise TypeError(f"Tipo no serializable: {type(valor).__name__}")
+
+class ORJSONResponse(JSONResponse):
+    """JSONResponse serializada con orjson (también modelos Pydantic anidados y Decimal)"""
+
+    def render(self, content: Any) -> bytes:
+        orjson = _importar_orjson()
+        return orjson.dumps(content, default=_por_defecto, option=orjson.OPT_NON_STR_KEYS)
+
+def columnas_respuesta(modelo, esquema: Type[BaseModel]) -> List:
+    """Columnas del modelo ORM correspondientes a los campos del esquema de respuesta"""
+    return [getattr(modelo, campo) for campo in esquema.model_fields]
+
+def filas_a_dicts(filas: Sequence[Sequence[Any]], esquema: Type[BaseModel]) -> List[Dict[str, Any]]:
+    """Diccionarios de respuesta a partir de las tuplas de `columnas_respuesta`"""
+    campos = list(esquema.model_fields)
+    return [dict(zip(campos, fila)) for fila in filas]
+
+def respuesta_filas(
+    filas: Sequence[Sequence[Any]], esquema: Type[BaseModel], siguiente_cursor: Optional[str] = None
+) -> ORJSONResponse:
+    """Listado serializado con orjson, con la cabecera del cursor de la página siguiente"""
+    cabeceras = {CABECERA_SIGUIENTE_CURSOR: siguiente_cursor} if siguiente_cursor else None
+    return ORJSONResponse(filas_a_dicts(filas, esquema), headers=cabeceras)
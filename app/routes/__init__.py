@@ -1,23 +1,33 @@
-from .cliente_routes import router as cliente_router
-from .servicio_routes import router as servicio_router
-from .recurso_routes import router as recurso_router
-from .reserva_routes import router as reserva_router
-from .precio_routes import router as precio_router
-from .auth_routes import router as auth_router
-from .horario_routes import router as horario_router
-from .precio_dinamico_routes import router as precio_dinamico_router
-from .pago_routes import router as pago_router
-from .integracion_routes import router as integracion_router
+"""Routers de la API.
 
-__all__ = [
-    "cliente_router",
-    "servicio_router",
-    "recurso_router",
-    "reserva_router",
-    "precio_router",
-    "auth_router",
-    "horario_router",
-    "precio_dinamico_router",
-    "pago_router",
-    "integracion_router"
-]
+Se importan bajo demanda (`from app.routes import pago_router` carga solo
+pago_routes): un script o una prueba que usa un router no paga el arranque de
+todos los demás ni de sus dependencias.
+"""
+import importlib
+
+# nombre exportado -> módulo que define `router`
+_MODULOS = {
+    "cliente_router": ".cliente_routes",
+    "servicio_router": ".servicio_routes",
+    "recurso_router": ".recurso_routes",
+    "reserva_router": ".reserva_routes",
+    "precio_router": ".precio_routes",
+    "auth_router": ".auth_routes",
+    "horario_router": ".horario_routes",
+    "precio_dinamico_router": ".precio_dinamico_routes",
+    "pago_router": ".pago_routes",
+    "integracion_router": ".integracion_routes",
+    "prediccion_router": ".prediccion_routes",
+    "cache_router": ".cache_routes",
+    "metricas_router": ".metricas_routes",
+}
+
+def __getattr__(nombre):
+    if nombre not in _MODULOS:
+        raise AttributeError(f"module {__name__!r} has no attribute {nombre!r}")
+    router = importlib.import_module(_MODULOS[nombre], __name__).router
+    globals()[nombre] = router
+    return router
+
+__all__ = list(_MODULOS)
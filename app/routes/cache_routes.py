@@ -0,0 +1,33 @@
+from fastapi import APIRouter, Depends
+from ..services.auth_service import require_admin
+from ..services.cache_service import cache_service
+
+router = APIRouter(prefix="/cache", tags=["cache"])
+
+# Prefijo de cache de cada endpoint de lectura cacheado
+ENDPOINTS_CACHEADOS = {
+    "servicios_listado": "GET /servicios/",
+    "recursos_listado": "GET /recursos/",
+    "recursos_disponibles": "GET /recursos/disponibles",
+    "horarios_semana": "GET /horarios/semana/{recurso_id}",
+    "horarios_disponibilidad": "/horarios/disponibilidad",
+    "precios_servicio": "GET /api/precios/servicio/{servicio_id}",
+    "reservas_disponibilidad": "GET /reservas/disponibilidad",
+    "estadisticas_periodo": "ReservaService.get_estadisticas_periodo",
+}
+
+@router.get("/estadisticas")
+def obtener_estadisticas_cache(_admin = Depends(require_admin)):
+    """Estadísticas del cache y ratio de aciertos de cada endpoint cacheado"""
+    por_prefijo = cache_service.get_stats_por_prefijo()
+    vacio = {"hits": 0, "stale_hits": 0, "misses": 0, "hit_ratio": 0.0}
+    return {
+        "general": cache_service.get_stats(),
+        "por_endpoint": {
+            endpoint: por_prefijo.get(prefijo, vacio) for prefijo, endpoint in ENDPOINTS_CACHEADOS.items()
+        },
+        "otros_prefijos": {
+            prefijo: estadisticas for prefijo, estadisticas in por_prefijo.items()
+            if prefijo not in ENDPOINTS_CACHEADOS
+        }
+    }
@@ -1,7 +1,7 @@
 from fastapi import APIRouter, Depends, HTTPException
 from sqlalchemy.orm import Session
 from typing import List
-from ..db_sqlite_clean import get_db
+from ..db_sqlite_clean import get_db, get_db_lectura
 from ..services.cliente_service import ClienteService
 from ..schemas.cliente import ClienteCreate, ClienteResponse, ClienteUpdate
 from ..schemas.base import BaseResponse
@@ -9,7 +9,7 @@ from ..schemas.base import BaseResponse
 router = APIRouter(prefix="/clientes", tags=["clientes"])
 
 @router.get("/", response_model=List[ClienteResponse])
-def get_clientes(db: Session = Depends(get_db)):
+def get_clientes(db: Session = Depends(get_db_lectura)):
     """Obtener lista de todos los clientes"""
     return ClienteService.get_clientes(db)
 
@@ -1,7 +1,11 @@
-from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 from typing import List
-from ..db_sqlite_clean import get_db
+from ..db_sqlite_clean import get_db, get_db_cache, get_db_lectura
+from ..database_async import get_db_async_cache
+from ..condicional import responder_condicional
+from ..respuestas import DESCRIPCION_RAPIDO, ORJSONResponse
 from ..services.horario_service import HorarioService
 from ..schemas.horario import (
     HorarioRecursoCreate, 
@@ -15,7 +19,7 @@ from ..schemas.horario import (
 router = APIRouter(prefix="/horarios", tags=["Horarios"])
 
 @router.post("/", response_model=HorarioRecursoResponse)
-async def crear_horario(
+def crear_horario(
     horario: HorarioRecursoCreate,
     db: Session = Depends(get_db)
 ):
@@ -32,7 +36,7 @@ async def crear_horario(
     return HorarioService.create_horario(db, horario)
 
 @router.post("/bulk", response_model=List[HorarioRecursoResponse])
-async def crear_horarios_masivos(
+def crear_horarios_masivos(
     horarios_bulk: HorarioRecursoBulkCreate,
     db: Session = Depends(get_db)
 ):
@@ -48,9 +52,9 @@ async def crear_horarios_masivos(
     return horarios_creados
 
 @router.get("/recurso/{recurso_id}", response_model=List[HorarioRecursoResponse])
-async def obtener_horarios_recurso(
+def obtener_horarios_recurso(
     recurso_id: int,
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_db_lectura)
 ):
     """
     Obtener todos los horarios configurados para un recurso específico.
@@ -59,7 +63,7 @@ async def obtener_horarios_recurso(
     return HorarioService.get_horarios_recurso(db, recurso_id)
 
 @router.get("/{horario_id}", response_model=HorarioRecursoResponse)
-async def obtener_horario(
+def obtener_horario(
     horario_id: int,
     db: Session = Depends(get_db)
 ):
@@ -69,7 +73,7 @@ async def obtener_horario(
     return HorarioService.get_horario(db, horario_id)
 
 @router.put("/{horario_id}", response_model=HorarioRecursoResponse)
-async def actualizar_horario(
+def actualizar_horario(
     horario_id: int,
     horario_update: HorarioRecursoUpdate,
     db: Session = Depends(get_db)
@@ -81,7 +85,7 @@ async def actualizar_horario(
     return HorarioService.update_horario(db, horario_id, horario_update)
 
 @router.delete("/{horario_id}")
-async def eliminar_horario(
+def eliminar_horario(
     horario_id: int,
     db: Session = Depends(get_db)
 ):
@@ -94,7 +98,8 @@ async def eliminar_horario(
 @router.post("/disponibilidad", response_model=DisponibilidadResponse)
 async def obtener_disponibilidad(
     request: DisponibilidadRequest,
-    db: Session = Depends(get_db)
+    rapido: bool = Query(False, description=DESCRIPCION_RAPIDO),
+    db: AsyncSession = Depends(get_db_async_cache)
 ):
     """
     Obtener la disponibilidad de un recurso para una fecha específica.
@@ -108,14 +113,16 @@ async def obtener_disponibilidad(
     - Horarios de cada slot
     - Motivo por el que un slot no está disponible
     """
-    return HorarioService.get_disponibilidad(db, request)
+    disponibilidad = await HorarioService.get_disponibilidad_async(db, request)
+    return ORJSONResponse(disponibilidad) if rapido else disponibilidad
 
 @router.get("/disponibilidad/{recurso_id}")
 async def obtener_disponibilidad_get(
     recurso_id: int,
     fecha: str = Query(..., description="Fecha en formato YYYY-MM-DD"),
     servicio_id: int = Query(None, description="ID del servicio (opcional)"),
-    db: Session = Depends(get_db)
+    rapido: bool = Query(False, description=DESCRIPCION_RAPIDO),
+    db: AsyncSession = Depends(get_db_async_cache)
 ):
     """
     Obtener disponibilidad usando GET (más fácil para testing).
@@ -129,43 +136,18 @@ async def obtener_disponibilidad_get(
         fecha=fecha,
         servicio_id=servicio_id
     )
-    return HorarioService.get_disponibilidad(db, request)
+    disponibilidad = await HorarioService.get_disponibilidad_async(db, request)
+    return ORJSONResponse(disponibilidad) if rapido else disponibilidad
 
 @router.get("/semana/{recurso_id}")
-async def obtener_horario_semanal(
+def obtener_horario_semanal(
     recurso_id: int,
-    db: Session = Depends(get_db)
+    request: Request,
+    response: Response,
+    db: Session = Depends(get_db_cache)
 ):
     """
     Obtener el horario completo de la semana para un recurso.
-    Útil para mostrar un calendario semanal.
+    Útil para mostrar un calendario semanal. Con ETag: 304 si no ha cambiado.
     """
-    horarios = HorarioService.get_horarios_recurso(db, recurso_id)
-    
-    # Agrupar por día de la semana
-    dias_semana = ["Lunes", "Martes", "Miércoles", "Jueves", "Viernes", "Sábado", "Domingo"]
-    horarios_por_dia = {i: [] for i in range(7)}
-    
-    for horario in horarios:
-        horarios_por_dia[horario.dia_semana].append(horario)
-    
-    # Crear respuesta estructurada
-    respuesta = {
-        "recurso_id": recurso_id,
-        "horarios_semana": {}
-    }
-    
-    for dia_num, dia_nombre in enumerate(dias_semana):
-        respuesta["horarios_semana"][dia_nombre] = [
-            {
-                "id": h.id,
-                "hora_inicio": h.hora_inicio.strftime("%H:%M"),
-                "hora_fin": h.hora_fin.strftime("%H:%M"),
-                "duracion_slot_minutos": h.duracion_slot_minutos,
-                "pausa_entre_slots": h.pausa_entre_slots,
-                "disponible": h.disponible
-            }
-            for h in horarios_por_dia[dia_num]
-        ]
-    
-    return respuesta
+    return responder_condicional(request, response, HorarioService.get_horario_semanal, db, recurso_id)
@@ -3,7 +3,7 @@ from sqlalchemy.orm import Session
 from typing import List, Optional, Dict, Any
 from datetime import datetime
 
-from ..db_sqlite_clean import get_db
+from ..db_sqlite_clean import get_db, get_db_lectura
 from ..services.integracion_service import (
     IntegracionService, NotificacionService, GoogleCalendarService, 
     WebhookService, ResumenIntegracionesService
@@ -287,13 +287,13 @@ def disparar_webhooks_por_evento(evento: str, payload: Dict[str, Any], db: Sessi
 # ============================================================================
 
 @router.get("/estado/general", response_model=EstadoIntegracionesResponse)
-def obtener_estado_integraciones(db: Session = Depends(get_db)):
+def obtener_estado_integraciones(db: Session = Depends(get_db_lectura)):
     """Obtener estado general de todas las integraciones"""
     estado = ResumenIntegracionesService.obtener_estado_integraciones(db)
     return estado
 
 @router.get("/notificaciones/resumen", response_model=ResumenNotificacionesResponse)
-def obtener_resumen_notificaciones(db: Session = Depends(get_db)):
+def obtener_resumen_notificaciones(db: Session = Depends(get_db_lectura)):
     """Obtener resumen de notificaciones"""
     resumen = ResumenIntegracionesService.obtener_resumen_notificaciones(db)
     return resumen
@@ -303,8 +303,8 @@ def obtener_resumen_notificaciones(db: Session = Depends(get_db)):
 # ============================================================================
 
 @router.post("/webhook/externo")
-async def webhook_externo(request: Request, db: Session = Depends(get_db)):
-    """Endpoint para recibir webhooks externos"""
+async def webhook_externo(request: Request):
+    """Endpoint para recibir webhooks externos (no usa la base de datos: no reserva una conexión)"""
     try:
         # Obtener el cuerpo del webhook
         body = await request.json()
@@ -0,0 +1,22 @@
+from fastapi import APIRouter, Depends, Header, HTTPException
+from fastapi.responses import Response
+from sqlalchemy.orm import Session
+from typing import Optional
+import hmac
+from ..config import settings
+from ..db_sqlite_clean import get_db_lectura
+from ..metricas import TIPO_CONTENIDO, exponer
+
+router = APIRouter()
+
+@router.get("/metrics", include_in_schema=False)
+def obtener_metricas(
+    db: Session = Depends(get_db_lectura),
+    authorization: Optional[str] = Header(None)
+):
+    """Métricas del worker en formato de texto de Prometheus"""
+    if settings.metricas_token and not hmac.compare_digest(
+        authorization or "", f"Bearer {settings.metricas_token}"
+    ):
+        raise HTTPException(status_code=401, detail="Token de métricas no válido")
+    return Response(content=exponer(db), media_type=TIPO_CONTENIDO)
@@ -1,9 +1,12 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, status, Query, Response
 from sqlalchemy.orm import Session
 from typing import List, Optional
 from datetime import datetime
 
-from ..db_sqlite_clean import get_db
+from ..db_sqlite_clean import get_db, get_db_lectura
+from ..paginacion import CABECERA_SIGUIENTE_CURSOR
+from ..models.pago import Pago
+from ..respuestas import DESCRIPCION_RAPIDO, columnas_respuesta, respuesta_filas
 from ..services.pago_service import PagoService, FacturaService, ReembolsoService, ResumenPagosService
 from ..schemas.pago import (
     PagoCreate, PagoUpdate, PagoResponse, PagoCompletoResponse,
@@ -20,16 +23,34 @@ router = APIRouter(prefix="/api/pagos", tags=["pagos"])
 
 @router.get("/", response_model=List[PagoResponse])
 def listar_pagos(
+    response: Response,
     skip: int = 0, 
     limit: int = 100, 
     estado: Optional[str] = None,
     metodo_pago: Optional[str] = None,
-    db: Session = Depends(get_db)
+    cursor: Optional[str] = None,
+    rapido: bool = Query(False, description=DESCRIPCION_RAPIDO),
+    db: Session = Depends(get_db_lectura)
 ):
-    """Listar todos los pagos con filtros opcionales"""
+    """Listar todos los pagos con filtros opcionales (paginación por cursor si no se indica skip)"""
     try:
-        pagos = PagoService.listar_pagos(db, skip=skip, limit=limit, estado=estado, metodo_pago=metodo_pago)
+        columnas = columnas_respuesta(Pago, PagoResponse) if rapido else None
+        if skip and not cursor:
+            pagos = PagoService.listar_pagos(
+                db, skip=skip, limit=limit, estado=estado, metodo_pago=metodo_pago, columnas=columnas
+            )
+            return respuesta_filas(pagos, PagoResponse) if rapido else pagos
+        
+        pagos, siguiente_cursor = PagoService.listar_pagos_cursor(
+            db, limit=limit, cursor=cursor, estado=estado, metodo_pago=metodo_pago, columnas=columnas
+        )
+        if rapido:
+            return respuesta_filas(pagos, PagoResponse, siguiente_cursor)
+        if siguiente_cursor:
+            response.headers[CABECERA_SIGUIENTE_CURSOR] = siguiente_cursor
         return pagos
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
@@ -257,13 +278,13 @@ def procesar_reembolso(reembolso_id: int, transaccion_id: str, db: Session = Dep
 # ============================================================================
 
 @router.get("/resumen/general", response_model=ResumenPagosResponse)
-def obtener_resumen_pagos(db: Session = Depends(get_db)):
+def obtener_resumen_pagos(db: Session = Depends(get_db_lectura)):
     """Obtener resumen general de pagos"""
     resumen = ResumenPagosService.obtener_resumen_pagos(db)
     return resumen
 
 @router.get("/estadisticas/mensual/{año}/{mes}")
-def obtener_estadisticas_mensuales(año: int, mes: int, db: Session = Depends(get_db)):
+def obtener_estadisticas_mensuales(año: int, mes: int, db: Session = Depends(get_db_lectura)):
     """Obtener estadísticas de pagos por mes"""
     if mes < 1 or mes > 12:
         raise HTTPException(
@@ -1,7 +1,9 @@
 from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 from typing import List, Optional
-from ..db_sqlite_clean import get_db
+from ..db_sqlite_clean import get_db, get_db_lectura
+from ..database_async import get_db_async_lectura
 from ..services.precio_dinamico_service import PrecioDinamicoService
 from ..schemas.precio_dinamico import (
     ReglaPrecioCreate, ReglaPrecioUpdate, ReglaPrecioResponse,
@@ -14,7 +16,7 @@ router = APIRouter(prefix="/precios-dinamicos", tags=["Precios Dinámicos"])
 
 # Endpoints para reglas de precios
 @router.post("/reglas", response_model=ReglaPrecioResponse)
-async def crear_regla_precio(
+def crear_regla_precio(
     regla: ReglaPrecioCreate,
     db: Session = Depends(get_db)
 ):
@@ -33,11 +35,11 @@ async def crear_regla_precio(
     return PrecioDinamicoService.create_regla(db, regla)
 
 @router.get("/reglas", response_model=List[ReglaPrecioResponse])
-async def obtener_reglas_precio(
+def obtener_reglas_precio(
     activas_solo: bool = Query(False, description="Solo reglas activas"),
     skip: int = Query(0, ge=0, description="Número de registros a omitir"),
     limit: int = Query(100, ge=1, le=1000, description="Límite de registros"),
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_db_lectura)
 ):
     """
     Obtener lista de reglas de precio dinámico.
@@ -45,7 +47,7 @@ async def obtener_reglas_precio(
     return PrecioDinamicoService.get_reglas(db, activas_solo, skip, limit)
 
 @router.get("/reglas/{regla_id}", response_model=ReglaPrecioResponse)
-async def obtener_regla_precio(
+def obtener_regla_precio(
     regla_id: int,
     db: Session = Depends(get_db)
 ):
@@ -55,7 +57,7 @@ async def obtener_regla_precio(
     return PrecioDinamicoService.get_regla(db, regla_id)
 
 @router.put("/reglas/{regla_id}", response_model=ReglaPrecioResponse)
-async def actualizar_regla_precio(
+def actualizar_regla_precio(
     regla_id: int,
     regla_update: ReglaPrecioUpdate,
     db: Session = Depends(get_db)
@@ -66,7 +68,7 @@ async def actualizar_regla_precio(
     return PrecioDinamicoService.update_regla(db, regla_id, regla_update)
 
 @router.delete("/reglas/{regla_id}")
-async def eliminar_regla_precio(
+def eliminar_regla_precio(
     regla_id: int,
     db: Session = Depends(get_db)
 ):
@@ -78,7 +80,7 @@ async def eliminar_regla_precio(
 
 # Endpoint principal para cálculo de precios
 @router.post("/calcular", response_model=CalculoPrecioResponse)
-async def calcular_precio_dinamico(
+def calcular_precio_dinamico(
     request: CalculoPrecioRequest,
     db: Session = Depends(get_db)
 ):
@@ -91,7 +93,7 @@ async def calcular_precio_dinamico(
     return PrecioDinamicoService.calcular_precio(db, request)
 
 @router.get("/calcular/{servicio_id}")
-async def calcular_precio_get(
+def calcular_precio_get(
     servicio_id: int,
     recurso_id: int = Query(..., description="ID del recurso"),
     fecha_hora_inicio: str = Query(..., description="Fecha y hora de inicio (ISO format)"),
@@ -126,7 +128,7 @@ async def calcular_precio_get(
 
 # Endpoints para reglas rápidas predefinidas
 @router.post("/reglas-rapidas/hora-pico", response_model=ReglaPrecioResponse)
-async def crear_regla_hora_pico(
+def crear_regla_hora_pico(
     regla: ReglaRapida,
     db: Session = Depends(get_db)
 ):
@@ -150,7 +152,7 @@ async def crear_regla_hora_pico(
     )
 
 @router.post("/reglas-rapidas/descuento-anticipacion", response_model=ReglaPrecioResponse)
-async def crear_regla_descuento_anticipacion(
+def crear_regla_descuento_anticipacion(
     regla: ReglaRapida,
     db: Session = Depends(get_db)
 ):
@@ -172,7 +174,7 @@ async def crear_regla_descuento_anticipacion(
     )
 
 @router.post("/reglas-rapidas/fin-de-semana", response_model=ReglaPrecioResponse)
-async def crear_regla_fin_de_semana(
+def crear_regla_fin_de_semana(
     regla: ReglaRapida,
     db: Session = Depends(get_db)
 ):
@@ -195,7 +197,7 @@ async def crear_regla_fin_de_semana(
     )
 
 @router.post("/reglas-rapidas/temporada-alta", response_model=ReglaPrecioResponse)
-async def crear_regla_temporada_alta(
+def crear_regla_temporada_alta(
     regla: ReglaRapida,
     db: Session = Depends(get_db)
 ):
@@ -226,54 +228,23 @@ async def simular_precios_semana(
     hora_servicio: str = Query("10:00", description="Hora del servicio (HH:MM)"),
     duracion_horas: int = Query(1, ge=1, description="Duración en horas"),
     participantes: int = Query(1, ge=1, description="Número de participantes"),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db_async_lectura)
 ):
     """
     Simular precios para una semana completa.
     Útil para ver cómo varían los precios día a día.
     """
-    from datetime import datetime, timedelta
+    from datetime import datetime
     
     try:
         fecha_base = datetime.strptime(fecha_inicio, "%Y-%m-%d")
     except ValueError:
         raise HTTPException(status_code=400, detail="Formato de fecha inválido. Use YYYY-MM-DD")
     
-    resultados = {}
-    dias_semana = ["Lunes", "Martes", "Miércoles", "Jueves", "Viernes", "Sábado", "Domingo"]
-    
-    for i in range(7):
-        fecha_dia = fecha_base + timedelta(days=i)
-        fecha_hora_inicio = datetime.combine(
-            fecha_dia.date(), 
-            datetime.strptime(hora_servicio, "%H:%M").time()
-        )
-        fecha_hora_fin = fecha_hora_inicio + timedelta(hours=duracion_horas)
-        
-        request = CalculoPrecioRequest(
-            servicio_id=servicio_id,
-            recurso_id=recurso_id,
-            fecha_hora_inicio=fecha_hora_inicio,
-            fecha_hora_fin=fecha_hora_fin,
-            participantes=participantes,
-            tipo_cliente="regular"
-        )
-        
-        try:
-            calculo = PrecioDinamicoService.calcular_precio(db, request)
-            resultados[dias_semana[i]] = {
-                "fecha": fecha_dia.strftime("%Y-%m-%d"),
-                "precio_base": calculo.precio_base,
-                "precio_final": calculo.precio_final,
-                "descuento_total": calculo.descuento_total,
-                "recargo_total": calculo.recargo_total,
-                "ahorro": calculo.ahorro_total,
-                "reglas_aplicadas": len(calculo.reglas_aplicadas)
-            }
-        except Exception as e:
-            resultados[dias_semana[i]] = {
-                "error": str(e)
-            }
+    resultados = await PrecioDinamicoService.simular_semana_async(
+        db, servicio_id, recurso_id, fecha_base,
+        datetime.strptime(hora_servicio, "%H:%M").time(), duracion_horas, participantes
+    )
     
     return {
         "servicio_id": servicio_id,
@@ -285,32 +256,9 @@ async def simular_precios_semana(
 # Endpoints para estadísticas
 @router.get("/estadisticas/reglas")
 async def obtener_estadisticas_reglas(
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db_async_lectura)
 ):
     """
     Obtener estadísticas sobre las reglas de precio.
     """
-    reglas = PrecioDinamicoService.get_reglas(db, limit=1000)
-    
-    estadisticas = {
-        "total_reglas": len(reglas),
-        "reglas_activas": len([r for r in reglas if r.activa]),
-        "reglas_inactivas": len([r for r in reglas if not r.activa]),
-        "por_tipo": {},
-        "por_modificador": {}
-    }
-    
-    # Estadísticas por tipo de regla
-    for regla in reglas:
-        tipo = regla.tipo_regla
-        if tipo not in estadisticas["por_tipo"]:
-            estadisticas["por_tipo"][tipo] = 0
-        estadisticas["por_tipo"][tipo] += 1
-        
-        # Estadísticas por tipo de modificador
-        modificador = regla.tipo_modificador
-        if modificador not in estadisticas["por_modificador"]:
-            estadisticas["por_modificador"][modificador] = 0
-        estadisticas["por_modificador"][modificador] += 1
-    
-    return estadisticas
+    return await PrecioDinamicoService.get_estadisticas_reglas_async(db)
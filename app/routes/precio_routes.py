@@ -1,10 +1,15 @@
-from fastapi import APIRouter, Depends, HTTPException, status, Query
+from fastapi import APIRouter, Depends, HTTPException, status, Query, Request, Response
 from sqlalchemy.orm import Session
 from typing import List, Optional
 from datetime import datetime
 
-from ..db_sqlite_clean import get_db
+from ..db_sqlite_clean import get_db, get_db_cache, get_db_lectura
+from ..paginacion import CABECERA_SIGUIENTE_CURSOR
+from ..models.precio import Precio
+from ..respuestas import DESCRIPCION_RAPIDO, columnas_respuesta, respuesta_filas
+from ..condicional import responder_condicional
 from ..services.precio_service import PrecioService
+from ..services.cache_service import invalidar_por_precio
 from ..schemas.precio import (
     PrecioCreate, PrecioUpdate, PrecioResponse, PrecioCompletoResponse,
     CalculoPrecioRequest, CalculoPrecioResponse, FiltroPrecios,
@@ -33,15 +38,31 @@ def crear_precio(precio: PrecioCreate, db: Session = Depends(get_db)):
 
 @router.get("/", response_model=List[PrecioResponse])
 def listar_precios(
+    response: Response,
     skip: int = Query(0, ge=0, description="Número de registros a omitir"),
     limit: int = Query(100, ge=1, le=1000, description="Número máximo de registros"),
-    db: Session = Depends(get_db)
+    cursor: Optional[str] = Query(None, description="Token de página siguiente (cabecera X-Next-Cursor)"),
+    rapido: bool = Query(False, description=DESCRIPCION_RAPIDO),
+    db: Session = Depends(get_db_lectura)
 ):
-    """Listar todos los precios"""
+    """Listar todos los precios (paginación por cursor si no se indica skip)"""
     try:
-        precios = PrecioService.listar_precios(db, skip=skip, limit=limit, filtros=None)
+        columnas = columnas_respuesta(Precio, PrecioResponse) if rapido else None
+        if skip and not cursor:
+            precios = PrecioService.listar_precios(db, skip=skip, limit=limit, filtros=None, columnas=columnas)
+            return respuesta_filas(precios, PrecioResponse) if rapido else precios
+        
+        precios, siguiente_cursor = PrecioService.listar_precios_cursor(
+            db, limit=limit, cursor=cursor, filtros=None, columnas=columnas
+        )
+        if rapido:
+            return respuesta_filas(precios, PrecioResponse, siguiente_cursor)
+        if siguiente_cursor:
+            response.headers[CABECERA_SIGUIENTE_CURSOR] = siguiente_cursor
         return precios
         
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -115,10 +136,14 @@ def eliminar_precio(precio_id: int, db: Session = Depends(get_db)):
 # ============================================================================
 
 @router.get("/servicio/{servicio_id}", response_model=List[PrecioResponse])
-def obtener_precios_por_servicio(servicio_id: int, db: Session = Depends(get_db)):
-    """Obtener todos los precios de un servicio específico"""
+def obtener_precios_por_servicio(
+    servicio_id: int, request: Request, response: Response, db: Session = Depends(get_db_cache)
+):
+    """Obtener todos los precios de un servicio específico (con ETag: 304 si no han cambiado)"""
     try:
-        return PrecioService.get_precios_by_servicio(db, servicio_id)
+        return responder_condicional(
+            request, response, PrecioService.get_precios_by_servicio_cacheado, db, servicio_id
+        )
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -149,7 +174,7 @@ def obtener_precio_base_servicio(servicio_id: int, db: Session = Depends(get_db)
 # ============================================================================
 
 @router.get("/recurso/{recurso_id}", response_model=List[PrecioResponse])
-def obtener_precios_por_recurso(recurso_id: int, db: Session = Depends(get_db)):
+def obtener_precios_por_recurso(recurso_id: int, db: Session = Depends(get_db_lectura)):
     """Obtener todos los precios de un recurso específico"""
     try:
         return PrecioService.get_precios_by_recurso(db, recurso_id)
@@ -254,7 +279,7 @@ def calcular_precio_recurso(
 # ============================================================================
 
 @router.get("/estadisticas/general", response_model=EstadisticasPreciosResponse)
-def obtener_estadisticas_precios(db: Session = Depends(get_db)):
+def obtener_estadisticas_precios(db: Session = Depends(get_db_lectura)):
     """Obtener estadísticas generales de precios"""
     try:
         return PrecioService.obtener_estadisticas(db)
@@ -265,7 +290,7 @@ def obtener_estadisticas_precios(db: Session = Depends(get_db)):
         )
 
 @router.get("/estadisticas/servicio/{servicio_id}")
-def obtener_estadisticas_servicio(servicio_id: int, db: Session = Depends(get_db)):
+def obtener_estadisticas_servicio(servicio_id: int, db: Session = Depends(get_db_lectura)):
     """Obtener estadísticas de precios de un servicio específico"""
     try:
         precios = PrecioService.get_precios_by_servicio(db, servicio_id)
@@ -297,7 +322,7 @@ def obtener_estadisticas_servicio(servicio_id: int, db: Session = Depends(get_db
         )
 
 @router.get("/estadisticas/recurso/{recurso_id}")
-def obtener_estadisticas_recurso(recurso_id: int, db: Session = Depends(get_db)):
+def obtener_estadisticas_recurso(recurso_id: int, db: Session = Depends(get_db_lectura)):
     """Obtener estadísticas de precios de un recurso específico"""
     try:
         precios = PrecioService.get_precios_by_recurso(db, recurso_id)
@@ -341,6 +366,7 @@ def activar_precio(precio_id: int, db: Session = Depends(get_db)):
         precio.updated_at = datetime.now()
         db.commit()
         db.refresh(precio)
+        invalidar_por_precio(precio.servicio_id, precio.recurso_id)
         return {"mensaje": "Precio activado exitosamente", "precio_id": precio_id}
     except HTTPException:
         raise
@@ -360,6 +386,7 @@ def desactivar_precio(precio_id: int, db: Session = Depends(get_db)):
         precio.updated_at = datetime.now()
         db.commit()
         db.refresh(precio)
+        invalidar_por_precio(precio.servicio_id, precio.recurso_id)
         return {"mensaje": "Precio desactivado exitosamente", "precio_id": precio_id}
     except HTTPException:
         raise
@@ -0,0 +1,52 @@
+from fastapi import APIRouter, Depends, BackgroundTasks, Query
+from sqlalchemy.orm import Session
+from typing import Optional
+from datetime import date
+from ..db_sqlite_clean import get_db_lectura, SessionLocal
+from ..services.auth_service import require_admin
+from ..schemas.prediccion import PrediccionesServicioResponse, PrediccionesFechaResponse
+from ..schemas.base import BaseResponse
+
+router = APIRouter(prefix="/predicciones", tags=["predicciones"])
+
+def _servicio_lote():
+    """PrediccionLoteService bajo demanda: el lote (numpy) no se carga al arrancar la aplicación"""
+    from ..services.prediccion_lote_service import PrediccionLoteService
+    return PrediccionLoteService
+
+def _ejecutar_lote(dias_futuros: Optional[int]):
+    """Ejecutar el lote con una sesión propia (fuera de la petición)"""
+    db = SessionLocal()
+    try:
+        _servicio_lote().ejecutar(db, dias_futuros=dias_futuros)
+    finally:
+        db.close()
+
+@router.get("/servicio/{servicio_id}", response_model=PrediccionesServicioResponse)
+def get_predicciones_servicio(
+    servicio_id: int,
+    algoritmo: str = "arima",
+    dias: Optional[int] = Query(None, ge=1),
+    db: Session = Depends(get_db_lectura)
+):
+    """Predicciones de demanda de un servicio generadas por el lote nocturno"""
+    return _servicio_lote().get_predicciones_servicio(db, servicio_id, algoritmo, dias)
+
+@router.get("/", response_model=PrediccionesFechaResponse)
+def get_predicciones_fecha(
+    fecha: Optional[date] = None,
+    algoritmo: str = "arima",
+    db: Session = Depends(get_db_lectura)
+):
+    """Demanda prevista de todos los servicios para una fecha (hoy por defecto)"""
+    return _servicio_lote().get_predicciones_fecha(db, fecha or date.today(), algoritmo)
+
+@router.post("/lote", response_model=BaseResponse)
+def ejecutar_lote_predicciones(
+    background_tasks: BackgroundTasks,
+    dias_futuros: Optional[int] = Query(None, ge=1, le=365),
+    current_user = Depends(require_admin)
+):
+    """Regenerar en segundo plano las predicciones de todos los servicios (solo administradores)"""
+    background_tasks.add_task(_ejecutar_lote, dias_futuros)
+    return BaseResponse(success=True, message="Lote de predicciones en ejecución")
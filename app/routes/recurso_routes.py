@@ -1,7 +1,8 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Request, Response
 from sqlalchemy.orm import Session
 from typing import List
-from ..db_sqlite_clean import get_db
+from ..db_sqlite_clean import get_db, get_db_cache
+from ..condicional import responder_condicional
 from ..services.recurso_service import RecursoService
 from ..schemas.recurso import RecursoCreate, RecursoResponse, RecursoUpdate
 from ..schemas.base import BaseResponse
@@ -14,14 +15,14 @@ def create_recurso(recurso: RecursoCreate, db: Session = Depends(get_db)):
     return RecursoService.create(db, recurso)
 
 @router.get("/", response_model=List[RecursoResponse])
-def get_recursos(skip: int = 0, limit: int = 100, db: Session = Depends(get_db)):
-    """Obtener lista de recursos"""
-    return RecursoService.get_all(db, skip=skip, limit=limit)
+def get_recursos(request: Request, response: Response, skip: int = 0, limit: int = 100, db: Session = Depends(get_db_cache)):
+    """Obtener lista de recursos (con ETag: 304 si no ha cambiado)"""
+    return responder_condicional(request, response, RecursoService.get_all_cacheado, db, skip=skip, limit=limit)
 
 @router.get("/disponibles", response_model=List[RecursoResponse])
-def get_recursos_disponibles(db: Session = Depends(get_db)):
-    """Obtener recursos disponibles"""
-    return RecursoService.get_disponibles(db)
+def get_recursos_disponibles(request: Request, response: Response, db: Session = Depends(get_db_cache)):
+    """Obtener recursos disponibles (con ETag: 304 si no han cambiado)"""
+    return responder_condicional(request, response, RecursoService.get_disponibles_cacheado, db)
 
 @router.get("/{recurso_id}", response_model=RecursoResponse)
 def get_recurso(recurso_id: int, db: Session = Depends(get_db)):
@@ -9,7 +9,7 @@ from ..services.recurso_service import RecursoService
 router = APIRouter(prefix="/recursos", tags=["recursos"])
 
 @router.get("/", response_model=List[RecursoResponse])
-async def get_recursos(
+def get_recursos(
     skip: int = 0, 
     limit: int = 100, 
     db: Session = Depends(get_db)
@@ -18,7 +18,7 @@ async def get_recursos(
     return RecursoService.get_all(db, skip=skip, limit=limit)
 
 @router.get("/{recurso_id}", response_model=RecursoResponse)
-async def get_recurso(recurso_id: int, db: Session = Depends(get_db)):
+def get_recurso(recurso_id: int, db: Session = Depends(get_db)):
     """Obtener un recurso específico por ID"""
     recurso = RecursoService.get_by_id(db, recurso_id)
     if not recurso:
@@ -26,7 +26,7 @@ async def get_recurso(recurso_id: int, db: Session = Depends(get_db)):
     return recurso
 
 @router.post("/", response_model=RecursoResponse, status_code=201)
-async def create_recurso(
+def create_recurso(
     recurso: RecursoCreate, 
     db: Session = Depends(get_db)
 ):
@@ -34,7 +34,7 @@ async def create_recurso(
     return RecursoService.create(db, recurso)
 
 @router.put("/{recurso_id}", response_model=RecursoResponse)
-async def update_recurso(
+def update_recurso(
     recurso_id: int, 
     recurso: RecursoUpdate, 
     db: Session = Depends(get_db)
@@ -46,7 +46,7 @@ async def update_recurso(
     return updated_recurso
 
 @router.delete("/{recurso_id}")
-async def delete_recurso(recurso_id: int, db: Session = Depends(get_db)):
+def delete_recurso(recurso_id: int, db: Session = Depends(get_db)):
     """Eliminar un recurso"""
     success = RecursoService.delete(db, recurso_id)
     if not success:
@@ -54,7 +54,7 @@ async def delete_recurso(recurso_id: int, db: Session = Depends(get_db)):
     return {"message": "Recurso eliminado correctamente"}
 
 @router.put("/{recurso_id}/toggle-disponibilidad")
-async def toggle_disponibilidad(recurso_id: int, db: Session = Depends(get_db)):
+def toggle_disponibilidad(recurso_id: int, db: Session = Depends(get_db)):
     """Cambiar la disponibilidad de un recurso"""
     recurso = RecursoService.toggle_disponibilidad(db, recurso_id)
     if not recurso:
@@ -1,7 +1,10 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query, Response
 from sqlalchemy.orm import Session
-from typing import List
-from ..db_sqlite_clean import get_db
+from typing import List, Optional
+from ..db_sqlite_clean import get_db, get_db_cache, get_db_lectura
+from ..paginacion import CABECERA_SIGUIENTE_CURSOR
+from ..models.reserva import Reserva
+from ..respuestas import DESCRIPCION_RAPIDO, columnas_respuesta, respuesta_filas
 from ..services.reserva_service import ReservaService
 from ..schemas.reserva import ReservaCreate, ReservaResponse, ReservaUpdate, DisponibilidadResponse
 from ..schemas.base import BaseResponse
@@ -14,12 +17,65 @@ def create_reserva(reserva: ReservaCreate, db: Session = Depends(get_db)):
     return ReservaService.create_reserva(db, reserva)
 
 @router.get("/listar", response_model=List[ReservaResponse])
-def listar_reservas(skip: int = 0, limit: int = 100, db: Session = Depends(get_db)):
-    """Listar todas las reservas"""
-    return ReservaService.get_all_reservas(db, skip=skip, limit=limit)
+def listar_reservas(
+    response: Response,
+    skip: int = 0,
+    limit: int = 100,
+    cursor: Optional[str] = None,
+    rapido: bool = Query(False, description=DESCRIPCION_RAPIDO),
+    db: Session = Depends(get_db_lectura)
+):
+    """Listar todas las reservas.
+
+    Sin `skip` se pagina por cursor: el token de la página siguiente se devuelve
+    en la cabecera X-Next-Cursor y se envía de vuelta en `cursor`.
+    """
+    columnas = columnas_respuesta(Reserva, ReservaResponse) if rapido else None
+    if skip and not cursor:
+        reservas = ReservaService.get_all_reservas(db, skip=skip, limit=limit, columnas=columnas)
+        return respuesta_filas(reservas, ReservaResponse) if rapido else reservas
+    
+    reservas, siguiente_cursor = ReservaService.get_all_reservas_cursor(db, limit=limit, cursor=cursor, columnas=columnas)
+    if rapido:
+        return respuesta_filas(reservas, ReservaResponse, siguiente_cursor)
+    if siguiente_cursor:
+        response.headers[CABECERA_SIGUIENTE_CURSOR] = siguiente_cursor
+    return reservas
+
+@router.get("/buscar", response_model=List[ReservaResponse])
+def buscar_reservas(
+    response: Response,
+    skip: int = 0,
+    limit: int = 100,
+    cursor: Optional[str] = None,
+    cliente_id: Optional[int] = None,
+    servicio_id: Optional[int] = None,
+    recurso_id: Optional[int] = None,
+    estado: Optional[str] = None,
+    fecha_inicio: Optional[str] = None,
+    fecha_fin: Optional[str] = None,
+    db: Session = Depends(get_db_lectura)
+):
+    """Buscar reservas con filtros, de la más reciente a la más antigua.
+
+    Sin `skip` se pagina por cursor sobre (fecha_hora_inicio, id), como en /listar.
+    """
+    filtros = {
+        "cliente_id": cliente_id, "servicio_id": servicio_id, "recurso_id": recurso_id,
+        "estado": estado, "fecha_inicio": fecha_inicio, "fecha_fin": fecha_fin,
+    }
+    if skip and not cursor:
+        return ReservaService.get_reservas_filtradas(db, skip=skip, limit=limit, **filtros)
+
+    reservas, siguiente_cursor = ReservaService.get_reservas_filtradas_cursor(
+        db, limit=limit, cursor=cursor, **filtros
+    )
+    if siguiente_cursor:
+        response.headers[CABECERA_SIGUIENTE_CURSOR] = siguiente_cursor
+    return reservas
 
 @router.get("/disponibilidad", response_model=DisponibilidadResponse)
-def get_disponibilidad(servicio_id: int, fecha: str, db: Session = Depends(get_db)):
+def get_disponibilidad(servicio_id: int, fecha: str, db: Session = Depends(get_db_cache)):
     """Obtener disponibilidad de un servicio para una fecha específica"""
     return ReservaService.get_disponibilidad(db, servicio_id, fecha)
 
@@ -1,7 +1,8 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Request, Response
 from sqlalchemy.orm import Session
 from typing import List
-from ..db_sqlite_clean import get_db
+from ..db_sqlite_clean import get_db, get_db_cache
+from ..condicional import responder_condicional
 from ..services.servicio_service import ServicioService
 from ..schemas.servicio import ServicioCreate, ServicioResponse, ServicioUpdate
 from ..schemas.base import BaseResponse
@@ -14,9 +15,9 @@ def create_servicio(servicio: ServicioCreate, db: Session = Depends(get_db)):
     return ServicioService.create(db, servicio)
 
 @router.get("/", response_model=List[ServicioResponse])
-def get_servicios(skip: int = 0, limit: int = 100, db: Session = Depends(get_db)):
-    """Obtener lista de servicios"""
-    return ServicioService.get_all(db, skip=skip, limit=limit)
+def get_servicios(request: Request, response: Response, skip: int = 0, limit: int = 100, db: Session = Depends(get_db_cache)):
+    """Obtener lista de servicios (con ETag: 304 si no ha cambiado)"""
+    return responder_condicional(request, response, ServicioService.get_all_cacheado, db, skip=skip, limit=limit)
 
 @router.get("/{servicio_id}", response_model=ServicioResponse)
 def get_servicio(servicio_id: int, db: Session = Depends(get_db)):
@@ -9,7 +9,7 @@ from ..services.servicio_service import ServicioService
 router = APIRouter(prefix="/servicios", tags=["servicios"])
 
 @router.get("/", response_model=List[ServicioResponse])
-async def get_servicios(
+def get_servicios(
     skip: int = 0, 
     limit: int = 100, 
     db: Session = Depends(get_db)
@@ -18,7 +18,7 @@ async def get_servicios(
     return ServicioService.get_all(db, skip=skip, limit=limit)
 
 @router.get("/{servicio_id}", response_model=ServicioResponse)
-async def get_servicio(servicio_id: int, db: Session = Depends(get_db)):
+def get_servicio(servicio_id: int, db: Session = Depends(get_db)):
     """Obtener un servicio específico por ID"""
     servicio = ServicioService.get_by_id(db, servicio_id)
     if not servicio:
@@ -26,7 +26,7 @@ async def get_servicio(servicio_id: int, db: Session = Depends(get_db)):
     return servicio
 
 @router.post("/", response_model=ServicioResponse, status_code=201)
-async def create_servicio(
+def create_servicio(
     servicio: ServicioCreate, 
     db: Session = Depends(get_db)
 ):
@@ -34,7 +34,7 @@ async def create_servicio(
     return ServicioService.create(db, servicio)
 
 @router.put("/{servicio_id}", response_model=ServicioResponse)
-async def update_servicio(
+def update_servicio(
     servicio_id: int, 
     servicio: ServicioUpdate, 
     db: Session = Depends(get_db)
@@ -46,7 +46,7 @@ async def update_servicio(
     return updated_servicio
 
 @router.delete("/{servicio_id}")
-async def delete_servicio(servicio_id: int, db: Session = Depends(get_db)):
+def delete_servicio(servicio_id: int, db: Session = Depends(get_db)):
     """Eliminar un servicio"""
     success = ServicioService.delete(db, servicio_id)
     if not success:
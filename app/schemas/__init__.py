@@ -23,6 +23,7 @@ from .integracion import (
     EstadoIntegracionesResponse, ResumenNotificacionesResponse,
     TestIntegracionRequest, TestIntegracionResponse
 )
+from .prediccion import PrediccionesServicioResponse, PrediccionesFechaResponse
 
 __all__ = [
     "ClienteCreate", "ClienteResponse", "ClienteUpdate",
@@ -41,5 +42,6 @@ __all__ = [
     "SincronizacionGoogleCalendarCreate", "SincronizacionGoogleCalendarResponse",
     "WebhookCreate", "WebhookResponse", "WebhookUpdate",
     "EstadoIntegracionesResponse", "ResumenNotificacionesResponse",
-    "TestIntegracionRequest", "TestIntegracionResponse"
+    "TestIntegracionRequest", "TestIntegracionResponse",
+    "PrediccionesServicioResponse", "PrediccionesFechaResponse"
 ]
@@ -0,0 +1,23 @@
+from pydantic import BaseModel, Field
+from typing import List, Optional
+from datetime import datetime
+
+class PrediccionDiaria(BaseModel):
+    fecha: str = Field(..., description="Fecha (YYYY-MM-DD)")
+    prediccion: float = Field(..., description="Reservas previstas")
+
+class PrediccionesServicioResponse(BaseModel):
+    servicio_id: int
+    algoritmo: str
+    generada_at: Optional[datetime] = None
+    predicciones: List[PrediccionDiaria]
+
+class PrediccionServicio(BaseModel):
+    servicio_id: int
+    prediccion: float
+
+class PrediccionesFechaResponse(BaseModel):
+    fecha: str
+    algoritmo: str
+    total_prevista: float
+    servicios: List[PrediccionServicio]
@@ -1,29 +1,35 @@
-from .cliente_service import ClienteService
-from .servicio_service import ServicioService
-from .recurso_service import RecursoService
-from .reserva_service import ReservaService
-from .precio_service import PrecioService
-from .usuario_service import UsuarioService
-from .pago_service import PagoService, FacturaService, ReembolsoService, ResumenPagosService
-from .integracion_service import (
-    IntegracionService, NotificacionService, GoogleCalendarService,
-    WebhookService, ResumenIntegracionesService
-)
+"""Servicios de negocio.
 
-__all__ = [
-    "ClienteService",
-    "ServicioService",
-    "RecursoService", 
-    "ReservaService",
-    "PrecioService",
-    "UsuarioService",
-    "PagoService",
-    "FacturaService",
-    "ReembolsoService",
-    "ResumenPagosService",
-    "IntegracionService",
-    "NotificacionService",
-    "GoogleCalendarService",
-    "WebhookService",
-    "ResumenIntegracionesService"
-]
+Se importan bajo demanda: `from app.services import PagoService` carga solo
+pago_service, y los módulos con dependencias pesadas (integraciones,
+predicciones) no se cargan hasta que algo los usa.
+"""
+import importlib
+
+# nombre exportado -> módulo que lo define
+_MODULOS = {
+    "ClienteService": ".cliente_service",
+    "ServicioService": ".servicio_service",
+    "RecursoService": ".recurso_service",
+    "ReservaService": ".reserva_service",
+    "PrecioService": ".precio_service",
+    "UsuarioService": ".usuario_service",
+    "PagoService": ".pago_service",
+    "FacturaService": ".pago_service",
+    "ReembolsoService": ".pago_service",
+    "ResumenPagosService": ".pago_service",
+    "IntegracionService": ".integracion_service",
+    "NotificacionService": ".integracion_service",
+    "GoogleCalendarService": ".integracion_service",
+    "WebhookService": ".integracion_service",
+    "ResumenIntegracionesService": ".integracion_service",
+}
+
+def __getattr__(nombre):
+    if nombre not in _MODULOS:
+        raise AttributeError(f"module {__name__!r} has no attribute {nombre!r}")
+    valor = getattr(importlib.import_module(_MODULOS[nombre], __name__), nombre)
+    globals()[nombre] = valor
+    return valor
+
+__all__ = list(_MODULOS)
@@ -0,0 +1,156 @@
+from sqlalchemy.orm import Session
+from sqlalchemy import and_, select, insert, delete, exists, func as sql_func
+from fastapi import HTTPException
+from datetime import datetime, timedelta
+from typing import Dict, Any, Optional
+from ..config import settings
+from ..models.reserva import Reserva
+from ..models.reserva_archivo import ReservaArchivada, COLUMNAS_HISTORICO
+from ..models.pago import Pago
+from ..models.precio_dinamico import HistorialPrecio
+from ..models.integracion import Notificacion, SincronizacionGoogleCalendar
+
+# Estados que ya no pueden cambiar una vez pasada la fecha de fin
+ESTADOS_ARCHIVABLES = ("confirmada", "cancelada")
+
+# Tablas con clave foránea a reservas: una reserva referenciada no se archiva
+# para no romper la integridad referencial (pagos, facturación, sincronizaciones)
+TABLAS_DEPENDIENTES = (Pago, HistorialPrecio, Notificacion, SincronizacionGoogleCalendar)
+
+class ArchivoService:
+    """Servicio de archivo de reservas históricas (particionado caliente/frío).
+
+    Mueve las reservas finalizadas o canceladas más antiguas que
+    `settings.archivo_reservas_dias` a la tabla `reservas_archivadas`, de modo
+    que la tabla `reservas` y sus índices solo contienen datos recientes. Las
+    consultas analíticas leen ambas a través de la vista `reservas_historico`.
+    """
+
+    @staticmethod
+    def _fecha_limite(dias_antiguedad: Optional[int], fecha_referencia: Optional[datetime]) -> datetime:
+        dias = settings.archivo_reservas_dias if dias_antiguedad is None else dias_antiguedad
+        if dias < 0:
+            raise HTTPException(status_code=400, detail="La antigüedad de archivo no puede ser negativa")
+        return (fecha_referencia or datetime.now()) - timedelta(days=dias)
+
+    @staticmethod
+    def _query_archivables(fecha_limite: datetime):
+        condiciones = [
+            Reserva.fecha_hora_fin < fecha_limite,
+            Reserva.estado.in_(ESTADOS_ARCHIVABLES)
+        ]
+        for modelo in TABLAS_DEPENDIENTES:
+            condiciones.append(~exists().where(modelo.reserva_id == Reserva.id))
+        return select(Reserva.id).where(and_(*condiciones))
+
+    @staticmethod
+    def contar_archivables(
+        db: Session,
+        dias_antiguedad: Optional[int] = None,
+        fecha_referencia: Optional[datetime] = None
+    ) -> int:
+        """Contar las reservas que se moverían al archivo (simulación)"""
+        fecha_limite = ArchivoService._fecha_limite(dias_antiguedad, fecha_referencia)
+        consulta = ArchivoService._query_archivables(fecha_limite).subquery()
+        return db.execute(select(sql_func.count()).select_from(consulta)).scalar()
+
+    @staticmethod
+    def archivar_reservas(
+        db: Session,
+        dias_antiguedad: Optional[int] = None,
+        tamano_lote: Optional[int] = None,
+        fecha_referencia: Optional[datetime] = None
+    ) -> Dict[str, Any]:
+        """Mover al archivo las reservas finalizadas o canceladas antiguas.
+
+        Trabaja por lotes de ids: cada lote se copia a `reservas_archivadas` y se
+        borra de `reservas` en la misma transacción, así que una interrupción
+        nunca deja una reserva duplicada ni perdida.
+        """
+        lote = tamano_lote or settings.archivo_reservas_lote
+        if lote <= 0:
+            raise HTTPException(status_code=400, detail="El tamaño de lote debe ser positivo")
+        fecha_limite = ArchivoService._fecha_limite(dias_antiguedad, fecha_referencia)
+
+        consulta_ids = ArchivoService._query_archivables(fecha_limite).order_by(Reserva.id).limit(lote)
+        columnas_origen = [getattr(Reserva, columna) for columna in COLUMNAS_HISTORICO]
+
+        total_archivadas = 0
+        lotes = 0
+        try:
+            while True:
+                ids = db.execute(consulta_ids).scalars().all()
+                if not ids:
+                    break
+
+                db.execute(
+                    insert(ReservaArchivada).from_select(
+                        COLUMNAS_HISTORICO + ["archivada_at"],
+                        select(*columnas_origen, sql_func.now()).where(Reserva.id.in_(ids))
+                    )
+                )
+                db.execute(delete(Reserva).where(Reserva.id.in_(ids)).execution_options(synchronize_session=False))
+                db.commit()
+
+                total_archivadas += len(ids)
+                lotes += 1
+                if len(ids) < lote:
+                    break
+        except Exception:
+            db.rollback()
+            raise
+
+        return {
+            "fecha_limite": fecha_limite.isoformat(),
+            "estados": list(ESTADOS_ARCHIVABLES),
+            "reservas_archivadas": total_archivadas,
+            "lotes": lotes,
+            "fecha_generacion": datetime.now().isoformat()
+        }
+
+    @staticmethod
+    def restaurar_reserva(db: Session, reserva_id: int) -> Reserva:
+        """Devolver una reserva archivada a la tabla activa"""
+        archivada = db.query(ReservaArchivada).filter(ReservaArchivada.id == reserva_id).first()
+        if not archivada:
+            raise HTTPException(status_code=404, detail="Reserva archivada no encontrada")
+
+        reserva = Reserva(**{columna: getattr(archivada, columna) for columna in COLUMNAS_HISTORICO})
+        db.add(reserva)
+        db.delete(archivada)
+        db.commit()
+        db.refresh(reserva)
+        return reserva
+
+    @staticmethod
+    def compactar(db: Session) -> None:
+        """Devolver al sistema el espacio liberado (VACUUM en SQLite, ANALYZE en el resto)"""
+        bind = db.get_bind()
+        db.commit()
+        with bind.connect() as conn:
+            conn = conn.execution_options(isolation_level="AUTOCOMMIT")
+            if bind.dialect.name == "sqlite":
+                conn.exec_driver_sql("VACUUM")
+                conn.exec_driver_sql("ANALYZE")
+            else:
+                conn.exec_driver_sql("ANALYZE reservas")
+                conn.exec_driver_sql("ANALYZE reservas_archivadas")
+
+    @staticmethod
+    def get_resumen_archivo(db: Session) -> Dict[str, Any]:
+        """Obtener el tamaño de la partición activa y del archivo"""
+        activas = db.query(sql_func.count(Reserva.id)).scalar()
+        archivadas, primera, ultima = db.query(
+            sql_func.count(ReservaArchivada.id),
+            sql_func.min(ReservaArchivada.fecha_hora_inicio),
+            sql_func.max(ReservaArchivada.fecha_hora_inicio)
+        ).one()
+
+        return {
+            "reservas_activas": activas,
+            "reservas_archivadas": archivadas,
+            "archivo_desde": primera.isoformat() if primera else None,
+            "archivo_hasta": ultima.isoformat() if ultima else None,
+            "antiguedad_archivo_dias": settings.archivo_reservas_dias,
+            "fecha_generacion": datetime.now().isoformat()
+        }
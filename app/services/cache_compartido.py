@@ -0,0 +1,313 @@
+"""Segundo nivel de cache compartido por los workers de un mismo host.
+
+Cada worker de uvicorn tiene su propio CacheService en memoria; este almacén
+SQLite en modo WAL (un fichero local, sin servicios externos) permite que un
+valor calculado por un worker lo aprovechen los demás y que las
+invalidaciones lleguen a todos.
+
+Las invalidaciones incrementan un contador de generación y quedan registradas
+con sus tags: cada worker lee los cambios posteriores a la última generación
+que aplicó para limpiar su nivel local, y un valor calculado antes de una
+invalidación de sus tags no se guarda (se compara con la generación leída al
+empezar el cálculo). Los eventos (cambios que cada worker aplica a su propio
+estado en memoria, p.ej. una reserva nueva) comparten el mismo contador y se
+entregan en esa misma sincronización a los demás workers.
+"""
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+import json
+import os
+import pickle
+import sqlite3
+import threading
+import time
+from ..config import settings
+
+# Tag de las invalidaciones que vacían todo el cache
+TAG_TODO = "*"
+
+def tag_clave(clave: str) -> str:
+    """Tag de la invalidación de una clave concreta"""
+    return f"clave:{clave}"
+
+def serializar(valor: Any) -> Optional[bytes]:
+    """Serialización del valor (pickle); None si no es serializable"""
+    try:
+        return pickle.dumps(valor, protocol=pickle.HIGHEST_PROTOCOL)
+    except Exception:
+        return None
+
+_ESQUEMA = """
+CREATE TABLE IF NOT EXISTS entradas (
+    clave TEXT PRIMARY KEY,
+    valor BLOB NOT NULL,
+    expira REAL NOT NULL,
+    purga REAL NOT NULL,
+    ttl INTEGER NOT NULL,
+    tags TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS ix_entradas_purga ON entradas (purga);
+CREATE TABLE IF NOT EXISTS entrada_tags (
+    tag TEXT NOT NULL,
+    clave TEXT NOT NULL,
+    PRIMARY KEY (tag, clave)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS ix_entrada_tags_clave ON entrada_tags (clave);
+CREATE TABLE IF NOT EXISTS invalidaciones (
+    generacion INTEGER NOT NULL,
+    tag TEXT NOT NULL,
+    creada REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS ix_invalidaciones_generacion ON invalidaciones (generacion);
+CREATE TABLE IF NOT EXISTS eventos (
+    generacion INTEGER PRIMARY KEY,
+    canal TEXT NOT NULL,
+    origen TEXT NOT NULL,
+    datos TEXT NOT NULL,
+    creada REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS meta (
+    nombre TEXT PRIMARY KEY,
+    valor INTEGER NOT NULL
+);
+INSERT OR IGNORE INTO meta (nombre, valor) VALUES ('generacion', 0), ('generacion_purgada', 0);
+"""
+
+class CacheCompartido:
+    """Almacén de cache en un fichero SQLite (WAL) compartido entre procesos
+
+    Los instantes de expiración son de reloj de pared (time.time), comunes a
+    todos los procesos. Usa una conexión por hilo y proceso.
+    """
+
+    def __init__(
+        self,
+        ruta: str,
+        max_entradas: Optional[int] = None,
+        retencion_invalidaciones: Optional[int] = None,
+        timeout_segundos: float = 5.0
+    ):
+        self.ruta = ruta
+        self.max_entradas = max_entradas if max_entradas is not None else settings.cache_compartido_max_entradas
+        self.retencion_invalidaciones = (
+            retencion_invalidaciones if retencion_invalidaciones is not None
+            else settings.cache_compartido_retencion_invalidaciones
+        )
+        self.timeout_segundos = timeout_segundos
+        self._local = threading.local()
+        directorio = os.path.dirname(os.path.abspath(ruta))
+        os.makedirs(directorio, exist_ok=True)
+        self._conexion().executescript(_ESQUEMA)
+
+    def _conexion(self) -> sqlite3.Connection:
+        """Conexión del hilo actual (se reabre tras un fork)"""
+        conexion = getattr(self._local, "conexion", None)
+        if conexion is None or self._local.pid != os.getpid():
+            conexion = sqlite3.connect(self.ruta, timeout=self.timeout_segundos, isolation_level=None)
+            conexion.execute("PRAGMA journal_mode=WAL")
+            conexion.execute("PRAGMA synchronous=NORMAL")
+            self._local.conexion = conexion
+            self._local.pid = os.getpid()
+        return conexion
+
+    def _escribir(self, operacion):
+        """Ejecutar `operacion(conexion)` en una transacción de escritura"""
+        conexion = self._conexion()
+        conexion.execute("BEGIN IMMEDIATE")
+        try:
+            resultado = operacion(conexion)
+            conexion.execute("COMMIT")
+            return resultado
+        except BaseException:
+            conexion.execute("ROLLBACK")
+            raise
+
+    def generacion(self) -> int:
+        """Generación actual (número de invalidaciones y eventos registrados)"""
+        return self._conexion().execute("SELECT valor FROM meta WHERE nombre = 'generacion'").fetchone()[0]
+
+    def obtener(self, clave: str) -> Optional[Tuple[Any, float, float, int, List[str], int]]:
+        """(valor, expira, purga, ttl, tags, bytes) de una entrada no purgada, o None"""
+        fila = self._conexion().execute(
+            "SELECT valor, expira, purga, ttl, tags FROM entradas WHERE clave = ? AND purga > ?",
+            (clave, time.time())
+        ).fetchone()
+        if fila is None:
+            return None
+        datos, expira, purga, ttl, tags = fila
+        try:
+            valor = pickle.loads(datos)
+        except Exception:
+            return None
+        return valor, expira, purga, ttl, json.loads(tags), len(datos)
+
+    def guardar(
+        self,
+        clave: str,
+        datos: bytes,
+        expira: float,
+        purga: float,
+        ttl: int,
+        tags: Iterable[str],
+        generacion: int
+    ) -> bool:
+        """Guardar una entrada serializada, salvo que sus tags se hayan invalidado tras `generacion`"""
+        tags = list(tags)
+
+        def operacion(conexion: sqlite3.Connection) -> bool:
+            marcadores = ",".join("?" * (len(tags) + 2))
+            invalidada = conexion.execute(
+                f"SELECT 1 FROM invalidaciones WHERE generacion > ? AND tag IN ({marcadores}) LIMIT 1",
+                (generacion, TAG_TODO, tag_clave(clave), *tags)
+            ).fetchone()
+            if invalidada or generacion < self._generacion_purgada(conexion):
+                # Calculado antes de una invalidación (o sin registro para comprobarlo)
+                return False
+            conexion.execute(
+                "INSERT OR REPLACE INTO entradas (clave, valor, expira, purga, ttl, tags) VALUES (?, ?, ?, ?, ?, ?)",
+                (clave, datos, expira, purga, ttl, json.dumps(tags))
+            )
+            conexion.execute("DELETE FROM entrada_tags WHERE clave = ?", (clave,))
+            conexion.executemany(
+                "INSERT OR IGNORE INTO entrada_tags (tag, clave) VALUES (?, ?)", [(tag, clave) for tag in tags]
+            )
+            return True
+
+        return self._escribir(operacion)
+
+    @staticmethod
+    def _generacion_purgada(conexion: sqlite3.Connection) -> int:
+        return conexion.execute("SELECT valor FROM meta WHERE nombre = 'generacion_purgada'").fetchone()[0]
+
+    def invalidar(self, *tags: str) -> int:
+        """Borrar las entradas con alguno de los tags y registrar la invalidación; devuelve las borradas"""
+        if not tags:
+            return 0
+
+        def operacion(conexion: sqlite3.Connection) -> int:
+            self._registrar_invalidacion(conexion, tags)
+            if TAG_TODO in tags:
+                borradas = conexion.execute("DELETE FROM entradas").rowcount
+                conexion.execute("DELETE FROM entrada_tags")
+                return borradas
+
+            claves: Set[str] = {tag[len("clave:"):] for tag in tags if tag.startswith("clave:")}
+            etiquetas = [tag for tag in tags if not tag.startswith("clave:")]
+            if etiquetas:
+                marcadores = ",".join("?" * len(etiquetas))
+                claves.update(fila[0] for fila in conexion.execute(
+                    f"SELECT DISTINCT clave FROM entrada_tags WHERE tag IN ({marcadores})", etiquetas
+                ))
+            borradas = 0
+            for clave in claves:
+                borradas += conexion.execute("DELETE FROM entradas WHERE clave = ?", (clave,)).rowcount
+                conexion.execute("DELETE FROM entrada_tags WHERE clave = ?", (clave,))
+            return borradas
+
+        return self._escribir(operacion)
+
+    def publicar(self, canal: str, origen: str, datos: Dict[str, Any]) -> int:
+        """Registrar un evento (datos JSON) para los demás procesos; devuelve su generación"""
+        def operacion(conexion: sqlite3.Connection) -> int:
+            generacion = self._siguiente_generacion(conexion)
+            conexion.execute(
+                "INSERT INTO eventos (generacion, canal, origen, datos, creada) VALUES (?, ?, ?, ?, ?)",
+                (generacion, canal, origen, json.dumps(datos), time.time())
+            )
+            return generacion
+
+        return self._escribir(operacion)
+
+    @staticmethod
+    def _siguiente_generacion(conexion: sqlite3.Connection) -> int:
+        return conexion.execute(
+            "UPDATE meta SET valor = valor + 1 WHERE nombre = 'generacion' RETURNING valor"
+        ).fetchone()[0]
+
+    @staticmethod
+    def _registrar_invalidacion(conexion: sqlite3.Connection, tags: Iterable[str]) -> int:
+        generacion = CacheCompartido._siguiente_generacion(conexion)
+        ahora = time.time()
+        conexion.executemany(
+            "INSERT INTO invalidaciones (generacion, tag, creada) VALUES (?, ?, ?)",
+            [(generacion, tag, ahora) for tag in tags]
+        )
+        return generacion
+
+    def limpiar(self) -> int:
+        """Vaciar el almacén en todos los procesos"""
+        return self.invalidar(TAG_TODO)
+
+    def cambios_desde(self, generacion: int) -> Tuple[int, Set[str]]:
+        """(generación actual, tags invalidados después de `generacion`).
+
+        Si el registro ya no cubre esa generación se devuelve TAG_TODO: quien
+        sincroniza debe vaciar su nivel local.
+        """
+        conexion = self._conexion()
+        actual = self.generacion()
+        if actual == generacion:
+            return actual, set()
+        if generacion < self._generacion_purgada(conexion):
+            return actual, {TAG_TODO}
+        tags = {fila[0] for fila in conexion.execute(
+            "SELECT DISTINCT tag FROM invalidaciones WHERE generacion > ? AND generacion <= ?", (generacion, actual)
+        )}
+        return actual, tags
+
+    def eventos_desde(self, generacion: int, hasta: int, origen: str) -> List[Tuple[int, str, Dict[str, Any]]]:
+        """(generación, canal, datos) de los eventos de otros orígenes en (generacion, hasta], en orden"""
+        return [
+            (fila[0], fila[1], json.loads(fila[2])) for fila in self._conexion().execute(
+                "SELECT generacion, canal, datos FROM eventos WHERE generacion > ? AND generacion <= ? "
+                "AND origen != ? ORDER BY generacion",
+                (generacion, hasta, origen)
+            )
+        ]
+
+    def purgar(self) -> int:
+        """Borrar entradas fuera de su ventana, las más próximas a purgarse si se excede
+        el máximo y el registro de invalidaciones antiguo; devuelve las entradas borradas"""
+        def operacion(conexion: sqlite3.Connection) -> int:
+            ahora = time.time()
+            borradas = conexion.execute("DELETE FROM entradas WHERE purga <= ?", (ahora,)).rowcount
+            exceso = conexion.execute("SELECT count(*) FROM entradas").fetchone()[0] - self.max_entradas
+            if exceso > 0:
+                borradas += conexion.execute(
+                    "DELETE FROM entradas WHERE clave IN (SELECT clave FROM entradas ORDER BY purga LIMIT ?)",
+                    (exceso,)
+                ).rowcount
+            if borradas:
+                conexion.execute("DELETE FROM entrada_tags WHERE clave NOT IN (SELECT clave FROM entradas)")
+
+            limite = ahora - self.retencion_invalidaciones
+            purgada = conexion.execute(
+                "SELECT max(generacion) FROM (SELECT generacion FROM invalidaciones WHERE creada < ? "
+                "UNION ALL SELECT generacion FROM eventos WHERE creada < ?)", (limite, limite)
+            ).fetchone()[0]
+            if purgada is not None:
+                conexion.execute("DELETE FROM invalidaciones WHERE generacion <= ?", (purgada,))
+                conexion.execute("DELETE FROM eventos WHERE generacion <= ?", (purgada,))
+                conexion.execute(
+                    "UPDATE meta SET valor = max(valor, ?) WHERE nombre = 'generacion_purgada'", (purgada,)
+                )
+            return borradas
+
+        return self._escribir(operacion)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Estadísticas del almacén compartido"""
+        conexion = self._conexion()
+        entradas, tamano = conexion.execute("SELECT count(*), coalesce(sum(length(valor)), 0) FROM entradas").fetchone()
+        return {
+            'ruta': self.ruta,
+            'entries': entradas,
+            'max_entries': self.max_entradas,
+            'bytes': tamano,
+            'generation': self.generacion()
+        }
+
+def crear_cache_compartido() -> Optional[CacheCompartido]:
+    """Almacén compartido configurado en settings (None si no hay ruta)"""
+    if not settings.cache_compartido_ruta:
+        return None
+    return CacheCompartido(settings.cache_compartido_ruta)
@@ -1,19 +1,161 @@
-from datetime import datetime, timedelta
-from typing import Dict, Any, Optional
+from collections import OrderedDict, deque
+from datetime import datetime, timedelta, date, time as time_type
+from enum import Enum
+from typing import Dict, Any, Optional, Callable, Iterable, Set, List, Union, Tuple, Awaitable
+import asyncio
+import functools
+import heapq
+import inspect
 import json
 import hashlib
+import os
+import sys
 import threading
 import time
+import uuid
+from pydantic import BaseModel
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+from ..config import settings
+from .cache_compartido import CacheCompartido, TAG_TODO, crear_cache_compartido, serializar, tag_clave
 
-class CacheService:
-    """Servicio de cache en memoria para métricas y datos frecuentes"""
+# Invalidaciones locales recientes que se recuerdan para rechazar cálculos en curso
+MAX_REGISTRO_INVALIDACIONES = 1024
+
+# Espacios de nombres: entradas que dependen de cualquier reserva, precio, horario, servicio o recurso
+TAG_RESERVAS = "reservas"
+TAG_PRECIOS = "precios"
+TAG_HORARIOS = "horarios"
+TAG_SERVICIOS = "servicios"
+TAG_RECURSOS = "recursos"
+
+def tag_servicio(servicio_id: int) -> str:
+    return f"servicio:{servicio_id}"
+
+def tag_recurso(recurso_id: int) -> str:
+    return f"recurso:{recurso_id}"
+
+def tag_fecha(fecha: Union[date, datetime, str]) -> str:
+    return f"fecha:{str(fecha)[:10]}"
+
+def tag_recurso_fecha(recurso_id: int, fecha: Union[date, datetime, str]) -> str:
+    """Reservas de un recurso en un día (disponibilidad del recurso)"""
+    return f"recurso:{recurso_id}:fecha:{str(fecha)[:10]}"
+
+def tag_horarios_recurso(recurso_id: int) -> str:
+    """Horarios de un recurso (sin sus reservas)"""
+    return f"horarios:recurso:{recurso_id}"
+
+def tag_precios_servicio(servicio_id: int) -> str:
+    """Precios de un servicio (sin las reglas dinámicas ni sus reservas)"""
+    return f"precios:servicio:{servicio_id}"
+
+def _tag_prefijo(prefix: str) -> str:
+    return f"prefijo:{prefix}"
+
+def estimar_tamano(value: Any) -> int:
+    """Bytes aproximados de un valor (tamaño serializado; se calcula una vez al guardarlo)"""
+    datos = serializar(value)
+    return len(datos) if datos is not None else sys.getsizeof(value)
+
+def huella_contenido(value: Any) -> str:
+    """Huella estable del contenido de un valor JSON-serializable (base de los ETag)"""
+    contenido = json.dumps(value, sort_keys=True, default=str, separators=(",", ":"))
+    return hashlib.blake2b(contenido.encode(), digest_size=16).hexdigest()
+
+class _Vuelo:
+    """Cálculo en curso de una clave: los seguidores esperan su resultado"""
     
     def __init__(self):
-        self._cache: Dict[str, Dict[str, Any]] = {}
-        self._locks: Dict[str, threading.Lock] = {}
+        self.terminado = threading.Event()
+        self.valor: Any = None
+        self.error: Optional[BaseException] = None
+    
+    def resultado(self) -> Any:
+        if self.error is not None:
+            raise self.error
+        return self.valor
+
+class CacheService:
+    """Servicio de cache en memoria para métricas y datos frecuentes
+
+    Cache acotado con expulsión LRU por número de entradas y por bytes. La
+    caducidad es incremental: un heap ordenado por instante de expiración
+    permite purgar solo las entradas vencidas, sin recorrer todo el cache. Las
+    estadísticas se mantienen con contadores, en O(1).
+
+    Cada entrada puede registrar tags (p.ej. `recurso:5`, `fecha:2025-06-01`)
+    además del de su prefijo; un índice tag -> claves permite invalidar
+    exactamente las entradas dependientes en tiempo proporcional a su número.
+
+    Las entradas guardadas con `max_stale_seconds` siguen sirviéndose tras su
+    TTL durante esa ventana (stale-while-revalidate) mientras un único
+    refresco en segundo plano recalcula el valor. Invalidar (por clave, tag o
+    prefijo) las elimina del todo: un dato invalidado por una escritura no se
+    sirve obsoleto. Un valor cuyo cálculo empezó antes de invalidar alguno de
+    sus tags (o su clave) no se guarda: se devuelve a quien lo pidió, pero la
+    siguiente lectura vuelve a calcularlo.
+
+    Con un CacheCompartido (segundo nivel en un fichero común a los workers)
+    los fallos locales se buscan allí, los valores calculados se guardan en
+    ambos niveles y las invalidaciones se registran para que los demás workers
+    las apliquen a su nivel local antes de leer (como mucho cada
+    `intervalo_sincronizacion` segundos). En esa misma sincronización cada
+    worker recibe los eventos que los demás publicaron (`publicar`) en los
+    canales a los que se suscribió (`suscribir`).
+    """
+    
+    def __init__(
+        self,
+        max_entries: Optional[int] = None,
+        max_bytes: Optional[int] = None,
+        reloj: Callable[[], float] = time.monotonic,
+        limpieza_automatica: bool = True,
+        compartido: Optional[CacheCompartido] = None,
+        intervalo_sincronizacion: Optional[float] = None
+    ):
+        self.max_entries = max_entries if max_entries is not None else settings.cache_max_entradas
+        self.max_bytes = max_bytes if max_bytes is not None else settings.cache_max_bytes
+        self._reloj = reloj
+        self.compartido = compartido
+        self.intervalo_sincronizacion = (
+            intervalo_sincronizacion if intervalo_sincronizacion is not None
+            else settings.cache_compartido_sincronizacion
+        )
+        # Última generación de invalidaciones compartidas aplicada al nivel local
+        self._generacion = compartido.generacion() if compartido is not None else 0
+        # Versión de las invalidaciones de este nivel local y registro (versión, tags) de las recientes
+        self._version_local = 0
+        self._invalidaciones_locales: "deque[Tuple[int, frozenset]]" = deque(maxlen=MAX_REGISTRO_INVALIDACIONES)
+        self._ultima_sincronizacion = 0.0
+        # Manejadores de eventos de otros workers por canal; el token distingue los propios
+        self._suscripciones: Dict[str, List[Callable[[Dict[str, Any]], None]]] = {}
+        self._token = uuid.uuid4().hex
+        # Orden de uso: la primera entrada es la menos usada recientemente
+        self._cache: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        # Cálculos en curso por clave (single-flight) para llamadas síncronas y async
+        self._vuelos: Dict[str, "_Vuelo"] = {}
+        self._vuelos_async: Dict[Tuple[int, str], "asyncio.Task"] = {}
+        self._por_tag: Dict[str, Set[str]] = {}
+        # Aciertos, aciertos obsoletos y fallos por prefijo (uno por endpoint o función cacheada)
+        self._por_prefijo: Dict[str, List[int]] = {}
+        self._lock = threading.RLock()
+        # (instante de purga, clave); las entradas reemplazadas se descartan al purgar
+        self._expiraciones: list = []
+        self._bytes = 0
+        self._hits = 0
+        self._misses = 0
+        self._stale_hits = 0
+        self._shared_hits = 0
+        self._evictions = 0
+        self._expirations = 0
+        self._coalesced = 0
+        self._refreshes = 0
+        self._refresh_errors = 0
         self._cleanup_thread = None
         self._running = False
-        self._start_cleanup_thread()
+        if limpieza_automatica:
+            self._start_cleanup_thread()
     
     def _start_cleanup_thread(self):
         """Iniciar thread de limpieza automática del cache"""
@@ -27,23 +169,47 @@ class CacheService:
         while self._running:
             try:
                 self._cleanup_expired()
+                if self.compartido is not None:
+                    self.compartido.purgar()
                 time.sleep(60)  # Limpiar cada minuto
             except Exception as e:
                 print(f"Error en limpieza de cache: {e}")
                 time.sleep(300)  # Esperar 5 minutos si hay error
     
-    def _cleanup_expired(self):
-        """Limpiar entradas expiradas del cache"""
-        now = datetime.now()
-        expired_keys = []
-        
-        for key, data in self._cache.items():
-            if 'expires_at' in data and data['expires_at'] < now:
-                expired_keys.append(key)
-        
-        for key in expired_keys:
-            self._cache.pop(key, None)
-            self._locks.pop(key, None)
+    def _cleanup_expired(self) -> int:
+        """Purgar las entradas vencidas (y fuera de su ventana de obsolescencia) desde la cima del heap"""
+        ahora = self._reloj()
+        purgadas = 0
+        with self._lock:
+            while self._expiraciones and self._expiraciones[0][0] <= ahora:
+                purga, key = heapq.heappop(self._expiraciones)
+                data = self._cache.get(key)
+                # Solo si la entrada sigue siendo la que programó esta expiración
+                if data is not None and data['stale_ts'] == purga:
+                    self._remove(key)
+                    self._expirations += 1
+                    purgadas += 1
+            # Compactar si se acumulan expiraciones de entradas ya reemplazadas
+            if len(self._expiraciones) > 2 * len(self._cache) + 64:
+                self._expiraciones = [(d['stale_ts'], k) for k, d in self._cache.items()]
+                heapq.heapify(self._expiraciones)
+        return purgadas
+    
+    def _remove(self, key: str) -> Optional[Dict[str, Any]]:
+        """Quitar una entrada actualizando los contadores (con self._lock tomado)"""
+        data = self._cache.pop(key, None)
+        if data is not None:
+            self._desindexar(key, data)
+        return data
+    
+    def _desindexar(self, key: str, data: Dict[str, Any]):
+        self._bytes -= data['size']
+        for tag in data['tags']:
+            claves = self._por_tag.get(tag)
+            if claves is not None:
+                claves.discard(key)
+                if not claves:
+                    del self._por_tag[tag]
     
     def _generate_key(self, prefix: str, **kwargs) -> str:
         """Generar clave única para el cache"""
@@ -54,182 +220,811 @@ class CacheService:
     
     def get(self, prefix: str, **kwargs) -> Optional[Any]:
         """Obtener valor del cache"""
-        key = self._generate_key(prefix, **kwargs)
+        return self._get_key(self._generate_key(prefix, **kwargs), prefix=prefix)
+    
+    def _get_key(self, key: str, contar: bool = True, prefix: Optional[str] = None) -> Optional[Any]:
+        """Valor vigente de una clave; una entrada obsoleta cuenta como fallo"""
+        value, obsoleta = self._consultar(key, contar, servir_obsoleta=False, prefix=prefix)
+        return value
+    
+    def _consultar(
+        self,
+        key: str,
+        contar: bool = True,
+        servir_obsoleta: bool = True,
+        prefix: Optional[str] = None
+    ) -> Tuple[Optional[Any], bool]:
+        """(valor, obsoleto): con `servir_obsoleta` devuelve también entradas vencidas dentro de su ventana"""
+        self._sincronizar()
+        value, obsoleta = self._consultar_local(key, servir_obsoleta)
+        compartida = False
+        if value is None and self.compartido is not None and self._cargar_compartido(key):
+            value, obsoleta = self._consultar_local(key, servir_obsoleta)
+            compartida = value is not None
         
-        if key in self._cache:
-            data = self._cache[key]
-            if 'expires_at' not in data or data['expires_at'] > datetime.now():
-                return data['value']
+        if not contar:
+            return value, obsoleta
+        # 0 = acierto, 1 = acierto obsoleto, 2 = fallo
+        resultado = 2 if value is None else int(obsoleta)
+        with self._lock:
+            if resultado == 2:
+                self._misses += 1
+            elif obsoleta:
+                self._stale_hits += 1
             else:
-                # Expiró, remover
-                self._cache.pop(key, None)
-                self._locks.pop(key, None)
+                self._hits += 1
+            self._shared_hits += compartida
+            if prefix is not None:
+                contadores = self._por_prefijo.get(prefix)
+                if contadores is None:
+                    contadores = self._por_prefijo[prefix] = [0, 0, 0]
+                contadores[resultado] += 1
+        return value, obsoleta
+    
+    def _consultar_local(self, key: str, servir_obsoleta: bool) -> Tuple[Optional[Any], bool]:
+        """Consulta del nivel en memoria, sin contar aciertos ni fallos"""
+        with self._lock:
+            data = self._cache.get(key)
+            if data is not None:
+                ahora = self._reloj()
+                if data['expires_ts'] > ahora:
+                    self._cache.move_to_end(key)
+                    data['access_count'] += 1
+                    return data['value'], False
+                if data['stale_ts'] > ahora:
+                    # Vencida pero dentro de su ventana: se conserva para los refrescos
+                    if servir_obsoleta:
+                        self._cache.move_to_end(key)
+                        data['access_count'] += 1
+                        return data['value'], True
+                else:
+                    # Expiró, remover
+                    self._remove(key)
+                    self._expirations += 1
         
-        return None
+        return None, False
     
-    def set(self, prefix: str, value: Any, ttl_seconds: int = 300, **kwargs) -> str:
-        """Establecer valor en el cache con TTL"""
-        key = self._generate_key(prefix, **kwargs)
+    # ===== NIVEL COMPARTIDO ENTRE WORKERS =====
+    
+    def _sincronizar(self, forzar: bool = False):
+        """Aplicar al nivel local las invalidaciones y los eventos registrados por otros workers"""
+        if self.compartido is None:
+            return
+        ahora = time.monotonic()
+        if not forzar and ahora - self._ultima_sincronizacion < self.intervalo_sincronizacion:
+            return
+        self._ultima_sincronizacion = ahora
         
-        # Crear lock si no existe
-        if key not in self._locks:
-            self._locks[key] = threading.Lock()
-        
-        with self._locks[key]:
-            self._cache[key] = {
-                'value': value,
-                'created_at': datetime.now(),
-                'expires_at': datetime.now() + timedelta(seconds=ttl_seconds),
-                'ttl': ttl_seconds,
-                'access_count': 0
-            }
+        anterior = self._generacion
+        generacion, tags = self.compartido.cambios_desde(anterior)
+        if generacion <= anterior:
+            return
+        eventos = self.compartido.eventos_desde(anterior, generacion, self._origen()) if self._suscripciones else []
+        with self._lock:
+            if generacion <= self._generacion:
+                return
+            # Otro hilo pudo aplicar ya una parte: cada evento se entrega una sola vez
+            eventos = [evento for evento in eventos if evento[0] > self._generacion]
+            if TAG_TODO in tags:
+                self._vaciar_local()
+            else:
+                self._invalidar_local(tags)
+            self._generacion = generacion
         
-        return key
+        for _, canal, datos in eventos:
+            for manejador in self._suscripciones.get(canal, ()):
+                try:
+                    manejador(datos)
+                except Exception as e:
+                    print(f"Error aplicando evento de cache '{canal}': {e}")
+    
+    def sincronizar(self):
+        """Sincronizar ya con los demás workers, sin esperar al intervalo"""
+        self._sincronizar(forzar=True)
+    
+    def _origen(self) -> str:
+        # Distinto en cada proceso aunque el servicio se herede con fork
+        return f"{os.getpid()}:{self._token}"
+    
+    def suscribir(self, canal: str, manejador: Callable[[Dict[str, Any]], None]):
+        """Recibir los eventos de `canal` publicados por otros workers (al sincronizar)"""
+        self._suscripciones.setdefault(canal, []).append(manejador)
+    
+    def publicar(self, canal: str, datos: Dict[str, Any]) -> bool:
+        """Enviar un evento (datos JSON) a los demás workers; este no lo recibe.
+        
+        Para estados `local` que cada worker mantiene al día en memoria: quien
+        publica aplica el cambio al suyo y los demás al sincronizar. False sin
+        nivel compartido (no hay otros workers a los que avisar).
+        """
+        if self.compartido is None:
+            return False
+        self.compartido.publicar(canal, self._origen(), datos)
+        return True
+    
+    def _cargar_compartido(self, key: str) -> bool:
+        """Copiar al nivel local una entrada del nivel compartido; False si no está"""
+        fila = self.compartido.obtener(key)
+        if fila is None:
+            return False
+        value, expira, purga, ttl, tags, size = fila
+        # El nivel compartido usa reloj de pared; el local, self._reloj
+        desfase = self._reloj() - time.time()
+        with self._lock:
+            anterior = self._cache.pop(key, None)
+            if anterior is not None:
+                self._desindexar(key, anterior)
+            self._guardar_local(key, value, size, tuple(tags), expira + desfase, purga + desfase, ttl)
+        return True
     
-    def get_or_set(self, prefix: str, default_func, ttl_seconds: int = 300, **kwargs) -> Any:
-        """Obtener del cache o establecer usando función por defecto"""
+    def set(
+        self,
+        prefix: str,
+        value: Any,
+        ttl_seconds: int = 300,
+        tags: Optional[Iterable[str]] = None,
+        max_stale_seconds: int = 0,
+        local: bool = False,
+        **kwargs
+    ) -> str:
+        """Establecer valor en el cache con TTL, tags de invalidación y ventana de obsolescencia opcionales.
+        
+        Con `local` el valor no se comparte con otros workers (p.ej. objetos que se
+        modifican en memoria).
+        """
         key = self._generate_key(prefix, **kwargs)
+        self._set_key(key, prefix, value, ttl_seconds, tags, max_stale_seconds, local=local)
+        return key
+    
+    def _set_key(
+        self,
+        key: str,
+        prefix: str,
+        value: Any,
+        ttl_seconds: int,
+        tags: Optional[Iterable[str]],
+        max_stale_seconds: int = 0,
+        generacion: Optional[int] = None,
+        local: bool = False,
+        version_local: Optional[int] = None
+    ):
+        """Guardar en ambos niveles; `generacion` y `version_local` son las leídas antes de calcular el valor"""
+        datos = serializar(value)
+        size = len(datos) if datos is not None else sys.getsizeof(value)
+        tags = (_tag_prefijo(prefix), *(tags or ()))
+        max_stale_seconds = max(max_stale_seconds, 0)
+        
+        guardar = size <= self.max_bytes and not self._invalidada_desde(version_local, key, tags)
+        if guardar and self.compartido is not None and not local and datos is not None:
+            ahora = time.time()
+            # Rechazado si otro worker invalidó sus tags mientras se calculaba
+            guardar = self.compartido.guardar(
+                key, datos, ahora + ttl_seconds, ahora + ttl_seconds + max_stale_seconds, ttl_seconds, tags,
+                self._generacion if generacion is None else generacion
+            )
         
-        # Intentar obtener del cache
-        cached_value = self.get(prefix, **kwargs)
-        if cached_value is not None:
-            # Incrementar contador de accesos
-            if key in self._cache:
-                self._cache[key]['access_count'] += 1
-            return cached_value
-        
-        # Crear lock si no existe
-        if key not in self._locks:
-            self._locks[key] = threading.Lock()
-        
-        with self._locks[key]:
-            # Verificar nuevamente (double-checked locking)
-            cached_value = self.get(prefix, **kwargs)
-            if cached_value is not None:
-                return cached_value
+        with self._lock:
+            anterior = self._cache.pop(key, None)
+            if anterior is not None:
+                self._desindexar(key, anterior)
+            if not guardar or self._invalidada_desde(version_local, key, tags):
+                # Mayor que todo el presupuesto o invalidado mientras se calculaba
+                return
             
-            # Generar valor por defecto
-            try:
-                value = default_func()
-                self.set(prefix, value, ttl_seconds, **kwargs)
-                return value
-            except Exception as e:
-                print(f"Error generando valor por defecto para cache: {e}")
-                return None
+            expira = self._reloj() + ttl_seconds
+            self._guardar_local(key, value, size, tags, expira, expira + max_stale_seconds, ttl_seconds)
     
-    def invalidate(self, prefix: str, **kwargs) -> bool:
-        """Invalidar entrada específica del cache"""
+    def _invalidada_desde(self, version_local: Optional[int], key: str, tags: Tuple[str, ...]) -> bool:
+        """True si la clave o alguno de sus tags se invalidó localmente después de `version_local`"""
+        with self._lock:
+            if version_local is None or version_local == self._version_local:
+                return False
+            if not self._invalidaciones_locales or self._invalidaciones_locales[0][0] > version_local + 1:
+                # El registro ya no llega tan atrás: se asume invalidada
+                return True
+            afectados = {TAG_TODO, tag_clave(key), *tags}
+            for version, invalidados in reversed(self._invalidaciones_locales):
+                if version <= version_local:
+                    return False
+                if not afectados.isdisjoint(invalidados):
+                    return True
+            return False
+    
+    def _registrar_invalidacion_local(self, tags: Iterable[str]):
+        """Anotar una invalidación del nivel local (con self._lock tomado)"""
+        self._version_local += 1
+        self._invalidaciones_locales.append((self._version_local, frozenset(tags)))
+    
+    def _guardar_local(
+        self,
+        key: str,
+        value: Any,
+        size: int,
+        tags: Tuple[str, ...],
+        expira: float,
+        purga: float,
+        ttl_seconds: int
+    ):
+        """Insertar una entrada en el nivel local (con self._lock tomado y la clave libre)"""
+        self._cache[key] = {
+            'value': value,
+            'created_at': datetime.now(),
+            'expires_ts': expira,
+            'stale_ts': purga,
+            'ttl': ttl_seconds,
+            'access_count': 0,
+            'size': size,
+            'tags': tags
+        }
+        self._bytes += size
+        for tag in tags:
+            self._por_tag.setdefault(tag, set()).add(key)
+        heapq.heappush(self._expiraciones, (purga, key))
+        self._evict()
+    
+    def _evict(self):
+        """Expulsar las entradas menos usadas hasta cumplir los límites (con self._lock tomado)"""
+        while self._cache and (len(self._cache) > self.max_entries or self._bytes > self.max_bytes):
+            key = next(iter(self._cache))
+            self._remove(key)
+            self._evictions += 1
+    
+    # ===== SINGLE-FLIGHT: UN SOLO CÁLCULO POR CLAVE =====
+    
+    def get_or_compute(
+        self,
+        prefix: str,
+        func: Callable[[], Any],
+        ttl_seconds: int = 300,
+        tags: Optional[Iterable[str]] = None,
+        max_stale_seconds: int = 0,
+        refrescar: Optional[Callable[[], Any]] = None,
+        **kwargs
+    ) -> Any:
+        """Obtener del cache o calcular con `func`, una sola vez por clave.
+        
+        Las llamadas concurrentes con la misma clave esperan al cálculo en curso
+        y reciben su resultado (o su excepción, que no se cachea).
+        
+        Con `max_stale_seconds` una entrada vencida se devuelve al momento
+        durante esa ventana y se recalcula en un hilo con `refrescar` (por
+        defecto `func`), una sola vez por clave.
+        """
         key = self._generate_key(prefix, **kwargs)
+        value, obsoleta = self._consultar(key, prefix=prefix)
+        generacion, version_local = self._generacion, self._version_local
+        if value is not None:
+            if obsoleta:
+                self._refrescar(key, prefix, refrescar or func, ttl_seconds, tags, max_stale_seconds)
+            return value
+        
+        with self._lock:
+            vuelo = self._vuelos.get(key)
+            lider = vuelo is None
+            if lider:
+                vuelo = self._vuelos[key] = _Vuelo()
+            else:
+                self._coalesced += 1
         
-        if key in self._cache:
-            self._cache.pop(key, None)
-            self._locks.pop(key, None)
-            return True
+        if not lider:
+            vuelo.terminado.wait()
+            return vuelo.resultado()
         
-        return False
+        try:
+            # Otro líder pudo terminar entre la consulta y el registro del vuelo
+            value = self._get_key(key, contar=False)
+            if value is None:
+                value = func()
+                self._set_key(
+                    key, prefix, value, ttl_seconds, tags, max_stale_seconds, generacion, version_local=version_local
+                )
+            vuelo.valor = value
+            return value
+        except BaseException as e:
+            vuelo.error = e
+            raise
+        finally:
+            with self._lock:
+                self._vuelos.pop(key, None)
+            vuelo.terminado.set()
     
-    def invalidate_pattern(self, prefix: str) -> int:
-        """Invalidar todas las entradas que coincidan con un prefijo"""
-        keys_to_remove = []
+    def _refrescar(
+        self,
+        key: str,
+        prefix: str,
+        func: Callable[[], Any],
+        ttl_seconds: int,
+        tags: Optional[Iterable[str]],
+        max_stale_seconds: int
+    ):
+        """Recalcular una entrada obsoleta en un hilo, salvo que ya haya un cálculo en curso"""
+        with self._lock:
+            if key in self._vuelos:
+                return
+            vuelo = self._vuelos[key] = _Vuelo()
+            self._refreshes += 1
+        
+        def ejecutar():
+            generacion, version_local = self._generacion, self._version_local
+            try:
+                vuelo.valor = func()
+                self._set_key(
+                    key, prefix, vuelo.valor, ttl_seconds, tags, max_stale_seconds, generacion,
+                    version_local=version_local
+                )
+            except BaseException as e:
+                # Se sigue sirviendo el valor obsoleto hasta el fin de su ventana
+                vuelo.error = e
+                with self._lock:
+                    self._refresh_errors += 1
+                print(f"Error refrescando cache '{prefix}': {e}")
+            finally:
+                with self._lock:
+                    self._vuelos.pop(key, None)
+                vuelo.terminado.set()
+        
+        threading.Thread(target=ejecutar, daemon=True).start()
+    
+    async def get_or_compute_async(
+        self,
+        prefix: str,
+        func: Callable[[], Awaitable[Any]],
+        ttl_seconds: int = 300,
+        tags: Optional[Iterable[str]] = None,
+        max_stale_seconds: int = 0,
+        refrescar: Optional[Callable[[], Awaitable[Any]]] = None,
+        **kwargs
+    ) -> Any:
+        """Versión para `async def`: las corrutinas concurrentes comparten una tarea.
+        
+        El cálculo corre en una tarea propia, así que cancelar a quien lo inició
+        no cancela la espera de los demás. Una entrada obsoleta se devuelve al
+        momento y se refresca en una tarea del mismo loop. Con nivel compartido
+        sus lecturas y escrituras (sqlite3, bloqueantes) se hacen en un hilo.
+        """
+        key = self._generate_key(prefix, **kwargs)
+        value, obsoleta = await self._sin_bloquear(self._consultar, key, prefix=prefix)
+        generacion, version_local = self._generacion, self._version_local
+        loop = asyncio.get_running_loop()
+        clave_vuelo = (id(loop), key)
+        tarea = self._vuelos_async.get(clave_vuelo)
+        
+        if value is not None:
+            if obsoleta and tarea is None:
+                self._refreshes += 1
+                func_refresco = refrescar or func
+                
+                async def refrescar_entrada():
+                    try:
+                        resultado = await func_refresco()
+                        await self._sin_bloquear(
+                            self._set_key, key, prefix, resultado, ttl_seconds, tags, max_stale_seconds,
+                            generacion, version_local=version_local
+                        )
+                        return resultado
+                    except Exception as e:
+                        self._refresh_errors += 1
+                        print(f"Error refrescando cache '{prefix}': {e}")
+                        return value
+                    finally:
+                        self._vuelos_async.pop(clave_vuelo, None)
+                
+                self._vuelos_async[clave_vuelo] = loop.create_task(refrescar_entrada())
+            return value
         
-        for key in self._cache.keys():
-            if key.startswith(prefix):
-                keys_to_remove.append(key)
+        if tarea is None:
+            async def calcular():
+                try:
+                    resultado = await self._sin_bloquear(self._get_key, key, contar=False)
+                    if resultado is None:
+                        resultado = await func()
+                        await self._sin_bloquear(
+                            self._set_key, key, prefix, resultado, ttl_seconds, tags, max_stale_seconds,
+                            generacion, version_local=version_local
+                        )
+                    return resultado
+                finally:
+                    self._vuelos_async.pop(clave_vuelo, None)
+            
+            tarea = self._vuelos_async[clave_vuelo] = loop.create_task(calcular())
+        else:
+            self._coalesced += 1
         
-        for key in keys_to_remove:
-            self._cache.pop(key, None)
-            self._locks.pop(key, None)
+        return await asyncio.shield(tarea)
+    
+    async def _sin_bloquear(self, funcion: Callable[..., Any], *args, **kwargs) -> Any:
+        """Llamar a `funcion` desde el loop: en un hilo si puede tocar el nivel compartido"""
+        if self.compartido is None:
+            return funcion(*args, **kwargs)
+        return await asyncio.to_thread(funcion, *args, **kwargs)
+    
+    async def esperar_refrescos(self, plazo: float) -> int:
+        """Esperar hasta `plazo` segundos a los cálculos en curso (al apagar el worker).
+
+        Cubre los refrescos en hilos y las tareas del loop actual; devuelve
+        cuántos siguen pendientes al vencer el plazo.
+        """
+        limite = time.monotonic() + plazo
+        loop = asyncio.get_running_loop()
+        tareas = [tarea for (id_loop, _), tarea in list(self._vuelos_async.items()) if id_loop == id(loop)]
+        if tareas:
+            await asyncio.wait(tareas, timeout=plazo)
+        for vuelo in list(self._vuelos.values()):
+            restante = limite - time.monotonic()
+            if restante <= 0:
+                break
+            await asyncio.to_thread(vuelo.terminado.wait, restante)
+        with self._lock:
+            return len(self._vuelos) + len(self._vuelos_async)
+    
+    def get_or_set(
+        self,
+        prefix: str,
+        default_func,
+        ttl_seconds: int = 300,
+        tags: Optional[Iterable[str]] = None,
+        **kwargs
+    ) -> Any:
+        """Obtener del cache o establecer usando función por defecto (None si falla)"""
+        try:
+            return self.get_or_compute(prefix, default_func, ttl_seconds, tags, **kwargs)
+        except Exception as e:
+            print(f"Error generando valor por defecto para cache: {e}")
+            return None
+    
+    def invalidate(self, prefix: str, **kwargs) -> bool:
+        """Invalidar entrada específica del cache"""
+        key = self._generate_key(prefix, **kwargs)
         
-        return len(keys_to_remove)
+        with self._lock:
+            eliminada = self._remove(key) is not None
+            self._registrar_invalidacion_local((tag_clave(key),))
+        if self.compartido is not None:
+            eliminada = bool(self.compartido.invalidar(tag_clave(key))) or eliminada
+        return eliminada
+    
+    def invalidate_pattern(self, prefix: str) -> int:
+        """Invalidar todas las entradas guardadas con un prefijo"""
+        return self.invalidate_tags(_tag_prefijo(prefix))
+    
+    def invalidate_tags(self, *tags: str) -> int:
+        """Invalidar las entradas que registraron alguno de los tags (devuelve las locales)"""
+        with self._lock:
+            eliminadas = self._invalidar_local(tags)
+        if self.compartido is not None:
+            self.compartido.invalidar(*tags)
+        return eliminadas
+    
+    def _invalidar_local(self, tags: Iterable[str]) -> int:
+        """Quitar del nivel local las entradas con alguno de los tags (con self._lock tomado)"""
+        self._registrar_invalidacion_local(tags)
+        keys_to_remove = set()
+        for tag in tags:
+            if tag.startswith("clave:"):
+                keys_to_remove.add(tag[len("clave:"):])
+            else:
+                keys_to_remove.update(self._por_tag.get(tag, ()))
+        return sum(self._remove(key) is not None for key in keys_to_remove)
     
     def clear(self):
-        """Limpiar todo el cache"""
+        """Limpiar todo el cache (también el nivel compartido)"""
+        with self._lock:
+            self._vaciar_local()
+        if self.compartido is not None:
+            self.compartido.limpiar()
+    
+    def _vaciar_local(self):
+        self._registrar_invalidacion_local((TAG_TODO,))
         self._cache.clear()
-        self._locks.clear()
+        self._por_tag.clear()
+        self._expiraciones.clear()
+        self._bytes = 0
     
     def get_stats(self) -> Dict[str, Any]:
-        """Obtener estadísticas del cache"""
-        now = datetime.now()
-        total_entries = len(self._cache)
-        expired_entries = 0
-        total_access_count = 0
-        memory_usage = 0
-        
-        for data in self._cache.values():
-            if 'expires_at' in data and data['expires_at'] < now:
-                expired_entries += 1
-            
-            if 'access_count' in data:
-                total_access_count += data['access_count']
-            
-            # Estimación simple del uso de memoria
-            memory_usage += len(str(data))
-        
-        return {
-            'total_entries': total_entries,
-            'expired_entries': expired_entries,
-            'active_entries': total_entries - expired_entries,
-            'total_access_count': total_access_count,
-            'estimated_memory_bytes': memory_usage,
-            'locks_count': len(self._locks),
-            'timestamp': now.isoformat()
-        }
+        """Obtener estadísticas del cache (contadores, sin recorrer las entradas)"""
+        with self._lock:
+            servidas = self._hits + self._stale_hits
+            consultas = servidas + self._misses
+            return {
+                'total_entries': len(self._cache),
+                'max_entries': self.max_entries,
+                'estimated_memory_bytes': self._bytes,
+                'max_bytes': self.max_bytes,
+                'hits': self._hits,
+                'stale_hits': self._stale_hits,
+                'shared_hits': self._shared_hits,
+                'misses': self._misses,
+                'hit_ratio': round(servidas / consultas, 4) if consultas else 0.0,
+                'stale_ratio': round(self._stale_hits / consultas, 4) if consultas else 0.0,
+                'evictions': self._evictions,
+                'expirations': self._expirations,
+                'refreshes': self._refreshes,
+                'refresh_errors': self._refresh_errors,
+                'total_access_count': servidas,
+                'coalesced': self._coalesced,
+                'in_flight': len(self._vuelos) + len(self._vuelos_async),
+                'tags_count': len(self._por_tag),
+                'prefixes': len(self._por_prefijo),
+                'shared': self.compartido.get_stats() if self.compartido is not None else None,
+                'generation': self._generacion,
+                'timestamp': datetime.now().isoformat()
+            }
+    
+    def get_stats_por_prefijo(self) -> Dict[str, Dict[str, Any]]:
+        """Aciertos, fallos y ratio de aciertos de cada prefijo consultado"""
+        with self._lock:
+            por_prefijo = {prefix: list(contadores) for prefix, contadores in self._por_prefijo.items()}
+        estadisticas = {}
+        for prefix, (hits, stale_hits, misses) in sorted(por_prefijo.items()):
+            consultas = hits + stale_hits + misses
+            estadisticas[prefix] = {
+                'hits': hits,
+                'stale_hits': stale_hits,
+                'misses': misses,
+                'hit_ratio': round((hits + stale_hits) / consultas, 4) if consultas else 0.0
+            }
+        return estadisticas
     
     def get_entry_info(self, prefix: str, **kwargs) -> Optional[Dict[str, Any]]:
         """Obtener información detallada de una entrada específica"""
         key = self._generate_key(prefix, **kwargs)
         
-        if key in self._cache:
-            data = self._cache[key]
-            now = datetime.now()
+        with self._lock:
+            data = self._cache.get(key)
+            if data is None:
+                return None
+            ahora = self._reloj()
+            restante = data['expires_ts'] - ahora
             
             return {
                 'key': key,
                 'value_type': type(data['value']).__name__,
+                'size_bytes': data['size'],
+                'tags': list(data['tags']),
                 'created_at': data['created_at'].isoformat(),
-                'expires_at': data['expires_at'].isoformat() if 'expires_at' in data else None,
+                'expires_at': (datetime.now() + timedelta(seconds=restante)).isoformat(),
                 'ttl_seconds': data.get('ttl', 0),
                 'access_count': data.get('access_count', 0),
-                'is_expired': 'expires_at' in data and data['expires_at'] < now,
-                'time_until_expiry': (data['expires_at'] - now).total_seconds() if 'expires_at' in data and data['expires_at'] > now else 0
+                'is_expired': restante <= 0,
+                'is_stale': restante <= 0 < data['stale_ts'] - ahora,
+                'max_stale_seconds': data['stale_ts'] - data['expires_ts'],
+                'time_until_expiry': max(restante, 0)
             }
-        
-        return None
 
-# Instancia global del cache
-cache_service = CacheService()
+# Instancia global del cache (con nivel compartido si hay ruta configurada)
+cache_service = CacheService(compartido=crear_cache_compartido())
+
+def _dias(fecha: Union[date, datetime, str], fecha_fin: Union[date, datetime, str, None]) -> List[str]:
+    """Días (YYYY-MM-DD) que ocupa una reserva, de su inicio a su fin"""
+    inicio = date.fromisoformat(str(fecha)[:10])
+    fin = date.fromisoformat(str(fecha_fin)[:10]) if fecha_fin is not None else inicio
+    return [(inicio + timedelta(days=i)).isoformat() for i in range(max((fin - inicio).days, 0) + 1)]
+
+# Periodos de más días se etiquetan con TAG_RESERVAS en lugar de día a día
+MAX_DIAS_TAGS_PERIODO = 366
+
+def tags_periodo(fecha_inicio: Union[date, datetime, str], fecha_fin: Union[date, datetime, str], **_) -> List[str]:
+    """Un tag por día del periodo: una reserva solo invalida los periodos que incluyen su fecha"""
+    try:
+        dias = _dias(fecha_inicio, fecha_fin)
+    except ValueError:
+        # Fecha inválida: la función responde 400 y no se guarda nada
+        return []
+    if len(dias) > MAX_DIAS_TAGS_PERIODO:
+        return [TAG_RESERVAS]
+    return [tag_fecha(dia) for dia in dias]
+
+def invalidar_por_reserva(
+    servicio_id: int,
+    recurso_id: int,
+    fecha: Union[date, datetime, str],
+    fecha_fin: Union[date, datetime, str, None] = None
+) -> int:
+    """Invalidar las entradas que dependen de una reserva creada, modificada o eliminada"""
+    tags = [TAG_RESERVAS, tag_servicio(servicio_id), tag_recurso(recurso_id)]
+    for dia in _dias(fecha, fecha_fin):
+        tags.extend((tag_fecha(dia), tag_recurso_fecha(recurso_id, dia)))
+    return cache_service.invalidate_tags(*tags)
+
+def invalidar_por_precio(servicio_id: Optional[int] = None, recurso_id: Optional[int] = None) -> int:
+    """Invalidar las entradas que dependen de los precios (de un servicio o recurso, o reglas globales)"""
+    tags = [TAG_PRECIOS]
+    if servicio_id is not None:
+        tags.extend((tag_servicio(servicio_id), tag_precios_servicio(servicio_id)))
+    if recurso_id is not None:
+        tags.append(tag_recurso(recurso_id))
+    return cache_service.invalidate_tags(*tags)
+
+def invalidar_por_horario(recurso_id: int) -> int:
+    """Invalidar las entradas que dependen de los horarios de un recurso"""
+    return cache_service.invalidate_tags(TAG_HORARIOS, tag_recurso(recurso_id), tag_horarios_recurso(recurso_id))
+
+def invalidar_por_servicio(servicio_id: int) -> int:
+    """Invalidar las entradas que dependen de los datos de un servicio (catálogo, duración)"""
+    return cache_service.invalidate_tags(TAG_SERVICIOS, tag_servicio(servicio_id))
+
+def invalidar_por_recurso(recurso_id: int) -> int:
+    """Invalidar las entradas que dependen de los datos de un recurso (catálogo, disponibilidad)"""
+    return cache_service.invalidate_tags(TAG_RECURSOS, tag_recurso(recurso_id), tag_horarios_recurso(recurso_id))
+
+def _normalizar_argumento(valor: Any) -> Any:
+    """Representación JSON estable de un argumento para la clave del cache"""
+    if valor is None or isinstance(valor, (bool, int, float, str)):
+        return valor
+    if isinstance(valor, Enum):
+        return _normalizar_argumento(valor.value)
+    if isinstance(valor, (datetime, date, time_type)):
+        return valor.isoformat()
+    if isinstance(valor, BaseModel):
+        return valor.model_dump(mode="json")
+    if isinstance(valor, dict):
+        return {str(k): _normalizar_argumento(v) for k, v in sorted(valor.items(), key=lambda item: str(item[0]))}
+    if isinstance(valor, (set, frozenset)):
+        return sorted((_normalizar_argumento(v) for v in valor), key=repr)
+    if isinstance(valor, (list, tuple)):
+        return [_normalizar_argumento(v) for v in valor]
+    raise TypeError(f"Argumento de tipo {type(valor).__name__} no utilizable en la clave del cache")
+
+# Sesiones de base de datos: no forman parte de la clave y el refresco usa otras nuevas
+_SESIONES = (Session, AsyncSession)
 
 class CacheDecorator:
-    """Decorador para cachear métodos de servicios"""
+    """Decorador para cachear métodos de servicios (funciones normales o `async def`)
+    
+    La clave incluye todos los argumentos de la llamada salvo la sesión de base
+    de datos y los nombrados en `ignorar`; un argumento sin representación
+    estable (ver _normalizar_argumento) es un error, no se omite. Los fallos de
+    cache se calculan una sola vez aunque lleguen muchas llamadas a la vez.
+    
+    `tags` son los tags de invalidación de cada resultado: una lista fija o
+    una función que recibe los argumentos de la llamada y devuelve la lista.
+    
+    Con `max_stale_seconds` el resultado vencido se sirve durante esa ventana
+    mientras se recalcula en segundo plano. El refresco no puede usar la sesión
+    de la petición (se cierra al responder): las sesiones de los argumentos se
+    sustituyen por otras nuevas de `session_factory`.
     
-    def __init__(self, prefix: str, ttl_seconds: int = 300):
+    Con `etag` el resultado se cachea junto a su huella de contenido (calculada
+    una vez al guardarlo, en la misma entrada: caducan e invalidan a la vez) y
+    la función decorada expone `con_etag(...)`, que devuelve (huella, resultado)
+    para responder 304 sin volver a serializar ni consultar la base de datos.
+    """
+    
+    def __init__(
+        self,
+        prefix: str,
+        ttl_seconds: int = 300,
+        tags: Union[Iterable[str], Callable[..., Iterable[str]], None] = None,
+        ignorar: Iterable[str] = (),
+        max_stale_seconds: int = 0,
+        session_factory: Optional[Callable[[], Session]] = None,
+        etag: bool = False
+    ):
         self.prefix = prefix
         self.ttl_seconds = ttl_seconds
+        self.tags = tags
+        self.ignorar = set(ignorar)
+        self.max_stale_seconds = max_stale_seconds
+        self.session_factory = session_factory
+        self.etag = etag
+    
+    def _argumentos(self, firma: inspect.Signature, args, kwargs) -> Dict[str, Any]:
+        argumentos = firma.bind(*args, **kwargs)
+        argumentos.apply_defaults()
+        return dict(argumentos.arguments)
+    
+    def _clave(self, argumentos: Dict[str, Any]) -> Dict[str, Any]:
+        return {
+            nombre: _normalizar_argumento(valor)
+            for nombre, valor in argumentos.items()
+            if nombre not in self.ignorar and not isinstance(valor, _SESIONES)
+        }
+    
+    def _tags(self, argumentos: Dict[str, Any]) -> Optional[Iterable[str]]:
+        return self.tags(**argumentos) if callable(self.tags) else self.tags
+    
+    def _nueva_sesion(self, original: Union[Session, AsyncSession]) -> Union[Session, AsyncSession]:
+        if self.session_factory is not None:
+            return self.session_factory()
+        # Los resultados cacheados son lecturas: se refrescan con una sesión de solo
+        # lectura que no va a la réplica (volvería a guardar datos ya invalidados)
+        if isinstance(original, AsyncSession):
+            from ..database_async import sesiones_async_cache
+            return sesiones_async_cache()()
+        from ..db_sqlite_clean import SessionCache
+        return SessionCache()
+    
+    def _con_sesiones_propias(self, args, kwargs) -> Tuple[tuple, dict, List[Session]]:
+        """Copia de los argumentos con una sesión nueva en lugar de cada sesión recibida"""
+        sesiones = []
+        
+        def sustituir(valor):
+            if isinstance(valor, _SESIONES):
+                sesiones.append(self._nueva_sesion(valor))
+                return sesiones[-1]
+            return valor
+        
+        return (
+            tuple(sustituir(valor) for valor in args),
+            {nombre: sustituir(valor) for nombre, valor in kwargs.items()},
+            sesiones
+        )
+    
+    def _empaquetar(self, valor: Any) -> Any:
+        return (huella_contenido(valor), valor) if self.etag else valor
+    
+    def _desempaquetar(self, resultado: Any) -> Any:
+        return resultado[1] if self.etag else resultado
     
     def __call__(self, func):
-        def wrapper(*args, **kwargs):
-            # Filtrar argumentos que no son serializables
-            cache_kwargs = {}
-            for key, value in kwargs.items():
-                if isinstance(value, (int, float, str, bool)):
-                    cache_kwargs[key] = value
+        firma = inspect.signature(func)
+        
+        if inspect.iscoroutinefunction(func):
+            async def cacheado_async(*args, **kwargs):
+                argumentos = self._argumentos(firma, args, kwargs)
+                
+                async def calcular():
+                    return self._empaquetar(await func(*args, **kwargs))
+                
+                async def refrescar():
+                    args_refresco, kwargs_refresco, sesiones = self._con_sesiones_propias(args, kwargs)
+                    try:
+                        return self._empaquetar(await func(*args_refresco, **kwargs_refresco))
+                    finally:
+                        for sesion in sesiones:
+                            if isinstance(sesion, AsyncSession):
+                                await sesion.close()
+                            else:
+                                sesion.close()
+                
+                return await cache_service.get_or_compute_async(
+                    self.prefix, calcular, self.ttl_seconds,
+                    self._tags(argumentos), self.max_stale_seconds, refrescar,
+                    **self._clave(argumentos)
+                )
             
-            # Intentar obtener del cache
-            cached_result = cache_service.get(self.prefix, **cache_kwargs)
-            if cached_result is not None:
-                return cached_result
+            @functools.wraps(func)
+            async def wrapper_async(*args, **kwargs):
+                return self._desempaquetar(await cacheado_async(*args, **kwargs))
+            
+            if self.etag:
+                wrapper_async.con_etag = cacheado_async
+            return wrapper_async
+        
+        def cacheado(*args, **kwargs):
+            argumentos = self._argumentos(firma, args, kwargs)
             
-            # Ejecutar función y cachear resultado
-            result = func(*args, **kwargs)
-            cache_service.set(self.prefix, result, self.ttl_seconds, **cache_kwargs)
+            def refrescar():
+                args_refresco, kwargs_refresco, sesiones = self._con_sesiones_propias(args, kwargs)
+                try:
+                    return self._empaquetar(func(*args_refresco, **kwargs_refresco))
+                finally:
+                    for sesion in sesiones:
+                        sesion.close()
             
-            return result
+            return cache_service.get_or_compute(
+                self.prefix, lambda: self._empaquetar(func(*args, **kwargs)), self.ttl_seconds,
+                self._tags(argumentos), self.max_stale_seconds, refrescar,
+                **self._clave(argumentos)
+            )
         
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            return self._desempaquetar(cacheado(*args, **kwargs))
+        
+        if self.etag:
+            wrapper.con_etag = cacheado
         return wrapper
 
 # Decoradores predefinidos para casos comunes
-cache_metricas_tiempo_real = CacheDecorator("metricas_tiempo_real", 60)  # 1 minuto
-cache_estadisticas_periodo = CacheDecorator("estadisticas_periodo", 300)  # 5 minutos
-cache_predicciones = CacheDecorator("predicciones", 1800)  # 30 minutos
-cache_listado_reservas = CacheDecorator("listado_reservas", 120)  # 2 minutos
-
+cache_metricas_tiempo_real = CacheDecorator("metricas_tiempo_real", 60, tags=[TAG_RESERVAS])  # 1 minuto
+# Analíticas costosas: tras el TTL se sirven obsoletas mientras se recalculan
+cache_estadisticas_periodo = CacheDecorator(
+    "estadisticas_periodo", 300, tags=tags_periodo,
+    max_stale_seconds=settings.cache_obsolescencia_estadisticas
+)  # 5 minutos
+cache_predicciones = CacheDecorator(
+    "predicciones", 1800, tags=[TAG_RESERVAS],
+    max_stale_seconds=settings.cache_obsolescencia_predicciones
+)  # 30 minutos
+cache_listado_reservas = CacheDecorator("listado_reservas", 120, tags=[TAG_RESERVAS])  # 2 minutos
@@ -0,0 +1,279 @@
+from sqlalchemy.orm import Session
+from sqlalchemy import and_, select
+from fastapi import HTTPException
+from datetime import datetime, timedelta
+from typing import Dict, Any, List, Optional, Tuple
+import csv
+import os
+import time
+
+from ..models.reserva_archivo import ReservaHistorica
+from ..models.servicio import Servicio
+from ..models.recurso import Recurso
+from ..models.cliente import Cliente
+
+# Columnas exportadas (nombre, tipo arrow) en el orden de la consulta
+COLUMNAS_EXPORTACION = [
+    ("id", "int64"),
+    ("cliente_id", "int64"),
+    ("cliente_nombre", "string"),
+    ("servicio_id", "int64"),
+    ("servicio_nombre", "string"),
+    ("recurso_id", "int64"),
+    ("recurso_nombre", "string"),
+    ("fecha_hora_inicio", "timestamp"),
+    ("fecha_hora_fin", "timestamp"),
+    ("estado", "string"),
+    ("precio_base", "float64"),
+    ("created_at", "timestamp"),
+    ("updated_at", "timestamp"),
+]
+
+COMPRESIONES_PARQUET = {"none", "snappy", "gzip", "zstd", "brotli", "lz4"}
+COMPRESIONES_ARROW = {"none", "zstd", "lz4"}
+PARTICIONES = {"ninguna", "anio", "mes", "dia"}
+
+def _importar_pyarrow():
+    """Importar pyarrow bajo demanda (solo lo usa la exportación columnar)"""
+    try:
+        import pyarrow
+        import pyarrow.parquet
+        import pyarrow.ipc
+        return pyarrow
+    except ImportError:
+        raise HTTPException(
+            status_code=500,
+            detail="La exportación columnar requiere 'pyarrow'. Instálelo con: pip install pyarrow"
+        )
+
+def _clave_particion(fecha: datetime, particion: str) -> str:
+    """Ruta relativa (estilo Hive) de la partición para una fecha"""
+    if particion == "anio":
+        return f"anio={fecha.year}"
+    if particion == "mes":
+        return f"anio={fecha.year}/mes={fecha.month:02d}"
+    if particion == "dia":
+        return f"anio={fecha.year}/mes={fecha.month:02d}/dia={fecha.day:02d}"
+    return ""
+
+def _parsear_periodo(fecha_inicio: str, fecha_fin: str) -> Tuple[datetime, datetime]:
+    try:
+        return datetime.strptime(fecha_inicio, "%Y-%m-%d"), datetime.strptime(fecha_fin, "%Y-%m-%d")
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Formato de fecha inválido. Use YYYY-MM-DD")
+
+def _consulta_reservas(fecha_inicio: datetime, fecha_fin: datetime, tamano_lote: int):
+    """Columnas planas (sin instanciar objetos ORM) del periodo, ordenadas por fecha
+    para que cada partición se escriba de forma contigua"""
+    return select(
+        ReservaHistorica.id, ReservaHistorica.cliente_id, Cliente.nombre,
+        ReservaHistorica.servicio_id, Servicio.nombre,
+        ReservaHistorica.recurso_id, Recurso.nombre,
+        ReservaHistorica.fecha_hora_inicio, ReservaHistorica.fecha_hora_fin, ReservaHistorica.estado,
+        Servicio.precio_base, ReservaHistorica.created_at, ReservaHistorica.updated_at
+    ).join(Cliente, ReservaHistorica.cliente_id == Cliente.id).join(
+        Servicio, ReservaHistorica.servicio_id == Servicio.id
+    ).join(
+        Recurso, ReservaHistorica.recurso_id == Recurso.id
+    ).where(
+        and_(
+            ReservaHistorica.fecha_hora_inicio >= fecha_inicio,
+            ReservaHistorica.fecha_hora_inicio < fecha_fin + timedelta(days=1)
+        )
+    ).order_by(ReservaHistorica.fecha_hora_inicio, ReservaHistorica.id).execution_options(yield_per=tamano_lote)
+
+def _tamano_directorio(directorio: str) -> int:
+    return sum(
+        os.path.getsize(os.path.join(raiz, nombre))
+        for raiz, _, nombres in os.walk(directorio) for nombre in nombres
+    )
+
+class ExportacionService:
+    """Exportación columnar (Parquet / Arrow IPC) de reservas para el equipo de BI"""
+
+    @staticmethod
+    def exportar_reservas_columnar(
+        db: Session,
+        fecha_inicio: str,
+        fecha_fin: str,
+        directorio: str,
+        formato: str = "parquet",
+        compresion: str = "zstd",
+        particion: str = "mes",
+        tamano_lote: int = 50000
+    ) -> Dict[str, Any]:
+        """Exportar reservas con cliente, servicio y recurso en lotes desde el cursor"""
+        fecha_inicio_obj, fecha_fin_obj = _parsear_periodo(fecha_inicio, fecha_fin)
+
+        formato = formato.lower()
+        compresion = (compresion or "none").lower()
+        particion = (particion or "ninguna").lower()
+
+        if formato not in ("parquet", "arrow"):
+            raise HTTPException(status_code=400, detail="Formato no soportado. Use 'parquet' o 'arrow'")
+        compresiones_validas = COMPRESIONES_PARQUET if formato == "parquet" else COMPRESIONES_ARROW
+        if compresion not in compresiones_validas:
+            raise HTTPException(
+                status_code=400,
+                detail=f"Compresión inválida para {formato}. Use una de: {', '.join(sorted(compresiones_validas))}"
+            )
+        if particion not in PARTICIONES:
+            raise HTTPException(
+                status_code=400,
+                detail=f"Partición inválida. Use una de: {', '.join(sorted(PARTICIONES))}"
+            )
+        if tamano_lote <= 0:
+            raise HTTPException(status_code=400, detail="El tamaño de lote debe ser positivo")
+
+        pa = _importar_pyarrow()
+        esquema = ExportacionService._esquema_arrow(pa)
+
+        consulta = _consulta_reservas(fecha_inicio_obj, fecha_fin_obj, tamano_lote)
+
+        extension = "parquet" if formato == "parquet" else "arrow"
+        os.makedirs(directorio, exist_ok=True)
+
+        archivos: List[Dict[str, Any]] = []
+        escritor = None
+        particion_actual: Optional[str] = None
+        total_registros = 0
+
+        def abrir_escritor(clave: str):
+            ruta_directorio = os.path.join(directorio, clave) if clave else directorio
+            os.makedirs(ruta_directorio, exist_ok=True)
+            ruta = os.path.join(ruta_directorio, f"reservas.{extension}")
+            if formato == "parquet":
+                nuevo = pa.parquet.ParquetWriter(
+                    ruta, esquema,
+                    compression=None if compresion == "none" else compresion
+                )
+            else:
+                opciones = pa.ipc.IpcWriteOptions(compression=None if compresion == "none" else compresion)
+                nuevo = pa.ipc.new_file(ruta, esquema, options=opciones)
+            archivos.append({"ruta": ruta, "particion": clave or None, "filas": 0, "lotes": 0})
+            return nuevo
+
+        def escribir_lote(filas: List) -> None:
+            columnas = list(zip(*filas))
+            lote = pa.RecordBatch.from_arrays(
+                [pa.array(valores, type=campo.type) for valores, campo in zip(columnas, esquema)],
+                schema=esquema
+            )
+            escritor.write_batch(lote)
+            archivos[-1]["filas"] += len(filas)
+            archivos[-1]["lotes"] += 1
+
+        try:
+            resultado = db.execute(consulta)
+            for lote_filas in resultado.partitions():
+                # Un lote puede cruzar el límite de una partición: se divide en tramos contiguos
+                tramo: List = []
+                for fila in lote_filas:
+                    clave = _clave_particion(fila[7], particion)
+                    if clave != particion_actual:
+                        if tramo:
+                            escribir_lote(tramo)
+                            tramo = []
+                        if escritor is not None:
+                            escritor.close()
+                        escritor = abrir_escritor(clave)
+                        particion_actual = clave
+                    tramo.append(fila)
+                if tramo:
+                    escribir_lote(tramo)
+                total_registros += len(lote_filas)
+        finally:
+            if escritor is not None:
+                escritor.close()
+
+        return {
+            "formato": formato,
+            "compresion": compresion,
+            "particion": particion,
+            "periodo": {"inicio": fecha_inicio, "fin": fecha_fin},
+            "directorio": directorio,
+            "total_registros": total_registros,
+            "archivos": archivos,
+            "fecha_generacion": datetime.now().isoformat()
+        }
+
+    @staticmethod
+    def exportar_reservas_csv(
+        db: Session,
+        fecha_inicio: str,
+        fecha_fin: str,
+        ruta: str,
+        tamano_lote: int = 50000
+    ) -> Dict[str, Any]:
+        """Exportar las mismas columnas a un único CSV (referencia para comparar con el formato columnar)"""
+        fecha_inicio_obj, fecha_fin_obj = _parsear_periodo(fecha_inicio, fecha_fin)
+        directorio = os.path.dirname(ruta)
+        if directorio:
+            os.makedirs(directorio, exist_ok=True)
+
+        total_registros = 0
+        with open(ruta, "w", newline="", encoding="utf-8") as fichero:
+            escritor = csv.writer(fichero)
+            escritor.writerow([nombre for nombre, _ in COLUMNAS_EXPORTACION])
+            resultado = db.execute(_consulta_reservas(fecha_inicio_obj, fecha_fin_obj, tamano_lote))
+            for lote_filas in resultado.partitions():
+                escritor.writerows(lote_filas)
+                total_registros += len(lote_filas)
+
+        return {"formato": "csv", "ruta": ruta, "total_registros": total_registros}
+
+    @staticmethod
+    def comparar_con_csv(
+        db: Session,
+        fecha_inicio: str,
+        fecha_fin: str,
+        directorio: str,
+        **opciones
+    ) -> Dict[str, Any]:
+        """Tiempo y tamaño de la exportación columnar frente a CSV para el mismo periodo.
+
+        `opciones` son las de exportar_reservas_columnar (formato, compresion,
+        particion, tamano_lote).
+        """
+        directorio_csv = os.path.join(directorio, "csv")
+        directorio_columnar = os.path.join(directorio, opciones.get("formato", "parquet"))
+
+        # Primero la columnar: la de CSV encuentra la base ya en la cache de páginas
+        inicio = time.perf_counter()
+        columnar = ExportacionService.exportar_reservas_columnar(
+            db, fecha_inicio, fecha_fin, directorio_columnar, **opciones
+        )
+        segundos_columnar = time.perf_counter() - inicio
+
+        inicio = time.perf_counter()
+        csv_resumen = ExportacionService.exportar_reservas_csv(
+            db, fecha_inicio, fecha_fin, os.path.join(directorio_csv, "reservas.csv"),
+            tamano_lote=opciones.get("tamano_lote", 50000)
+        )
+        segundos_csv = time.perf_counter() - inicio
+
+        bytes_csv = _tamano_directorio(directorio_csv)
+        bytes_columnar = _tamano_directorio(directorio_columnar)
+        return {
+            "total_registros": columnar["total_registros"],
+            "csv": {"bytes": bytes_csv, "segundos": round(segundos_csv, 4), "filas": csv_resumen["total_registros"]},
+            columnar["formato"]: {
+                "bytes": bytes_columnar,
+                "segundos": round(segundos_columnar, 4),
+                "compresion": columnar["compresion"],
+                "archivos": len(columnar["archivos"])
+            },
+            "reduccion_tamano": round(bytes_csv / bytes_columnar, 2) if bytes_columnar else None,
+            "aceleracion": round(segundos_csv / segundos_columnar, 2) if segundos_columnar else None
+        }
+
+    @staticmethod
+    def _esquema_arrow(pa):
+        """Construir el esquema arrow de la exportación"""
+        tipos = {
+            "int64": pa.int64(),
+            "float64": pa.float64(),
+            "string": pa.string(),
+            "timestamp": pa.timestamp("us"),
+        }
+        return pa.schema([pa.field(nombre, tipos[tipo]) for nombre, tipo in COLUMNAS_EXPORTACION])
@@ -1,13 +1,19 @@
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
-from sqlalchemy import and_, extract
+from sqlalchemy import and_, or_, extract, select
 from fastapi import HTTPException
 from datetime import datetime, timedelta
-from typing import List, Optional
+from typing import List, Optional, Dict, Any, Tuple
+from ..config import settings
 from ..models.horario import HorarioRecurso
 from ..models.recurso import Recurso
 from ..models.reserva import Reserva
 from ..models.servicio import Servicio
 from ..schemas.horario import HorarioRecursoCreate, HorarioRecursoUpdate, DisponibilidadRequest, SlotDisponibilidad
+from .cache_service import (
+    CacheDecorator, TAG_RECURSOS, TAG_SERVICIOS, invalidar_por_horario,
+    tag_horarios_recurso, tag_recurso_fecha
+)
 import calendar
 
 class HorarioService:
@@ -39,6 +45,7 @@ class HorarioService:
         db.add(db_horario)
         db.commit()
         db.refresh(db_horario)
+        invalidar_por_horario(db_horario.recurso_id)
         return db_horario
     
     @staticmethod
@@ -46,6 +53,37 @@ class HorarioService:
         """Obtener todos los horarios de un recurso"""
         return db.query(HorarioRecurso).filter(HorarioRecurso.recurso_id == recurso_id).order_by(HorarioRecurso.dia_semana, HorarioRecurso.hora_inicio).all()
     
+    @staticmethod
+    @CacheDecorator(
+        "horarios_semana", settings.cache_ttl_horarios,
+        tags=lambda recurso_id, **_: [tag_horarios_recurso(recurso_id)], etag=True
+    )
+    def get_horario_semanal(db: Session, recurso_id: int) -> Dict[str, Any]:
+        """Horario de la semana de un recurso agrupado por día, desde cache (GET /horarios/semana/{recurso_id})"""
+        dias_semana = ["Lunes", "Martes", "Miércoles", "Jueves", "Viernes", "Sábado", "Domingo"]
+        horarios_por_dia = {i: [] for i in range(7)}
+        for horario in HorarioService.get_horarios_recurso(db, recurso_id):
+            horarios_por_dia[horario.dia_semana].append(horario)
+        
+        # Las horas ya se guardan como texto "HH:MM"
+        return {
+            "recurso_id": recurso_id,
+            "horarios_semana": {
+                dia_nombre: [
+                    {
+                        "id": h.id,
+                        "hora_inicio": h.hora_inicio,
+                        "hora_fin": h.hora_fin,
+                        "duracion_slot_minutos": h.duracion_slot_minutos,
+                        "pausa_entre_slots": h.pausa_entre_slots,
+                        "disponible": h.disponible
+                    }
+                    for h in horarios_por_dia[dia_num]
+                ]
+                for dia_num, dia_nombre in enumerate(dias_semana)
+            }
+        }
+    
     @staticmethod
     def get_horario(db: Session, horario_id: int) -> HorarioRecurso:
         """Obtener un horario específico por ID"""
@@ -75,43 +113,124 @@ class HorarioService:
         
         db.commit()
         db.refresh(db_horario)
+        invalidar_por_horario(db_horario.recurso_id)
         return db_horario
     
     @staticmethod
     def delete_horario(db: Session, horario_id: int) -> bool:
         """Eliminar un horario"""
         db_horario = HorarioService.get_horario(db, horario_id)
+        recurso_id = db_horario.recurso_id
         db.delete(db_horario)
         db.commit()
+        invalidar_por_horario(recurso_id)
         return True
     
     @staticmethod
+    @CacheDecorator(
+        "horarios_disponibilidad", settings.cache_ttl_disponibilidad,
+        tags=lambda request, **_: [
+            tag_recurso_fecha(request.recurso_id, request.fecha), tag_horarios_recurso(request.recurso_id),
+            TAG_RECURSOS, TAG_SERVICIOS
+        ]
+    )
     def get_disponibilidad(db: Session, request: DisponibilidadRequest) -> dict:
         """Obtener disponibilidad de un recurso para una fecha específica"""
-        # Parsear fecha
-        try:
-            fecha_obj = datetime.strptime(request.fecha, "%Y-%m-%d")
-        except ValueError:
-            raise HTTPException(status_code=400, detail="Formato de fecha inválido. Use YYYY-MM-DD")
-        
-        # Obtener el día de la semana (0=Lunes, 6=Domingo)
-        dia_semana = fecha_obj.weekday()
+        fecha_obj = HorarioService._parsear_fecha(request.fecha)
         
         # Obtener el recurso
-        recurso = db.query(Recurso).filter(Recurso.id == request.recurso_id).first()
+        recurso = db.get(Recurso, request.recurso_id)
         if not recurso:
             raise HTTPException(status_code=404, detail="Recurso no encontrado")
         
         # Obtener el horario para ese día
-        horario = db.query(HorarioRecurso).filter(
-            and_(
-                HorarioRecurso.recurso_id == request.recurso_id,
-                HorarioRecurso.dia_semana == dia_semana,
-                HorarioRecurso.disponible == True
-            )
-        ).first()
+        horario = db.execute(
+            HorarioService._consulta_horario_dia(request.recurso_id, fecha_obj.weekday())
+        ).scalars().first()
+        if not horario:
+            return HorarioService._respuesta_disponibilidad(request, recurso, None)
+        
+        # Generar slots de disponibilidad
+        slots = HorarioService._generar_slots_disponibilidad(
+            db, request.recurso_id, fecha_obj, horario, request.servicio_id
+        )
+        return HorarioService._respuesta_disponibilidad(request, recurso, slots)
+    
+    @staticmethod
+    # Mismo prefijo que la versión síncrona: comparten las entradas de cache
+    @CacheDecorator(
+        "horarios_disponibilidad", settings.cache_ttl_disponibilidad,
+        tags=lambda request, **_: [
+            tag_recurso_fecha(request.recurso_id, request.fecha), tag_horarios_recurso(request.recurso_id),
+            TAG_RECURSOS, TAG_SERVICIOS
+        ]
+    )
+    async def get_disponibilidad_async(db: AsyncSession, request: DisponibilidadRequest) -> dict:
+        """Disponibilidad de un recurso para una fecha sin bloquear el bucle de eventos"""
+        fecha_obj = HorarioService._parsear_fecha(request.fecha)
         
+        recurso = await db.get(Recurso, request.recurso_id)
+        if not recurso:
+            raise HTTPException(status_code=404, detail="Recurso no encontrado")
+        
+        horario = (await db.execute(
+            HorarioService._consulta_horario_dia(request.recurso_id, fecha_obj.weekday())
+        )).scalars().first()
         if not horario:
+            return HorarioService._respuesta_disponibilidad(request, recurso, None)
+        
+        duracion_servicio = 60
+        if request.servicio_id:
+            servicio = await db.get(Servicio, request.servicio_id)
+            if servicio:
+                duracion_servicio = servicio.duracion_minutos
+        
+        inicio_dia, fin_dia = HorarioService._limites_dia(fecha_obj, horario)
+        ocupados = (await db.execute(
+            HorarioService._consulta_reservas_dia(request.recurso_id, inicio_dia, fin_dia)
+        )).all()
+        slots = HorarioService._construir_slots(inicio_dia, fin_dia, horario, duracion_servicio, ocupados)
+        return HorarioService._respuesta_disponibilidad(request, recurso, slots)
+    
+    @staticmethod
+    def _parsear_fecha(fecha: str) -> datetime:
+        try:
+            return datetime.strptime(fecha, "%Y-%m-%d")
+        except ValueError:
+            raise HTTPException(status_code=400, detail="Formato de fecha inválido. Use YYYY-MM-DD")
+    
+    @staticmethod
+    def _consulta_horario_dia(recurso_id: int, dia_semana: int):
+        """Horario disponible del recurso para un día de la semana (0=Lunes, 6=Domingo)"""
+        return select(HorarioRecurso).where(
+            HorarioRecurso.recurso_id == recurso_id,
+            HorarioRecurso.dia_semana == dia_semana,
+            HorarioRecurso.disponible == True
+        ).limit(1)
+    
+    @staticmethod
+    def _consulta_reservas_dia(recurso_id: int, inicio: datetime, fin: datetime):
+        """(inicio, fin) de las reservas no canceladas del recurso que se solapan con [inicio, fin)"""
+        return select(Reserva.fecha_hora_inicio, Reserva.fecha_hora_fin).where(
+            Reserva.recurso_id == recurso_id,
+            Reserva.estado != "cancelada",
+            Reserva.fecha_hora_inicio < fin,
+            Reserva.fecha_hora_fin > inicio
+        )
+    
+    @staticmethod
+    def _limites_dia(fecha: datetime, horario: HorarioRecurso) -> Tuple[datetime, datetime]:
+        """Hora de inicio y fin del horario convertidas a datetime para el día específico"""
+        return (
+            datetime.combine(fecha.date(), datetime.strptime(horario.hora_inicio, "%H:%M").time()),
+            datetime.combine(fecha.date(), datetime.strptime(horario.hora_fin, "%H:%M").time())
+        )
+    
+    @staticmethod
+    def _respuesta_disponibilidad(
+        request: DisponibilidadRequest, recurso: Recurso, slots: Optional[List[SlotDisponibilidad]]
+    ) -> dict:
+        if slots is None:
             return {
                 "fecha": request.fecha,
                 "recurso_id": request.recurso_id,
@@ -122,11 +241,6 @@ class HorarioService:
                 "mensaje": "No hay horario configurado para este día"
             }
         
-        # Generar slots de disponibilidad
-        slots = HorarioService._generar_slots_disponibilidad(
-            db, request.recurso_id, fecha_obj, horario, request.servicio_id
-        )
-        
         slots_disponibles = [slot for slot in slots if slot.disponible]
         
         return {
@@ -141,20 +255,29 @@ class HorarioService:
     @staticmethod
     def _generar_slots_disponibilidad(db: Session, recurso_id: int, fecha: datetime, horario: HorarioRecurso, servicio_id: Optional[int] = None) -> List[SlotDisponibilidad]:
         """Generar slots de disponibilidad para un día específico"""
-        slots = []
-        
-        # Convertir hora de inicio y fin a datetime para el día específico
-        inicio_dia = datetime.combine(fecha.date(), datetime.strptime(horario.hora_inicio, "%H:%M").time())
-        fin_dia = datetime.combine(fecha.date(), datetime.strptime(horario.hora_fin, "%H:%M").time())
+        inicio_dia, fin_dia = HorarioService._limites_dia(fecha, horario)
         
         # Calcular duración del servicio si se proporciona
         duracion_servicio = 60  # Default 1 hora
         if servicio_id:
-            servicio = db.query(Servicio).filter(Servicio.id == servicio_id).first()
+            servicio = db.get(Servicio, servicio_id)
             if servicio:
                 duracion_servicio = servicio.duracion_minutos
         
-        # Generar slots
+        # Reservas del día en una sola consulta (no una por slot)
+        ocupados = db.execute(HorarioService._consulta_reservas_dia(recurso_id, inicio_dia, fin_dia)).all()
+        return HorarioService._construir_slots(inicio_dia, fin_dia, horario, duracion_servicio, ocupados)
+    
+    @staticmethod
+    def _construir_slots(
+        inicio_dia: datetime,
+        fin_dia: datetime,
+        horario: HorarioRecurso,
+        duracion_servicio: int,
+        ocupados: List[Tuple[datetime, datetime]]
+    ) -> List[SlotDisponibilidad]:
+        """Slots del día marcando como no disponibles los que se solapan con una reserva"""
+        slots = []
         current_time = inicio_dia
         while current_time < fin_dia:
             slot_fin = current_time + timedelta(minutes=duracion_servicio)
@@ -162,8 +285,8 @@ class HorarioService:
             # Verificar si el slot cabe en el horario
             if slot_fin <= fin_dia:
                 # Verificar si hay reservas que se solapan
-                disponible = not HorarioService._has_reserva_overlap(
-                    db, recurso_id, current_time, slot_fin
+                disponible = not any(
+                    inicio < slot_fin and fin > current_time for inicio, fin in ocupados
                 )
                 
                 slot = SlotDisponibilidad(
@@ -198,17 +321,3 @@ class HorarioService:
             query = query.filter(HorarioRecurso.id != exclude_id)
         
         return query.first() is not None
-    
-    @staticmethod
-    def _has_reserva_overlap(db: Session, recurso_id: int, inicio: datetime, fin: datetime) -> bool:
-        """Verificar si hay reservas que se solapan con un horario"""
-        return db.query(Reserva).filter(
-            and_(
-                Reserva.recurso_id == recurso_id,
-                Reserva.estado != "cancelada",
-                or_(
-                    and_(Reserva.fecha_hora_inicio < fin, Reserva.fecha_hora_fin > inicio),
-                    and_(Reserva.fecha_hora_inicio == inicio, Reserva.fecha_hora_fin == fin)
-                )
-            )
-        ).first() is not None
@@ -3,10 +3,7 @@ from sqlalchemy import and_, func
 from typing import List, Optional, Dict, Any
 from datetime import datetime, timedelta
 import json
-import requests
-import smtplib
-from email.mime.text import MIMEText
-from email.mime.multipart import MIMEMultipart
+from fastapi import HTTPException
 
 from ..models.integracion import (
     Integracion, Notificacion, SincronizacionGoogleCalendar, 
@@ -18,6 +15,17 @@ from ..schemas.integracion import (
     SincronizacionGoogleCalendarCreate, WebhookCreate
 )
 
+def _importar_requests():
+    """Importar requests bajo demanda (solo lo usan los webhooks)"""
+    try:
+        import requests
+        return requests
+    except ImportError:
+        raise HTTPException(
+            status_code=500,
+            detail="El envío de webhooks requiere 'requests'. Instálelo con: pip install requests"
+        )
+
 class IntegracionService:
     """Servicio para gestión de integraciones externas"""
     
@@ -351,7 +359,7 @@ class WebhookService:
         try:
             # Enviar webhook
             inicio = datetime.now()
-            response = requests.post(
+            response = _importar_requests().post(
                 db_webhook.url,
                 json=payload,
                 headers=db_webhook.headers or {},
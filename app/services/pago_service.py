@@ -1,6 +1,7 @@
 from sqlalchemy.orm import Session
 from sqlalchemy import and_, func
-from typing import List, Optional, Dict, Any
+from sqlalchemy.engine import Row
+from typing import List, Optional, Dict, Any, Sequence, Tuple, Union
 from datetime import datetime, timedelta
 import json
 import uuid
@@ -9,6 +10,7 @@ from ..models.pago import Pago, Factura, Reembolso, EstadoPago, MetodoPago
 from ..models.reserva import Reserva
 from ..models.cliente import Cliente
 from ..schemas.pago import PagoCreate, PagoUpdate, FacturaCreate, ReembolsoCreate
+from ..paginacion import paginar_keyset
 
 class PagoService:
     """Servicio para gestión de pagos"""
@@ -51,10 +53,37 @@ class PagoService:
         skip: int = 0, 
         limit: int = 100, 
         estado: Optional[str] = None,
-        metodo_pago: Optional[str] = None
-    ) -> List[Pago]:
-        """Listar todos los pagos con filtros opcionales"""
-        query = db.query(Pago)
+        metodo_pago: Optional[str] = None,
+        columnas: Optional[Sequence] = None
+    ) -> List[Union[Pago, Row]]:
+        """Listar todos los pagos con filtros opcionales (solo `columnas`, como tuplas, si se indican)"""
+        query = PagoService._query_pagos(db, estado, metodo_pago, columnas)
+        
+        # Ordenar por fecha de creación (más recientes primero)
+        query = query.order_by(Pago.fecha_creacion.desc())
+        
+        # Aplicar paginación
+        return query.offset(skip).limit(limit).all()
+    
+    @staticmethod
+    def listar_pagos_cursor(
+        db: Session,
+        limit: int = 100,
+        cursor: Optional[str] = None,
+        estado: Optional[str] = None,
+        metodo_pago: Optional[str] = None,
+        columnas: Optional[Sequence] = None
+    ) -> Tuple[List[Union[Pago, Row]], Optional[str]]:
+        """Listar pagos con paginación por cursor (clave: fecha_creacion, id; más recientes primero)"""
+        query = PagoService._query_pagos(db, estado, metodo_pago, columnas)
+        return paginar_keyset(query, [Pago.fecha_creacion, Pago.id], limit, cursor, descendente=True)
+    
+    @staticmethod
+    def _query_pagos(
+        db: Session, estado: Optional[str] = None, metodo_pago: Optional[str] = None, columnas: Optional[Sequence] = None
+    ):
+        """Construir la consulta de pagos (o de `columnas`) con los filtros opcionales"""
+        query = db.query(*(columnas or [Pago]))
         
         # Aplicar filtros si se especifican
         if estado:
@@ -62,11 +91,7 @@ class PagoService:
         if metodo_pago:
             query = query.filter(Pago.metodo_pago == metodo_pago)
         
-        # Ordenar por fecha de creación (más recientes primero)
-        query = query.order_by(Pago.fecha_creacion.desc())
-        
-        # Aplicar paginación
-        return query.offset(skip).limit(limit).all()
+        return query
     
     @staticmethod
     def actualizar_pago(db: Session, pago_id: int, pago_data: PagoUpdate) -> Optional[Pago]:
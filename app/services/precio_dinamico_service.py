@@ -1,7 +1,8 @@
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
-from sqlalchemy import and_, or_
+from sqlalchemy import and_, or_, func, select
 from fastapi import HTTPException
-from datetime import datetime, timedelta
+from datetime import datetime, timedelta, time
 from typing import List, Dict, Any, Optional, Tuple
 import json
 import logging
@@ -13,6 +14,7 @@ from ..schemas.precio_dinamico import (
     ReglaPrecioCreate, ReglaPrecioUpdate, CalculoPrecioRequest, 
     CalculoPrecioResponse, ReglaAplicada, ConfiguracionPrecioCreate, ConfiguracionPrecioUpdate
 )
+from .cache_service import invalidar_por_precio
 
 logger = logging.getLogger(__name__)
 
@@ -31,6 +33,7 @@ class PrecioDinamicoService:
         db.add(db_regla)
         db.commit()
         db.refresh(db_regla)
+        invalidar_por_precio()
         return db_regla
     
     @staticmethod
@@ -67,6 +70,7 @@ class PrecioDinamicoService:
         
         db.commit()
         db.refresh(db_regla)
+        invalidar_por_precio()
         return db_regla
     
     @staticmethod
@@ -75,6 +79,7 @@ class PrecioDinamicoService:
         db_regla = PrecioDinamicoService.get_regla(db, regla_id)
         db.delete(db_regla)
         db.commit()
+        invalidar_por_precio()
         return True
     
     @staticmethod
@@ -91,17 +96,24 @@ class PrecioDinamicoService:
         if not recurso:
             raise HTTPException(status_code=404, detail="Recurso no encontrado")
         
+        # Obtener reglas aplicables
+        reglas = PrecioDinamicoService._get_reglas_aplicables(
+            db, request.servicio_id, request.recurso_id, request.fecha_hora_inicio
+        )
+        
+        return PrecioDinamicoService._aplicar_reglas(servicio, recurso, reglas, request)
+    
+    @staticmethod
+    def _aplicar_reglas(
+        servicio: Servicio, recurso: Recurso, reglas: List[ReglaPrecio], request: CalculoPrecioRequest
+    ) -> CalculoPrecioResponse:
+        """Aplicar las reglas (ya filtradas y en orden de prioridad) al precio base del servicio"""
         precio_base = servicio.precio_base
         precio_actual = precio_base
         reglas_aplicadas = []
         descuento_total = 0.0
         recargo_total = 0.0
         
-        # Obtener reglas aplicables
-        reglas = PrecioDinamicoService._get_reglas_aplicables(
-            db, request.servicio_id, request.recurso_id, request.fecha_hora_inicio
-        )
-        
         # Aplicar cada regla en orden de prioridad
         for regla in reglas:
             if PrecioDinamicoService._evaluar_condicion(regla, request):
@@ -149,6 +161,90 @@ class PrecioDinamicoService:
             }
         )
     
+    @staticmethod
+    async def simular_semana_async(
+        db: AsyncSession,
+        servicio_id: int,
+        recurso_id: int,
+        fecha_base: datetime,
+        hora_servicio: time,
+        duracion_horas: int,
+        participantes: int
+    ) -> Dict[str, Dict[str, Any]]:
+        """Precio de los siete días desde `fecha_base` a la misma hora.
+
+        Carga servicio, recurso y reglas activas una sola vez (tres consultas en
+        total, sin bloquear el bucle de eventos) y evalúa las reglas vigentes de
+        cada día en memoria.
+        """
+        dias_semana = ["Lunes", "Martes", "Miércoles", "Jueves", "Viernes", "Sábado", "Domingo"]
+        servicio = await db.get(Servicio, servicio_id)
+        recurso = await db.get(Recurso, recurso_id)
+        if not servicio or not recurso:
+            error = "Servicio no encontrado" if not servicio else "Recurso no encontrado"
+            return {dia: {"error": error} for dia in dias_semana}
+        
+        reglas = (await db.execute(
+            select(ReglaPrecio).where(ReglaPrecio.activa == True).order_by(ReglaPrecio.prioridad.desc())
+        )).scalars().all()
+        
+        resultados = {}
+        for i, dia in enumerate(dias_semana):
+            fecha_hora_inicio = datetime.combine((fecha_base + timedelta(days=i)).date(), hora_servicio)
+            request = CalculoPrecioRequest(
+                servicio_id=servicio_id,
+                recurso_id=recurso_id,
+                fecha_hora_inicio=fecha_hora_inicio,
+                fecha_hora_fin=fecha_hora_inicio + timedelta(hours=duracion_horas),
+                participantes=participantes,
+                tipo_cliente="regular"
+            )
+            aplicables = [
+                regla for regla in reglas
+                if PrecioDinamicoService._regla_vigente(regla, fecha_hora_inicio)
+                and PrecioDinamicoService._es_regla_aplicable(regla, servicio_id, recurso_id)
+            ]
+            try:
+                calculo = PrecioDinamicoService._aplicar_reglas(servicio, recurso, aplicables, request)
+                resultados[dia] = {
+                    "fecha": fecha_hora_inicio.strftime("%Y-%m-%d"),
+                    "precio_base": calculo.precio_base,
+                    "precio_final": calculo.precio_final,
+                    "descuento_total": calculo.descuento_total,
+                    "recargo_total": calculo.recargo_total,
+                    "ahorro": calculo.ahorro_total,
+                    "reglas_aplicadas": len(calculo.reglas_aplicadas)
+                }
+            except Exception as e:
+                resultados[dia] = {
+                    "error": str(e)
+                }
+        
+        return resultados
+    
+    @staticmethod
+    async def get_estadisticas_reglas_async(db: AsyncSession) -> Dict[str, Any]:
+        """Recuento de reglas por estado, tipo y modificador con una única consulta agregada"""
+        filas = (await db.execute(
+            select(ReglaPrecio.tipo_regla, ReglaPrecio.tipo_modificador, ReglaPrecio.activa, func.count())
+            .group_by(ReglaPrecio.tipo_regla, ReglaPrecio.tipo_modificador, ReglaPrecio.activa)
+        )).all()
+        
+        estadisticas = {
+            "total_reglas": 0,
+            "reglas_activas": 0,
+            "reglas_inactivas": 0,
+            "por_tipo": {},
+            "por_modificador": {}
+        }
+        for tipo, modificador, activa, total in filas:
+            estadisticas["total_reglas"] += total
+            estadisticas["reglas_activas" if activa else "reglas_inactivas"] += total
+            estadisticas["por_tipo"][tipo] = estadisticas["por_tipo"].get(tipo, 0) + total
+            estadisticas["por_modificador"][modificador] = estadisticas["por_modificador"].get(modificador, 0) + total
+        
+        return estadisticas
+    
     @staticmethod
     def _get_reglas_aplicables(db: Session, servicio_id: int, recurso_id: int, fecha: datetime) -> List[ReglaPrecio]:
         """Obtener reglas aplicables ordenadas por prioridad"""
@@ -176,6 +272,14 @@ class PrecioDinamicoService:
         
         return reglas_filtradas
     
+    @staticmethod
+    def _regla_vigente(regla: ReglaPrecio, fecha: datetime) -> bool:
+        """Mismo filtro de fechas que _get_reglas_aplicables, sobre reglas ya cargadas"""
+        return (
+            (regla.fecha_inicio is None or regla.fecha_inicio <= fecha)
+            and (regla.fecha_fin is None or regla.fecha_fin >= fecha)
+        )
+    
     @staticmethod
     def _es_regla_aplicable(regla: ReglaPrecio, servicio_id: int, recurso_id: int) -> bool:
         """Verificar si una regla es aplicable al servicio/recurso"""
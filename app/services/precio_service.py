@@ -1,7 +1,8 @@
 from sqlalchemy.orm import Session
 from sqlalchemy import and_, or_, func
+from sqlalchemy.engine import Row
 from fastapi import HTTPException
-from typing import List, Optional, Dict, Any
+from typing import List, Optional, Dict, Any, Sequence, Tuple, Union
 from datetime import datetime, timedelta
 import json
 
@@ -9,9 +10,12 @@ from ..models.precio import Precio, TipoPrecio, Moneda
 from ..models.servicio import Servicio
 from ..models.recurso import Recurso
 from ..schemas.precio import (
-    PrecioCreate, PrecioUpdate, CalculoPrecioRequest, 
+    PrecioCreate, PrecioUpdate, PrecioResponse, CalculoPrecioRequest, 
     CalculoPrecioResponse, FiltroPrecios
 )
+from ..paginacion import paginar_keyset
+from ..config import settings
+from .cache_service import CacheDecorator, invalidar_por_precio, tag_precios_servicio
 
 class PrecioService:
     """Servicio para gestión completa de precios"""
@@ -51,6 +55,7 @@ class PrecioService:
             db.add(db_precio)
             db.commit()
             db.refresh(db_precio)
+            invalidar_por_precio(db_precio.servicio_id, db_precio.recurso_id)
             return db_precio
             
         except HTTPException:
@@ -77,6 +82,18 @@ class PrecioService:
             )
         ).order_by(Precio.prioridad.desc(), Precio.created_at.desc()).all()
     
+    @staticmethod
+    @CacheDecorator(
+        "precios_servicio", settings.cache_ttl_precios,
+        tags=lambda servicio_id, **_: [tag_precios_servicio(servicio_id)], etag=True
+    )
+    def get_precios_by_servicio_cacheado(db: Session, servicio_id: int) -> List[Dict[str, Any]]:
+        """Precios activos de un servicio ya serializados, desde cache (GET /api/precios/servicio/{id})"""
+        return [
+            PrecioResponse.model_validate(p).model_dump()
+            for p in PrecioService.get_precios_by_servicio(db, servicio_id)
+        ]
+    
     @staticmethod
     def get_precios_by_recurso(db: Session, recurso_id: int) -> List[Precio]:
         """Obtener todos los precios de un recurso"""
@@ -115,6 +132,7 @@ class PrecioService:
         try:
             db_precio = PrecioService.get_precio(db, precio_id)
             
+            anterior = (db_precio.servicio_id, db_precio.recurso_id)
             update_data = precio.dict(exclude_unset=True)
             for field, value in update_data.items():
                 setattr(db_precio, field, value)
@@ -122,6 +140,8 @@ class PrecioService:
             db_precio.updated_at = datetime.now()
             db.commit()
             db.refresh(db_precio)
+            invalidar_por_precio(*anterior)
+            invalidar_por_precio(db_precio.servicio_id, db_precio.recurso_id)
             return db_precio
             
         except HTTPException:
@@ -135,8 +155,10 @@ class PrecioService:
         """Eliminar un precio"""
         try:
             db_precio = PrecioService.get_precio(db, precio_id)
+            anterior = (db_precio.servicio_id, db_precio.recurso_id)
             db.delete(db_precio)
             db.commit()
+            invalidar_por_precio(*anterior)
             return True
             
         except HTTPException:
@@ -150,10 +172,29 @@ class PrecioService:
         db: Session, 
         skip: int = 0, 
         limit: int = 100,
-        filtros: Optional[FiltroPrecios] = None
-    ) -> List[Precio]:
-        """Listar precios con filtros opcionales"""
-        query = db.query(Precio)
+        filtros: Optional[FiltroPrecios] = None,
+        columnas: Optional[Sequence] = None
+    ) -> List[Union[Precio, Row]]:
+        """Listar precios con filtros opcionales (solo `columnas`, como tuplas, si se indican)"""
+        query = PrecioService._query_precios(db, filtros, columnas)
+        return query.order_by(Precio.prioridad.desc(), Precio.created_at.desc()).offset(skip).limit(limit).all()
+    
+    @staticmethod
+    def listar_precios_cursor(
+        db: Session,
+        limit: int = 100,
+        cursor: Optional[str] = None,
+        filtros: Optional[FiltroPrecios] = None,
+        columnas: Optional[Sequence] = None
+    ) -> Tuple[List[Union[Precio, Row]], Optional[str]]:
+        """Listar precios con paginación por cursor (clave: prioridad, id; mayor prioridad primero)"""
+        query = PrecioService._query_precios(db, filtros, columnas)
+        return paginar_keyset(query, [Precio.prioridad, Precio.id], limit, cursor, descendente=True)
+    
+    @staticmethod
+    def _query_precios(db: Session, filtros: Optional[FiltroPrecios] = None, columnas: Optional[Sequence] = None):
+        """Construir la consulta de precios (o de `columnas`) con los filtros opcionales"""
+        query = db.query(*(columnas or [Precio]))
         
         if filtros:
             if filtros.servicio_id:
@@ -175,7 +216,7 @@ class PrecioService:
             if filtros.fecha_hasta:
                 query = query.filter(Precio.fecha_fin <= filtros.fecha_hasta)
         
-        return query.order_by(Precio.prioridad.desc(), Precio.created_at.desc()).offset(skip).limit(limit).all()
+        return query
     
     @staticmethod
     def calcular_precio(
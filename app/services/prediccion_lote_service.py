@@ -0,0 +1,288 @@
+"""Lote nocturno de predicciones de demanda.
+
+Carga las reservas diarias de todos los servicios con una única consulta
+agrupada, reparte el ajuste de los modelos entre procesos y guarda las
+predicciones en la tabla predicciones_demanda, que la API sirve directamente.
+"""
+from sqlalchemy.orm import Session
+from sqlalchemy import and_, func as sql_func
+from fastapi import HTTPException
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timedelta, date
+from typing import List, Dict, Any, Optional, Callable, Tuple
+import multiprocessing
+import os
+import threading
+import time
+from ..config import settings
+from ..prediccion_numerica import EstadoPrediccion, estado_desde_filas
+from ..models.prediccion import PrediccionDemanda
+from ..models.reserva_archivo import ReservaHistorica
+from ..models.servicio import Servicio
+from .prediccion_service import PrediccionService, ALGORITMOS, DIAS_HISTORICO
+
+# En modo automático, servicios mínimos por proceso: arrancar un proceso (spawn)
+# cuesta más que ajustar decenas de series, así que lotes pequeños van en serie
+SERVICIOS_POR_PROCESO = 50
+
+# (servicio_id, filas (fecha, total), hoy, días futuros)
+TareaAjuste = Tuple[int, List[Tuple[Any, int]], date, int]
+
+def _ajustar_servicio(tarea: TareaAjuste) -> Tuple[int, EstadoPrediccion, List[Tuple[str, str, float]], List[Dict[str, Any]]]:
+    """Construir el estado de un servicio y proyectar sus modelos (se ejecuta en un proceso hijo).
+
+    Solo recibe y devuelve datos serializables: no toca la base de datos ni el cache.
+    """
+    servicio_id, filas_diarias, hoy, dias_futuros = tarea
+    estado = estado_desde_filas(filas_diarias, hoy, DIAS_HISTORICO)
+    filas = []
+    omitidos = []
+    for algoritmo in ALGORITMOS:
+        try:
+            modelo = getattr(PrediccionService, f"_modelo_{algoritmo}")(estado)
+        except HTTPException as e:
+            omitidos.append({"servicio_id": servicio_id, "algoritmo": algoritmo, "motivo": e.detail})
+            continue
+        proyectar = getattr(PrediccionService, f"_proyectar_{algoritmo}")
+        filas.extend(
+            (algoritmo, dia["fecha"], dia["prediccion"]) for dia in proyectar(modelo, dias_futuros)
+        )
+    return servicio_id, estado, filas, omitidos
+
+class PrediccionLoteService:
+    """Servicio del lote de predicciones de todos los servicios"""
+
+    @staticmethod
+    def _filas_servicios(
+        db: Session,
+        servicio_ids: List[int],
+        dias_historico: int = DIAS_HISTORICO
+    ) -> Dict[int, List[Tuple[Any, int]]]:
+        """Reservas diarias (historial y futuras) de todos los servicios con una consulta GROUP BY"""
+        inicio = date.today() - timedelta(days=dias_historico)
+
+        consulta = db.query(
+            ReservaHistorica.servicio_id,
+            sql_func.date(ReservaHistorica.fecha_hora_inicio).label('fecha'),
+            sql_func.count(ReservaHistorica.id).label('total')
+        ).filter(
+            and_(
+                ReservaHistorica.fecha_hora_inicio >= datetime(inicio.year, inicio.month, inicio.day),
+                ReservaHistorica.estado != "cancelada"
+            )
+        ).group_by(
+            ReservaHistorica.servicio_id,
+            sql_func.date(ReservaHistorica.fecha_hora_inicio)
+        )
+
+        filas_por_servicio: Dict[int, List[Tuple[Any, int]]] = {servicio_id: [] for servicio_id in servicio_ids}
+        for servicio_id, fecha, total in consulta:
+            if servicio_id in filas_por_servicio:
+                filas_por_servicio[servicio_id].append((fecha, total))
+        return filas_por_servicio
+
+    @staticmethod
+    def _num_procesos(procesos: Optional[int], num_tareas: int) -> int:
+        """Procesos del lote: el valor indicado o, con 0, según núcleos y tamaño del lote"""
+        if procesos is None:
+            procesos = settings.prediccion_lote_procesos
+        if not procesos or procesos < 1:
+            procesos = min(os.cpu_count() or 1, -(-num_tareas // SERVICIOS_POR_PROCESO))
+        return max(1, min(procesos, num_tareas))
+
+    @staticmethod
+    def ejecutar(
+        db: Session,
+        dias_futuros: Optional[int] = None,
+        procesos: Optional[int] = None,
+        servicio_ids: Optional[List[int]] = None,
+        calentar_cache: bool = True
+    ) -> Dict[str, Any]:
+        """Predecir la demanda de todos los servicios y guardarla en predicciones_demanda.
+
+        Con `procesos` > 1 el ajuste se reparte en un ProcessPoolExecutor (contexto
+        spawn, seguro desde hilos del servidor); con 1 se ejecuta en este proceso.
+        Con `calentar_cache` los estados incrementales construidos calientan
+        también el cache de PrediccionService, que es local a este proceso.
+        """
+        dias_futuros = dias_futuros or settings.prediccion_lote_dias
+        inicio_lote = time.perf_counter()
+
+        todos = servicio_ids is None
+        if todos:
+            servicio_ids = [fila.id for fila in db.query(Servicio.id).all()]
+
+        hoy = date.today()
+        filas_servicios = PrediccionLoteService._filas_servicios(db, servicio_ids)
+        tareas = [(servicio_id, filas, hoy, dias_futuros) for servicio_id, filas in filas_servicios.items()]
+        duracion_carga = time.perf_counter() - inicio_lote
+
+        procesos = PrediccionLoteService._num_procesos(procesos, len(tareas))
+        if procesos > 1:
+            tamano_bloque = max(1, len(tareas) // (procesos * 4))
+            with ProcessPoolExecutor(max_workers=procesos, mp_context=multiprocessing.get_context("spawn")) as executor:
+                resultados = list(executor.map(_ajustar_servicio, tareas, chunksize=tamano_bloque))
+        else:
+            resultados = [_ajustar_servicio(tarea) for tarea in tareas]
+        duracion_ajuste = time.perf_counter() - inicio_lote - duracion_carga
+
+        generada_at = datetime.now()
+        filas = []
+        modelos_calculados = 0
+        omitidos = []
+        for servicio_id, estado, predicciones, omitidos_servicio in resultados:
+            omitidos.extend(omitidos_servicio)
+            modelos_calculados += len(ALGORITMOS) - len(omitidos_servicio)
+            if calentar_cache:
+                PrediccionService._guardar_estado_cache(servicio_id, estado)
+            filas.extend({
+                "servicio_id": servicio_id,
+                "algoritmo": algoritmo,
+                "fecha": date.fromisoformat(fecha),
+                "prediccion": prediccion,
+                "generada_at": generada_at
+            } for algoritmo, fecha, prediccion in predicciones)
+
+        # Reemplazar las predicciones anteriores en una sola transacción
+        borrado = db.query(PrediccionDemanda)
+        if not todos:
+            borrado = borrado.filter(PrediccionDemanda.servicio_id.in_(servicio_ids))
+        borrado.delete(synchronize_session=False)
+        if filas:
+            db.bulk_insert_mappings(PrediccionDemanda, filas)
+        db.commit()
+
+        return {
+            "servicios": len(tareas),
+            "modelos_calculados": modelos_calculados,
+            "modelos_omitidos": omitidos,
+            "predicciones_guardadas": len(filas),
+            "dias_futuros": dias_futuros,
+            "procesos": procesos,
+            "duracion_carga_segundos": round(duracion_carga, 3),
+            "duracion_ajuste_segundos": round(duracion_ajuste, 3),
+            "duracion_segundos": round(time.perf_counter() - inicio_lote, 3),
+            "fecha_generacion": generada_at.isoformat()
+        }
+
+    @staticmethod
+    def get_predicciones_servicio(
+        db: Session,
+        servicio_id: int,
+        algoritmo: str = "arima",
+        dias: Optional[int] = None
+    ) -> Dict[str, Any]:
+        """Predicciones guardadas de un servicio a partir de hoy"""
+        if algoritmo not in ALGORITMOS:
+            raise HTTPException(status_code=400, detail=f"Algoritmo no válido. Opciones: {', '.join(ALGORITMOS)}")
+
+        consulta = db.query(PrediccionDemanda).filter(
+            and_(
+                PrediccionDemanda.servicio_id == servicio_id,
+                PrediccionDemanda.algoritmo == algoritmo,
+                PrediccionDemanda.fecha >= date.today()
+            )
+        ).order_by(PrediccionDemanda.fecha)
+        if dias:
+            consulta = consulta.limit(dias)
+        predicciones = consulta.all()
+
+        if not predicciones:
+            raise HTTPException(status_code=404, detail="No hay predicciones generadas para este servicio")
+
+        return {
+            "servicio_id": servicio_id,
+            "algoritmo": algoritmo,
+            "generada_at": predicciones[0].generada_at,
+            "predicciones": [
+                {"fecha": p.fecha.isoformat(), "prediccion": p.prediccion} for p in predicciones
+            ]
+        }
+
+    @staticmethod
+    def get_predicciones_fecha(db: Session, fecha: date, algoritmo: str = "arima") -> Dict[str, Any]:
+        """Demanda prevista de todos los servicios para un día"""
+        if algoritmo not in ALGORITMOS:
+            raise HTTPException(status_code=400, detail=f"Algoritmo no válido. Opciones: {', '.join(ALGORITMOS)}")
+
+        filas = db.query(PrediccionDemanda.servicio_id, PrediccionDemanda.prediccion).filter(
+            and_(
+                PrediccionDemanda.fecha == fecha,
+                PrediccionDemanda.algoritmo == algoritmo
+            )
+        ).order_by(PrediccionDemanda.servicio_id).all()
+
+        return {
+            "fecha": fecha.isoformat(),
+            "algoritmo": algoritmo,
+            "total_prevista": round(sum(prediccion for _, prediccion in filas), 2),
+            "servicios": [
+                {"servicio_id": servicio_id, "prediccion": prediccion} for servicio_id, prediccion in filas
+            ]
+        }
+
+class PrecalculoNocturno:
+    """Hilo que ejecuta cada noche el lote de predicciones de todos los servicios"""
+
+    def __init__(self):
+        self._thread = None
+        self._running = False
+        self._despertar = threading.Event()
+        self._session_factory: Optional[Callable[[], Session]] = None
+        self._calentar_cache = True
+        self.ultimo_resultado: Optional[Dict[str, Any]] = None
+
+    def start(self, session_factory: Callable[[], Session], calentar_cache: bool = True):
+        """Iniciar el hilo: ejecuta el lote al arrancar y después a la hora configurada.
+
+        Sin `calentar_cache` solo escribe predicciones_demanda (el proceso que lo
+        ejecuta no atiende predicciones y su cache no serviría a nadie).
+        """
+        if not self._running:
+            self._running = True
+            self._session_factory = session_factory
+            self._calentar_cache = calentar_cache
+            self._despertar.clear()
+            self._thread = threading.Thread(target=self._loop, daemon=True)
+            self._thread.start()
+
+    def stop(self, plazo: float = 0) -> bool:
+        """Detener el hilo esperando hasta `plazo` segundos a que termine el lote en curso.
+
+        Devuelve False si el lote sigue en marcha al vencer el plazo (su
+        transacción no llega a confirmarse y la siguiente ejecución lo repite).
+        """
+        self._running = False
+        self._despertar.set()
+        if self._thread is not None and plazo > 0:
+            self._thread.join(plazo)
+        return self._thread is None or not self._thread.is_alive()
+
+    def ejecutar(self) -> Dict[str, Any]:
+        """Ejecutar el lote completo con una sesión propia"""
+        db = self._session_factory()
+        try:
+            self.ultimo_resultado = PrediccionLoteService.ejecutar(db, calentar_cache=self._calentar_cache)
+            return self.ultimo_resultado
+        finally:
+            db.close()
+
+    @staticmethod
+    def _segundos_hasta_proxima_ejecucion(ahora: datetime) -> float:
+        proxima = ahora.replace(hour=settings.prediccion_precalculo_hora, minute=0, second=0, microsecond=0)
+        if proxima <= ahora:
+            proxima += timedelta(days=1)
+        return (proxima - ahora).total_seconds()
+
+    def _loop(self):
+        """Loop del precálculo: una ejecución inmediata y luego una por noche"""
+        while self._running:
+            try:
+                self.ejecutar()
+            except Exception as e:
+                print(f"Error en lote de predicciones: {e}")
+            # stop() despierta la espera para no retrasar el apagado
+            self._despertar.wait(self._segundos_hasta_proxima_ejecucion(datetime.now()))
+
+# Instancia global del precálculo nocturno
+precalculo_nocturno = PrecalculoNocturno()
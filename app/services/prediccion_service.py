@@ -2,168 +2,143 @@ from sqlalchemy.orm import Session
 from sqlalchemy import and_, func as sql_func
 from fastapi import HTTPException
 from datetime import datetime, timedelta, date
-from typing import List, Dict, Any
-import math
-import statistics
-from ..models.reserva import Reserva
+from typing import List, Dict, Any, Optional
+import time
+from ..config import settings
+from ..prediccion_numerica import (
+    SerieDiaria, EstadoPrediccion, VENTANA_MEDIA_MOVIL, serie_diaria_densa, estado_desde_filas,
+    factores_dia_semana, factores_mes_dia_semana
+)
+from ..models.reserva_archivo import ReservaHistorica
 from ..models.servicio import Servicio
 from ..models.recurso import Recurso
+from .cache_service import cache_service
+
+DIAS_SEMANA = ["Lunes", "Martes", "Miércoles", "Jueves", "Viernes", "Sábado", "Domingo"]
+
+# Prefijo de las entradas de cache con el estado incremental de cada servicio
+PREFIJO_CACHE_ESTADO = "estado_prediccion"
+# Canal de los cambios de reservas que cada worker aplica a su propio estado
+CANAL_RESERVAS = "prediccion_reservas"
+ALGORITMOS = ("arima", "estacional", "ml")
+
+# Días de historial que se cargan por servicio (el mayor de los tres algoritmos)
+DIAS_HISTORICO = 365
 
 class PrediccionService:
-    """Servicio especializado en algoritmos de predicción avanzados"""
+    """Servicio especializado en algoritmos de predicción avanzados
+
+    Cada algoritmo se divide en ajuste (parámetros) y proyección (generar los
+    días futuros a partir de los parámetros). Los parámetros se leen de un
+    EstadoPrediccion cacheado por servicio que se carga con una consulta; las
+    mutaciones de reservas lo actualizan en O(1) en lugar de invalidarlo y el
+    precálculo nocturno lo reconstruye desde la base de datos.
+
+    El estado vive en el nivel local de cada worker: el que registra la reserva
+    actualiza el suyo y publica el cambio (servicio, fecha, delta) en el nivel
+    compartido del cache; los demás lo aplican al suyo, también en O(1), al
+    sincronizar. Sin nivel compartido solo hay un worker y nada que publicar.
+    """
     
     @staticmethod
     def prediccion_arima_simple(db: Session, servicio_id: int, dias_futuros: int = 30) -> Dict[str, Any]:
         """Predicción usando modelo ARIMA simple (promedio móvil)"""
-        # Obtener datos históricos de los últimos 120 días
-        inicio_historico = datetime.now() - timedelta(days=120)
-        
-        # Obtener reservas diarias para el servicio
-        reservas_diarias = db.query(
-            sql_func.date(Reserva.fecha_hora_inicio).label('fecha'),
-            sql_func.count(Reserva.id).label('total')
-        ).filter(
-            and_(
-                Reserva.servicio_id == servicio_id,
-                Reserva.fecha_hora_inicio >= inicio_historico,
-                Reserva.estado != "cancelada"
-            )
-        ).group_by(sql_func.date(Reserva.fecha_hora_inicio)).order_by(
-            sql_func.date(Reserva.fecha_hora_inicio)
-        ).all()
+        modelo = PrediccionService._obtener_modelo(db, servicio_id, "arima")
+        pendiente = modelo["pendiente"]
+        predicciones = PrediccionService._proyectar_arima(modelo, dias_futuros)
         
-        if len(reservas_diarias) < 30:
-            raise HTTPException(status_code=400, detail="Datos insuficientes para predicción ARIMA")
-        
-        # Convertir a lista de valores
-        valores = [r.total for r in reservas_diarias]
-        
-        # Calcular promedio móvil (ventana de 7 días)
-        ventana = 7
-        promedios_moviles = []
-        for i in range(ventana, len(valores)):
-            promedio = sum(valores[i-ventana:i]) / ventana
-            promedios_moviles.append(promedio)
+        return {
+            "algoritmo": "ARIMA Simple",
+            "servicio_id": servicio_id,
+            "datos_historicos": modelo["datos_historicos"],
+            "parametros_modelo": {
+                "ventana_promedio_movil": modelo["ventana"],
+                "pendiente_tendencia": round(pendiente, 4),
+                "intercepto": round(modelo["intercepto"], 2)
+            },
+            "predicciones": predicciones,
+            "fecha_generacion": datetime.now().isoformat()
+        }
+    
+    @staticmethod
+    def prediccion_estacional_avanzada(db: Session, servicio_id: int, dias_futuros: int = 30) -> Dict[str, Any]:
+        """Predicción usando análisis estacional avanzado"""
+        modelo = PrediccionService._obtener_modelo(db, servicio_id, "estacional")
+        patrones_estacionales = modelo["patrones_estacionales"]
+        factores_estacionales = modelo["factores_estacionales"]
+        promedio_diario_historico = modelo["promedio_diario"]
+        predicciones = PrediccionService._proyectar_estacional(modelo, dias_futuros)
         
-        # Calcular tendencia lineal
-        if len(promedios_moviles) > 1:
-            x = list(range(len(promedios_moviles)))
-            y = promedios_moviles
-            
-            # Regresión lineal simple
-            n = len(x)
-            sum_x = sum(x)
-            sum_y = sum(y)
-            sum_xy = sum(x[i] * y[i] for i in range(n))
-            sum_x2 = sum(x[i] ** 2 for i in range(n))
-            
-            pendiente = (n * sum_xy - sum_x * sum_y) / (n * sum_x2 - sum_x ** 2)
-            intercepto = (sum_y - pendiente * sum_x) / n
-        else:
-            pendiente = 0
-            intercepto = statistics.mean(valores) if valores else 0
+        return {
+            "algoritmo": "Estacional Avanzado",
+            "servicio_id": servicio_id,
+            "datos_historicos": {
+                "dias_analizados": 365,
+                "total_reservas": modelo["total_reservas"],
+                "promedio_diario": round(promedio_diario_historico, 2)
+            },
+            "patrones_estacionales": {
+                "meses": {str(mes): {str(dia): patrones_estacionales[mes][dia] for dia in range(7)} for mes in range(1, 13)},
+                "factores": {str(mes): {str(dia): round(factores_estacionales[mes][dia], 3) for dia in range(7)} for mes in range(1, 13)}
+            },
+            "predicciones": predicciones,
+            "fecha_generacion": datetime.now().isoformat()
+        }
+    
+    @staticmethod
+    def prediccion_machine_learning_simple(db: Session, servicio_id: int, dias_futuros: int = 30) -> Dict[str, Any]:
+        """Predicción usando algoritmo de ML simple (regresión polinomial)"""
+        modelo = PrediccionService._obtener_modelo(db, servicio_id, "ml")
+        a, b, c = modelo["a"], modelo["b"], modelo["c"]
+        predicciones = PrediccionService._proyectar_ml(modelo, dias_futuros)
         
-        # Generar predicciones
+        return {
+            "algoritmo": "Machine Learning Simple (Regresión Polinomial)",
+            "servicio_id": servicio_id,
+            "datos_entrenamiento": modelo["datos_entrenamiento"],
+            "modelo": {
+                "ecuacion": f"y = {round(a, 6)}x² + {round(b, 6)}x + {round(c, 6)}",
+                "coeficientes": {
+                    "a": round(a, 6),
+                    "b": round(b, 6),
+                    "c": round(c, 6)
+                }
+            },
+            "metricas_calidad": modelo["metricas_calidad"],
+            "predicciones": predicciones,
+            "fecha_generacion": datetime.now().isoformat()
+        }
+    
+    # ===== PROYECCIÓN (sin acceso a base de datos) =====
+    
+    @staticmethod
+    def _proyectar_arima(modelo: Dict[str, Any], dias_futuros: int) -> List[Dict[str, Any]]:
+        """Generar los días futuros del modelo ARIMA simple"""
+        pendiente = modelo["pendiente"]
         predicciones = []
-        ultimo_promedio = promedios_moviles[-1] if promedios_moviles else statistics.mean(valores)
-        
         for i in range(dias_futuros):
             # Predicción = último promedio + tendencia + estacionalidad
-            prediccion_base = ultimo_promedio + (pendiente * i)
+            prediccion_base = modelo["ultimo_promedio"] + (pendiente * i)
             
             # Factor estacional (día de la semana)
             fecha_prediccion = date.today() + timedelta(days=i)
             dia_semana = fecha_prediccion.weekday()
-            
-            # Calcular factor estacional promedio para este día
-            factor_estacional = PrediccionService._calcular_factor_estacional(db, servicio_id, dia_semana)
+            factor_estacional = modelo["factores_estacionales"][dia_semana]
             
             prediccion_final = max(0, round(prediccion_base * factor_estacional, 2))
             
             predicciones.append({
                 "fecha": fecha_prediccion.strftime("%Y-%m-%d"),
-                "dia_semana": ["Lunes", "Martes", "Miércoles", "Jueves", "Viernes", "Sábado", "Domingo"][dia_semana],
+                "dia_semana": DIAS_SEMANA[dia_semana],
                 "prediccion": prediccion_final,
                 "tendencia": round(pendiente, 4),
                 "factor_estacional": round(factor_estacional, 3)
             })
-        
-        return {
-            "algoritmo": "ARIMA Simple",
-            "servicio_id": servicio_id,
-            "datos_historicos": {
-                "dias_analizados": len(reservas_diarias),
-                "total_reservas": sum(valores),
-                "promedio_diario": round(statistics.mean(valores), 2),
-                "desviacion_estandar": round(statistics.stdev(valores), 2) if len(valores) > 1 else 0
-            },
-            "parametros_modelo": {
-                "ventana_promedio_movil": ventana,
-                "pendiente_tendencia": round(pendiente, 4),
-                "intercepto": round(intercepto, 2)
-            },
-            "predicciones": predicciones,
-            "fecha_generacion": datetime.now().isoformat()
-        }
+        return predicciones
     
     @staticmethod
-    def prediccion_estacional_avanzada(db: Session, servicio_id: int, dias_futuros: int = 30) -> Dict[str, Any]:
-        """Predicción usando análisis estacional avanzado"""
-        # Obtener datos de los últimos 365 días
-        inicio_historico = datetime.now() - timedelta(days=365)
-        
-        # Obtener reservas por mes y día de la semana
-        reservas_por_mes_dia = db.query(
-            sql_func.extract('month', Reserva.fecha_hora_inicio).label('mes'),
-            sql_func.extract('dow', Reserva.fecha_hora_inicio).label('dia_semana'),
-            sql_func.count(Reserva.id).label('total')
-        ).filter(
-            and_(
-                Reserva.servicio_id == servicio_id,
-                Reserva.fecha_hora_inicio >= inicio_historico,
-                Reserva.estado != "cancelada"
-            )
-        ).group_by(
-            sql_func.extract('month', Reserva.fecha_hora_inicio),
-            sql_func.extract('dow', Reserva.fecha_hora_inicio)
-        ).all()
-        
-        # Crear matriz de patrones estacionales
-        patrones_estacionales = {}
-        for mes in range(1, 13):
-            patrones_estacionales[mes] = {}
-            for dia in range(7):
-                patrones_estacionales[mes][dia] = 0
-        
-        # Poblar patrones
-        for r in reservas_por_mes_dia:
-            mes = int(r.mes)
-            dia = int(r.dia_semana)
-            patrones_estacionales[mes][dia] = r.total
-        
-        # Calcular factores de estacionalidad
-        factores_estacionales = {}
-        for mes in range(1, 13):
-            factores_estacionales[mes] = {}
-            for dia in range(7):
-                # Factor = valor / promedio del mes
-                valores_mes = [patrones_estacionales[mes][d] for d in range(7)]
-                promedio_mes = statistics.mean(valores_mes) if valores_mes else 1
-                factor = patrones_estacionales[mes][dia] / promedio_mes if promedio_mes > 0 else 1
-                factores_estacionales[mes][dia] = factor
-        
-        # Calcular tendencia general
-        reservas_totales = db.query(Reserva).filter(
-            and_(
-                Reserva.servicio_id == servicio_id,
-                Reserva.fecha_hora_inicio >= inicio_historico,
-                Reserva.estado != "cancelada"
-            )
-        ).count()
-        
-        promedio_diario_historico = reservas_totales / 365
-        
-        # Generar predicciones
+    def _proyectar_estacional(modelo: Dict[str, Any], dias_futuros: int) -> List[Dict[str, Any]]:
+        """Generar los días futuros del modelo estacional"""
         predicciones = []
         for i in range(dias_futuros):
             fecha_prediccion = date.today() + timedelta(days=i)
@@ -171,96 +146,30 @@ class PrediccionService:
             dia_semana = fecha_prediccion.weekday()
             
             # Predicción = promedio histórico * factor estacional * ajuste temporal
-            factor_estacional = factores_estacionales[mes][dia_semana]
+            factor_estacional = modelo["factores_estacionales"][mes][dia_semana]
             
             # Ajuste temporal (crecimiento gradual)
             factor_crecimiento = 1 + (i * 0.001)  # 0.1% de crecimiento diario
             
-            prediccion = promedio_diario_historico * factor_estacional * factor_crecimiento
+            prediccion = modelo["promedio_diario"] * factor_estacional * factor_crecimiento
             prediccion = max(0, round(prediccion, 2))
             
             predicciones.append({
                 "fecha": fecha_prediccion.strftime("%Y-%m-%d"),
-                "dia_semana": ["Lunes", "Martes", "Miércoles", "Jueves", "Viernes", "Sábado", "Domingo"][dia_semana],
+                "dia_semana": DIAS_SEMANA[dia_semana],
                 "prediccion": prediccion,
                 "factor_estacional": round(factor_estacional, 3),
                 "factor_crecimiento": round(factor_crecimiento, 4)
             })
-        
-        return {
-            "algoritmo": "Estacional Avanzado",
-            "servicio_id": servicio_id,
-            "datos_historicos": {
-                "dias_analizados": 365,
-                "total_reservas": reservas_totales,
-                "promedio_diario": round(promedio_diario_historico, 2)
-            },
-            "patrones_estacionales": {
-                "meses": {str(mes): {str(dia): patrones_estacionales[mes][dia] for dia in range(7)} for mes in range(1, 13)},
-                "factores": {str(mes): {str(dia): round(factores_estacionales[mes][dia], 3) for dia in range(7)} for mes in range(1, 13)}
-            },
-            "predicciones": predicciones,
-            "fecha_generacion": datetime.now().isoformat()
-        }
+        return predicciones
     
     @staticmethod
-    def prediccion_machine_learning_simple(db: Session, servicio_id: int, dias_futuros: int = 30) -> Dict[str, Any]:
-        """Predicción usando algoritmo de ML simple (regresión polinomial)"""
-        # Obtener datos de los últimos 180 días
-        inicio_historico = datetime.now() - timedelta(days=180)
-        
-        # Obtener reservas diarias
-        reservas_diarias = db.query(
-            sql_func.date(Reserva.fecha_hora_inicio).label('fecha'),
-            sql_func.count(Reserva.id).label('total')
-        ).filter(
-            and_(
-                Reserva.servicio_id == servicio_id,
-                Reserva.fecha_hora_inicio >= inicio_historico,
-                Reserva.estado != "cancelada"
-            )
-        ).group_by(sql_func.date(Reserva.fecha_hora_inicio)).order_by(
-            sql_func.date(Reserva.fecha_hora_inicio)
-        ).all()
-        
-        if len(reservas_diarias) < 60:
-            raise HTTPException(status_code=400, detail="Datos insuficientes para ML")
-        
-        # Preparar datos para regresión
-        x = list(range(len(reservas_diarias)))
-        y = [r.total for r in reservas_diarias]
-        
-        # Regresión polinomial de grado 2 (cuadrática)
-        n = len(x)
-        sum_x = sum(x)
-        sum_y = sum(y)
-        sum_x2 = sum(x[i] ** 2 for i in range(n))
-        sum_x3 = sum(x[i] ** 3 for i in range(n))
-        sum_x4 = sum(x[i] ** 4 for i in range(n))
-        sum_xy = sum(x[i] * y[i] for i in range(n))
-        sum_x2y = sum(x[i] ** 2 * y[i] for i in range(n))
-        
-        # Resolver sistema de ecuaciones para coeficientes a, b, c
-        # y = ax² + bx + c
-        det = n * sum_x2 * sum_x4 + 2 * sum_x * sum_x2 * sum_x3 - sum_x2 ** 3 - n * sum_x3 ** 2 - sum_x ** 2 * sum_x4
-        
-        if abs(det) < 1e-10:
-            # Si el determinante es muy pequeño, usar regresión lineal
-            a, b, c = 0, 0, statistics.mean(y)
-        else:
-            a = (n * sum_x2y * sum_x2 + sum_x * sum_xy * sum_x3 + sum_y * sum_x2 * sum_x3 - 
-                 sum_x2 ** 2 * sum_y - n * sum_xy * sum_x4 - sum_x ** 2 * sum_x2y) / det
-            
-            b = (n * sum_xy * sum_x4 + sum_x * sum_x2y * sum_x2 + sum_y * sum_x3 * sum_x2 - 
-                 sum_x2 ** 2 * sum_x2y - n * sum_x3 * sum_xy - sum_x ** 2 * sum_x4) / det
-            
-            c = (sum_x2 * sum_x2y * sum_x4 + sum_x3 * sum_xy * sum_x3 + sum_x * sum_x2 * sum_x2y - 
-                 sum_x2 ** 3 - sum_x3 ** 2 * sum_x2y - sum_x ** 2 * sum_x4) / det
-        
-        # Generar predicciones
+    def _proyectar_ml(modelo: Dict[str, Any], dias_futuros: int) -> List[Dict[str, Any]]:
+        """Generar los días futuros de la regresión polinomial"""
+        a, b, c = modelo["a"], modelo["b"], modelo["c"]
         predicciones = []
         for i in range(dias_futuros):
-            x_pred = len(x) + i
+            x_pred = modelo["n"] + i
             prediccion = a * (x_pred ** 2) + b * x_pred + c
             prediccion = max(0, round(prediccion, 2))
             
@@ -273,78 +182,212 @@ class PrediccionService:
                     "c": round(c, 6)
                 }
             })
+        return predicciones
+    
+    # ===== ESTADO INCREMENTAL DE LOS MODELOS =====
+    
+    @staticmethod
+    def _obtener_estado(db: Session, servicio_id: int, forzar: bool = False) -> EstadoPrediccion:
+        """Obtener el estado incremental del servicio, desde cache si está vigente"""
+        if not forzar:
+            estado = cache_service.get(PREFIJO_CACHE_ESTADO, servicio_id=servicio_id)
+            if estado is not None:
+                estado.avanzar(date.today())
+                return estado
         
-        # Calcular métricas de calidad del modelo
-        predicciones_entrenamiento = []
-        for i, x_val in enumerate(x):
-            pred = a * (x_val ** 2) + b * x_val + c
-            predicciones_entrenamiento.append(pred)
+        # Los cambios publicados hasta ahora ya están en la base de datos: se
+        # entregan antes de la consulta para no aplicarlos también al estado nuevo.
+        # Uno confirmado entre esta sincronización y la consulta se contaría dos
+        # veces (±1 en un día); el estado se reconstruye al caducar su TTL
+        cache_service.sincronizar()
+        hoy = date.today()
+        estado = estado_desde_filas(
+            PrediccionService._filas_diarias(db, servicio_id, hoy - timedelta(days=DIAS_HISTORICO)),
+            hoy, DIAS_HISTORICO
+        )
+        PrediccionService._guardar_estado_cache(servicio_id, estado)
+        return estado
+    
+    @staticmethod
+    def _obtener_modelo(db: Session, servicio_id: int, algoritmo: str, forzar: bool = False) -> Dict[str, Any]:
+        """Parámetros del modelo leídos del estado incremental (O(1), sin reajustar el historial)"""
+        estado = PrediccionService._obtener_estado(db, servicio_id, forzar)
+        return getattr(PrediccionService, f"_modelo_{algoritmo}")(estado)
+    
+    @staticmethod
+    def _guardar_estado_cache(servicio_id: int, estado: EstadoPrediccion):
+        # Solo en este worker: registrar_reserva modifica el estado en memoria
+        cache_service.set(
+            PREFIJO_CACHE_ESTADO, estado, settings.prediccion_modelo_ttl, local=True, servicio_id=servicio_id
+        )
+    
+    @staticmethod
+    def invalidar_modelos(servicio_id: int) -> bool:
+        """Descartar el estado del servicio (en todos los workers) para que se reconstruya desde la base de datos"""
+        return cache_service.invalidate(PREFIJO_CACHE_ESTADO, servicio_id=servicio_id)
+    
+    @staticmethod
+    def registrar_reserva(servicio_id: int, fecha_hora_inicio: datetime, estado: str, delta: int = 1) -> bool:
+        """Aplicar al estado del servicio una reserva añadida (+1) o retirada (-1) en O(1).
         
-        # Error cuadrático medio
-        mse = sum((y[i] - predicciones_entrenamiento[i]) ** 2 for i in range(n)) / n
-        rmse = math.sqrt(mse)
+        Las reservas canceladas no cuentan en las predicciones. Si el servicio no
+        tiene estado en este worker no hay nada que actualizar: se construirá con
+        la siguiente predicción. El cambio se publica para los demás workers.
+        """
+        if estado == "cancelada":
+            return False
+        fecha = fecha_hora_inicio.date()
+        cache_service.publicar(
+            CANAL_RESERVAS, {"servicio_id": servicio_id, "fecha": fecha.isoformat(), "delta": delta}
+        )
+        return PrediccionService._aplicar_reserva(servicio_id, fecha, delta)
+    
+    @staticmethod
+    def _aplicar_reserva(servicio_id: int, fecha: date, delta: int) -> bool:
+        """Sumar `delta` reservas al estado del servicio en este worker, si lo tiene"""
+        estado_prediccion = cache_service.get(PREFIJO_CACHE_ESTADO, servicio_id=servicio_id)
+        if estado_prediccion is None:
+            return False
+        estado_prediccion.avanzar(date.today())
+        estado_prediccion.registrar(fecha, delta)
+        return True
+    
+    @staticmethod
+    def aplicar_reserva_de_otro_worker(datos: Dict[str, Any]):
+        """Manejador de CANAL_RESERVAS: el cambio que otro worker publicó en registrar_reserva"""
+        PrediccionService._aplicar_reserva(datos["servicio_id"], date.fromisoformat(datos["fecha"]), datos["delta"])
+    
+    @staticmethod
+    def precalcular_modelos(db: Session, servicio_ids: Optional[List[int]] = None) -> Dict[str, Any]:
+        """Reconstruir y cachear el estado de todos los servicios (precálculo nocturno)"""
+        if servicio_ids is None:
+            servicio_ids = [fila.id for fila in db.query(Servicio.id).all()]
         
-        # Coeficiente de determinación R²
-        y_mean = statistics.mean(y)
-        ss_tot = sum((y[i] - y_mean) ** 2 for i in range(n))
-        ss_res = sum((y[i] - predicciones_entrenamiento[i]) ** 2 for i in range(n))
-        r2 = 1 - (ss_res / ss_tot) if ss_tot > 0 else 0
+        inicio = time.perf_counter()
+        calculados = 0
+        omitidos = []
+        for servicio_id in servicio_ids:
+            # Una sola consulta por servicio, compartida por los tres algoritmos
+            estado = PrediccionService._obtener_estado(db, servicio_id, forzar=True)
+            for algoritmo in ALGORITMOS:
+                try:
+                    getattr(PrediccionService, f"_modelo_{algoritmo}")(estado)
+                    calculados += 1
+                except HTTPException as e:
+                    omitidos.append({"servicio_id": servicio_id, "algoritmo": algoritmo, "motivo": e.detail})
         
         return {
-            "algoritmo": "Machine Learning Simple (Regresión Polinomial)",
-            "servicio_id": servicio_id,
-            "datos_entrenamiento": {
-                "dias_analizados": n,
-                "total_reservas": sum(y),
-                "promedio_diario": round(statistics.mean(y), 2)
+            "servicios": len(servicio_ids),
+            "modelos_calculados": calculados,
+            "modelos_omitidos": omitidos,
+            "duracion_segundos": round(time.perf_counter() - inicio, 3),
+            "fecha_generacion": datetime.now().isoformat()
+        }
+    
+    # ===== AJUSTE DE MODELOS =====
+    
+    @staticmethod
+    def _filas_diarias(db: Session, servicio_id: int, inicio: date, fin: Optional[date] = None) -> List[Any]:
+        """(fecha, total) de las reservas no canceladas del servicio por día, desde `inicio` (y antes de `fin`)"""
+        condiciones = [
+            ReservaHistorica.servicio_id == servicio_id,
+            ReservaHistorica.fecha_hora_inicio >= datetime(inicio.year, inicio.month, inicio.day),
+            ReservaHistorica.estado != "cancelada"
+        ]
+        if fin is not None:
+            condiciones.append(ReservaHistorica.fecha_hora_inicio < datetime(fin.year, fin.month, fin.day))
+        return db.query(
+            sql_func.date(ReservaHistorica.fecha_hora_inicio).label('fecha'),
+            sql_func.count(ReservaHistorica.id).label('total')
+        ).filter(and_(*condiciones)).group_by(sql_func.date(ReservaHistorica.fecha_hora_inicio)).all()
+    
+    @staticmethod
+    def _serie_servicio(db: Session, servicio_id: int, dias_historico: int = DIAS_HISTORICO) -> SerieDiaria:
+        """Serie diaria densa de reservas no canceladas del servicio hasta ayer (incluido)"""
+        hoy = date.today()
+        inicio = hoy - timedelta(days=dias_historico)
+        reservas_diarias = PrediccionService._filas_diarias(db, servicio_id, inicio, hoy)
+        return serie_diaria_densa(reservas_diarias, inicio, hoy - timedelta(days=1))
+    
+    @staticmethod
+    def _modelo_arima(estado: EstadoPrediccion) -> Dict[str, Any]:
+        """Modelo ARIMA simple (promedio móvil + tendencia lineal) a partir del estado"""
+        with estado.bloqueado():
+            if estado.dias_con_reservas_arima() < 30:
+                raise HTTPException(status_code=400, detail="Datos insuficientes para predicción ARIMA")
+            ajuste = estado.ajuste_arima()
+            factores = estado.factores_dia_semana()
+        
+        return {
+            "ventana": VENTANA_MEDIA_MOVIL,
+            "pendiente": ajuste["pendiente"],
+            "intercepto": ajuste["intercepto"],
+            "ultimo_promedio": ajuste["ultimo_promedio"],
+            "factores_estacionales": factores.tolist(),
+            "datos_historicos": {
+                "dias_analizados": ajuste["dias"],
+                "total_reservas": int(round(ajuste["total"])),
+                "promedio_diario": round(ajuste["media"], 2),
+                "desviacion_estandar": round(ajuste["desviacion"], 2)
+            }
+        }
+    
+    @staticmethod
+    def _modelo_estacional(estado: EstadoPrediccion) -> Dict[str, Any]:
+        """Matriz de patrones estacionales (mes x día de la semana) a partir del estado"""
+        matriz = estado.matriz_mes_dia_semana()
+        factores = factores_mes_dia_semana(matriz)
+        reservas_totales = int(round(matriz.sum()))
+        
+        return {
+            "patrones_estacionales": {
+                mes: {dia: int(round(matriz[mes - 1, dia])) for dia in range(7)} for mes in range(1, 13)
             },
-            "modelo": {
-                "ecuacion": f"y = {round(a, 6)}x² + {round(b, 6)}x + {round(c, 6)}",
-                "coeficientes": {
-                    "a": round(a, 6),
-                    "b": round(b, 6),
-                    "c": round(c, 6)
-                }
+            "factores_estacionales": {
+                mes: {dia: float(factores[mes - 1, dia]) for dia in range(7)} for mes in range(1, 13)
+            },
+            "total_reservas": reservas_totales,
+            "promedio_diario": reservas_totales / 365
+        }
+    
+    @staticmethod
+    def _modelo_ml(estado: EstadoPrediccion) -> Dict[str, Any]:
+        """Regresión polinomial de grado 2 a partir de los momentos del estado"""
+        with estado.bloqueado():
+            if estado.dias_con_reservas_ml() < 60:
+                raise HTTPException(status_code=400, detail="Datos insuficientes para ML")
+            ajuste = estado.ajuste_cuadratico()
+        
+        a, b, c = ajuste["coeficientes"]
+        mse, rmse, r2 = ajuste["metricas"]
+        
+        return {
+            "a": a,
+            "b": b,
+            "c": c,
+            "n": ajuste["dias"],
+            "datos_entrenamiento": {
+                "dias_analizados": ajuste["dias"],
+                "total_reservas": int(round(ajuste["total"])),
+                "promedio_diario": round(ajuste["media"], 2)
             },
             "metricas_calidad": {
                 "mse": round(mse, 4),
                 "rmse": round(rmse, 4),
                 "r2": round(r2, 4)
-            },
-            "predicciones": predicciones,
-            "fecha_generacion": datetime.now().isoformat()
+            }
         }
     
+    @staticmethod
+    def _factores_estacionales(db: Session, servicio_id: int, dias_historico: int = 90) -> List[float]:
+        """Factor estacional de cada día de la semana (0 = lunes) con una consulta GROUP BY"""
+        serie = PrediccionService._serie_servicio(db, servicio_id, dias_historico)
+        return factores_dia_semana(serie).tolist()
+    
     @staticmethod
     def _calcular_factor_estacional(db: Session, servicio_id: int, dia_semana: int) -> float:
         """Calcular factor estacional para un día específico de la semana"""
-        # Obtener datos de los últimos 90 días
-        inicio_historico = datetime.now() - timedelta(days=90)
-        
-        # Obtener reservas para este día de la semana
-        reservas_dia = db.query(Reserva).filter(
-            and_(
-                Reserva.servicio_id == servicio_id,
-                Reserva.fecha_hora_inicio >= inicio_historico,
-                sql_func.extract('dow', Reserva.fecha_hora_inicio) == dia_semana,
-                Reserva.estado != "cancelada"
-            )
-        ).count()
-        
-        # Obtener total de reservas en el período
-        total_reservas = db.query(Reserva).filter(
-            and_(
-                Reserva.servicio_id == servicio_id,
-                Reserva.fecha_hora_inicio >= inicio_historico,
-                Reserva.estado != "cancelada"
-            )
-        ).count()
-        
-        # Calcular factor estacional
-        if total_reservas > 0:
-            # Factor = (reservas del día / total) / (1/7)
-            factor = (reservas_dia / total_reservas) / (1/7)
-            return factor
-        else:
-            return 1.0
+        return PrediccionService._factores_estacionales(db, servicio_id)[dia_semana]
+
 
+cache_service.suscribir(CANAL_RESERVAS, PrediccionService.aplicar_reserva_de_otro_worker)
@@ -1,7 +1,9 @@
 from sqlalchemy.orm import Session
-from typing import List, Optional
+from typing import List, Optional, Dict, Any
+from ..config import settings
 from ..models.recurso import Recurso
-from ..schemas.recurso import RecursoCreate, RecursoUpdate
+from ..schemas.recurso import RecursoCreate, RecursoUpdate, RecursoResponse
+from .cache_service import CacheDecorator, TAG_RECURSOS, invalidar_por_recurso
 
 class RecursoService:
     
@@ -10,6 +12,12 @@ class RecursoService:
         """Obtener todos los recursos con paginación"""
         return db.query(Recurso).offset(skip).limit(limit).all()
     
+    @staticmethod
+    @CacheDecorator("recursos_listado", settings.cache_ttl_recursos, tags=[TAG_RECURSOS], etag=True)
+    def get_all_cacheado(db: Session, skip: int = 0, limit: int = 100) -> List[Dict[str, Any]]:
+        """Listado de recursos ya serializado, desde cache (GET /recursos/)"""
+        return [RecursoResponse.model_validate(r).model_dump() for r in RecursoService.get_all(db, skip, limit)]
+    
     @staticmethod
     def get_by_id(db: Session, recurso_id: int) -> Optional[Recurso]:
         """Obtener un recurso por ID"""
@@ -30,6 +38,12 @@ class RecursoService:
         """Obtener solo recursos disponibles"""
         return db.query(Recurso).filter(Recurso.disponible == True).all()
     
+    @staticmethod
+    @CacheDecorator("recursos_disponibles", settings.cache_ttl_recursos, tags=[TAG_RECURSOS], etag=True)
+    def get_disponibles_cacheado(db: Session) -> List[Dict[str, Any]]:
+        """Recursos disponibles ya serializados, desde cache (GET /recursos/disponibles)"""
+        return [RecursoResponse.model_validate(r).model_dump() for r in RecursoService.get_disponibles(db)]
+    
     @staticmethod
     def create(db: Session, recurso: RecursoCreate) -> Recurso:
         """Crear un nuevo recurso"""
@@ -37,6 +51,7 @@ class RecursoService:
         db.add(db_recurso)
         db.commit()
         db.refresh(db_recurso)
+        invalidar_por_recurso(db_recurso.id)
         return db_recurso
     
     @staticmethod
@@ -53,6 +68,7 @@ class RecursoService:
         
         db.commit()
         db.refresh(db_recurso)
+        invalidar_por_recurso(recurso_id)
         return db_recurso
     
     @staticmethod
@@ -64,6 +80,7 @@ class RecursoService:
         
         db.delete(db_recurso)
         db.commit()
+        invalidar_por_recurso(recurso_id)
         return True
     
     @staticmethod
@@ -76,6 +93,7 @@ class RecursoService:
         db_recurso.disponible = not db_recurso.disponible
         db.commit()
         db.refresh(db_recurso)
+        invalidar_por_recurso(recurso_id)
         return db_recurso
     
     @staticmethod
@@ -1,13 +1,29 @@
 from sqlalchemy.orm import Session
 from sqlalchemy import and_, or_, func as sql_func
+from sqlalchemy.engine import Row
 from fastapi import HTTPException
 from datetime import datetime, timedelta
-from typing import List, Optional
+from typing import List, Optional, Sequence, Tuple, Union
 from ..models.reserva import Reserva
+from ..models.reserva_archivo import ReservaHistorica
 from ..models.servicio import Servicio
 from ..models.recurso import Recurso
 from ..models.cliente import Cliente
 from ..schemas.reserva import ReservaCreate, ReservaUpdate
+from ..paginacion import paginar_keyset
+from ..config import settings
+from .cache_service import (
+    CacheDecorator, TAG_RECURSOS, TAG_SERVICIOS, invalidar_por_reserva, cache_estadisticas_periodo, tag_fecha
+)
+
+def _registrar_prediccion(servicio_id: int, fecha_hora_inicio: datetime, estado: str, delta: int) -> None:
+    """Aplicar una reserva añadida (+1) o retirada (-1) al estado de predicción del servicio.
+
+    El módulo de predicciones (numpy) se importa con la primera escritura y no
+    al arrancar la aplicación.
+    """
+    from .prediccion_service import PrediccionService
+    PrediccionService.registrar_reserva(servicio_id, fecha_hora_inicio, estado, delta)
 
 class ReservaService:
     @staticmethod
@@ -37,12 +53,25 @@ class ReservaService:
         db.add(db_reserva)
         db.commit()
         db.refresh(db_reserva)
+        _registrar_prediccion(
+            db_reserva.servicio_id, db_reserva.fecha_hora_inicio, db_reserva.estado, 1
+        )
+        invalidar_por_reserva(
+            db_reserva.servicio_id, db_reserva.recurso_id, db_reserva.fecha_hora_inicio, db_reserva.fecha_hora_fin
+        )
         return db_reserva
     
     @staticmethod
-    def get_all_reservas(db: Session, skip: int = 0, limit: int = 100) -> List[Reserva]:
-        """Obtener todas las reservas con paginación"""
-        return db.query(Reserva).offset(skip).limit(limit).all()
+    def get_all_reservas(db: Session, skip: int = 0, limit: int = 100, columnas: Optional[Sequence] = None) -> List[Union[Reserva, Row]]:
+        """Obtener todas las reservas con paginación (solo `columnas`, como tuplas, si se indican)"""
+        return db.query(*(columnas or [Reserva])).offset(skip).limit(limit).all()
+    
+    @staticmethod
+    def get_all_reservas_cursor(
+        db: Session, limit: int = 100, cursor: Optional[str] = None, columnas: Optional[Sequence] = None
+    ) -> Tuple[List[Union[Reserva, Row]], Optional[str]]:
+        """Obtener todas las reservas con paginación por cursor (clave: id)"""
+        return paginar_keyset(db.query(*(columnas or [Reserva])), [Reserva.id], limit, cursor)
     
     @staticmethod
     def get_reserva(db: Session, reserva_id: int) -> Reserva:
@@ -73,12 +102,23 @@ class ReservaService:
                 raise HTTPException(status_code=400, detail="Recurso no disponible en ese horario")
         
         update_data = reserva.dict(exclude_unset=True)
+        anterior = (db_reserva.servicio_id, db_reserva.fecha_hora_inicio, db_reserva.estado)
+        recurso_anterior, fin_anterior = db_reserva.recurso_id, db_reserva.fecha_hora_fin
         for field, value in update_data.items():
             setattr(db_reserva, field, value)
         
         try:
             db.commit()
             db.refresh(db_reserva)
+            # Retirar la reserva anterior del estado de predicción y añadir la nueva
+            _registrar_prediccion(*anterior, -1)
+            _registrar_prediccion(
+                db_reserva.servicio_id, db_reserva.fecha_hora_inicio, db_reserva.estado, 1
+            )
+            invalidar_por_reserva(anterior[0], recurso_anterior, anterior[1], fin_anterior)
+            invalidar_por_reserva(
+                db_reserva.servicio_id, db_reserva.recurso_id, db_reserva.fecha_hora_inicio, db_reserva.fecha_hora_fin
+            )
             return db_reserva
         except Exception as e:
             db.rollback()
@@ -87,19 +127,34 @@ class ReservaService:
     @staticmethod
     def delete_reserva(db: Session, reserva_id: int) -> bool:
         db_reserva = ReservaService.get_reserva(db, reserva_id)
+        anterior = (db_reserva.servicio_id, db_reserva.fecha_hora_inicio, db_reserva.estado)
+        recurso_id, fecha_fin = db_reserva.recurso_id, db_reserva.fecha_hora_fin
         db.delete(db_reserva)
         db.commit()
+        _registrar_prediccion(*anterior, -1)
+        invalidar_por_reserva(anterior[0], recurso_id, anterior[1], fecha_fin)
         return True
     
     @staticmethod
     def cancel_reserva(db: Session, reserva_id: int) -> Reserva:
         db_reserva = ReservaService.get_reserva(db, reserva_id)
+        estado_anterior = db_reserva.estado
         db_reserva.estado = "cancelada"
         db.commit()
         db.refresh(db_reserva)
+        _registrar_prediccion(
+            db_reserva.servicio_id, db_reserva.fecha_hora_inicio, estado_anterior, -1
+        )
+        invalidar_por_reserva(
+            db_reserva.servicio_id, db_reserva.recurso_id, db_reserva.fecha_hora_inicio, db_reserva.fecha_hora_fin
+        )
         return db_reserva
     
     @staticmethod
+    @CacheDecorator(
+        "reservas_disponibilidad", settings.cache_ttl_disponibilidad,
+        tags=lambda fecha, **_: [tag_fecha(fecha), TAG_SERVICIOS, TAG_RECURSOS]
+    )
     def get_disponibilidad(db: Session, servicio_id: int, fecha: str) -> dict:
         # Parse date
         try:
@@ -112,20 +167,33 @@ class ReservaService:
         if not servicio:
             raise HTTPException(status_code=404, detail="Servicio not found")
         
-        # Get available resources for this service type
-        recursos = db.query(Recurso).filter(Recurso.disponible == True).all()
-        
         # Generate time slots (9 AM to 6 PM, every 30 minutes)
         horarios = []
         start_time = fecha_obj.replace(hour=9, minute=0, second=0, microsecond=0)
         end_time = fecha_obj.replace(hour=18, minute=0, second=0, microsecond=0)
         
+        # Reservas del día de cada recurso disponible, en una sola consulta
+        recursos = [fila.id for fila in db.query(Recurso.id).filter(Recurso.disponible == True)]
+        ocupados = {recurso_id: [] for recurso_id in recursos}
+        for recurso_id, inicio, fin in db.query(
+            Reserva.recurso_id, Reserva.fecha_hora_inicio, Reserva.fecha_hora_fin
+        ).filter(
+            Reserva.recurso_id.in_(recursos),
+            Reserva.estado != "cancelada",
+            Reserva.fecha_hora_inicio < end_time,
+            Reserva.fecha_hora_fin > start_time
+        ):
+            ocupados[recurso_id].append((inicio, fin))
+        
         current_time = start_time
         while current_time <= end_time:
             slot_end = current_time + timedelta(minutes=servicio.duracion_minutos)
             if slot_end <= end_time:
                 # Check if any resource is available for this time slot
-                disponible = not ReservaService._has_overlap(db, None, current_time, slot_end)
+                disponible = any(
+                    all(fin <= current_time or inicio >= slot_end for inicio, fin in reservas)
+                    for reservas in ocupados.values()
+                )
                 horarios.append({
                     "inicio": current_time.strftime("%H:%M"),
                     "fin": slot_end.strftime("%H:%M"),
@@ -293,6 +361,7 @@ class ReservaService:
     # ===== MÉTODOS PARA EXPLOTACIÓN DE DATOS =====
 
     @staticmethod
+    @cache_estadisticas_periodo
     def get_estadisticas_periodo(db: Session, fecha_inicio: str, fecha_fin: str) -> dict:
         """Obtener estadísticas de reservas en un período específico"""
         try:
@@ -302,29 +371,29 @@ class ReservaService:
             raise HTTPException(status_code=400, detail="Formato de fecha inválido. Use YYYY-MM-DD")
         
         # Total de reservas en el período
-        total_reservas = db.query(Reserva).filter(
+        total_reservas = db.query(ReservaHistorica).filter(
             and_(
-                Reserva.fecha_hora_inicio >= fecha_inicio_obj,
-                Reserva.fecha_hora_inicio <= fecha_fin_obj
+                ReservaHistorica.fecha_hora_inicio >= fecha_inicio_obj,
+                ReservaHistorica.fecha_hora_inicio <= fecha_fin_obj
             )
         ).count()
         
         # Reservas por estado
-        reservas_por_estado = db.query(Reserva.estado, sql_func.count(Reserva.id)).filter(
+        reservas_por_estado = db.query(ReservaHistorica.estado, sql_func.count(ReservaHistorica.id)).filter(
             and_(
-                Reserva.fecha_hora_inicio >= fecha_inicio_obj,
-                Reserva.fecha_hora_inicio <= fecha_fin_obj
+                ReservaHistorica.fecha_hora_inicio >= fecha_inicio_obj,
+                ReservaHistorica.fecha_hora_inicio <= fecha_fin_obj
             )
-        ).group_by(Reserva.estado).all()
+        ).group_by(ReservaHistorica.estado).all()
         
         # Reservas por servicio
         reservas_por_servicio = db.query(
             Servicio.nombre, 
-            sql_func.count(Reserva.id)
-        ).join(Reserva).filter(
+            sql_func.count(ReservaHistorica.id)
+        ).join(ReservaHistorica, ReservaHistorica.servicio_id == Servicio.id).filter(
             and_(
-                Reserva.fecha_hora_inicio >= fecha_inicio_obj,
-                Reserva.fecha_hora_inicio <= fecha_fin_obj
+                ReservaHistorica.fecha_hora_inicio >= fecha_inicio_obj,
+                ReservaHistorica.fecha_hora_inicio <= fecha_fin_obj
             )
         ).group_by(Servicio.id, Servicio.nombre).all()
         
@@ -345,12 +414,12 @@ class ReservaService:
             raise HTTPException(status_code=404, detail="Servicio not found")
         
         # Total de reservas para este servicio
-        total_reservas = db.query(Reserva).filter(Reserva.servicio_id == servicio_id).count()
+        total_reservas = db.query(ReservaHistorica).filter(ReservaHistorica.servicio_id == servicio_id).count()
         
         # Reservas por estado
-        reservas_por_estado = db.query(Reserva.estado, sql_func.count(Reserva.id)).filter(
-            Reserva.servicio_id == servicio_id
-        ).group_by(Reserva.estado).all()
+        reservas_por_estado = db.query(ReservaHistorica.estado, sql_func.count(ReservaHistorica.id)).filter(
+            ReservaHistorica.servicio_id == servicio_id
+        ).group_by(ReservaHistorica.estado).all()
         
         # Reservas por mes (últimos 12 meses)
         from datetime import date
@@ -367,11 +436,11 @@ class ReservaService:
             else:
                 fin_mes = datetime(año, mes + 1, 1) - timedelta(seconds=1)
             
-            count = db.query(Reserva).filter(
+            count = db.query(ReservaHistorica).filter(
                 and_(
-                    Reserva.servicio_id == servicio_id,
-                    Reserva.fecha_hora_inicio >= inicio_mes,
-                    Reserva.fecha_hora_inicio <= fin_mes
+                    ReservaHistorica.servicio_id == servicio_id,
+                    ReservaHistorica.fecha_hora_inicio >= inicio_mes,
+                    ReservaHistorica.fecha_hora_inicio <= fin_mes
                 )
             ).count()
             
@@ -401,23 +470,23 @@ class ReservaService:
             raise HTTPException(status_code=404, detail="Recurso not found")
         
         # Total de reservas para este recurso
-        total_reservas = db.query(Reserva).filter(Reserva.recurso_id == recurso_id).count()
+        total_reservas = db.query(ReservaHistorica).filter(ReservaHistorica.recurso_id == recurso_id).count()
         
         # Reservas por estado
-        reservas_por_estado = db.query(Reserva.estado, sql_func.count(Reserva.id)).filter(
-            Reserva.recurso_id == recurso_id
-        ).group_by(Reserva.estado).all()
+        reservas_por_estado = db.query(ReservaHistorica.estado, sql_func.count(ReservaHistorica.id)).filter(
+            ReservaHistorica.recurso_id == recurso_id
+        ).group_by(ReservaHistorica.estado).all()
         
         # Tasa de ocupación (últimos 30 días)
         from datetime import date
         hoy = date.today()
         inicio_periodo = datetime(hoy.year, hoy.month, hoy.day) - timedelta(days=30)
         
-        reservas_periodo = db.query(Reserva).filter(
+        reservas_periodo = db.query(ReservaHistorica).filter(
             and_(
-                Reserva.recurso_id == recurso_id,
-                Reserva.fecha_hora_inicio >= inicio_periodo,
-                Reserva.estado != "cancelada"
+                ReservaHistorica.recurso_id == recurso_id,
+                ReservaHistorica.fecha_hora_inicio >= inicio_periodo,
+                ReservaHistorica.estado != "cancelada"
             )
         ).all()
         
@@ -453,11 +522,11 @@ class ReservaService:
             raise HTTPException(status_code=400, detail="Formato de fecha inválido. Use YYYY-MM-DD")
         
         # Obtener todas las reservas para esa fecha
-        reservas = db.query(Reserva).filter(
+        reservas = db.query(ReservaHistorica).filter(
             and_(
-                Reserva.fecha_hora_inicio >= fecha_obj,
-                Reserva.fecha_hora_inicio < fecha_obj + timedelta(days=1),
-                Reserva.estado != "cancelada"
+                ReservaHistorica.fecha_hora_inicio >= fecha_obj,
+                ReservaHistorica.fecha_hora_inicio < fecha_obj + timedelta(days=1),
+                ReservaHistorica.estado != "cancelada"
             )
         ).all()
         
@@ -525,10 +594,10 @@ class ReservaService:
             
             inicio_mes = datetime(año, mes, 1)
             
-            count = db.query(Reserva).filter(
+            count = db.query(ReservaHistorica).filter(
                 and_(
-                    Reserva.fecha_hora_inicio >= inicio_mes,
-                    Reserva.fecha_hora_inicio <= fin_mes
+                    ReservaHistorica.fecha_hora_inicio >= inicio_mes,
+                    ReservaHistorica.fecha_hora_inicio <= fin_mes
                 )
             ).count()
             
@@ -542,11 +611,11 @@ class ReservaService:
         
         reservas_por_dia = []
         for dia in range(7):
-            count = db.query(Reserva).filter(
+            count = db.query(ReservaHistorica).filter(
                 and_(
-                    Reserva.fecha_hora_inicio >= inicio_3_meses,
-                    Reserva.fecha_hora_inicio < datetime.now(),
-                    sql_func.extract('dow', Reserva.fecha_hora_inicio) == dia
+                    ReservaHistorica.fecha_hora_inicio >= inicio_3_meses,
+                    ReservaHistorica.fecha_hora_inicio < datetime.now(),
+                    sql_func.extract('dow', ReservaHistorica.fecha_hora_inicio) == dia
                 )
             ).count()
             
@@ -574,20 +643,20 @@ class ReservaService:
             raise HTTPException(status_code=400, detail="Formato de fecha inválido. Use YYYY-MM-DD")
         
         # Total de reservas confirmadas
-        total_reservas = db.query(Reserva).filter(
+        total_reservas = db.query(ReservaHistorica).filter(
             and_(
-                Reserva.fecha_hora_inicio >= fecha_inicio_obj,
-                Reserva.fecha_hora_inicio <= fecha_fin_obj,
-                Reserva.estado == "confirmada"
+                ReservaHistorica.fecha_hora_inicio >= fecha_inicio_obj,
+                ReservaHistorica.fecha_hora_inicio <= fecha_fin_obj,
+                ReservaHistorica.estado == "confirmada"
             )
         ).count()
         
         # Reservas canceladas
-        reservas_canceladas = db.query(Reserva).filter(
+        reservas_canceladas = db.query(ReservaHistorica).filter(
             and_(
-                Reserva.fecha_hora_inicio >= fecha_inicio_obj,
-                Reserva.fecha_hora_inicio <= fecha_fin_obj,
-                Reserva.estado == "cancelada"
+                ReservaHistorica.fecha_hora_inicio >= fecha_inicio_obj,
+                ReservaHistorica.fecha_hora_inicio <= fecha_fin_obj,
+                ReservaHistorica.estado == "cancelada"
             )
         ).count()
         
@@ -597,11 +666,11 @@ class ReservaService:
         # Ingresos estimados (usando precio base de servicios)
         reservas_con_precio = db.query(
             Servicio.precio_base
-        ).join(Reserva).filter(
+        ).join(ReservaHistorica, ReservaHistorica.servicio_id == Servicio.id).filter(
             and_(
-                Reserva.fecha_hora_inicio >= fecha_inicio_obj,
-                Reserva.fecha_hora_inicio <= fecha_fin_obj,
-                Reserva.estado == "confirmada"
+                ReservaHistorica.fecha_hora_inicio >= fecha_inicio_obj,
+                ReservaHistorica.fecha_hora_inicio <= fecha_fin_obj,
+                ReservaHistorica.estado == "confirmada"
             )
         ).all()
         
@@ -637,6 +706,47 @@ class ReservaService:
         fecha_fin: Optional[str] = None
     ) -> List[Reserva]:
         """Obtener reservas con filtros avanzados"""
+        query = ReservaService._query_reservas_filtradas(
+            db, cliente_id, servicio_id, recurso_id, estado, fecha_inicio, fecha_fin
+        )
+        
+        # Ordenar por fecha de inicio (más recientes primero)
+        query = query.order_by(Reserva.fecha_hora_inicio.desc())
+        
+        # Aplicar paginación
+        return query.offset(skip).limit(limit).all()
+
+    @staticmethod
+    def get_reservas_filtradas_cursor(
+        db: Session,
+        limit: int = 100,
+        cursor: Optional[str] = None,
+        cliente_id: Optional[int] = None,
+        servicio_id: Optional[int] = None,
+        recurso_id: Optional[int] = None,
+        estado: Optional[str] = None,
+        fecha_inicio: Optional[str] = None,
+        fecha_fin: Optional[str] = None
+    ) -> Tuple[List[Reserva], Optional[str]]:
+        """Obtener reservas filtradas con paginación por cursor (clave: fecha_hora_inicio, id)"""
+        query = ReservaService._query_reservas_filtradas(
+            db, cliente_id, servicio_id, recurso_id, estado, fecha_inicio, fecha_fin
+        )
+        return paginar_keyset(
+            query, [Reserva.fecha_hora_inicio, Reserva.id], limit, cursor, descendente=True
+        )
+
+    @staticmethod
+    def _query_reservas_filtradas(
+        db: Session,
+        cliente_id: Optional[int] = None,
+        servicio_id: Optional[int] = None,
+        recurso_id: Optional[int] = None,
+        estado: Optional[str] = None,
+        fecha_inicio: Optional[str] = None,
+        fecha_fin: Optional[str] = None
+    ):
+        """Construir la consulta de reservas con los filtros avanzados"""
         query = db.query(Reserva)
         
         # Aplicar filtros
@@ -676,11 +786,7 @@ class ReservaService:
             except ValueError:
                 pass
         
-        # Ordenar por fecha de inicio (más recientes primero)
-        query = query.order_by(Reserva.fecha_hora_inicio.desc())
-        
-        # Aplicar paginación
-        return query.offset(skip).limit(limit).all()
+        return query
 
     @staticmethod
     def get_analisis_rendimiento(db: Session, fecha_inicio: str, fecha_fin: str) -> dict:
@@ -692,10 +798,10 @@ class ReservaService:
             raise HTTPException(status_code=400, detail="Formato de fecha inválido. Use YYYY-MM-DD")
         
         # Obtener todas las reservas en el período
-        reservas = db.query(Reserva).filter(
+        reservas = db.query(ReservaHistorica).filter(
             and_(
-                Reserva.fecha_hora_inicio >= fecha_inicio_obj,
-                Reserva.fecha_hora_inicio <= fecha_fin_obj
+                ReservaHistorica.fecha_hora_inicio >= fecha_inicio_obj,
+                ReservaHistorica.fecha_hora_inicio <= fecha_fin_obj
             )
         ).all()
         
@@ -761,10 +867,10 @@ class ReservaService:
         inicio_historico = datetime(hoy.year, hoy.month, hoy.day) - timedelta(days=90)
         
         # Obtener reservas históricas
-        reservas_historicas = db.query(Reserva).filter(
+        reservas_historicas = db.query(ReservaHistorica).filter(
             and_(
-                Reserva.fecha_hora_inicio >= inicio_historico,
-                Reserva.estado != "cancelada"
+                ReservaHistorica.fecha_hora_inicio >= inicio_historico,
+                ReservaHistorica.estado != "cancelada"
             )
         ).all()
         
@@ -838,13 +944,17 @@ class ReservaService:
         
         # Obtener reservas con información completa
         reservas = db.query(
-            Reserva, Cliente.nombre.label('cliente_nombre'), 
+            ReservaHistorica, Cliente.nombre.label('cliente_nombre'), 
             Servicio.nombre.label('servicio_nombre'),
             Recurso.nombre.label('recurso_nombre')
-        ).join(Cliente).join(Servicio).join(Recurso).filter(
+        ).join(Cliente, ReservaHistorica.cliente_id == Cliente.id).join(
+            Servicio, ReservaHistorica.servicio_id == Servicio.id
+        ).join(
+            Recurso, ReservaHistorica.recurso_id == Recurso.id
+        ).filter(
             and_(
-                Reserva.fecha_hora_inicio >= fecha_inicio_obj,
-                Reserva.fecha_hora_inicio <= fecha_fin_obj
+                ReservaHistorica.fecha_hora_inicio >= fecha_inicio_obj,
+                ReservaHistorica.fecha_hora_inicio <= fecha_fin_obj
             )
         ).all()
         
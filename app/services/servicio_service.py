@@ -1,7 +1,9 @@
 from sqlalchemy.orm import Session
-from typing import List, Optional
+from typing import List, Optional, Dict, Any
+from ..config import settings
 from ..models.servicio import Servicio
-from ..schemas.servicio import ServicioCreate, ServicioUpdate
+from ..schemas.servicio import ServicioCreate, ServicioUpdate, ServicioResponse
+from .cache_service import CacheDecorator, TAG_SERVICIOS, invalidar_por_servicio
 
 class ServicioService:
     
@@ -10,6 +12,12 @@ class ServicioService:
         """Obtener todos los servicios con paginación"""
         return db.query(Servicio).offset(skip).limit(limit).all()
     
+    @staticmethod
+    @CacheDecorator("servicios_listado", settings.cache_ttl_servicios, tags=[TAG_SERVICIOS], etag=True)
+    def get_all_cacheado(db: Session, skip: int = 0, limit: int = 100) -> List[Dict[str, Any]]:
+        """Listado de servicios ya serializado, desde cache (GET /servicios/)"""
+        return [ServicioResponse.model_validate(s).model_dump() for s in ServicioService.get_all(db, skip, limit)]
+    
     @staticmethod
     def get_by_id(db: Session, servicio_id: int) -> Optional[Servicio]:
         """Obtener un servicio por ID"""
@@ -27,6 +35,7 @@ class ServicioService:
         db.add(db_servicio)
         db.commit()
         db.refresh(db_servicio)
+        invalidar_por_servicio(db_servicio.id)
         return db_servicio
     
     @staticmethod
@@ -43,6 +52,7 @@ class ServicioService:
         
         db.commit()
         db.refresh(db_servicio)
+        invalidar_por_servicio(servicio_id)
         return db_servicio
     
     @staticmethod
@@ -54,6 +64,7 @@ class ServicioService:
         
         db.delete(db_servicio)
         db.commit()
+        invalidar_por_servicio(servicio_id)
         return True
     
     @staticmethod
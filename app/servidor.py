@@ -0,0 +1,149 @@
+"""Lanzador de producción del microservicio (uvicorn con varios workers).
+
+    python -m app.servidor
+    SERVIDOR_WORKERS=4 SERVIDOR_APP=app.main:app python -m app.servidor
+
+Todo se configura con los ajustes `servidor_*` (variables SERVIDOR_*):
+número de workers (uno por núcleo por defecto), bucle de eventos e
+intérprete HTTP (uvloop y httptools si están instalados), keep-alive, backlog
+del socket, límite de concurrencia y plazo del apagado ordenado. Nunca usa
+`reload` y avisa si DEBUG sigue activo: el `__main__` de cada app queda para
+desarrollo.
+
+Con varios workers el precálculo nocturno de predicciones corre una sola vez,
+en el proceso supervisor, en lugar de repetirse en cada worker. El supervisor
+solo escribe la tabla predicciones_demanda, compartida por todos: el cache de
+modelos es local a cada proceso, así que cada worker reconstruye el estado
+incremental de un servicio en su primera predicción.
+
+Varios workers necesitan el nivel compartido del cache para que las
+invalidaciones de uno lleguen a los demás: sin CACHE_COMPARTIDO_RUTA el
+lanzador crea uno temporal para esa ejecución y lo borra al terminar.
+
+Al apagarse (SIGTERM/SIGINT) uvicorn deja de aceptar conexiones y espera a
+las peticiones en curso, y el lifespan de cada worker llama a
+`apagado_ordenado`: espera a los recálculos del cache y al lote de
+predicciones en marcha y cierra los pools de conexiones.
+"""
+from typing import Any, Dict, Optional
+import argparse
+import asyncio
+import importlib.util
+import os
+import shutil
+import tempfile
+import time
+from .config import settings
+
+# Implementaciones de uvicorn: (preferida si está instalada, alternativa sin dependencias)
+LOOPS = ("uvloop", "asyncio")
+HTTPS = ("httptools", "h11")
+
+def num_workers(configurados: int = 0) -> int:
+    """Workers a lanzar: los configurados o uno por núcleo disponible.
+
+    Los núcleos se cuentan por afinidad (respeta `--cpuset-cpus`); con una
+    cuota de CPU (`--cpus`) hay que fijar SERVIDOR_WORKERS.
+    """
+    if configurados > 0:
+        return configurados
+    if hasattr(os, "sched_getaffinity"):
+        return len(os.sched_getaffinity(0)) or 1
+    return os.cpu_count() or 1
+
+def implementacion(valor: str, opciones) -> str:
+    """Resolver "auto" a la opción preferida si su paquete está instalado"""
+    preferida, alternativa = opciones
+    if valor == "auto":
+        return preferida if importlib.util.find_spec(preferida) else alternativa
+    if valor not in opciones:
+        raise ValueError(f"'{valor}' no es válido: usa auto, {preferida} o {alternativa}")
+    return valor
+
+def configuracion_uvicorn(workers: Optional[int] = None, app: Optional[str] = None) -> Dict[str, Any]:
+    """Argumentos de uvicorn.run a partir de los ajustes `servidor_*`"""
+    return {
+        "app": app or settings.servidor_app,
+        "host": settings.host,
+        "port": settings.port,
+        "workers": num_workers(settings.servidor_workers if workers is None else workers),
+        "loop": implementacion(settings.servidor_loop, LOOPS),
+        "http": implementacion(settings.servidor_http, HTTPS),
+        "timeout_keep_alive": settings.servidor_keep_alive,
+        "backlog": settings.servidor_backlog,
+        "limit_concurrency": settings.servidor_limite_concurrencia or None,
+        "timeout_graceful_shutdown": settings.servidor_apagado_segundos,
+        "proxy_headers": True,
+        "reload": False,
+    }
+
+def preparar_cache_compartido(workers: int) -> Optional[str]:
+    """Fijar CACHE_COMPARTIDO_RUTA para los workers si son varios y no hay una.
+
+    Devuelve el directorio temporal creado, que se borra al terminar, o None
+    si no hace falta (un worker o ruta configurada).
+    """
+    if workers <= 1 or settings.cache_compartido_ruta:
+        return None
+    directorio = tempfile.mkdtemp(prefix="reservas_cache_")
+    os.environ["CACHE_COMPARTIDO_RUTA"] = os.path.join(directorio, "cache.db")
+    return directorio
+
+async def apagado_ordenado(precalculo=None, plazo: Optional[float] = None) -> None:
+    """Vaciar el trabajo en segundo plano del worker y cerrar sus conexiones.
+
+    Todo comparte un mismo plazo (`servidor_apagado_segundos`): lo que no
+    termina a tiempo se abandona sin perder datos (los refrescos del cache se
+    recalculan en la siguiente lectura y el lote de predicciones no confirma
+    su transacción).
+    """
+    from .database import cerrar_engines
+    from .database_async import cerrar_engines_async
+    from .services.cache_service import cache_service
+
+    limite = time.monotonic() + (settings.servidor_apagado_segundos if plazo is None else plazo)
+    if precalculo is not None:
+        if not await asyncio.to_thread(precalculo.stop, max(limite - time.monotonic(), 0)):
+            print("⚠️ Apagado: el lote de predicciones en curso no terminó a tiempo")
+    pendientes = await cache_service.esperar_refrescos(max(limite - time.monotonic(), 0))
+    if pendientes:
+        print(f"⚠️ Apagado: {pendientes} recálculos del cache sin terminar")
+    await cerrar_engines_async()
+    cerrar_engines()
+
+def main():
+    parser = argparse.ArgumentParser(description="Servidor de producción del microservicio de reservas")
+    parser.add_argument("--workers", type=int, default=None, help="Procesos worker (0 = uno por núcleo)")
+    parser.add_argument("--app", default=None, help="Aplicación ASGI (módulo:atributo)")
+    args = parser.parse_args()
+
+    import uvicorn
+
+    configuracion = configuracion_uvicorn(args.workers, args.app)
+    print(f"🚀 {configuracion['app']} en {configuracion['host']}:{configuracion['port']}: "
+          f"{configuracion['workers']} workers, {configuracion['loop']}/{configuracion['http']}, "
+          f"keep-alive {configuracion['timeout_keep_alive']}s, backlog {configuracion['backlog']}")
+    if settings.debug:
+        print("⚠️ DEBUG=True: los errores 500 incluyen la traza; define DEBUG=false en producción")
+    directorio_cache = preparar_cache_compartido(configuracion["workers"])
+    if directorio_cache is not None:
+        print(f"⚠️ Varios workers sin CACHE_COMPARTIDO_RUTA: cache compartido temporal en {os.environ['CACHE_COMPARTIDO_RUTA']}")
+
+    precalculo = None
+    if configuracion["workers"] > 1 and settings.prediccion_precalculo_activo:
+        # Una sola ejecución del lote para todos los workers, que heredan el ajuste desactivado.
+        # Sin calentar el cache: el del supervisor no lo lee ningún worker
+        from .database import SessionLocal
+        from .services.prediccion_lote_service import precalculo_nocturno as precalculo
+        precalculo.start(SessionLocal, calentar_cache=False)
+        os.environ["PREDICCION_PRECALCULO_ACTIVO"] = "false"
+    try:
+        uvicorn.run(**configuracion)
+    finally:
+        if precalculo is not None:
+            precalculo.stop(settings.servidor_apagado_segundos)
+        if directorio_cache is not None:
+            shutil.rmtree(directorio_cache, ignore_errors=True)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,117 @@
+"""Fixtures compartidas de las pruebas (pytest)
+
+Las fixtures devuelven fábricas: cada prueba crea sus datos cuando los necesita.
+"""
+
+import os
+import tempfile
+from datetime import datetime, timedelta
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine, event
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import NullPool, StaticPool
+
+from app.consultas import limite_consultas
+from app.database_async import get_db_async_cache, get_db_async_lectura
+from app.db_sqlite_clean import Base, get_db, get_db_cache, get_db_lectura
+from app.models import Cliente, Servicio, Recurso, Reserva
+from app.routes import servicio_router, recurso_router, horario_router, precio_router, reserva_router
+from app.services.cache_service import cache_service
+
+class ContadorConsultas:
+    """Cuenta las sentencias SQL ejecutadas por uno o varios engines (también asíncronos)"""
+
+    def __init__(self, *engines):
+        self.total = 0
+        for engine in engines:
+            event.listen(getattr(engine, "sync_engine", engine), "before_cursor_execute", self._contar)
+
+    def _contar(self, *args):
+        self.total += 1
+
+def base_con_historial(url="sqlite://"):
+    """Crear una base (en memoria por defecto) con 150 días de reservas para dos servicios"""
+    engine = create_engine(
+        url,
+        connect_args={"check_same_thread": False},
+        **({"poolclass": StaticPool} if url == "sqlite://" else {})
+    )
+    Base.metadata.create_all(bind=engine)
+    db = sessionmaker(bind=engine)()
+
+    db.add_all([
+        Cliente(id=1, nombre="Ana", email="ana@test.com"),
+        Servicio(id=1, nombre="Consulta", duracion_minutos=60, precio_base=50.0),
+        Servicio(id=2, nombre="Sin historial", duracion_minutos=60, precio_base=30.0),
+        Recurso(id=1, nombre="Sala 1", tipo="sala"),
+    ])
+
+    hoy = datetime.now().replace(hour=9, minute=0, second=0, microsecond=0)
+    reserva_id = 1
+    for dia in range(1, 151):
+        inicio_dia = hoy - timedelta(days=dia)
+        # Más demanda los fines de semana
+        for hora in range(4 if inicio_dia.weekday() >= 5 else 2):
+            inicio = inicio_dia + timedelta(hours=hora)
+            db.add(Reserva(
+                id=reserva_id, cliente_id=1, servicio_id=1, recurso_id=1,
+                fecha_hora_inicio=inicio, fecha_hora_fin=inicio + timedelta(hours=1),
+                estado="confirmada"
+            ))
+            reserva_id += 1
+    db.commit()
+    cache_service.clear()
+    return engine, db
+
+def cliente_con_cache():
+    """App de prueba sobre un fichero SQLite temporal, con sesiones síncronas y asíncronas.
+
+    Incluye los routers con lecturas cacheadas. Devuelve los dos engines: las
+    consultas se cuentan en ambos.
+    """
+    ruta = os.path.join(tempfile.mkdtemp(), "endpoints.db")
+    engine, db = base_con_historial(f"sqlite:///{ruta}")
+    # Sin pool: TestClient abre un bucle de eventos por petición
+    engine_async = create_async_engine(f"sqlite+aiosqlite:///{ruta}", poolclass=NullPool)
+    sesiones_async = async_sessionmaker(engine_async, expire_on_commit=False)
+
+    async def sesion_async():
+        async with sesiones_async() as sesion:
+            yield sesion
+
+    app = FastAPI()
+    for router in (servicio_router, recurso_router, horario_router, precio_router, reserva_router):
+        app.include_router(router)
+    app.dependency_overrides[get_db] = lambda: db
+    app.dependency_overrides[get_db_lectura] = lambda: db
+    app.dependency_overrides[get_db_cache] = lambda: db
+    app.dependency_overrides[get_db_async_lectura] = sesion_async
+    app.dependency_overrides[get_db_async_cache] = sesion_async
+    return (engine, engine_async), db, TestClient(app)
+
+@pytest.fixture
+def max_consultas():
+    """Máximo de consultas SQL por petición: `with max_consultas(2): cliente.get(...)`
+
+    Requiere que la app bajo prueba incluya ConsultasMiddleware.
+    """
+    return limite_consultas
+
+@pytest.fixture
+def contar_consultas():
+    """Contador de sentencias SQL: `contador = contar_consultas(engine)`; `contador.total`"""
+    return ContadorConsultas
+
+@pytest.fixture
+def crear_base():
+    """Base con historial de reservas: `engine, db = crear_base()` (o `crear_base(url)`)"""
+    return base_con_historial
+
+@pytest.fixture
+def crear_cliente_cache():
+    """App con lecturas cacheadas: `(engine, engine_async), db, cliente = crear_cliente_cache()`"""
+    return cliente_con_cache
@@ -8,7 +8,8 @@ import sys
 # Add the parent directory to the Python path
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-from app.db import Base
+from app.database import Base
+import app.models  # noqa: F401  (registra las tablas en Base.metadata)
 from app.config import settings
 
 # this is the Alembic Config object, which provides
@@ -0,0 +1,424 @@
+"""Esquema base: tablas anteriores a las migraciones
+
+Revision ID: 0000
+Revises:
+Create Date: 2026-10-19 18:00:00.000000
+
+La aplicación ya no crea las tablas al importarse: una base de datos nueva
+se construye solo con `alembic upgrade head`. Esta revisión congela el esquema
+tal como lo dejaba create_all antes de la serie (sin los índices, tablas y
+vistas de 0001 en adelante). No importa los modelos: si cambian, la base
+sigue siendo la misma. Una base existente, creada antes con create_all, ya
+tiene estas tablas y no se toca.
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0000'
+down_revision = None
+branch_labels = None
+depends_on = None
+
+# Tipos enumerados (en PostgreSQL son tipos propios que hay que borrar aparte)
+TIPOS_ENUM = [
+    'tipointegracion', 'estadointegracion', 'tiporegla', 'tipomodificador',
+    'tiponotificacion', 'estadopago', 'metodopago',
+]
+
+
+def upgrade() -> None:
+    if sa.inspect(op.get_bind()).has_table('reservas'):
+        return
+
+    op.create_table(
+        'clientes',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('nombre', sa.String(), nullable=False),
+        sa.Column('email', sa.String(), nullable=False),
+        sa.Column('telefono', sa.String(), nullable=True),
+        sa.Column('created_at', sa.DateTime(), nullable=True),
+        sa.Column('updated_at', sa.DateTime(), nullable=True),
+        sa.PrimaryKeyConstraint('id'),
+    )
+    op.create_index('ix_clientes_email', 'clientes', ['email'], unique=True)
+    op.create_index('ix_clientes_id', 'clientes', ['id'], unique=False)
+
+    op.create_table(
+        'configuracion_precios',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('clave', sa.String(), nullable=False),
+        sa.Column('valor', sa.String(), nullable=False),
+        sa.Column('descripcion', sa.Text(), nullable=True),
+        sa.Column('created_at', sa.DateTime(), nullable=True),
+        sa.Column('updated_at', sa.DateTime(), nullable=True),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('clave'),
+    )
+    op.create_index('ix_configuracion_precios_id', 'configuracion_precios', ['id'], unique=False)
+
+    op.create_table(
+        'integraciones',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('nombre', sa.String(length=100), nullable=False),
+        sa.Column('tipo', sa.Enum('EMAIL', 'SMS', 'WHATSAPP', 'GOOGLE_CALENDAR', 'STRIPE', 'PAYPAL', name='tipointegracion'), nullable=False),
+        sa.Column('estado', sa.Enum('ACTIVA', 'INACTIVA', 'ERROR', 'CONFIGURANDO', name='estadointegracion'), nullable=True),
+        sa.Column('configuracion', sa.JSON(), nullable=True),
+        sa.Column('api_key', sa.String(length=500), nullable=True),
+        sa.Column('api_secret', sa.String(length=500), nullable=True),
+        sa.Column('access_token', sa.Text(), nullable=True),
+        sa.Column('refresh_token', sa.Text(), nullable=True),
+        sa.Column('descripcion', sa.Text(), nullable=True),
+        sa.Column('webhook_url', sa.String(length=500), nullable=True),
+        sa.Column('created_at', sa.DateTime(), nullable=True),
+        sa.Column('updated_at', sa.DateTime(), nullable=True),
+        sa.Column('ultima_sincronizacion', sa.DateTime(), nullable=True),
+        sa.PrimaryKeyConstraint('id'),
+    )
+    op.create_index('ix_integraciones_id', 'integraciones', ['id'], unique=False)
+
+    op.create_table(
+        'recursos',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('nombre', sa.String(), nullable=False),
+        sa.Column('tipo', sa.String(), nullable=False),
+        sa.Column('capacidad', sa.Integer(), nullable=True),
+        sa.Column('descripcion', sa.String(), nullable=True),
+        sa.Column('disponible', sa.Boolean(), nullable=True),
+        sa.Column('precio_base', sa.Float(), nullable=True),
+        sa.Column('created_at', sa.DateTime(), nullable=True),
+        sa.Column('updated_at', sa.DateTime(), nullable=True),
+        sa.PrimaryKeyConstraint('id'),
+    )
+    op.create_index('ix_recursos_id', 'recursos', ['id'], unique=False)
+
+    op.create_table(
+        'reglas_precios',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('nombre', sa.String(), nullable=False),
+        sa.Column('descripcion', sa.Text(), nullable=True),
+        sa.Column('tipo_regla', sa.Enum('DIA_SEMANA', 'HORA', 'TEMPORADA', 'FESTIVO', 'ANTICIPACION', 'DURACION', 'RECURSO', 'PARTICIPANTES', 'CLIENTE_TIPO', name='tiporegla'), nullable=False),
+        sa.Column('condicion', sa.Text(), nullable=False),
+        sa.Column('tipo_modificador', sa.Enum('PORCENTAJE', 'MONTO_FIJO', 'PRECIO_FIJO', name='tipomodificador'), nullable=False),
+        sa.Column('valor_modificador', sa.Float(), nullable=False),
+        sa.Column('prioridad', sa.Integer(), nullable=True),
+        sa.Column('activa', sa.Boolean(), nullable=True),
+        sa.Column('fecha_inicio', sa.DateTime(), nullable=True),
+        sa.Column('fecha_fin', sa.DateTime(), nullable=True),
+        sa.Column('servicios_aplicables', sa.Text(), nullable=True),
+        sa.Column('recursos_aplicables', sa.Text(), nullable=True),
+        sa.Column('created_at', sa.DateTime(), nullable=True),
+        sa.Column('updated_at', sa.DateTime(), nullable=True),
+        sa.PrimaryKeyConstraint('id'),
+    )
+    op.create_index('ix_reglas_precios_id', 'reglas_precios', ['id'], unique=False)
+
+    op.create_table(
+        'servicios',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('nombre', sa.String(), nullable=False),
+        sa.Column('descripcion', sa.String(), nullable=True),
+        sa.Column('duracion_minutos', sa.Integer(), nullable=False),
+        sa.Column('precio_base', sa.Float(), nullable=False),
+        sa.Column('created_at', sa.DateTime(), nullable=True),
+        sa.Column('updated_at', sa.DateTime(), nullable=True),
+        sa.PrimaryKeyConstraint('id'),
+    )
+    op.create_index('ix_servicios_id', 'servicios', ['id'], unique=False)
+
+    op.create_table(
+        'usuarios',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('username', sa.String(), nullable=False),
+        sa.Column('email', sa.String(), nullable=False),
+        sa.Column('hashed_password', sa.String(), nullable=False),
+        sa.Column('is_admin', sa.Boolean(), nullable=True),
+        sa.Column('is_active', sa.Boolean(), nullable=True),
+        sa.Column('created_at', sa.DateTime(), nullable=True),
+        sa.Column('updated_at', sa.DateTime(), nullable=True),
+        sa.PrimaryKeyConstraint('id'),
+    )
+    op.create_index('ix_usuarios_email', 'usuarios', ['email'], unique=True)
+    op.create_index('ix_usuarios_id', 'usuarios', ['id'], unique=False)
+    op.create_index('ix_usuarios_username', 'usuarios', ['username'], unique=True)
+
+    op.create_table(
+        'webhooks',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('nombre', sa.String(length=100), nullable=False),
+        sa.Column('url', sa.String(length=500), nullable=False),
+        sa.Column('evento', sa.String(length=100), nullable=False),
+        sa.Column('activo', sa.Boolean(), nullable=True),
+        sa.Column('metodo_http', sa.String(length=10), nullable=True),
+        sa.Column('headers', sa.JSON(), nullable=True),
+        sa.Column('secret_key', sa.String(length=255), nullable=True),
+        sa.Column('verificar_ssl', sa.Boolean(), nullable=True),
+        sa.Column('created_at', sa.DateTime(), nullable=True),
+        sa.Column('updated_at', sa.DateTime(), nullable=True),
+        sa.Column('ultimo_disparo', sa.DateTime(), nullable=True),
+        sa.PrimaryKeyConstraint('id'),
+    )
+    op.create_index('ix_webhooks_id', 'webhooks', ['id'], unique=False)
+
+    op.create_table(
+        'horarios_recursos',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('recurso_id', sa.Integer(), nullable=False),
+        sa.Column('dia_semana', sa.Integer(), nullable=False),
+        sa.Column('hora_inicio', sa.String(), nullable=False),
+        sa.Column('hora_fin', sa.String(), nullable=False),
+        sa.Column('disponible', sa.Boolean(), nullable=True),
+        sa.Column('duracion_slot_minutos', sa.Integer(), nullable=True),
+        sa.Column('pausa_entre_slots', sa.Integer(), nullable=True),
+        sa.Column('created_at', sa.String(), nullable=True),
+        sa.Column('updated_at', sa.String(), nullable=True),
+        sa.CheckConstraint('dia_semana <= 6', name='check_dia_semana_max'),
+        sa.CheckConstraint('dia_semana >= 0', name='check_dia_semana_min'),
+        sa.CheckConstraint('duracion_slot_minutos > 0', name='check_duracion_slot'),
+        sa.CheckConstraint('pausa_entre_slots >= 0', name='check_pausa_slots'),
+        sa.ForeignKeyConstraint(['recurso_id'], ['recursos.id']),
+        sa.PrimaryKeyConstraint('id'),
+    )
+    op.create_index('ix_horarios_recursos_id', 'horarios_recursos', ['id'], unique=False)
+
+    op.create_table(
+        'precios',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('servicio_id', sa.Integer(), nullable=True),
+        sa.Column('recurso_id', sa.Integer(), nullable=True),
+        sa.Column('tipo_precio', sa.String(), nullable=False),
+        sa.Column('nombre', sa.String(length=100), nullable=False),
+        sa.Column('descripcion', sa.Text(), nullable=True),
+        sa.Column('precio_base', sa.Float(), nullable=False),
+        sa.Column('precio_final', sa.Float(), nullable=True),
+        sa.Column('moneda', sa.String(), nullable=False),
+        sa.Column('activo', sa.Boolean(), nullable=True),
+        sa.Column('prioridad', sa.Integer(), nullable=True),
+        sa.Column('fecha_inicio', sa.DateTime(), nullable=True),
+        sa.Column('fecha_fin', sa.DateTime(), nullable=True),
+        sa.Column('cantidad_minima', sa.Integer(), nullable=True),
+        sa.Column('cantidad_maxima', sa.Integer(), nullable=True),
+        sa.Column('dias_semana', sa.String(length=50), nullable=True),
+        sa.Column('hora_inicio', sa.String(length=5), nullable=True),
+        sa.Column('hora_fin', sa.String(length=5), nullable=True),
+        sa.Column('metadatos', sa.Text(), nullable=True),
+        sa.Column('created_at', sa.DateTime(), nullable=True),
+        sa.Column('updated_at', sa.DateTime(), nullable=True),
+        sa.ForeignKeyConstraint(['recurso_id'], ['recursos.id']),
+        sa.ForeignKeyConstraint(['servicio_id'], ['servicios.id']),
+        sa.PrimaryKeyConstraint('id'),
+    )
+    op.create_index('ix_precios_id', 'precios', ['id'], unique=False)
+
+    op.create_table(
+        'reservas',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('cliente_id', sa.Integer(), nullable=False),
+        sa.Column('servicio_id', sa.Integer(), nullable=False),
+        sa.Column('recurso_id', sa.Integer(), nullable=False),
+        sa.Column('fecha_hora_inicio', sa.DateTime(), nullable=False),
+        sa.Column('fecha_hora_fin', sa.DateTime(), nullable=False),
+        sa.Column('estado', sa.String(), nullable=False),
+        sa.Column('created_at', sa.DateTime(), nullable=True),
+        sa.Column('updated_at', sa.DateTime(), nullable=True),
+        sa.CheckConstraint("estado IN ('pendiente', 'confirmada', 'cancelada')", name='check_estado'),
+        sa.ForeignKeyConstraint(['cliente_id'], ['clientes.id']),
+        sa.ForeignKeyConstraint(['recurso_id'], ['recursos.id']),
+        sa.ForeignKeyConstraint(['servicio_id'], ['servicios.id']),
+        sa.PrimaryKeyConstraint('id'),
+    )
+    op.create_index('ix_reservas_id', 'reservas', ['id'], unique=False)
+
+    op.create_table(
+        'webhooks_logs',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('webhook_id', sa.Integer(), nullable=False),
+        sa.Column('evento_disparado', sa.String(length=100), nullable=False),
+        sa.Column('payload_enviado', sa.JSON(), nullable=True),
+        sa.Column('codigo_respuesta', sa.Integer(), nullable=True),
+        sa.Column('respuesta_recibida', sa.Text(), nullable=True),
+        sa.Column('tiempo_respuesta', sa.Float(), nullable=True),
+        sa.Column('exitoso', sa.Boolean(), nullable=True),
+        sa.Column('error_mensaje', sa.Text(), nullable=True),
+        sa.Column('created_at', sa.DateTime(), nullable=True),
+        sa.ForeignKeyConstraint(['webhook_id'], ['webhooks.id']),
+        sa.PrimaryKeyConstraint('id'),
+    )
+    op.create_index('ix_webhooks_logs_id', 'webhooks_logs', ['id'], unique=False)
+
+    op.create_table(
+        'historial_precios',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('reserva_id', sa.Integer(), nullable=True),
+        sa.Column('servicio_id', sa.Integer(), nullable=True),
+        sa.Column('recurso_id', sa.Integer(), nullable=True),
+        sa.Column('precio_base', sa.Float(), nullable=False),
+        sa.Column('precio_final', sa.Float(), nullable=False),
+        sa.Column('descuento_total', sa.Float(), nullable=True),
+        sa.Column('recargo_total', sa.Float(), nullable=True),
+        sa.Column('reglas_aplicadas', sa.Text(), nullable=True),
+        sa.Column('fecha_calculo', sa.DateTime(), nullable=True),
+        sa.ForeignKeyConstraint(['recurso_id'], ['recursos.id']),
+        sa.ForeignKeyConstraint(['reserva_id'], ['reservas.id']),
+        sa.ForeignKeyConstraint(['servicio_id'], ['servicios.id']),
+        sa.PrimaryKeyConstraint('id'),
+    )
+    op.create_index('ix_historial_precios_id', 'historial_precios', ['id'], unique=False)
+
+    op.create_table(
+        'notificaciones',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('integracion_id', sa.Integer(), nullable=False),
+        sa.Column('reserva_id', sa.Integer(), nullable=True),
+        sa.Column('cliente_id', sa.Integer(), nullable=True),
+        sa.Column('tipo', sa.Enum('CONFIRMACION_RESERVA', 'RECORDATORIO', 'CANCELACION', 'PAGO_EXITOSO', 'PAGO_FALLIDO', 'FACTURA_GENERADA', name='tiponotificacion'), nullable=False),
+        sa.Column('destinatario', sa.String(length=255), nullable=False),
+        sa.Column('asunto', sa.String(length=255), nullable=True),
+        sa.Column('contenido', sa.Text(), nullable=False),
+        sa.Column('enviada', sa.Boolean(), nullable=True),
+        sa.Column('fecha_envio', sa.DateTime(), nullable=True),
+        sa.Column('fecha_lectura', sa.DateTime(), nullable=True),
+        sa.Column('respuesta_servicio', sa.Text(), nullable=True),
+        sa.Column('codigo_respuesta', sa.String(length=50), nullable=True),
+        sa.Column('error_mensaje', sa.Text(), nullable=True),
+        sa.Column('intentos', sa.Integer(), nullable=True),
+        sa.Column('max_intentos', sa.Integer(), nullable=True),
+        sa.Column('created_at', sa.DateTime(), nullable=True),
+        sa.Column('updated_at', sa.DateTime(), nullable=True),
+        sa.ForeignKeyConstraint(['cliente_id'], ['clientes.id']),
+        sa.ForeignKeyConstraint(['integracion_id'], ['integraciones.id']),
+        sa.ForeignKeyConstraint(['reserva_id'], ['reservas.id']),
+        sa.PrimaryKeyConstraint('id'),
+    )
+    op.create_index('ix_notificaciones_id', 'notificaciones', ['id'], unique=False)
+
+    op.create_table(
+        'pagos',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('reserva_id', sa.Integer(), nullable=False),
+        sa.Column('cliente_id', sa.Integer(), nullable=False),
+        sa.Column('monto', sa.Float(), nullable=False),
+        sa.Column('moneda', sa.String(length=3), nullable=True),
+        sa.Column('estado', sa.Enum('PENDIENTE', 'PROCESANDO', 'COMPLETADO', 'FALLIDO', 'CANCELADO', 'REEMBOLSADO', name='estadopago'), nullable=True),
+        sa.Column('metodo_pago', sa.Enum('STRIPE', 'PAYPAL', 'TRANSFERENCIA', 'EFECTIVO', name='metodopago'), nullable=False),
+        sa.Column('transaccion_externa_id', sa.String(length=255), nullable=True),
+        sa.Column('referencia_pago', sa.String(length=255), nullable=True),
+        sa.Column('factura_generada', sa.Boolean(), nullable=True),
+        sa.Column('numero_factura', sa.String(length=50), nullable=True),
+        sa.Column('descripcion', sa.Text(), nullable=True),
+        sa.Column('metadatos_pago', sa.Text(), nullable=True),
+        sa.Column('fecha_creacion', sa.DateTime(), nullable=True),
+        sa.Column('fecha_actualizacion', sa.DateTime(), nullable=True),
+        sa.Column('fecha_pago', sa.DateTime(), nullable=True),
+        sa.ForeignKeyConstraint(['cliente_id'], ['clientes.id']),
+        sa.ForeignKeyConstraint(['reserva_id'], ['reservas.id']),
+        sa.PrimaryKeyConstraint('id'),
+    )
+    op.create_index('ix_pagos_id', 'pagos', ['id'], unique=False)
+
+    op.create_table(
+        'sincronizaciones_google_calendar',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('reserva_id', sa.Integer(), nullable=False),
+        sa.Column('evento_google_id', sa.String(length=255), nullable=True),
+        sa.Column('calendario_id', sa.String(length=255), nullable=True),
+        sa.Column('sincronizada', sa.Boolean(), nullable=True),
+        sa.Column('fecha_sincronizacion', sa.DateTime(), nullable=True),
+        sa.Column('link_evento', sa.String(length=500), nullable=True),
+        sa.Column('error_sincronizacion', sa.Text(), nullable=True),
+        sa.Column('created_at', sa.DateTime(), nullable=True),
+        sa.Column('updated_at', sa.DateTime(), nullable=True),
+        sa.ForeignKeyConstraint(['reserva_id'], ['reservas.id']),
+        sa.PrimaryKeyConstraint('id'),
+    )
+    op.create_index('ix_sincronizaciones_google_calendar_id', 'sincronizaciones_google_calendar', ['id'], unique=False)
+
+    op.create_table(
+        'facturas',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('pago_id', sa.Integer(), nullable=False),
+        sa.Column('cliente_id', sa.Integer(), nullable=False),
+        sa.Column('numero_factura', sa.String(length=50), nullable=False),
+        sa.Column('fecha_emision', sa.DateTime(), nullable=True),
+        sa.Column('fecha_vencimiento', sa.DateTime(), nullable=True),
+        sa.Column('subtotal', sa.Float(), nullable=False),
+        sa.Column('iva', sa.Float(), nullable=True),
+        sa.Column('total', sa.Float(), nullable=False),
+        sa.Column('pagada', sa.Boolean(), nullable=True),
+        sa.Column('cancelada', sa.Boolean(), nullable=True),
+        sa.Column('nombre_cliente', sa.String(length=255), nullable=False),
+        sa.Column('nif_cliente', sa.String(length=20), nullable=True),
+        sa.Column('direccion_cliente', sa.Text(), nullable=True),
+        sa.Column('email_cliente', sa.String(length=255), nullable=False),
+        sa.Column('pdf_generado', sa.Boolean(), nullable=True),
+        sa.Column('ruta_pdf', sa.String(length=500), nullable=True),
+        sa.Column('created_at', sa.DateTime(), nullable=True),
+        sa.Column('updated_at', sa.DateTime(), nullable=True),
+        sa.ForeignKeyConstraint(['cliente_id'], ['clientes.id']),
+        sa.ForeignKeyConstraint(['pago_id'], ['pagos.id']),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('numero_factura'),
+    )
+    op.create_index('ix_facturas_id', 'facturas', ['id'], unique=False)
+
+    op.create_table(
+        'reembolsos',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('pago_id', sa.Integer(), nullable=False),
+        sa.Column('monto_reembolso', sa.Float(), nullable=False),
+        sa.Column('motivo', sa.Text(), nullable=False),
+        sa.Column('estado', sa.Enum('PENDIENTE', 'PROCESANDO', 'COMPLETADO', 'FALLIDO', 'CANCELADO', 'REEMBOLSADO', name='estadopago'), nullable=True),
+        sa.Column('transaccion_reembolso_id', sa.String(length=255), nullable=True),
+        sa.Column('aprobado_por', sa.Integer(), nullable=True),
+        sa.Column('fecha_aprobacion', sa.DateTime(), nullable=True),
+        sa.Column('fecha_solicitud', sa.DateTime(), nullable=True),
+        sa.Column('fecha_procesamiento', sa.DateTime(), nullable=True),
+        sa.ForeignKeyConstraint(['aprobado_por'], ['usuarios.id']),
+        sa.ForeignKeyConstraint(['pago_id'], ['pagos.id']),
+        sa.PrimaryKeyConstraint('id'),
+    )
+    op.create_index('ix_reembolsos_id', 'reembolsos', ['id'], unique=False)
+
+def downgrade() -> None:
+    op.drop_index('ix_reembolsos_id', table_name='reembolsos')
+    op.drop_table('reembolsos')
+    op.drop_index('ix_facturas_id', table_name='facturas')
+    op.drop_table('facturas')
+    op.drop_index('ix_sincronizaciones_google_calendar_id', table_name='sincronizaciones_google_calendar')
+    op.drop_table('sincronizaciones_google_calendar')
+    op.drop_index('ix_pagos_id', table_name='pagos')
+    op.drop_table('pagos')
+    op.drop_index('ix_notificaciones_id', table_name='notificaciones')
+    op.drop_table('notificaciones')
+    op.drop_index('ix_historial_precios_id', table_name='historial_precios')
+    op.drop_table('historial_precios')
+    op.drop_index('ix_webhooks_logs_id', table_name='webhooks_logs')
+    op.drop_table('webhooks_logs')
+    op.drop_index('ix_reservas_id', table_name='reservas')
+    op.drop_table('reservas')
+    op.drop_index('ix_precios_id', table_name='precios')
+    op.drop_table('precios')
+    op.drop_index('ix_horarios_recursos_id', table_name='horarios_recursos')
+    op.drop_table('horarios_recursos')
+    op.drop_index('ix_webhooks_id', table_name='webhooks')
+    op.drop_table('webhooks')
+    op.drop_index('ix_usuarios_username', table_name='usuarios')
+    op.drop_index('ix_usuarios_id', table_name='usuarios')
+    op.drop_index('ix_usuarios_email', table_name='usuarios')
+    op.drop_table('usuarios')
+    op.drop_index('ix_servicios_id', table_name='servicios')
+    op.drop_table('servicios')
+    op.drop_index('ix_reglas_precios_id', table_name='reglas_precios')
+    op.drop_table('reglas_precios')
+    op.drop_index('ix_recursos_id', table_name='recursos')
+    op.drop_table('recursos')
+    op.drop_index('ix_integraciones_id', table_name='integraciones')
+    op.drop_table('integraciones')
+    op.drop_index('ix_configuracion_precios_id', table_name='configuracion_precios')
+    op.drop_table('configuracion_precios')
+    op.drop_index('ix_clientes_id', table_name='clientes')
+    op.drop_index('ix_clientes_email', table_name='clientes')
+    op.drop_table('clientes')
+    for nombre in TIPOS_ENUM:
+        sa.Enum(name=nombre).drop(op.get_bind(), checkfirst=True)
@@ -0,0 +1,45 @@
+"""Índices compuestos para la paginación por cursor
+
+Revision ID: 0001
+Revises: 0000
+Create Date: 2026-10-19 10:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0001'
+down_revision = '0000'
+branch_labels = None
+depends_on = None
+
+# (nombre, tabla, columnas)
+INDICES = [
+    ('ix_reservas_inicio_id', 'reservas', ['fecha_hora_inicio', 'id']),
+    ('ix_pagos_fecha_creacion_id', 'pagos', ['fecha_creacion', 'id']),
+    ('ix_precios_prioridad_id', 'precios', ['prioridad', 'id']),
+]
+
+
+def _indices_existentes(tabla):
+    inspector = sa.inspect(op.get_bind())
+    if not inspector.has_table(tabla):
+        return None
+    return {indice['name'] for indice in inspector.get_indexes(tabla)}
+
+
+def upgrade() -> None:
+    # Las tablas pueden haberse creado con create_all (con o sin estos índices)
+    for nombre, tabla, columnas in INDICES:
+        existentes = _indices_existentes(tabla)
+        if existentes is not None and nombre not in existentes:
+            op.create_index(nombre, tabla, columnas)
+
+
+def downgrade() -> None:
+    for nombre, tabla, _ in reversed(INDICES):
+        existentes = _indices_existentes(tabla)
+        if existentes and nombre in existentes:
+            op.drop_index(nombre, table_name=tabla)
@@ -0,0 +1,55 @@
+"""Índices compuestos y parciales para las consultas más frecuentes
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-19 12:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0002'
+down_revision = '0001'
+branch_labels = None
+depends_on = None
+
+# (nombre, tabla, columnas, opciones)
+INDICES = [
+    # Comprobación de solapamientos: recurso + estado + rango horario
+    ('ix_reservas_recurso_estado_inicio_fin', 'reservas',
+     ['recurso_id', 'estado', 'fecha_hora_inicio', 'fecha_hora_fin'], {}),
+    # Índice parcial: solo reservas activas (excluye las canceladas)
+    ('ix_reservas_activas_recurso_inicio_fin', 'reservas',
+     ['recurso_id', 'fecha_hora_inicio', 'fecha_hora_fin'],
+     {'sqlite_where': sa.text("estado != 'cancelada'"),
+      'postgresql_where': sa.text("estado <> 'cancelada'")}),
+    # Analítica y predicciones por servicio y rango de fechas
+    ('ix_reservas_servicio_inicio', 'reservas', ['servicio_id', 'fecha_hora_inicio'], {}),
+    ('ix_precios_servicio_activo_tipo', 'precios', ['servicio_id', 'activo', 'tipo_precio'], {}),
+    ('ix_reglas_precios_activa_prioridad', 'reglas_precios', ['activa', 'prioridad'], {}),
+    ('ix_notificaciones_enviada_intentos', 'notificaciones', ['enviada', 'intentos'], {}),
+    ('ix_horarios_recursos_recurso_dia', 'horarios_recursos', ['recurso_id', 'dia_semana'], {}),
+]
+
+
+def _indices_existentes(tabla):
+    inspector = sa.inspect(op.get_bind())
+    if not inspector.has_table(tabla):
+        return None
+    return {indice['name'] for indice in inspector.get_indexes(tabla)}
+
+
+def upgrade() -> None:
+    for nombre, tabla, columnas, opciones in INDICES:
+        existentes = _indices_existentes(tabla)
+        if existentes is not None and nombre not in existentes:
+            op.create_index(nombre, tabla, columnas, **opciones)
+
+
+def downgrade() -> None:
+    for nombre, tabla, _, _ in reversed(INDICES):
+        existentes = _indices_existentes(tabla)
+        if existentes and nombre in existentes:
+            op.drop_index(nombre, table_name=tabla)
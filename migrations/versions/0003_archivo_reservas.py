@@ -0,0 +1,74 @@
+"""Archivo de reservas históricas y vista unificada reservas_historico
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-19 14:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0003'
+down_revision = '0002'
+branch_labels = None
+depends_on = None
+
+COLUMNAS_HISTORICO = (
+    "id, cliente_id, servicio_id, recurso_id, "
+    "fecha_hora_inicio, fecha_hora_fin, estado, created_at, updated_at"
+)
+
+# (nombre, tabla, columnas)
+INDICES = [
+    ('ix_reservas_archivadas_inicio', 'reservas_archivadas', ['fecha_hora_inicio']),
+    ('ix_reservas_archivadas_servicio_inicio', 'reservas_archivadas', ['servicio_id', 'fecha_hora_inicio']),
+    ('ix_reservas_archivadas_recurso_inicio', 'reservas_archivadas', ['recurso_id', 'fecha_hora_inicio']),
+]
+
+
+def upgrade() -> None:
+    inspector = sa.inspect(op.get_bind())
+
+    # La tabla y la vista pueden existir ya si la app las creó con create_all
+    if not inspector.has_table('reservas_archivadas'):
+        op.create_table(
+            'reservas_archivadas',
+            sa.Column('id', sa.Integer(), primary_key=True, autoincrement=False),
+            sa.Column('cliente_id', sa.Integer(), sa.ForeignKey('clientes.id'), nullable=False),
+            sa.Column('servicio_id', sa.Integer(), sa.ForeignKey('servicios.id'), nullable=False),
+            sa.Column('recurso_id', sa.Integer(), sa.ForeignKey('recursos.id'), nullable=False),
+            sa.Column('fecha_hora_inicio', sa.DateTime(), nullable=False),
+            sa.Column('fecha_hora_fin', sa.DateTime(), nullable=False),
+            sa.Column('estado', sa.String(), nullable=False),
+            sa.Column('created_at', sa.DateTime()),
+            sa.Column('updated_at', sa.DateTime()),
+            sa.Column('archivada_at', sa.DateTime(), server_default=sa.func.now()),
+        )
+        existentes = set()
+    else:
+        existentes = {indice['name'] for indice in inspector.get_indexes('reservas_archivadas')}
+
+    for nombre, tabla, columnas in INDICES:
+        if nombre not in existentes:
+            op.create_index(nombre, tabla, columnas)
+
+    if 'reservas_historico' not in inspector.get_view_names():
+        op.execute(
+            f"CREATE VIEW reservas_historico AS "
+            f"SELECT {COLUMNAS_HISTORICO} FROM reservas "
+            f"UNION ALL "
+            f"SELECT {COLUMNAS_HISTORICO} FROM reservas_archivadas"
+        )
+
+
+def downgrade() -> None:
+    op.execute("DROP VIEW IF EXISTS reservas_historico")
+    if sa.inspect(op.get_bind()).has_table('reservas_archivadas'):
+        # Las reservas archivadas vuelven a la tabla activa antes de eliminar el archivo
+        op.execute(
+            f"INSERT INTO reservas ({COLUMNAS_HISTORICO}) "
+            f"SELECT {COLUMNAS_HISTORICO} FROM reservas_archivadas"
+        )
+        op.drop_table('reservas_archivadas')
@@ -0,0 +1,37 @@
+"""Tabla predicciones_demanda del lote nocturno de predicciones
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2026-10-19 16:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0004'
+down_revision = '0003'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # La tabla puede existir ya si la app la creó con create_all
+    if not sa.inspect(op.get_bind()).has_table('predicciones_demanda'):
+        op.create_table(
+            'predicciones_demanda',
+            sa.Column('id', sa.Integer(), primary_key=True),
+            sa.Column('servicio_id', sa.Integer(), sa.ForeignKey('servicios.id'), nullable=False),
+            sa.Column('algoritmo', sa.String(length=20), nullable=False),
+            sa.Column('fecha', sa.Date(), nullable=False),
+            sa.Column('prediccion', sa.Float(), nullable=False),
+            sa.Column('generada_at', sa.DateTime(), server_default=sa.func.now()),
+            sa.UniqueConstraint('servicio_id', 'algoritmo', 'fecha', name='uq_predicciones_servicio_algoritmo_fecha'),
+        )
+        op.create_index('ix_predicciones_demanda_id', 'predicciones_demanda', ['id'])
+
+
+def downgrade() -> None:
+    if sa.inspect(op.get_bind()).has_table('predicciones_demanda'):
+        op.drop_table('predicciones_demanda')
@@ -0,0 +1,44 @@
+"""Claves de la paginación por cursor NOT NULL (pagos.fecha_creacion, precios.prioridad)
+
+La comparación de la clave con el cursor es NULL para las filas con la clave
+nula: desaparecían de todas las páginas y, si cerraban una página, el cursor
+siguiente no devolvía nada. Se rellenan los nulos existentes y se impiden.
+
+Revision ID: 0005
+Revises: 0004
+Create Date: 2026-10-20 09:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0005'
+down_revision = '0004'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Un pago sin fecha de creación toma la de actualización o la de pago, si la tiene
+    op.execute(
+        "UPDATE pagos SET fecha_creacion = COALESCE(fecha_actualizacion, fecha_pago, CURRENT_TIMESTAMP) "
+        "WHERE fecha_creacion IS NULL"
+    )
+    op.execute("UPDATE precios SET prioridad = 0 WHERE prioridad IS NULL")
+
+    # En SQLite cambiar la nulabilidad recrea la tabla (modo batch)
+    with op.batch_alter_table('pagos') as tabla:
+        tabla.alter_column(
+            'fecha_creacion', existing_type=sa.DateTime(), nullable=False, server_default=sa.func.now()
+        )
+    with op.batch_alter_table('precios') as tabla:
+        tabla.alter_column('prioridad', existing_type=sa.Integer(), nullable=False, server_default='0')
+
+
+def downgrade() -> None:
+    with op.batch_alter_table('precios') as tabla:
+        tabla.alter_column('prioridad', existing_type=sa.Integer(), nullable=True, server_default=None)
+    with op.batch_alter_table('pagos') as tabla:
+        tabla.alter_column('fecha_creacion', existing_type=sa.DateTime(), nullable=True, server_default=None)
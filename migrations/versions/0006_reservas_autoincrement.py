@@ -0,0 +1,61 @@
+"""AUTOINCREMENT en reservas (SQLite): no reutilizar los ids archivados
+
+Sin AUTOINCREMENT, SQLite asigna max(id) + 1 de la tabla activa: si las
+reservas con los ids más altos se mueven a reservas_archivadas, una reserva
+nueva recibe el id de una archivada y la vista reservas_historico lo duplica.
+En PostgreSQL la secuencia nunca retrocede y no hay nada que cambiar.
+
+Revision ID: 0006
+Revises: 0005
+Create Date: 2026-10-20 11:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0006'
+down_revision = '0005'
+branch_labels = None
+depends_on = None
+
+COLUMNAS_HISTORICO = (
+    "id, cliente_id, servicio_id, recurso_id, "
+    "fecha_hora_inicio, fecha_hora_fin, estado, created_at, updated_at"
+)
+
+
+def _recrear_reservas(autoincrement: bool) -> None:
+    # La vista impide renombrar la tabla recreada: se quita y se vuelve a crear
+    op.execute("DROP VIEW IF EXISTS reservas_historico")
+    with op.batch_alter_table(
+        'reservas', recreate='always', table_kwargs={'sqlite_autoincrement': autoincrement}
+    ):
+        pass
+    op.execute(
+        f"CREATE VIEW reservas_historico AS "
+        f"SELECT {COLUMNAS_HISTORICO} FROM reservas "
+        f"UNION ALL "
+        f"SELECT {COLUMNAS_HISTORICO} FROM reservas_archivadas"
+    )
+
+
+def upgrade() -> None:
+    if op.get_bind().dialect.name != 'sqlite':
+        return
+    _recrear_reservas(autoincrement=True)
+    # El contador parte del mayor id ya usado, también por las reservas archivadas
+    op.execute("DELETE FROM sqlite_sequence WHERE name = 'reservas'")
+    op.execute(
+        "INSERT INTO sqlite_sequence (name, seq) "
+        "SELECT 'reservas', MAX(id) FROM ("
+        "SELECT MAX(id) AS id FROM reservas UNION ALL SELECT MAX(id) FROM reservas_archivadas"
+        ") HAVING MAX(id) IS NOT NULL"
+    )
+
+
+def downgrade() -> None:
+    if op.get_bind().dialect.name != 'sqlite':
+        return
+    _recrear_reservas(autoincrement=False)
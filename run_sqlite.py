@@ -4,9 +4,13 @@ Script simplificado para ejecutar el microservicio de reservas con SQLite
 """
 
 import uvicorn
-from app.main_sqlite import app
+from alembic import command
+from alembic.config import Config
 
 if __name__ == "__main__":
+    # La aplicación no crea las tablas: el esquema se lleva a la última migración antes de arrancar
+    command.upgrade(Config("alembic.sqlite.ini"), "head")
+
     print("🚀 Iniciando Microservicio de Reservas (SQLite)...")
     print("📚 Documentación disponible en: http://localhost:8000/docs")
     print("🏠 Página principal: http://localhost:8000")
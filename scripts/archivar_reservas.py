@@ -0,0 +1,56 @@
+#!/usr/bin/env python3
+"""
+Archivo de Reservas Históricas
+Microservicio de Gestión de Reservas
+
+Mueve las reservas finalizadas o canceladas más antiguas que la antigüedad
+configurada (ARCHIVO_RESERVAS_DIAS, por defecto 365 días) a la tabla
+reservas_archivadas. Las consultas analíticas las siguen viendo a través de
+la vista reservas_historico. Pensado para ejecutarse periódicamente (cron).
+
+Uso:
+    python scripts/archivar_reservas.py
+    python scripts/archivar_reservas.py --dias 730 --lote 5000 --compactar
+    python scripts/archivar_reservas.py --simular
+"""
+
+import sys
+import os
+import argparse
+
+# Agregar el directorio raíz al path para importar la app
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.db_sqlite_clean import SessionLocal
+from app.services.archivo_service import ArchivoService
+
+def main():
+    parser = argparse.ArgumentParser(description="Archivo de reservas históricas")
+    parser.add_argument("--dias", type=int, default=None, help="Antigüedad mínima en días (por defecto, la configurada)")
+    parser.add_argument("--lote", type=int, default=None, help="Reservas movidas por transacción")
+    parser.add_argument("--simular", action="store_true", help="Solo contar las reservas archivables")
+    parser.add_argument("--compactar", action="store_true", help="Recuperar espacio tras archivar (VACUUM/ANALYZE)")
+    args = parser.parse_args()
+
+    db = SessionLocal()
+    try:
+        if args.simular:
+            total = ArchivoService.contar_archivables(db, args.dias)
+            print(f"ℹ️ {total} reservas se moverían al archivo")
+            return
+
+        resultado = ArchivoService.archivar_reservas(db, args.dias, args.lote)
+        print(f"✅ {resultado['reservas_archivadas']} reservas archivadas en {resultado['lotes']} lote(s)"
+              f" (finalizadas antes de {resultado['fecha_limite']})")
+
+        if args.compactar:
+            ArchivoService.compactar(db)
+            print("✅ Base de datos compactada")
+
+        resumen = ArchivoService.get_resumen_archivo(db)
+        print(f"   Activas: {resumen['reservas_activas']} | Archivadas: {resumen['reservas_archivadas']}")
+    finally:
+        db.close()
+
+if __name__ == "__main__":
+    main()
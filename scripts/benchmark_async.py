@@ -0,0 +1,217 @@
+#!/usr/bin/env python3
+"""
+Benchmark del Acceso Asíncrono a la Base de Datos
+Microservicio de Gestión de Reservas
+
+Lanza peticiones HTTP concurrentes de disponibilidad contra un worker de
+uvicorn en otro proceso (un único bucle de eventos) sobre un fichero SQLite con reservas,
+mezcladas con peticiones ligeras (/ping) que no tocan la base de datos, y
+compara tres formas de escribir el manejador de disponibilidad:
+
+    async+Session       `async def` con la Session síncrona (forma anterior):
+                        cada consulta bloquea el bucle de eventos
+    def+threadpool      `def` con la Session síncrona, en el threadpool
+    async+AsyncSession  `async def` con AsyncSession (aiosqlite)
+
+La disponibilidad se calcula sin cache para medir el acceso a la base de datos.
+La métrica relevante es el p99 de /ping: mide cuánto esperan las peticiones
+que no consultan nada por culpa de las que sí lo hacen.
+
+Con una concurrencia mayor que database_pool_size + database_max_overflow la
+variante async+Session se bloquea: espera una conexión del pool dentro del
+bucle de eventos, que es el mismo que tendría que cerrar las sesiones que las
+ocupan. Por eso la concurrencia por defecto queda por debajo del pool.
+
+Uso:
+    python scripts/benchmark_async.py
+    python scripts/benchmark_async.py --peticiones 2000 --concurrencia 8 --reservas 60000
+"""
+
+import sys
+import os
+import argparse
+import asyncio
+import multiprocessing
+import random
+import statistics
+import socket
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+# Agregar el directorio raíz al path para importar la app
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import httpx
+import uvicorn
+from fastapi import Depends, FastAPI
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+from sqlalchemy.orm import Session, sessionmaker
+
+from app.database import Base, crear_engine
+from app.database_async import crear_engine_async
+from app.models import Cliente, HorarioRecurso, Recurso, Reserva, Servicio
+from app.schemas.horario import DisponibilidadRequest
+from app.services.horario_service import HorarioService
+
+RECURSOS = 20
+DIAS = 365
+
+# Funciones sin el CacheDecorator: cada petición consulta la base de datos
+disponibilidad = HorarioService.get_disponibilidad.__wrapped__
+disponibilidad_async = HorarioService.get_disponibilidad_async.__wrapped__
+
+def crear_base(ruta, reservas):
+    engine = crear_engine(f"sqlite:///{ruta}")
+    Base.metadata.create_all(bind=engine)
+    rng = random.Random(0)
+    inicio = datetime(2025, 1, 1, 8)
+    with engine.begin() as conexion:
+        conexion.execute(Cliente.__table__.insert(), [{"id": 1, "nombre": "Ana", "email": "ana@ejemplo.com"}])
+        conexion.execute(Servicio.__table__.insert(), [
+            {"id": 1, "nombre": "Consulta", "duracion_minutos": 60, "precio_base": 50.0, "activo": True}
+        ])
+        conexion.execute(Recurso.__table__.insert(), [
+            {"id": i, "nombre": f"Sala {i}", "tipo": "sala", "disponible": True} for i in range(1, RECURSOS + 1)
+        ])
+        conexion.execute(HorarioRecurso.__table__.insert(), [
+            {"recurso_id": r, "dia_semana": d, "hora_inicio": "08:00", "hora_fin": "20:00",
+             "disponible": True, "created_at": "09:00:00"}
+            for r in range(1, RECURSOS + 1) for d in range(7)
+        ])
+        filas = []
+        for _ in range(reservas):
+            comienzo = inicio + timedelta(days=rng.randrange(DIAS), hours=rng.randrange(12))
+            filas.append({
+                "cliente_id": 1, "servicio_id": 1, "recurso_id": rng.randint(1, RECURSOS),
+                "fecha_hora_inicio": comienzo, "fecha_hora_fin": comienzo + timedelta(hours=1),
+                "estado": rng.choice(["confirmada", "pendiente", "cancelada"])
+            })
+        conexion.execute(Reserva.__table__.insert(), filas)
+    return engine
+
+def crear_app(engine, engine_async):
+    sesiones = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+    sesiones_async = async_sessionmaker(engine_async, expire_on_commit=False, autoflush=False)
+
+    def get_db():
+        db = sesiones()
+        try:
+            yield db
+        finally:
+            db.close()
+
+    async def get_db_async():
+        async with sesiones_async() as db:
+            yield db
+
+    app = FastAPI()
+
+    @app.on_event("shutdown")
+    async def cerrar():
+        # Las conexiones de aiosqlite pertenecen al bucle de eventos del servidor
+        await engine_async.dispose()
+
+    @app.get("/ping")
+    async def ping():
+        return {"ok": True}
+
+    @app.get("/async+Session")
+    async def bloqueante(recurso_id: int, fecha: str, db: Session = Depends(get_db)):
+        return disponibilidad(db, DisponibilidadRequest(recurso_id=recurso_id, fecha=fecha))
+
+    @app.get("/def+threadpool")
+    def en_hilo(recurso_id: int, fecha: str, db: Session = Depends(get_db)):
+        return disponibilidad(db, DisponibilidadRequest(recurso_id=recurso_id, fecha=fecha))
+
+    @app.get("/async+AsyncSession")
+    async def asincrona(recurso_id: int, fecha: str, db: AsyncSession = Depends(get_db_async)):
+        return await disponibilidad_async(db, DisponibilidadRequest(recurso_id=recurso_id, fecha=fecha))
+
+    return app
+
+def percentil(valores, p):
+    ordenados = sorted(valores)
+    return ordenados[min(len(ordenados) - 1, int(len(ordenados) * p))] * 1000
+
+async def ejecutar(cliente, ruta, peticiones, concurrencia, proporcion_ping):
+    """Reparte las peticiones entre `concurrencia` clientes; devuelve latencias por tipo y segundos"""
+    latencias = {"disponibilidad": [], "ping": []}
+    pendientes = iter(range(peticiones))
+
+    async def trabajador(semilla):
+        rng = random.Random(semilla)
+        for _ in pendientes:
+            if rng.random() < proporcion_ping:
+                tipo, url, params = "ping", "/ping", None
+            else:
+                fecha = datetime(2025, 1, 1) + timedelta(days=rng.randrange(DIAS))
+                tipo, url, params = "disponibilidad", f"/{ruta}", {
+                    "recurso_id": rng.randint(1, RECURSOS), "fecha": fecha.strftime("%Y-%m-%d")
+                }
+            comienzo = time.perf_counter()
+            respuesta = await cliente.get(url, params=params)
+            latencias[tipo].append(time.perf_counter() - comienzo)
+            assert respuesta.status_code == 200, respuesta.text
+
+    inicio = time.perf_counter()
+    await asyncio.gather(*(trabajador(i) for i in range(concurrencia)))
+    return latencias, time.perf_counter() - inicio
+
+def servir(ruta, puerto):
+    """Worker de uvicorn (proceso propio: no comparte el GIL con los clientes)"""
+    app = crear_app(crear_engine(f"sqlite:///{ruta}"), crear_engine_async(f"sqlite:///{ruta}"))
+    uvicorn.run(app, host="127.0.0.1", port=puerto, log_level="warning")
+
+def arrancar_servidor(ruta):
+    """Lanzar el worker y esperar a que acepte conexiones; devuelve (proceso, url)"""
+    with socket.socket() as libre:
+        libre.bind(("127.0.0.1", 0))
+        puerto = libre.getsockname()[1]
+    proceso = multiprocessing.Process(target=servir, args=(ruta, puerto))
+    proceso.start()
+    while True:
+        try:
+            socket.create_connection(("127.0.0.1", puerto), timeout=1).close()
+            return proceso, f"http://127.0.0.1:{puerto}"
+        except OSError:
+            time.sleep(0.1)
+
+async def comparar(args, url):
+    limites = httpx.Limits(max_connections=args.concurrencia, max_keepalive_connections=args.concurrencia)
+    async with httpx.AsyncClient(base_url=url, limits=limites, timeout=60) as cliente:
+        for variante in ("async+Session", "def+threadpool", "async+AsyncSession"):
+            # Calentar pools y cache de páginas
+            await ejecutar(cliente, variante, args.concurrencia * 2, args.concurrencia, args.ping)
+            latencias, segundos = await ejecutar(cliente, variante, args.peticiones, args.concurrencia, args.ping)
+            disp, ping = latencias["disponibilidad"], latencias["ping"]
+            print(f"{variante:>19} | {args.peticiones / segundos:>7.0f} "
+                  f"{statistics.median(disp) * 1000:>8.1f} {percentil(disp, 0.99):>8.1f} "
+                  f"{statistics.median(ping) * 1000:>8.1f} {percentil(ping, 0.99):>8.1f}")
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark del acceso asíncrono a la base de datos")
+    parser.add_argument("--peticiones", type=int, default=1000)
+    parser.add_argument("--concurrencia", type=int, default=12)
+    parser.add_argument("--reservas", type=int, default=40000)
+    parser.add_argument("--ping", type=float, default=0.5, help="Proporción de peticiones ligeras (/ping)")
+    args = parser.parse_args()
+
+    print(f"📊 Benchmark del acceso asíncrono ({args.peticiones} peticiones, concurrencia {args.concurrencia}, "
+          f"{args.reservas} reservas, {args.ping:.0%} /ping)")
+    print("=" * 72)
+    print(f"{'manejador':>19} | {'pet/s':>7} {'disp p50':>8} {'disp p99':>8} {'ping p50':>8} {'ping p99':>8}  (ms)")
+    print("-" * 72)
+    ruta = os.path.join(tempfile.mkdtemp(), "benchmark.db")
+    crear_base(ruta, args.reservas).dispose()
+    proceso, url = arrancar_servidor(ruta)
+    try:
+        asyncio.run(comparar(args, url))
+    finally:
+        # SIGTERM: uvicorn termina las peticiones en curso y ejecuta el shutdown
+        proceso.terminate()
+        proceso.join()
+    print("=" * 72)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,100 @@
+#!/usr/bin/env python3
+"""
+Benchmark del Núcleo de Predicciones
+Microservicio de Gestión de Reservas
+
+Compara el núcleo NumPy (app/prediccion_numerica.py) con la implementación
+anterior en Python puro (medias móviles por slicing y regresión cuadrática por
+determinantes en forma cerrada) sobre series sintéticas, y mide el error de
+cada una al recuperar una cuadrática conocida.
+
+Uso:
+    python scripts/benchmark_prediccion.py
+    python scripts/benchmark_prediccion.py --tamanos 180 365 3650 --repeticiones 20
+"""
+
+import sys
+import os
+import argparse
+import statistics
+import time
+
+# Agregar el directorio raíz al path para importar la app
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+
+from app.prediccion_numerica import medias_moviles, ajuste_polinomico
+
+def medias_moviles_python(valores, ventana):
+    """Implementación anterior: una suma por ventana"""
+    return [sum(valores[i - ventana:i]) / ventana for i in range(ventana, len(valores))]
+
+def cuadratica_forma_cerrada(y):
+    """Implementación anterior: coeficientes (a, b, c) por determinantes"""
+    x = list(range(len(y)))
+    n = len(x)
+    sum_x = sum(x)
+    sum_y = sum(y)
+    sum_x2 = sum(v ** 2 for v in x)
+    sum_x3 = sum(v ** 3 for v in x)
+    sum_x4 = sum(v ** 4 for v in x)
+    sum_xy = sum(x[i] * y[i] for i in range(n))
+    sum_x2y = sum(x[i] ** 2 * y[i] for i in range(n))
+
+    det = n * sum_x2 * sum_x4 + 2 * sum_x * sum_x2 * sum_x3 - sum_x2 ** 3 - n * sum_x3 ** 2 - sum_x ** 2 * sum_x4
+    if abs(det) < 1e-10:
+        return 0, 0, statistics.mean(y)
+    a = (n * sum_x2y * sum_x2 + sum_x * sum_xy * sum_x3 + sum_y * sum_x2 * sum_x3 -
+         sum_x2 ** 2 * sum_y - n * sum_xy * sum_x4 - sum_x ** 2 * sum_x2y) / det
+    b = (n * sum_xy * sum_x4 + sum_x * sum_x2y * sum_x2 + sum_y * sum_x3 * sum_x2 -
+         sum_x2 ** 2 * sum_x2y - n * sum_x3 * sum_xy - sum_x ** 2 * sum_x4) / det
+    c = (sum_x2 * sum_x2y * sum_x4 + sum_x3 * sum_xy * sum_x3 + sum_x * sum_x2 * sum_x2y -
+         sum_x2 ** 3 - sum_x3 ** 2 * sum_x2y - sum_x ** 2 * sum_x4) / det
+    return a, b, c
+
+def medir(funcion, repeticiones):
+    """Mediana del tiempo de ejecución en milisegundos"""
+    tiempos = []
+    for _ in range(repeticiones):
+        inicio = time.perf_counter()
+        funcion()
+        tiempos.append((time.perf_counter() - inicio) * 1000)
+    return statistics.median(tiempos)
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark del núcleo de predicciones")
+    parser.add_argument("--tamanos", type=int, nargs="+", default=[120, 180, 365, 3650], help="Días de la serie")
+    parser.add_argument("--repeticiones", type=int, default=20)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(42)
+    coeficientes_reales = np.array([0.001, 0.05, 5.0])
+
+    print("📊 Benchmark del núcleo de predicciones (mediana en ms)")
+    print("=" * 86)
+    print(f"{'días':>6} | {'medias py':>10} {'medias np':>10} | {'cuadr. py':>10} {'cuadr. np':>10} | "
+          f"{'error py':>10} {'error np':>10}")
+    print("-" * 86)
+
+    for tamano in args.tamanos:
+        x = np.arange(tamano)
+        y = np.polyval(coeficientes_reales, x) + rng.normal(0, 0.5, tamano)
+        y_lista = y.tolist()
+
+        t_medias_py = medir(lambda: medias_moviles_python(y_lista, 7), args.repeticiones)
+        t_medias_np = medir(lambda: medias_moviles(y, 7), args.repeticiones)
+        t_cuadr_py = medir(lambda: cuadratica_forma_cerrada(y_lista), args.repeticiones)
+        t_cuadr_np = medir(lambda: ajuste_polinomico(y, 2), args.repeticiones)
+
+        # Error relativo del coeficiente cuadrático respecto al valor real
+        error_py = abs(cuadratica_forma_cerrada(y_lista)[0] - coeficientes_reales[0]) / coeficientes_reales[0]
+        error_np = abs(ajuste_polinomico(y, 2)[0] - coeficientes_reales[0]) / coeficientes_reales[0]
+
+        print(f"{tamano:>6} | {t_medias_py:>10.3f} {t_medias_np:>10.3f} | {t_cuadr_py:>10.3f} {t_cuadr_np:>10.3f} | "
+              f"{error_py:>10.2e} {error_np:>10.2e}")
+
+    print("=" * 86)
+
+if __name__ == "__main__":
+    main()
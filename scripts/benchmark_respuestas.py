@@ -0,0 +1,163 @@
+#!/usr/bin/env python3
+"""
+Benchmark de las Respuestas Rápidas (orjson)
+Microservicio de Gestión de Reservas
+
+Mide el tiempo de respuesta de los listados grandes con el camino normal
+(objetos ORM, validación con el response_model de Pydantic y `json` de la
+biblioteca estándar) y con `?rapido=true` (tuplas de columnas, diccionarios
+construidos directamente y orjson), sobre un fichero SQLite con N filas de
+reservas, pagos y precios, y para una disponibilidad con N slots.
+
+Los listados se recorren completos siguiendo X-Next-Cursor (precios admite
+como máximo 1000 filas por página). Se informa la mediana de varias
+repeticiones y se comprueba que ambos caminos devuelven el mismo JSON.
+
+Uso:
+    python scripts/benchmark_respuestas.py
+    python scripts/benchmark_respuestas.py --filas 50000 --repeticiones 3
+"""
+
+import sys
+import os
+import argparse
+import json
+import statistics
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+# Agregar el directorio raíz al path para importar la app
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fastapi import FastAPI, Query
+from fastapi.testclient import TestClient
+from sqlalchemy.orm import sessionmaker
+
+from app.database import Base, crear_engine
+from app.db_sqlite_clean import get_db, get_db_lectura
+from app.models import Cliente, Precio, Recurso, Reserva, Servicio
+from app.models.pago import EstadoPago, MetodoPago, Pago
+from app.respuestas import ORJSONResponse
+from app.routes import pago_router, precio_router, reserva_router
+from app.schemas.horario import DisponibilidadResponse, SlotDisponibilidad
+
+LISTADOS = [
+    ("reservas", "/reservas/listar", 10000),
+    ("pagos", "/api/pagos/", 10000),
+    ("precios", "/api/precios/", 1000),
+]
+
+def crear_base(ruta, filas):
+    engine = crear_engine(f"sqlite:///{ruta}")
+    Base.metadata.create_all(bind=engine)
+    inicio = datetime(2025, 1, 1, 8)
+    with engine.begin() as conexion:
+        conexion.execute(Cliente.__table__.insert(), [{"id": 1, "nombre": "Ana", "email": "ana@ejemplo.com"}])
+        conexion.execute(Servicio.__table__.insert(), [
+            {"id": 1, "nombre": "Consulta", "duracion_minutos": 60, "precio_base": 50.0, "activo": True}
+        ])
+        conexion.execute(Recurso.__table__.insert(), [{"id": 1, "nombre": "Sala 1", "tipo": "sala", "disponible": True}])
+        conexion.execute(Reserva.__table__.insert(), [
+            {"id": i, "cliente_id": 1, "servicio_id": 1, "recurso_id": 1,
+             "fecha_hora_inicio": inicio + timedelta(hours=i), "fecha_hora_fin": inicio + timedelta(hours=i, minutes=45),
+             "estado": "confirmada", "created_at": inicio, "updated_at": inicio + timedelta(days=1)}
+            for i in range(1, filas + 1)
+        ])
+        conexion.execute(Pago.__table__.insert(), [
+            {"id": i, "reserva_id": i, "cliente_id": 1, "monto": 40.0 + i % 50, "moneda": "EUR",
+             "estado": list(EstadoPago)[i % 6].name, "metodo_pago": list(MetodoPago)[i % 4].name,
+             "descripcion": f"Pago de la reserva {i}", "factura_generada": bool(i % 2),
+             "fecha_creacion": inicio + timedelta(minutes=i)}
+            for i in range(1, filas + 1)
+        ])
+        conexion.execute(Precio.__table__.insert(), [
+            {"id": i, "servicio_id": 1, "tipo_precio": "hora", "nombre": f"Tarifa {i}", "precio_base": 10.0 + i % 90,
+             "moneda": "EUR", "activo": True, "prioridad": i % 5, "fecha_inicio": inicio, "created_at": inicio}
+            for i in range(1, filas + 1)
+        ])
+    return engine
+
+def crear_app(engine, slots):
+    sesiones = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+    def sesion():
+        db = sesiones()
+        try:
+            yield db
+        finally:
+            db.close()
+
+    app = FastAPI()
+    for router in (reserva_router, pago_router, precio_router):
+        app.include_router(router)
+    app.dependency_overrides[get_db] = sesion
+    app.dependency_overrides[get_db_lectura] = sesion
+
+    # Misma forma que la disponibilidad de horarios (ya calculada: solo se mide la serialización)
+    disponibilidad = {
+        "fecha": "2025-01-01", "recurso_id": 1, "recurso_nombre": "Sala 1",
+        "slots_disponibles": [
+            SlotDisponibilidad(inicio=f"{i // 60 % 24:02d}:{i % 60:02d}", fin="23:59", disponible=bool(i % 3),
+                               motivo_no_disponible=None if i % 3 else "Recurso ya reservado")
+            for i in range(slots)
+        ],
+        "total_slots": slots,
+        "slots_disponibles_count": slots
+    }
+
+    @app.get("/slots", response_model=DisponibilidadResponse)
+    def listar_slots(rapido: bool = Query(False)):
+        return ORJSONResponse(disponibilidad) if rapido else disponibilidad
+
+    return app
+
+def recorrer(cliente, url, limite, rapido):
+    """Cuerpos de todas las páginas del listado (se decodifican fuera de la medición)"""
+    cuerpos, params = [], {"limit": limite}
+    if rapido:
+        params["rapido"] = "true"
+    while True:
+        respuesta = cliente.get(url, params=params)
+        assert respuesta.status_code == 200, respuesta.text
+        cuerpos.append(respuesta.content)
+        cursor = respuesta.headers.get("X-Next-Cursor")
+        if not cursor:
+            return cuerpos
+        params["cursor"] = cursor
+
+def medir(cliente, url, limite, repeticiones):
+    """Mediana de segundos de cada camino y tamaño de la respuesta"""
+    tiempos = {False: [], True: []}
+    cuerpos = {}
+    for _ in range(repeticiones):
+        for rapido in (False, True):
+            inicio = time.perf_counter()
+            cuerpos[rapido] = recorrer(cliente, url, limite, rapido)
+            tiempos[rapido].append(time.perf_counter() - inicio)
+    normal, rapido = ([json.loads(cuerpo) for cuerpo in cuerpos[clave]] for clave in (False, True))
+    assert normal == rapido, f"{url}: los dos caminos devuelven JSON distinto"
+    tamano = sum(len(cuerpo) for cuerpo in cuerpos[True])
+    return statistics.median(tiempos[False]), statistics.median(tiempos[True]), tamano
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark de las respuestas rápidas (orjson)")
+    parser.add_argument("--filas", type=int, default=10000)
+    parser.add_argument("--repeticiones", type=int, default=5)
+    args = parser.parse_args()
+
+    engine = crear_base(os.path.join(tempfile.mkdtemp(), "benchmark.db"), args.filas)
+    cliente = TestClient(crear_app(engine, args.filas))
+
+    print(f"📊 Benchmark de respuestas rápidas ({args.filas} filas, mediana de {args.repeticiones} repeticiones)")
+    print("=" * 60)
+    print(f"{'listado':>10} | {'normal ms':>10} {'rapido ms':>10} {'MB':>6}")
+    print("-" * 60)
+    for nombre, url, limite in LISTADOS + [("slots", "/slots", None)]:
+        normal, rapido, tamano = medir(cliente, url, limite or args.filas, args.repeticiones)
+        print(f"{nombre:>10} | {normal * 1000:>10.0f} {rapido * 1000:>10.0f} {tamano / 1e6:>6.2f}  (x{normal / rapido:.1f})")
+    print("=" * 60)
+    engine.dispose()
+
+if __name__ == "__main__":
+    main()
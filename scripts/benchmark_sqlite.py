@@ -0,0 +1,126 @@
+#!/usr/bin/env python3
+"""
+Benchmark del Perfil del Motor SQLite
+Microservicio de Gestión de Reservas
+
+Mide el rendimiento de una carga mixta de peticiones (lecturas por clave y
+listados, y escrituras de una fila con su commit, como las de la API) desde
+varios hilos sobre un fichero SQLite nuevo con cada configuración del motor:
+
+    antes        echo=True y valores por defecto de SQLite (configuración anterior)
+    sin echo     valores por defecto de SQLite sin registrar el SQL
+    produccion   sin echo y con el perfil "produccion" (WAL, synchronous=NORMAL, ...)
+
+El registro del SQL se escribe en /dev/null: en un terminal o un fichero de log
+el coste de "antes" es aún mayor.
+
+Uso:
+    python scripts/benchmark_sqlite.py
+    python scripts/benchmark_sqlite.py --operaciones 4000 --hilos 8 --escrituras 0.2
+"""
+
+import sys
+import os
+import argparse
+import contextlib
+import random
+import tempfile
+import threading
+import time
+
+# Agregar el directorio raíz al path para importar la app
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.database import Base, configurar_sqlite
+from app.models import Cliente, Servicio
+
+CONFIGURACIONES = [
+    ("antes", True, "basico"),
+    ("sin echo", False, "basico"),
+    ("produccion", False, "produccion"),
+]
+
+def crear_sesiones(ruta, echo, perfil):
+    engine = configurar_sqlite(
+        create_engine(f"sqlite:///{ruta}", connect_args={"check_same_thread": False}, echo=echo),
+        perfil
+    )
+    Base.metadata.create_all(bind=engine)
+    fabrica = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+    db = fabrica()
+    db.add_all(Servicio(nombre=f"Servicio {i}", duracion_minutos=60, precio_base=50.0) for i in range(20))
+    db.add_all(Cliente(nombre=f"Cliente {i}", email=f"inicial{i}@ejemplo.com") for i in range(1000))
+    db.commit()
+    db.close()
+    return engine, fabrica
+
+def ejecutar(fabrica, operaciones, hilos, proporcion_escrituras):
+    """Reparte las operaciones entre los hilos; devuelve (segundos, errores)"""
+    errores = []
+    contador = iter(range(operaciones))
+    bloqueo = threading.Lock()
+
+    def trabajador(semilla):
+        rng = random.Random(semilla)
+        while True:
+            with bloqueo:
+                numero = next(contador, None)
+            if numero is None:
+                return
+            db = fabrica()
+            try:
+                if rng.random() < proporcion_escrituras:
+                    db.add(Cliente(nombre=f"Nuevo {numero}", email=f"nuevo{numero}@ejemplo.com"))
+                    db.commit()
+                elif numero % 2:
+                    db.query(Cliente).filter(Cliente.id == rng.randint(1, 1000)).first()
+                else:
+                    db.query(Servicio).limit(20).all()
+            except Exception as e:
+                db.rollback()
+                errores.append(e)
+            finally:
+                db.close()
+
+    inicio = time.perf_counter()
+    trabajadores = [threading.Thread(target=trabajador, args=(i,)) for i in range(hilos)]
+    for hilo in trabajadores:
+        hilo.start()
+    for hilo in trabajadores:
+        hilo.join()
+    return time.perf_counter() - inicio, len(errores)
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark del perfil del motor SQLite")
+    parser.add_argument("--operaciones", type=int, default=3000)
+    parser.add_argument("--hilos", type=int, default=8)
+    parser.add_argument("--escrituras", type=float, default=0.2, help="Proporción de operaciones de escritura")
+    args = parser.parse_args()
+
+    print(f"📊 Benchmark del motor SQLite ({args.operaciones} operaciones, {args.hilos} hilos, "
+          f"{args.escrituras:.0%} escrituras)")
+    print("=" * 60)
+    print(f"{'configuración':>14} | {'ops/s':>10} {'segundos':>10} {'errores':>8}")
+    print("-" * 60)
+
+    referencia = None
+    with open(os.devnull, "w") as nulo:
+        for nombre, echo, perfil in CONFIGURACIONES:
+            ruta = os.path.join(tempfile.mkdtemp(), "benchmark.db")
+            # El handler de echo se crea con el stdout del momento: se redirige a /dev/null
+            with contextlib.redirect_stdout(nulo):
+                engine, fabrica = crear_sesiones(ruta, echo, perfil)
+                segundos, errores = ejecutar(fabrica, args.operaciones, args.hilos, args.escrituras)
+                engine.dispose()
+            rendimiento = args.operaciones / segundos
+            referencia = referencia or rendimiento
+            print(f"{nombre:>14} | {rendimiento:>10.0f} {segundos:>10.2f} {errores:>8}  (x{rendimiento / referencia:.1f})")
+
+    print("=" * 60)
+
+if __name__ == "__main__":
+    main()
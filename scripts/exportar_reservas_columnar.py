@@ -0,0 +1,78 @@
+#!/usr/bin/env python3
+"""
+Exportación Columnar de Reservas
+Microservicio de Gestión de Reservas
+
+Genera ficheros Parquet o Arrow IPC con las reservas (unidas a clientes,
+servicios y recursos) de un rango de fechas, escritos por lotes directamente
+desde el cursor y particionados por fecha (anio=/mes=/dia=).
+
+Uso:
+    python scripts/exportar_reservas_columnar.py 2025-01-01 2025-12-31 ./export
+    python scripts/exportar_reservas_columnar.py 2025-01-01 2025-12-31 ./export \\
+        --formato arrow --compresion lz4 --particion dia --lote 100000
+    python scripts/exportar_reservas_columnar.py 2025-01-01 2025-12-31 ./export --comparar-csv
+"""
+
+import sys
+import os
+import argparse
+
+# Agregar el directorio raíz al path para importar la app
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fastapi import HTTPException
+
+from app.db_sqlite_clean import SessionLocal
+from app.services.exportacion_service import ExportacionService
+
+def main():
+    parser = argparse.ArgumentParser(description="Exportación columnar de reservas")
+    parser.add_argument("fecha_inicio", help="Fecha de inicio (YYYY-MM-DD)")
+    parser.add_argument("fecha_fin", help="Fecha de fin, inclusive (YYYY-MM-DD)")
+    parser.add_argument("directorio", help="Directorio de salida")
+    parser.add_argument("--formato", default="parquet", choices=["parquet", "arrow"])
+    parser.add_argument("--compresion", default="zstd", help="none, snappy, gzip, zstd, brotli o lz4")
+    parser.add_argument("--particion", default="mes", choices=["ninguna", "anio", "mes", "dia"])
+    parser.add_argument("--lote", type=int, default=50000, help="Filas por lote / row group")
+    parser.add_argument("--comparar-csv", action="store_true",
+                        help="Exportar también a CSV y comparar tiempo y tamaño")
+    args = parser.parse_args()
+
+    opciones = {
+        "formato": args.formato,
+        "compresion": args.compresion,
+        "particion": args.particion,
+        "tamano_lote": args.lote,
+    }
+    db = SessionLocal()
+    try:
+        if args.comparar_csv:
+            comparacion = ExportacionService.comparar_con_csv(
+                db, args.fecha_inicio, args.fecha_fin, args.directorio, **opciones
+            )
+        else:
+            resumen = ExportacionService.exportar_reservas_columnar(
+                db, args.fecha_inicio, args.fecha_fin, args.directorio, **opciones
+            )
+    except HTTPException as e:
+        # Fechas u opciones inválidas, o pyarrow sin instalar
+        parser.exit(1, f"❌ {e.detail}\n")
+    finally:
+        db.close()
+
+    if args.comparar_csv:
+        print(f"📊 {comparacion['total_registros']} reservas")
+        for formato in ("csv", args.formato):
+            datos = comparacion[formato]
+            print(f"   - {formato}: {datos['bytes'] / 1024:.1f} KB en {datos['segundos']:.2f} s")
+        print(f"   {args.formato} ocupa {comparacion['reduccion_tamano']}x menos "
+              f"y es {comparacion['aceleracion']}x más rápido que CSV")
+        return
+
+    print(f"✅ {resumen['total_registros']} reservas exportadas en {len(resumen['archivos'])} archivo(s)")
+    for archivo in resumen["archivos"]:
+        print(f"   - {archivo['ruta']} ({archivo['filas']} filas, {archivo['lotes']} lotes)")
+
+if __name__ == "__main__":
+    main()
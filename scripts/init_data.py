@@ -22,7 +22,7 @@ from datetime import datetime, timedelta
 # Agregar el directorio raíz al path para importar la app
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-from app.db import SessionLocal, engine
+from app.database import SessionLocal, engine
 from app.models import Cliente, Servicio, Recurso, Usuario, Precio, Reserva
 from app.auth import get_password_hash
 
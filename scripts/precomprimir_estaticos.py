@@ -0,0 +1,72 @@
+#!/usr/bin/env python3
+"""
+Precompresión de los Ficheros Estáticos
+Microservicio de Gestión de Reservas
+
+Genera junto a cada fichero de texto de static/ (JS, CSS, HTML, JSON, SVG)
+su variante `.gz` (gzip nivel 9) y, si el paquete `brotli` está instalado,
+`.br` (calidad 11). La aplicación las sirve directamente a los clientes que
+las aceptan (app/estaticos.py): la compresión máxima se paga una vez al
+construir la imagen y no en cada petición.
+
+Solo se regeneran las variantes más antiguas que su original. Se ejecuta en
+el Dockerfile después de copiar el código.
+
+Uso:
+    python scripts/precomprimir_estaticos.py
+    python scripts/precomprimir_estaticos.py --directorio static --minimo 1024
+"""
+
+import sys
+import os
+import argparse
+import gzip
+
+# Agregar el directorio raíz al path para importar la app
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.compresion import importar_brotli
+from app.config import settings
+
+EXTENSIONES = (".js", ".css", ".html", ".json", ".svg", ".txt", ".map")
+
+def escribir_si_cambia(ruta_original, ruta_variante, comprimir):
+    """Escribir la variante si falta o es más antigua; devuelve su tamaño o None si no se escribió"""
+    if os.path.exists(ruta_variante) and os.path.getmtime(ruta_variante) >= os.path.getmtime(ruta_original):
+        return None
+    with open(ruta_original, "rb") as fichero:
+        datos = comprimir(fichero.read())
+    with open(ruta_variante, "wb") as fichero:
+        fichero.write(datos)
+    return len(datos)
+
+def main():
+    parser = argparse.ArgumentParser(description="Precomprimir los ficheros estáticos (.gz y .br)")
+    parser.add_argument("--directorio", default="static")
+    parser.add_argument("--minimo", type=int, default=settings.compresion_minimo_bytes,
+                        help="Tamaño mínimo en bytes para precomprimir")
+    args = parser.parse_args()
+
+    brotli = importar_brotli()
+    compresores = [(".gz", lambda datos: gzip.compress(datos, compresslevel=9, mtime=0))]
+    if brotli:
+        compresores.append((".br", lambda datos: brotli.compress(datos, quality=11)))
+    else:
+        print("⚠️ 'brotli' no está instalado: solo se generan variantes .gz (pip install brotli)")
+
+    print(f"🗜️ Precomprimiendo {args.directorio}/ ({', '.join(extension for extension, _ in compresores)})")
+    print("=" * 60)
+    for raiz, _, ficheros in os.walk(args.directorio):
+        for nombre in sorted(ficheros):
+            ruta = os.path.join(raiz, nombre)
+            if not nombre.endswith(EXTENSIONES) or os.path.getsize(ruta) < args.minimo:
+                continue
+            tamanos = []
+            for extension, comprimir in compresores:
+                tamano = escribir_si_cambia(ruta, ruta + extension, comprimir)
+                tamanos.append(f"{extension} {'al día' if tamano is None else f'{tamano / 1024:.0f} KB'}")
+            print(f"{os.path.relpath(ruta, args.directorio):>20} | {os.path.getsize(ruta) / 1024:>6.0f} KB -> {', '.join(tamanos)}")
+    print("=" * 60)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,46 @@
+#!/usr/bin/env python3
+"""
+Lote de Predicciones de Demanda
+Microservicio de Gestión de Reservas
+
+Ajusta los modelos de predicción de todos los servicios en paralelo y guarda
+las predicciones en la tabla predicciones_demanda, que sirve la API en
+/predicciones. El servidor ya lo ejecuta cada noche; este script permite
+lanzarlo desde cron o a mano.
+
+Uso:
+    python scripts/predicciones_lote.py
+    python scripts/predicciones_lote.py --dias 60 --procesos 8
+    python scripts/predicciones_lote.py --servicios 1 2 3
+"""
+
+import sys
+import os
+import argparse
+
+# Agregar el directorio raíz al path para importar la app
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.db_sqlite_clean import SessionLocal
+from app.services.prediccion_lote_service import PrediccionLoteService
+
+def main():
+    parser = argparse.ArgumentParser(description="Lote de predicciones de demanda")
+    parser.add_argument("--dias", type=int, default=None, help="Días futuros a predecir (por defecto, los configurados)")
+    parser.add_argument("--procesos", type=int, default=None, help="Procesos para ajustar modelos (0 = automático)")
+    parser.add_argument("--servicios", type=int, nargs="*", default=None, help="Limitar a estos servicios")
+    args = parser.parse_args()
+
+    db = SessionLocal()
+    try:
+        resultado = PrediccionLoteService.ejecutar(db, args.dias, args.procesos, args.servicios)
+        print(f"✅ {resultado['predicciones_guardadas']} predicciones de {resultado['servicios']} servicios"
+              f" en {resultado['duracion_segundos']}s ({resultado['procesos']} procesos)")
+        print(f"   Carga: {resultado['duracion_carga_segundos']}s | Ajuste: {resultado['duracion_ajuste_segundos']}s")
+        if resultado["modelos_omitidos"]:
+            print(f"ℹ️ {len(resultado['modelos_omitidos'])} modelos omitidos por datos insuficientes")
+    finally:
+        db.close()
+
+if __name__ == "__main__":
+    main()
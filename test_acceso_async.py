@@ -0,0 +1,120 @@
+"""
+Prueba del acceso asíncrono a la base de datos
+
+Sobre un fichero SQLite temporal comprueba que la disponibilidad leída con
+AsyncSession coincide con la de la Session síncrona, que la simulación semanal
+de precios hace tres consultas y da los mismos precios que el cálculo día a
+día, que las estadísticas de reglas salen de una consulta agregada y que
+ningún manejador `async def` de la API usa una sesión síncrona.
+"""
+
+import asyncio
+import inspect
+from datetime import datetime, time, timedelta
+
+from fastapi.routing import APIRoute
+from sqlalchemy.ext.asyncio import async_sessionmaker
+
+from app.database import get_db, get_db_cache, get_db_lectura
+from app.database_async import url_async
+from app.models.horario import HorarioRecurso
+from app.schemas.horario import DisponibilidadRequest
+from app.schemas.precio_dinamico import CalculoPrecioRequest
+from app.services.cache_service import cache_service
+from app.services.horario_service import HorarioService
+from app.services.precio_dinamico_service import PrecioDinamicoService
+
+def test_url_con_driver_asincrono():
+    assert str(url_async("sqlite:///./reservas.db")) == "sqlite+aiosqlite:///./reservas.db"
+    assert url_async("postgresql://u:p@db/reservas").drivername == "postgresql+asyncpg"
+    assert url_async("postgresql+psycopg2://u:p@db/reservas").drivername == "postgresql+asyncpg"
+    try:
+        url_async("mysql://u:p@db/reservas")
+        assert False, "mysql no tiene driver asíncrono configurado"
+    except ValueError as e:
+        assert "mysql" in str(e)
+
+async def con_sesion(engine_async, operacion):
+    async with async_sessionmaker(engine_async, expire_on_commit=False)() as sesion:
+        return await operacion(sesion)
+
+def test_disponibilidad_async_igual_que_sincrona(crear_cliente_cache):
+    (engine, engine_async), db, _ = crear_cliente_cache()
+    # Ayer tuvo reservas a las 9:00 (y a las 10:00 en laborables)
+    ayer = datetime.now() - timedelta(days=1)
+    db.add(HorarioRecurso(
+        id=1, recurso_id=1, dia_semana=ayer.weekday(), hora_inicio="08:00", hora_fin="14:00", created_at="09:00:00"
+    ))
+    db.commit()
+    request = DisponibilidadRequest(recurso_id=1, fecha=ayer.strftime("%Y-%m-%d"), servicio_id=1)
+
+    cache_service.clear()
+    sincrona = HorarioService.get_disponibilidad(db, request)
+    cache_service.clear()
+    asincrona = asyncio.run(con_sesion(engine_async, lambda s: HorarioService.get_disponibilidad_async(s, request)))
+    cache_service.clear()
+
+    assert asincrona == sincrona
+    slots = {slot.inicio: slot.disponible for slot in sincrona["slots_disponibles"]}
+    assert slots["08:00"] and not slots["09:00"] and slots["13:00"]
+
+def test_simulacion_semanal_en_tres_consultas(crear_cliente_cache, contar_consultas):
+    (engine, engine_async), db, _ = crear_cliente_cache()
+    PrecioDinamicoService.crear_regla_fin_de_semana(db, "Fin de semana", 20.0, 5, [5, 6])
+    lunes = datetime(2030, 1, 7)
+
+    contador = contar_consultas(engine_async)
+    semana = asyncio.run(con_sesion(engine_async, lambda s: PrecioDinamicoService.simular_semana_async(
+        s, 1, 1, lunes, time(10, 0), 1, 1
+    )))
+    assert contador.total == 3
+
+    assert list(semana) == ["Lunes", "Martes", "Miércoles", "Jueves", "Viernes", "Sábado", "Domingo"]
+    for i, dia in enumerate(semana.values()):
+        inicio = datetime.combine((lunes + timedelta(days=i)).date(), time(10, 0))
+        calculo = PrecioDinamicoService.calcular_precio(db, CalculoPrecioRequest(
+            servicio_id=1, recurso_id=1, fecha_hora_inicio=inicio,
+            fecha_hora_fin=inicio + timedelta(hours=1), participantes=1, tipo_cliente="regular"
+        ))
+        assert dia["fecha"] == inicio.strftime("%Y-%m-%d")
+        assert dia["precio_final"] == calculo.precio_final
+        assert dia["reglas_aplicadas"] == len(calculo.reglas_aplicadas)
+    assert semana["Sábado"]["precio_final"] > semana["Lunes"]["precio_final"]
+
+    inexistente = asyncio.run(con_sesion(engine_async, lambda s: PrecioDinamicoService.simular_semana_async(
+        s, 99, 1, lunes, time(10, 0), 1, 1
+    )))
+    assert all("Servicio no encontrado" in dia["error"] for dia in inexistente.values())
+
+def test_estadisticas_de_reglas_agregadas(crear_cliente_cache, contar_consultas):
+    (engine, engine_async), db, _ = crear_cliente_cache()
+    PrecioDinamicoService.crear_regla_fin_de_semana(db, "Fin de semana", 20.0, 5, [5, 6])
+    PrecioDinamicoService.crear_regla_hora_pico(db, "Hora pico", "18:00", "21:00", 15.0, [0, 1, 2, 3, 4])
+    inactiva = PrecioDinamicoService.crear_regla_fin_de_semana(db, "Domingo", 10.0, 1, [6])
+    inactiva.activa = False
+    db.commit()
+
+    contador = contar_consultas(engine_async)
+    estadisticas = asyncio.run(con_sesion(engine_async, PrecioDinamicoService.get_estadisticas_reglas_async))
+
+    assert contador.total == 1
+    assert estadisticas["total_reglas"] == 3
+    assert (estadisticas["reglas_activas"], estadisticas["reglas_inactivas"]) == (2, 1)
+    assert estadisticas["por_tipo"] == {"dia_semana": 2, "hora": 1}
+    assert estadisticas["por_modificador"] == {"porcentaje": 3}
+
+def test_manejadores_async_sin_sesion_sincrona():
+    """Un `async def` con Session síncrona bloquearía el bucle de eventos en cada consulta"""
+    from app import main_sqlite
+
+    bloqueantes = []
+    for ruta in main_sqlite.app.routes:
+        if not isinstance(ruta, APIRoute) or not inspect.iscoroutinefunction(ruta.endpoint):
+            continue
+        pendientes = list(ruta.dependant.dependencies)
+        while pendientes:
+            dependencia = pendientes.pop()
+            if dependencia.call in (get_db, get_db_cache, get_db_lectura):
+                bloqueantes.append(f"{ruta.path} ({ruta.endpoint.__name__})")
+            pendientes.extend(dependencia.dependencies)
+    assert not bloqueantes, f"async def con sesión síncrona: {bloqueantes}"
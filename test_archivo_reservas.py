@@ -0,0 +1,107 @@
+"""
+Prueba del archivo de reservas históricas
+
+Comprueba sobre una base SQLite en memoria que el archivo mueve solo las
+reservas finalizadas o canceladas antiguas, que las estadísticas (que leen la
+vista reservas_historico) no cambian al archivar y que una reserva archivada
+puede restaurarse.
+"""
+
+from datetime import datetime, timedelta
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from app.db_sqlite_clean import Base
+from app.models import Cliente, Servicio, Recurso, Reserva, ReservaArchivada, Pago, MetodoPago
+from app.services.archivo_service import ArchivoService
+from app.services.reserva_service import ReservaService
+
+AHORA = datetime(2025, 6, 1, 12, 0)
+
+def crear_datos():
+    """Crear una base en memoria con reservas recientes y antiguas"""
+    engine = create_engine(
+        "sqlite://",
+        connect_args={"check_same_thread": False},
+        poolclass=StaticPool
+    )
+    Base.metadata.create_all(bind=engine)
+    db = sessionmaker(bind=engine)()
+
+    db.add_all([
+        Cliente(id=1, nombre="Ana", email="ana@test.com", telefono="600000000"),
+        Servicio(id=1, nombre="Consulta", duracion_minutos=60, precio_base=50.0),
+        Recurso(id=1, nombre="Sala 1", tipo="sala"),
+    ])
+
+    # 2 años de reservas, una al día, rotando estados
+    estados = ["confirmada", "cancelada", "pendiente"]
+    for i in range(730):
+        inicio = AHORA - timedelta(days=i, hours=2)
+        db.add(Reserva(
+            id=i + 1, cliente_id=1, servicio_id=1, recurso_id=1,
+            fecha_hora_inicio=inicio, fecha_hora_fin=inicio + timedelta(hours=1),
+            estado=estados[i % 3]
+        ))
+    db.commit()
+    return db
+
+def test_archiva_solo_reservas_antiguas_cerradas():
+    db = crear_datos()
+    # Una reserva antigua con pago debe permanecer en la tabla activa
+    db.add(Pago(reserva_id=700, cliente_id=1, monto=50.0, metodo_pago=MetodoPago.EFECTIVO, referencia_pago="PAY-TEST"))
+    db.commit()
+
+    esperadas = ArchivoService.contar_archivables(db, 365, fecha_referencia=AHORA)
+    resultado = ArchivoService.archivar_reservas(db, 365, tamano_lote=50, fecha_referencia=AHORA)
+
+    assert resultado["reservas_archivadas"] == esperadas > 0
+    assert resultado["lotes"] > 1
+    limite = AHORA - timedelta(days=365)
+    assert db.query(ReservaArchivada).filter(ReservaArchivada.fecha_hora_fin >= limite).count() == 0
+    assert db.query(ReservaArchivada).filter(ReservaArchivada.estado == "pendiente").count() == 0
+    assert db.query(Reserva).filter(Reserva.id == 700).count() == 1
+    assert db.query(Reserva).count() + db.query(ReservaArchivada).count() == 730
+    assert ArchivoService.contar_archivables(db, 365, fecha_referencia=AHORA) == 0
+
+def test_estadisticas_incluyen_archivo():
+    db = crear_datos()
+    antes = ReservaService.get_estadisticas_periodo(db, "2023-01-01", "2025-12-31")
+    kpis_antes = ReservaService.get_kpis_negocio(db, "2023-01-01", "2025-12-31")
+
+    ArchivoService.archivar_reservas(db, 180, fecha_referencia=AHORA)
+    despues = ReservaService.get_estadisticas_periodo(db, "2023-01-01", "2025-12-31")
+    kpis_despues = ReservaService.get_kpis_negocio(db, "2023-01-01", "2025-12-31")
+
+    assert db.query(ReservaArchivada).count() > 0
+    assert despues["total_reservas"] == antes["total_reservas"] == 730
+    assert despues["reservas_por_estado"] == antes["reservas_por_estado"]
+    assert despues["reservas_por_servicio"] == antes["reservas_por_servicio"]
+    assert kpis_despues["ingresos_estimados"] == kpis_antes["ingresos_estimados"]
+
+def test_restaurar_reserva():
+    db = crear_datos()
+    ArchivoService.archivar_reservas(db, 365, fecha_referencia=AHORA)
+    archivada = db.query(ReservaArchivada).first()
+
+    reserva = ArchivoService.restaurar_reserva(db, archivada.id)
+
+    assert reserva.id == archivada.id
+    assert db.query(ReservaArchivada).filter(ReservaArchivada.id == reserva.id).count() == 0
+    assert ReservaService.get_reserva(db, reserva.id).estado == reserva.estado
+
+def test_no_reutiliza_ids_archivados():
+    db = crear_datos()
+    # Las reservas más antiguas tienen los ids más altos: el 730 pasa al archivo
+    ArchivoService.archivar_reservas(db, 365, fecha_referencia=AHORA)
+    assert db.get(ReservaArchivada, 730) is not None
+
+    nueva = Reserva(
+        cliente_id=1, servicio_id=1, recurso_id=1, estado="pendiente",
+        fecha_hora_inicio=AHORA + timedelta(days=1), fecha_hora_fin=AHORA + timedelta(days=1, hours=1)
+    )
+    db.add(nueva)
+    db.commit()
+    assert nueva.id == 731, f"id {nueva.id} reutilizado"
@@ -0,0 +1,93 @@
+"""
+Prueba del arranque en frío de la aplicación
+
+Comprueba, en un proceso nuevo, que importar la aplicación y completar el
+arranque (lifespan + primera petición a /health) cabe en el presupuesto de
+tiempo, que importarla no toca la base de datos ni carga las dependencias de
+los subsistemas opcionales (numpy para predicciones, requests para webhooks),
+que los routers y servicios se importan bajo demanda y que `alembic upgrade
+head` crea el esquema completo en una base de datos vacía.
+
+El presupuesto se puede ajustar con la variable PRESUPUESTO_ARRANQUE_SEGUNDOS.
+"""
+
+import json
+import os
+import subprocess
+import sys
+import tempfile
+
+import sqlalchemy as sa
+
+import app.models  # noqa: F401  (registra las tablas en Base.metadata)
+from app.database import Base
+
+RAIZ = os.path.dirname(os.path.abspath(__file__))
+PRESUPUESTO_SEGUNDOS = float(os.environ.get("PRESUPUESTO_ARRANQUE_SEGUNDOS", "5"))
+
+ARRANQUE = """
+import json, sys, time
+inicio = time.perf_counter()
+from app.main_sqlite import app
+importada = time.perf_counter()
+from fastapi.testclient import TestClient
+with TestClient(app) as cliente:
+    estado = cliente.get("/health").status_code
+fin = time.perf_counter()
+print(json.dumps({
+    "importacion": importada - inicio,
+    "total": fin - inicio,
+    "estado": estado,
+    "modulos": sorted(m for m in ("numpy", "requests", "app.prediccion_numerica") if m in sys.modules),
+}))
+"""
+
+def ejecutar(codigo, **entorno):
+    """Ejecutar código en un intérprete nuevo (arranque en frío) desde la raíz del repositorio"""
+    resultado = subprocess.run(
+        [sys.executable, "-c", codigo], cwd=RAIZ, capture_output=True, text=True,
+        env={**os.environ, "PYTHONPATH": RAIZ, **entorno}
+    )
+    assert resultado.returncode == 0, resultado.stderr
+    return resultado.stdout
+
+def test_arranque_en_frio_dentro_del_presupuesto():
+    ruta = os.path.join(tempfile.mkdtemp(), "arranque.db")
+    medida = json.loads(ejecutar(
+        ARRANQUE, DATABASE_URL=f"sqlite:///{ruta}", PREDICCION_PRECALCULO_ACTIVO="false"
+    ).splitlines()[-1])
+    print(f"   importación {medida['importacion']:.2f}s, arranque completo {medida['total']:.2f}s "
+          f"(presupuesto {PRESUPUESTO_SEGUNDOS:.1f}s)")
+
+    assert medida["estado"] == 200
+    assert medida["total"] < PRESUPUESTO_SEGUNDOS, f"arranque de {medida['total']:.2f}s"
+    assert medida["modulos"] == [], f"cargados al arrancar: {medida['modulos']}"
+    # Ni la importación ni el arranque crean tablas: eso es cosa de Alembic
+    assert not os.path.exists(ruta) or not sa.inspect(sa.create_engine(f"sqlite:///{ruta}")).get_table_names()
+
+def test_routers_y_servicios_bajo_demanda():
+    cargados = json.loads(ejecutar(
+        "import json, sys\n"
+        "from app.routes import pago_router\n"
+        "from app.services import ClienteService\n"
+        "print(json.dumps(sorted(m for m in sys.modules if m.startswith(('app.routes.', 'app.services.')))))"
+    ).splitlines()[-1])
+    assert "app.routes.pago_routes" in cargados and "app.services.cliente_service" in cargados
+    for modulo in ("app.routes.integracion_routes", "app.routes.prediccion_routes",
+                   "app.services.integracion_service", "app.services.prediccion_service"):
+        assert modulo not in cargados, f"{modulo} importado sin usarse"
+
+def test_migraciones_crean_el_esquema():
+    ruta = os.path.join(tempfile.mkdtemp(), "migraciones.db")
+    resultado = subprocess.run(
+        [sys.executable, "-m", "alembic", "-c", "alembic.sqlite.ini", "upgrade", "head"],
+        cwd=RAIZ, capture_output=True, text=True, env={**os.environ, "DATABASE_URL": f"sqlite:///{ruta}"}
+    )
+    assert resultado.returncode == 0, resultado.stderr
+
+    inspector = sa.inspect(sa.create_engine(f"sqlite:///{ruta}"))
+    faltan = set(Base.metadata.tables) - set(inspector.get_table_names())
+    assert not faltan, f"tablas sin migración: {sorted(faltan)}"
+    assert "reservas_historico" in inspector.get_view_names()
+    indices = {indice["name"] for indice in inspector.get_indexes("reservas")}
+    assert {"ix_reservas_inicio_id", "ix_reservas_recurso_estado_inicio_fin"} <= indices
@@ -0,0 +1,171 @@
+"""
+Prueba del nivel de cache compartido entre workers
+
+Simula varios workers con instancias de CacheService sobre el mismo fichero
+SQLite (y un proceso hijo real) y comprueba que un valor calculado por uno lo
+leen los demás sin recalcularlo, que las invalidaciones y el vaciado llegan a
+todos por el contador de generación, que un valor calculado antes de una
+invalidación no se comparte, que las entradas locales no salen del worker y
+que el acceso async no hace llamadas a sqlite3 desde el event loop.
+"""
+
+import asyncio
+import multiprocessing
+import os
+import tempfile
+import threading
+
+from app.services.cache_compartido import CacheCompartido
+from app.services.cache_service import CacheService
+
+def crear_workers(num=2):
+    ruta = os.path.join(tempfile.mkdtemp(), "cache_compartido.db")
+    workers = [
+        CacheService(
+            max_entries=100, max_bytes=10 ** 6, limpieza_automatica=False,
+            compartido=CacheCompartido(ruta), intervalo_sincronizacion=0
+        )
+        for _ in range(num)
+    ]
+    return ruta, workers
+
+def test_valor_calculado_una_vez_para_todos_los_workers():
+    _, (a, b) = crear_workers()
+    llamadas = []
+
+    def calcular():
+        llamadas.append(1)
+        return {"servicios": [1, 2, 3]}
+
+    assert a.get_or_compute("catalogo", calcular, 60, tags=["servicios"]) == {"servicios": [1, 2, 3]}
+    assert b.get_or_compute("catalogo", calcular, 60, tags=["servicios"]) == {"servicios": [1, 2, 3]}
+
+    assert len(llamadas) == 1
+    assert b.get_stats()["shared_hits"] == 1
+    # Ya copiado al nivel local de b: la siguiente lectura no va al fichero
+    assert b.get("catalogo") == {"servicios": [1, 2, 3]}
+    assert b.get_stats()["shared_hits"] == 1
+
+def test_invalidacion_llega_a_todos_los_workers():
+    _, (a, b) = crear_workers()
+    a.set("recursos", ["sala 1"], 60, tags=["recurso:1"])
+    assert b.get("recursos") == ["sala 1"]
+
+    a.invalidate_tags("recurso:1")
+
+    assert b.get("recursos") is None
+    assert a.get_stats()["shared"]["entries"] == 0
+    assert b.get_stats()["generation"] == 1
+
+    a.set("precios", 10, 60, servicio_id=1)
+    assert b.get("precios", servicio_id=1) == 10
+    a.invalidate("precios", servicio_id=1)
+    assert b.get("precios", servicio_id=1) is None
+
+    a.set("horarios", [9, 10], 60)
+    assert b.get("horarios") == [9, 10]
+    b.clear()
+    assert a.get("horarios") is None
+
+def test_valor_anterior_a_una_invalidacion_no_se_comparte():
+    _, (a, b) = crear_workers()
+
+    def calcular_mientras_otro_escribe():
+        # Otro worker modifica los datos e invalida durante el cálculo
+        b.invalidate_tags("reservas")
+        return "calculado con datos antiguos"
+
+    valor = a.get_or_compute("panel", calcular_mientras_otro_escribe, 60, tags=["reservas"])
+
+    assert valor == "calculado con datos antiguos"
+    assert a.get("panel") is None
+    assert b.get("panel") is None
+
+def test_entradas_locales_no_se_comparten():
+    _, (a, b) = crear_workers()
+    a.set("estado", {"buffer": [1, 2]}, 60, local=True, servicio_id=1)
+
+    assert a.get("estado", servicio_id=1) == {"buffer": [1, 2]}
+    assert b.get("estado", servicio_id=1) is None
+
+def test_eventos_llegan_una_vez_a_los_demas_workers():
+    ruta, (a, b) = crear_workers()
+    recibidos_a, recibidos_b = [], []
+    a.suscribir("reservas", recibidos_a.append)
+    b.suscribir("reservas", recibidos_b.append)
+    assert a.publicar("reservas", {"servicio_id": 1, "delta": 1})
+    assert a.publicar("reservas", {"servicio_id": 1, "delta": -1})
+
+    b.sincronizar()
+    b.sincronizar()
+    a.sincronizar()
+    assert recibidos_b == [{"servicio_id": 1, "delta": 1}, {"servicio_id": 1, "delta": -1}]
+    assert recibidos_a == [], "quien publica no recibe sus propios eventos"
+    assert CacheService(limpieza_automatica=False).publicar("reservas", {}) is False
+
+class CompartidoConHilos(CacheCompartido):
+    """Anota el hilo desde el que se lee o escribe el fichero"""
+
+    def __init__(self, ruta):
+        super().__init__(ruta)
+        self.hilos = set()
+
+    def cambios_desde(self, *args):
+        self.hilos.add(threading.get_ident())
+        return super().cambios_desde(*args)
+
+    def obtener(self, *args):
+        self.hilos.add(threading.get_ident())
+        return super().obtener(*args)
+
+    def guardar(self, *args, **kwargs):
+        self.hilos.add(threading.get_ident())
+        return super().guardar(*args, **kwargs)
+
+def test_acceso_async_fuera_del_loop():
+    compartido = CompartidoConHilos(os.path.join(tempfile.mkdtemp(), "cache.db"))
+    cache = CacheService(limpieza_automatica=False, compartido=compartido, intervalo_sincronizacion=0)
+
+    async def calcular():
+        return "valor"
+
+    async def consultar_dos_veces():
+        primera = await cache.get_or_compute_async("catalogo", calcular, 60)
+        cache._cache.clear()
+        segunda = await cache.get_or_compute_async("catalogo", calcular, 60)
+        return primera, segunda, threading.get_ident()
+
+    primera, segunda, hilo_loop = asyncio.run(consultar_dos_veces())
+    assert primera == segunda == "valor"
+    assert compartido.hilos and hilo_loop not in compartido.hilos
+
+def test_purga_del_registro_vacia_workers_atrasados():
+    ruta, (a, b) = crear_workers()
+    b.set("estado", [1], 60, local=True)
+    almacen = CacheCompartido(ruta, retencion_invalidaciones=-1)
+    a.invalidate_tags("otro")
+    almacen.purgar()
+
+    # b no vio la invalidación antes de que se purgara su registro: vacía su nivel local
+    generacion, tags = almacen.cambios_desde(0)
+    assert tags == {"*"}
+    assert b.get("estado") is None
+
+def _worker_hijo(ruta, cola):
+    cache = CacheService(limpieza_automatica=False, compartido=CacheCompartido(ruta), intervalo_sincronizacion=0)
+    cola.put(cache.get_or_compute("catalogo", lambda: "calculado en el hijo", 60, tags=["servicios"]))
+    cache.invalidate_tags("recurso:1")
+
+def test_entre_procesos():
+    ruta, (padre,) = crear_workers(1)
+    padre.set("catalogo", "calculado en el padre", 60, tags=["servicios"])
+    padre.set("recursos", ["sala 1"], 60, tags=["recurso:1"])
+
+    contexto = multiprocessing.get_context("spawn")
+    cola = contexto.Queue()
+    hijo = contexto.Process(target=_worker_hijo, args=(ruta, cola))
+    hijo.start()
+    hijo.join(30)
+
+    assert cola.get(timeout=5) == "calculado en el padre"
+    assert padre.get("recursos") is None
@@ -0,0 +1,107 @@
+"""
+Prueba de las lecturas cacheadas de los endpoints más consultados
+
+Con un TestClient sobre una base SQLite temporal comprueba que la segunda
+lectura de /servicios/, /recursos/, /recursos/disponibles,
+/horarios/semana/{id}, /api/precios/servicio/{id} y las disponibilidades no
+ejecuta SQL, que cada escritura correspondiente (también activar o desactivar
+un recurso) invalida la lectura y que el ratio de aciertos se informa por
+endpoint.
+"""
+
+from datetime import datetime, timedelta
+
+from app.models import HorarioRecurso
+from app.services.cache_service import cache_service
+
+def leer_dos_veces(contar_consultas, engines, cliente, url, **kwargs):
+    """Primera y segunda lectura; la segunda no debe consultar la base de datos"""
+    primera = cliente.get(url, **kwargs)
+    contador = contar_consultas(*engines)
+    segunda = cliente.get(url, **kwargs)
+    assert primera.status_code == segunda.status_code == 200, primera.text
+    assert contador.total == 0, f"{url}: {contador.total} consultas en una lectura cacheada"
+    assert primera.json() == segunda.json()
+    return segunda.json()
+
+def test_catalogo_de_servicios_y_recursos(crear_cliente_cache, contar_consultas):
+    engines, db, cliente = crear_cliente_cache()
+
+    servicios = leer_dos_veces(contar_consultas, engines, cliente, "/servicios/")
+    assert [s["nombre"] for s in servicios] == ["Consulta", "Sin historial"]
+    cliente.post("/servicios/", json={"nombre": "Masaje", "duracion_minutos": 30, "precio_base": 40.0})
+    assert [s["nombre"] for s in cliente.get("/servicios/").json()][-1] == "Masaje"
+    cliente.put("/servicios/3", json={"nombre": "Masaje largo"})
+    assert cliente.get("/servicios/").json()[-1]["nombre"] == "Masaje largo"
+
+    assert len(leer_dos_veces(contar_consultas, engines, cliente, "/recursos/disponibles")) == 1
+    leer_dos_veces(contar_consultas, engines, cliente, "/recursos/")
+    cliente.put("/recursos/1/toggle-disponibilidad")
+    assert cliente.get("/recursos/disponibles").json() == []
+    assert cliente.get("/recursos/").json()[0]["disponible"] is False
+
+def test_horario_semanal(crear_cliente_cache, contar_consultas):
+    engines, db, cliente = crear_cliente_cache()
+    db.add(HorarioRecurso(id=1, recurso_id=1, dia_semana=0, hora_inicio="09:00", hora_fin="14:00", created_at="09:00:00"))
+    db.commit()
+
+    semana = leer_dos_veces(contar_consultas, engines, cliente, "/horarios/semana/1")
+    assert semana["horarios_semana"]["Lunes"][0]["hora_inicio"] == "09:00"
+
+    cliente.delete("/horarios/1")
+    assert cliente.get("/horarios/semana/1").json()["horarios_semana"]["Lunes"] == []
+
+def test_precios_de_servicio(crear_cliente_cache, contar_consultas):
+    engines, db, cliente = crear_cliente_cache()
+    precio = {"servicio_id": 1, "tipo_precio": "base", "nombre": "Tarifa", "precio_base": 50.0}
+
+    assert leer_dos_veces(contar_consultas, engines, cliente, "/api/precios/servicio/1") == []
+    creado = cliente.post("/api/precios/", json=precio)
+    assert creado.status_code == 201, creado.text
+    assert [p["nombre"] for p in leer_dos_veces(contar_consultas, engines, cliente, "/api/precios/servicio/1")] == ["Tarifa"]
+
+    cliente.post(f"/api/precios/{creado.json()['id']}/desactivar")
+    assert cliente.get("/api/precios/servicio/1").json() == []
+
+def test_disponibilidad_y_ratio_por_endpoint(crear_cliente_cache, contar_consultas):
+    engines, db, cliente = crear_cliente_cache()
+    cache_service._por_prefijo.clear()
+    manana = (datetime.now() + timedelta(days=1)).replace(hour=0, minute=0, second=0, microsecond=0)
+    fecha = manana.strftime("%Y-%m-%d")
+    db.add(HorarioRecurso(id=1, recurso_id=1, dia_semana=manana.weekday(), hora_inicio="09:00", hora_fin="12:00", created_at="09:00:00"))
+    db.commit()
+
+    servicio = leer_dos_veces(contar_consultas, engines, cliente, "/reservas/disponibilidad", params={"servicio_id": 1, "fecha": fecha})
+    recurso = leer_dos_veces(contar_consultas, engines, cliente, "/horarios/disponibilidad/1", params={"fecha": fecha, "servicio_id": 1})
+    assert all(h["disponible"] for h in servicio["horarios_disponibles"])
+    assert recurso["slots_disponibles_count"] == recurso["total_slots"]
+
+    inicio = manana.replace(hour=9)
+    creada = cliente.post("/reservas/", json={
+        "cliente_id": 1, "servicio_id": 1, "recurso_id": 1,
+        "fecha_hora_inicio": inicio.isoformat(), "fecha_hora_fin": (inicio + timedelta(hours=1)).isoformat()
+    })
+    assert creada.status_code == 200, creada.text
+
+    servicio = cliente.get("/reservas/disponibilidad", params={"servicio_id": 1, "fecha": fecha}).json()
+    recurso = cliente.get("/horarios/disponibilidad/1", params={"fecha": fecha, "servicio_id": 1}).json()
+    assert servicio["horarios_disponibles"][0]["disponible"] is False
+    # Slots cada 30 minutos de un servicio de 60: la reserva de 9 a 10 ocupa los de 9:00 y 9:30
+    assert recurso["slots_disponibles_count"] == recurso["total_slots"] - 2
+
+    estadisticas = cache_service.get_stats_por_prefijo()
+    assert estadisticas["reservas_disponibilidad"] == {"hits": 1, "stale_hits": 0, "misses": 2, "hit_ratio": 0.3333}
+    assert estadisticas["horarios_disponibilidad"]["hits"] == 1
+
+def test_disponibilidad_sigue_a_los_recursos(crear_cliente_cache, contar_consultas):
+    engines, db, cliente = crear_cliente_cache()
+    fecha = (datetime.now() + timedelta(days=1)).strftime("%Y-%m-%d")
+    url, params = "/reservas/disponibilidad", {"servicio_id": 1, "fecha": fecha}
+    assert all(h["disponible"] for h in leer_dos_veces(contar_consultas, engines, cliente, url, params=params)["horarios_disponibles"])
+
+    # Sin recursos disponibles no queda ningún horario libre
+    assert cliente.put("/recursos/1/toggle-disponibilidad").json()["disponible"] is False
+    assert not any(h["disponible"] for h in leer_dos_veces(contar_consultas, engines, cliente, url, params=params)["horarios_disponibles"])
+
+    assert cliente.put("/recursos/1/toggle-disponibilidad").json()["disponible"] is True
+    assert all(h["disponible"] for h in cliente.get(url, params=params).json()["horarios_disponibles"])
@@ -0,0 +1,85 @@
+"""
+Prueba del cache en memoria acotado
+
+Comprueba la expulsión LRU por número de entradas y por presupuesto de bytes,
+la caducidad incremental con el heap de expiraciones (con un reloj simulado)
+y que las estadísticas se mantienen con contadores.
+"""
+
+from app.services.cache_service import CacheService, estimar_tamano
+
+class RelojSimulado:
+    def __init__(self):
+        self.ahora = 1000.0
+
+    def __call__(self):
+        return self.ahora
+
+def crear_cache(**kwargs):
+    return CacheService(limpieza_automatica=False, **kwargs)
+
+def test_lru_por_numero_de_entradas():
+    cache = crear_cache(max_entries=3, max_bytes=10 ** 6)
+    for i in range(3):
+        cache.set("k", i, i=i)
+
+    cache.get("k", i=0)  # la 0 pasa a ser la más reciente
+    cache.set("k", 3, i=3)
+
+    assert cache.get("k", i=1) is None
+    assert [cache.get("k", i=i) for i in (0, 2, 3)] == [0, 2, 3]
+    assert cache.get_stats()["evictions"] == 1
+
+def test_presupuesto_de_bytes():
+    valor = "x" * 1000
+    tamano = estimar_tamano(valor)
+    cache = crear_cache(max_entries=100, max_bytes=tamano * 3)
+    for i in range(5):
+        cache.set("grande", valor, i=i)
+
+    stats = cache.get_stats()
+    assert stats["total_entries"] == 3
+    assert stats["estimated_memory_bytes"] == tamano * 3
+    assert cache.get("grande", i=0) is None and cache.get("grande", i=4) == valor
+
+    # Un valor mayor que todo el presupuesto no se cachea ni expulsa nada
+    cache.set("enorme", "y" * 10000)
+    assert cache.get("enorme") is None
+    assert cache.get_stats()["total_entries"] == 3
+
+def test_caducidad_incremental():
+    reloj = RelojSimulado()
+    cache = crear_cache(max_entries=100, max_bytes=10 ** 6, reloj=reloj)
+    cache.set("corta", 1, 10)
+    cache.set("larga", 2, 100)
+    cache.set("corta", 3, 50)  # reemplazo: su primera expiración ya no aplica
+
+    reloj.ahora += 20
+    assert cache._cleanup_expired() == 0
+    assert cache.get("corta") == 3
+
+    reloj.ahora += 40
+    assert cache._cleanup_expired() == 1
+    assert cache.get("corta") is None and cache.get("larga") == 2
+
+    reloj.ahora += 100
+    assert cache.get("larga") is None
+    assert cache.get_stats()["expirations"] == 2
+
+def test_estadisticas_y_get_or_set():
+    cache = crear_cache(max_entries=10, max_bytes=10 ** 6)
+    llamadas = []
+
+    def calcular():
+        llamadas.append(1)
+        return {"total": 42}
+
+    assert cache.get_or_set("calculo", calcular, 60, id=1) == {"total": 42}
+    assert cache.get_or_set("calculo", calcular, 60, id=1) == {"total": 42}
+    cache.invalidate("calculo", id=1)
+
+    stats = cache.get_stats()
+    assert len(llamadas) == 1
+    assert (stats["hits"], stats["misses"]) == (1, 1)
+    assert stats["hit_ratio"] == 0.5
+    assert stats["total_entries"] == 0 and stats["estimated_memory_bytes"] == 0
@@ -0,0 +1,125 @@
+"""
+Prueba del single-flight del cache
+
+Comprueba que una ráfaga de 500 llamadas idénticas (hilos o corrutinas)
+calcula el valor una sola vez, que los errores llegan a todas las llamadas en
+espera sin cachearse y que la clave de CacheDecorator incluye todos los
+argumentos que afectan al resultado.
+"""
+
+import asyncio
+import threading
+import time
+from datetime import date
+
+from sqlalchemy.orm import Session
+
+from app.schemas.precio import FiltroPrecios
+from app.services.cache_service import CacheDecorator, cache_service
+
+RAFAGA = 500
+
+def test_rafaga_sincrona_calcula_una_vez():
+    cache_service.clear()
+    llamadas = []
+
+    @CacheDecorator("panel_sync", 60)
+    def panel(fecha_inicio: str, fecha_fin: str):
+        llamadas.append(1)
+        time.sleep(0.2)
+        return {"total": 42}
+
+    salida = threading.Barrier(RAFAGA)
+    resultados = []
+
+    def peticion():
+        salida.wait()
+        resultados.append(panel("2025-01-01", "2025-01-31"))
+
+    hilos = [threading.Thread(target=peticion) for _ in range(RAFAGA)]
+    for hilo in hilos:
+        hilo.start()
+    for hilo in hilos:
+        hilo.join()
+
+    assert len(llamadas) == 1
+    assert resultados == [{"total": 42}] * RAFAGA
+    assert cache_service.get_stats()["in_flight"] == 0
+
+def test_rafaga_async_calcula_una_vez():
+    cache_service.clear()
+    llamadas = []
+
+    @CacheDecorator("panel_async", 60)
+    async def panel(fecha_inicio: str, fecha_fin: str):
+        llamadas.append(1)
+        await asyncio.sleep(0.1)
+        return {"total": 7}
+
+    async def rafaga():
+        return await asyncio.gather(*(panel("2025-01-01", "2025-01-31") for _ in range(RAFAGA)))
+
+    resultados = asyncio.run(rafaga())
+
+    assert len(llamadas) == 1
+    assert resultados == [{"total": 7}] * RAFAGA
+
+def test_error_llega_a_todos_y_no_se_cachea():
+    cache_service.clear()
+    llamadas = []
+
+    @CacheDecorator("falla", 60)
+    def calcular(x: int):
+        llamadas.append(1)
+        time.sleep(0.1)
+        raise ValueError("sin datos")
+
+    errores = []
+
+    def peticion():
+        try:
+            calcular(1)
+        except ValueError as e:
+            errores.append(str(e))
+
+    hilos = [threading.Thread(target=peticion) for _ in range(20)]
+    for hilo in hilos:
+        hilo.start()
+    for hilo in hilos:
+        hilo.join()
+
+    assert errores == ["sin datos"] * 20
+    assert len(llamadas) == 1
+    try:
+        calcular(1)
+    except ValueError:
+        pass
+    assert len(llamadas) == 2
+
+def test_clave_incluye_todos_los_argumentos():
+    cache_service.clear()
+    llamadas = []
+
+    @CacheDecorator("listado", 60)
+    def listar(db: Session, desde: date, filtros: FiltroPrecios, limite: int = 10):
+        llamadas.append((desde, filtros.servicio_id, limite))
+        return len(llamadas)
+
+    sesion = Session()
+    assert listar(sesion, date(2025, 1, 1), FiltroPrecios(servicio_id=1)) == 1
+    # Misma llamada con otra sesión y el valor por defecto explícito: acierto
+    assert listar(Session(), date(2025, 1, 1), FiltroPrecios(servicio_id=1), limite=10) == 1
+    # Cambia un argumento no primitivo: fallo
+    assert listar(sesion, date(2025, 1, 2), FiltroPrecios(servicio_id=1)) == 2
+    assert listar(sesion, date(2025, 1, 1), FiltroPrecios(servicio_id=2)) == 3
+    assert listar(sesion, date(2025, 1, 1), FiltroPrecios(servicio_id=1), 20) == 4
+
+    @CacheDecorator("opaco", 60)
+    def opaco(objeto):
+        return 1
+
+    try:
+        opaco(object())
+        assert False, "un argumento sin representación estable debe fallar"
+    except TypeError:
+        pass
@@ -0,0 +1,162 @@
+"""
+Prueba del modo stale-while-revalidate del cache
+
+Con un reloj simulado comprueba que una entrada vencida se sirve al momento
+dentro de su ventana de obsolescencia mientras un único refresco en segundo
+plano la recalcula, que fuera de la ventana vuelve a ser un fallo, que la
+invalidación no deja servir datos obsoletos y que el refresco del decorador
+usa una sesión propia en lugar de la de la petición.
+"""
+
+import asyncio
+import threading
+import time
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import Session, sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from app.services.cache_service import CacheService, CacheDecorator, cache_service
+
+class RelojSimulado:
+    def __init__(self):
+        self.ahora = 1000.0
+
+    def __call__(self):
+        return self.ahora
+
+def crear_cache(reloj):
+    return CacheService(max_entries=100, max_bytes=10 ** 6, reloj=reloj, limpieza_automatica=False)
+
+def esperar_refrescos(cache, limite=2.0):
+    fin = time.monotonic() + limite
+    while cache.get_stats()["in_flight"] and time.monotonic() < fin:
+        time.sleep(0.01)
+
+def test_sirve_obsoleto_y_refresca_una_vez():
+    reloj = RelojSimulado()
+    cache = crear_cache(reloj)
+    version = [1]
+    llamadas = []
+    puede_terminar = threading.Event()
+
+    def calcular():
+        llamadas.append(1)
+        if len(llamadas) > 1:
+            puede_terminar.wait(2)
+        return {"version": version[0]}
+
+    assert cache.get_or_compute("panel", calcular, 60, max_stale_seconds=300) == {"version": 1}
+
+    version[0] = 2
+    reloj.ahora += 61
+    # 50 lecturas tras el TTL: todas reciben el valor anterior sin esperar
+    resultados = [cache.get_or_compute("panel", calcular, 60, max_stale_seconds=300) for _ in range(50)]
+    assert resultados == [{"version": 1}] * 50
+
+    puede_terminar.set()
+    esperar_refrescos(cache)
+    assert len(llamadas) == 2
+    assert cache.get_or_compute("panel", calcular, 60, max_stale_seconds=300) == {"version": 2}
+
+    stats = cache.get_stats()
+    assert stats["stale_hits"] == 50
+    assert stats["refreshes"] == 1
+    assert stats["hits"] == 1 and stats["misses"] == 1
+
+def test_fuera_de_la_ventana_recalcula_en_linea():
+    reloj = RelojSimulado()
+    cache = crear_cache(reloj)
+    cache.set("panel", "viejo", 60, max_stale_seconds=300)
+
+    reloj.ahora += 61
+    # Una lectura normal no devuelve valores obsoletos, pero no los borra
+    assert cache.get("panel") is None
+    assert cache._cleanup_expired() == 0
+    assert cache.get_entry_info("panel")["is_stale"]
+
+    reloj.ahora += 300
+    assert cache._cleanup_expired() == 1
+    assert cache.get_or_compute("panel", lambda: "nuevo", 60, max_stale_seconds=300) == "nuevo"
+    assert cache.get_stats()["stale_hits"] == 0
+
+def test_invalidacion_no_sirve_obsoletos():
+    reloj = RelojSimulado()
+    cache = crear_cache(reloj)
+    cache.set("panel", "viejo", 60, tags=["reservas"], max_stale_seconds=300)
+    reloj.ahora += 61
+
+    cache.invalidate_tags("reservas")
+
+    assert cache.get_or_compute("panel", lambda: "nuevo", 60, max_stale_seconds=300) == "nuevo"
+
+def test_error_de_refresco_mantiene_el_valor():
+    reloj = RelojSimulado()
+    cache = crear_cache(reloj)
+    cache.set("panel", "viejo", 60, max_stale_seconds=300)
+    reloj.ahora += 61
+
+    def fallar():
+        raise RuntimeError("base de datos caída")
+
+    assert cache.get_or_compute("panel", fallar, 60, max_stale_seconds=300) == "viejo"
+    esperar_refrescos(cache)
+    assert cache.get_or_compute("panel", fallar, 60, max_stale_seconds=300) == "viejo"
+    esperar_refrescos(cache)
+
+    stats = cache.get_stats()
+    assert stats["refresh_errors"] == 2
+    assert stats["stale_hits"] == 2
+
+def test_refresco_async_en_segundo_plano():
+    reloj = RelojSimulado()
+    cache = crear_cache(reloj)
+    llamadas = []
+
+    async def calcular():
+        llamadas.append(1)
+        await asyncio.sleep(0.05)
+        return len(llamadas)
+
+    async def escenario():
+        assert await cache.get_or_compute_async("panel", calcular, 60, max_stale_seconds=300) == 1
+        reloj.ahora += 61
+        obsoletos = await asyncio.gather(*(
+            cache.get_or_compute_async("panel", calcular, 60, max_stale_seconds=300) for _ in range(20)
+        ))
+        await asyncio.sleep(0.2)
+        return obsoletos, await cache.get_or_compute_async("panel", calcular, 60, max_stale_seconds=300)
+
+    obsoletos, refrescado = asyncio.run(escenario())
+
+    assert obsoletos == [1] * 20
+    assert refrescado == 2
+    assert len(llamadas) == 2
+
+def test_decorador_refresca_con_sesion_propia():
+    engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    fabrica = sessionmaker(bind=engine)
+    sesiones_usadas = []
+    reloj_original = cache_service._reloj
+    reloj = RelojSimulado()
+    cache_service._reloj = reloj
+    try:
+        cache_service.clear()
+
+        @CacheDecorator("panel_swr", 60, max_stale_seconds=300, session_factory=fabrica)
+        def panel(db: Session, fecha: str):
+            sesiones_usadas.append(db)
+            return len(sesiones_usadas)
+
+        peticion = fabrica()
+        assert panel(peticion, "2025-01-01") == 1
+        reloj.ahora += 61
+        assert panel(peticion, "2025-01-01") == 1
+        esperar_refrescos(cache_service)
+
+        assert panel(peticion, "2025-01-01") == 2
+        assert sesiones_usadas[0] is peticion
+        assert sesiones_usadas[1] is not peticion
+    finally:
+        cache_service._reloj = reloj_original
+        cache_service.clear()
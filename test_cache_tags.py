@@ -0,0 +1,151 @@
+"""
+Prueba de la invalidación por tags del cache
+
+Comprueba que las entradas se invalidan por tag y por prefijo, que el índice
+de tags se mantiene al reemplazar, expulsar o invalidar entradas y que las
+mutaciones de reservas, precios y horarios invalidan exactamente las entradas
+que dependen de ellas (las estadísticas de un periodo, solo si la reserva cae
+dentro), también si llegan mientras se calcula el valor.
+"""
+
+import asyncio
+import time
+from datetime import datetime, timedelta
+
+from app.models import Recurso, HorarioRecurso
+from app.schemas.precio import PrecioCreate, TipoPrecioEnum
+from app.schemas.reserva import ReservaCreate
+from app.services.cache_service import (
+    CacheService, cache_estadisticas_periodo, cache_service, invalidar_por_reserva, tag_recurso, tag_servicio,
+    tag_fecha, TAG_RESERVAS, TAG_PRECIOS
+)
+from app.services.horario_service import HorarioService
+from app.services.precio_service import PrecioService
+from app.services.reserva_service import ReservaService
+
+def test_invalidacion_por_tag_y_prefijo():
+    cache = CacheService(max_entries=100, max_bytes=10 ** 6, limpieza_automatica=False)
+    cache.set("disponibilidad", "r1", tags=[tag_recurso(1), tag_fecha("2025-06-01")], recurso_id=1)
+    cache.set("disponibilidad", "r2", tags=[tag_recurso(2), tag_fecha("2025-06-01")], recurso_id=2)
+    cache.set("catalogo", "servicios")
+
+    assert cache.invalidate_tags(tag_recurso(1)) == 1
+    assert cache.get("disponibilidad", recurso_id=2) == "r2"
+    assert cache.invalidate_tags(tag_fecha(datetime(2025, 6, 1, 10, 30))) == 1
+    # El prefijo también funciona aunque las claves sean hashes
+    assert cache.invalidate_pattern("catalogo") == 1
+    assert cache.get_stats()["total_entries"] == 0
+    assert cache.get_stats()["tags_count"] == 0
+
+def test_indice_de_tags_tras_reemplazo_y_expulsion():
+    cache = CacheService(max_entries=2, max_bytes=10 ** 6, limpieza_automatica=False)
+    cache.set("a", 1, tags=["viejo"])
+    cache.set("a", 2, tags=["nuevo"])  # reemplazo: el tag anterior ya no aplica
+
+    assert cache.invalidate_tags("viejo") == 0
+    cache.set("b", 3, tags=["nuevo"])
+    cache.set("c", 4, tags=["nuevo"])  # expulsa "a"
+
+    assert cache.invalidate_tags("nuevo") == 2
+    assert cache.get_stats()["tags_count"] == 0
+
+def test_invalidacion_durante_el_calculo_no_se_pierde():
+    cache = CacheService(max_entries=100, max_bytes=10 ** 6, limpieza_automatica=False)
+
+    def calcular():
+        # Una escritura invalida el recurso mientras se lee el valor anterior
+        cache.invalidate_tags(tag_recurso(1))
+        return "viejo"
+
+    assert cache.get_or_compute("disponibilidad", calcular, 60, tags=[tag_recurso(1)], recurso_id=1) == "viejo"
+    assert cache.get_or_compute("disponibilidad", lambda: "nuevo", 60, tags=[tag_recurso(1)], recurso_id=1) == "nuevo"
+
+    # Un tag ajeno no descarta el cálculo
+    def calcular_con_otra_escritura():
+        cache.invalidate_tags(tag_recurso(2))
+        return "sala 3"
+
+    cache.get_or_compute("disponibilidad", calcular_con_otra_escritura, 60, tags=[tag_recurso(3)], recurso_id=3)
+    assert cache.get("disponibilidad", recurso_id=3) == "sala 3"
+
+    # Versión async, invalidando la propia clave
+    async def calcular_async():
+        cache.invalidate("disponibilidad", recurso_id=4)
+        return "viejo"
+
+    assert asyncio.run(cache.get_or_compute_async("disponibilidad", calcular_async, 60, recurso_id=4)) == "viejo"
+    assert cache.get("disponibilidad", recurso_id=4) is None
+
+def test_invalidacion_durante_el_refresco_no_se_pierde():
+    ahora = [1000.0]
+    cache = CacheService(max_entries=100, max_bytes=10 ** 6, reloj=lambda: ahora[0], limpieza_automatica=False)
+    cache.get_or_compute("estadisticas", lambda: "v1", 60, tags=[TAG_RESERVAS], max_stale_seconds=600)
+    ahora[0] += 120
+
+    def refrescar():
+        cache.invalidate_tags(TAG_RESERVAS)
+        return "viejo"
+
+    # Se sirve el valor obsoleto; el refresco en segundo plano no debe guardarse
+    assert cache.get_or_compute(
+        "estadisticas", lambda: "v2", 60, tags=[TAG_RESERVAS], max_stale_seconds=600, refrescar=refrescar
+    ) == "v1"
+    while cache.get_stats()["in_flight"]:
+        time.sleep(0.01)
+    assert cache.get("estadisticas") is None
+    assert cache.get_stats()["refresh_errors"] == 0
+
+def test_estadisticas_invalidadas_solo_por_reservas_del_periodo():
+    calculos = []
+
+    @cache_estadisticas_periodo
+    def estadisticas(fecha_inicio: str, fecha_fin: str):
+        calculos.append((fecha_inicio, fecha_fin))
+        return len(calculos)
+
+    cache_service.clear()
+    try:
+        assert estadisticas("2025-06-01", "2025-06-30") == 1
+        invalidar_por_reserva(1, 1, "2025-07-02")
+        assert estadisticas("2025-06-01", "2025-06-30") == 1, "reserva fuera del periodo"
+        invalidar_por_reserva(1, 1, "2025-05-31 22:00:00", "2025-06-01 01:00:00")
+        assert estadisticas("2025-06-01", "2025-06-30") == 2
+
+        # Un periodo de varios años no genera un tag por día
+        assert estadisticas("2020-01-01", "2025-12-31") == 3
+        invalidar_por_reserva(1, 1, "2019-03-01")
+        assert estadisticas("2020-01-01", "2025-12-31") == 4
+        assert estadisticas("2025-13-01", "2025-06-30") == 5
+    finally:
+        cache_service.clear()
+
+def test_mutaciones_invalidan_dependientes(crear_base):
+    engine, db = crear_base()
+    db.add(Recurso(id=2, nombre="Sala 2", tipo="sala"))
+    db.commit()
+    manana = (datetime.now() + timedelta(days=1)).replace(hour=12, minute=0, second=0, microsecond=0)
+
+    cache_service.set("disponibilidad", "sala 1", tags=[tag_recurso(1), tag_fecha(manana)], recurso_id=1)
+    cache_service.set("disponibilidad", "sala 2", tags=[tag_recurso(2)], recurso_id=2)
+    cache_service.set("estadisticas", "todas", tags=[TAG_RESERVAS])
+    cache_service.set("precios", "servicio 2", tags=[tag_servicio(2)], servicio_id=2)
+    cache_service.set("tarifas", "todas", tags=[TAG_PRECIOS])
+
+    ReservaService.create_reserva(db, ReservaCreate(
+        cliente_id=1, servicio_id=1, recurso_id=1,
+        fecha_hora_inicio=manana, fecha_hora_fin=manana + timedelta(hours=1)
+    ))
+    assert cache_service.get("disponibilidad", recurso_id=1) is None
+    assert cache_service.get("estadisticas") is None
+    assert cache_service.get("disponibilidad", recurso_id=2) == "sala 2"
+    assert cache_service.get("precios", servicio_id=2) == "servicio 2"
+
+    PrecioService.create_precio(db, PrecioCreate(servicio_id=2, tipo_precio=TipoPrecioEnum.BASE, nombre="Base", precio_base=30.0))
+    assert cache_service.get("precios", servicio_id=2) is None
+    assert cache_service.get("tarifas") is None
+    assert cache_service.get("disponibilidad", recurso_id=2) == "sala 2"
+
+    db.add(HorarioRecurso(id=1, recurso_id=2, dia_semana=0, hora_inicio="09:00", hora_fin="14:00", created_at="09:00:00"))
+    db.commit()
+    HorarioService.delete_horario(db, 1)
+    assert cache_service.get("disponibilidad", recurso_id=2) is None
@@ -0,0 +1,161 @@
+"""
+Prueba de la compresión de respuestas y de la cache de los ficheros estáticos
+
+Comprueba que las respuestas de texto grandes se comprimen según
+Accept-Encoding (y las pequeñas o binarias no), también en streaming; que los
+estáticos se sirven con URL versionada e inmutable, que una huella antigua no
+se cachea, que las variantes .gz se envían sin volver a comprimirse y que el
+cliente web enlaza las URLs versionadas y responde 304 a su ETag.
+"""
+
+import gzip
+import os
+import tempfile
+import time
+
+from fastapi import FastAPI
+from fastapi.responses import Response, StreamingResponse
+from fastapi.testclient import TestClient
+
+from app.compresion import CompresionMiddleware, elegir_codificacion, importar_brotli
+from app.estaticos import CACHE_INMUTABLE, EstaticosVersionados
+
+LISTADO = [{"id": i, "estado": "confirmada", "fecha_hora_inicio": "2030-01-07T09:00:00"} for i in range(500)]
+
+def crear_cliente(directorio=None):
+    app = FastAPI()
+    app.add_middleware(CompresionMiddleware, minimo_bytes=1024)
+
+    @app.get("/listado")
+    def listado():
+        return LISTADO
+
+    @app.get("/pequena")
+    def pequena():
+        return {"ok": True}
+
+    @app.get("/binario")
+    def binario():
+        return Response(b"\x89PNG" + bytes(4096), media_type="image/png")
+
+    @app.get("/streaming")
+    def streaming():
+        return StreamingResponse((f"linea {i}\n" * 50 for i in range(20)), media_type="text/plain")
+
+    estaticos = None
+    if directorio:
+        estaticos = EstaticosVersionados(directory=directorio)
+        app.mount("/static", estaticos, name="static")
+    return TestClient(app), estaticos
+
+def test_comprime_respuestas_grandes():
+    cliente, _ = crear_cliente()
+    respuesta = cliente.get("/listado", headers={"Accept-Encoding": "gzip"})
+    assert respuesta.headers["content-encoding"] == "gzip"
+    assert "Accept-Encoding" in respuesta.headers["vary"]
+    assert respuesta.json() == LISTADO
+    assert int(respuesta.headers["content-length"]) * 5 < len(respuesta.content)
+
+    sin_compresion = cliente.get("/listado", headers={"Accept-Encoding": "identity"})
+    assert "content-encoding" not in sin_compresion.headers
+    assert sin_compresion.json() == LISTADO
+
+def test_no_comprime_pequenas_ni_binarias():
+    cliente, _ = crear_cliente()
+    pequena = cliente.get("/pequena", headers={"Accept-Encoding": "gzip"})
+    assert "content-encoding" not in pequena.headers and pequena.json() == {"ok": True}
+    binario = cliente.get("/binario", headers={"Accept-Encoding": "gzip"})
+    assert "content-encoding" not in binario.headers and len(binario.content) == 4100
+
+def test_comprime_en_streaming():
+    cliente, _ = crear_cliente()
+    respuesta = cliente.get("/streaming", headers={"Accept-Encoding": "gzip"})
+    assert respuesta.headers["content-encoding"] == "gzip"
+    assert "content-length" not in respuesta.headers
+    assert respuesta.text == "".join(f"linea {i}\n" * 50 for i in range(20))
+
+def test_negociacion_de_codificacion():
+    assert elegir_codificacion("gzip, deflate, br", brotli_disponible=True) == "br"
+    assert elegir_codificacion("gzip, deflate, br", brotli_disponible=False) == "gzip"
+    assert elegir_codificacion("br;q=0, gzip;q=0.5", brotli_disponible=True) == "gzip"
+    assert elegir_codificacion("gzip;q=0", brotli_disponible=False) is None
+    assert elegir_codificacion("*", brotli_disponible=False) == "gzip"
+    assert elegir_codificacion("", brotli_disponible=True) is None
+
+    cliente, _ = crear_cliente()
+    respuesta = cliente.get("/listado", headers={"Accept-Encoding": "br"})
+    esperada = "br" if importar_brotli() else None
+    assert respuesta.headers.get("content-encoding") == esperada
+
+def crear_estaticos():
+    directorio = tempfile.mkdtemp()
+    with open(os.path.join(directorio, "app.js"), "w") as fichero:
+        fichero.write("console.log('reservas');\n" * 400)
+    with open(os.path.join(directorio, "styles.css"), "w") as fichero:
+        fichero.write("body { margin: 0; }\n" * 400)
+    return directorio
+
+def test_url_versionada_inmutable():
+    cliente, estaticos = crear_cliente(crear_estaticos())
+    url = estaticos.url("app.js")
+    assert url.startswith("/static/app.") and url.endswith(".js") and url != "/static/app.js"
+
+    versionada = cliente.get(url)
+    assert versionada.status_code == 200
+    assert versionada.headers["cache-control"] == CACHE_INMUTABLE
+    normal = cliente.get("/static/app.js")
+    assert normal.headers["cache-control"] == "no-cache"
+    assert normal.content == versionada.content
+
+    # Huella de un despliegue anterior: contenido actual, sin cache largo
+    antigua = cliente.get("/static/app.000000000000.js")
+    assert antigua.status_code == 200 and antigua.headers["cache-control"] == "no-cache"
+    assert cliente.get("/static/otro.000000000000.js").status_code == 404
+
+    # La huella cambia con el contenido
+    with open(os.path.join(estaticos.directory, "app.js"), "a") as fichero:
+        fichero.write("// cambio\n")
+    estaticos.actualizar()
+    assert estaticos.url("app.js") != url
+
+def test_variantes_precomprimidas():
+    directorio = crear_estaticos()
+    ruta = os.path.join(directorio, "app.js")
+    with open(ruta, "rb") as fichero:
+        original = fichero.read()
+    # Contenido distinto al original para distinguir que se sirve la variante
+    with open(ruta + ".gz", "wb") as fichero:
+        fichero.write(gzip.compress(original + b"// precomprimido\n"))
+    cliente, estaticos = crear_cliente(directorio)
+
+    respuesta = cliente.get(estaticos.url("app.js"), headers={"Accept-Encoding": "gzip"})
+    assert respuesta.headers["content-encoding"] == "gzip"
+    assert respuesta.headers["content-type"].startswith("text/javascript")
+    assert respuesta.headers["cache-control"] == CACHE_INMUTABLE
+    assert respuesta.content.endswith(b"// precomprimido\n")
+
+    sin_gzip = cliente.get(estaticos.url("app.js"), headers={"Accept-Encoding": "identity"})
+    assert sin_gzip.content == original
+
+    # Una variante más antigua que el original se ignora
+    time.sleep(0.01)
+    with open(ruta, "ab") as fichero:
+        fichero.write(b"// nuevo\n")
+    estaticos.actualizar()
+    respuesta = cliente.get(estaticos.url("app.js"), headers={"Accept-Encoding": "gzip"})
+    assert respuesta.content.endswith(b"// nuevo\n")
+
+def test_cliente_web_enlaza_estaticos_versionados():
+    from app import main_sqlite
+
+    cliente = TestClient(main_sqlite.app)
+    pagina = cliente.get("/cliente-web")
+    assert pagina.status_code == 200
+    assert pagina.headers["cache-control"] == "no-cache"
+    url = main_sqlite.estaticos.url("app.js")
+    assert f'src="{url}"' in pagina.text and 'src="/static/app.js"' not in pagina.text
+
+    assert cliente.get("/cliente-web", headers={"If-None-Match": pagina.headers["ETag"]}).status_code == 304
+    script = cliente.get(url)
+    assert script.headers["cache-control"] == CACHE_INMUTABLE
+    assert script.headers["content-encoding"] in ("gzip", "br")
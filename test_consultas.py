@@ -0,0 +1,141 @@
+"""
+Prueba del contador de consultas por petición y del detector de N+1
+
+Comprueba que ConsultasMiddleware cuenta las sentencias SQL de cada petición
+(manejadores `def` en el threadpool y `async def` con AsyncSession) y las
+expone en X-DB-Queries/X-DB-Time-Ms solo si se activan las cabeceras, que
+registra un aviso cuando una petición supera el presupuesto o repite una
+sentencia en un bucle (N+1), que las consultas de otros hilos no cuentan y
+que la fixture max_consultas falla con el resumen de la petición excedida.
+"""
+
+import logging
+import os
+import tempfile
+import threading
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlalchemy.pool import NullPool
+
+from app.consultas import (
+    CABECERA_CONSULTAS, CABECERA_TIEMPO, ConsultasMiddleware, medir_consultas
+)
+from app.db_sqlite_clean import get_db, get_db_cache, get_db_lectura
+from app.routes import reserva_router, servicio_router
+from app.services.cache_service import cache_service
+
+def crear_cliente(crear_base, **opciones):
+    ruta = os.path.join(tempfile.mkdtemp(), "consultas.db")
+    engine, db = crear_base(f"sqlite:///{ruta}")
+    sesiones_async = async_sessionmaker(create_async_engine(f"sqlite+aiosqlite:///{ruta}", poolclass=NullPool))
+
+    app = FastAPI()
+    app.add_middleware(ConsultasMiddleware, **opciones)
+    for router in (servicio_router, reserva_router):
+        app.include_router(router)
+    app.dependency_overrides[get_db] = lambda: db
+    app.dependency_overrides[get_db_lectura] = lambda: db
+    app.dependency_overrides[get_db_cache] = lambda: db
+
+    @app.get("/sincrona")
+    def sincrona(veces: int = 3):
+        for i in range(veces):
+            db.execute(text("SELECT id FROM servicios WHERE id = :id"), {"id": i})
+        return {"ok": True}
+
+    @app.get("/asincrona")
+    async def asincrona():
+        async with sesiones_async() as sesion:
+            await sesion.execute(text("SELECT 1"))
+            await sesion.execute(text("SELECT 2"))
+        return {"ok": True}
+
+    @app.get("/otro-hilo")
+    def otro_hilo():
+        # Un hilo propio (como los refrescos del cache) no hereda la medición
+        hilo = threading.Thread(target=lambda: engine.connect().execute(text("SELECT 1")))
+        hilo.start()
+        hilo.join()
+        return {"ok": True}
+
+    return TestClient(app)
+
+class Avisos(logging.Handler):
+    """Captura los avisos del detector"""
+
+    def __enter__(self):
+        self.mensajes = []
+        logging.getLogger("app.consultas").addHandler(self)
+        return self.mensajes
+
+    def __exit__(self, *args):
+        logging.getLogger("app.consultas").removeHandler(self)
+
+    def emit(self, registro):
+        self.mensajes.append(registro.getMessage())
+
+def test_cuenta_consultas_por_peticion(crear_base):
+    cliente = crear_cliente(crear_base, cabeceras=True)
+
+    sincrona = cliente.get("/sincrona")
+    assert sincrona.headers[CABECERA_CONSULTAS] == "3"
+    assert float(sincrona.headers[CABECERA_TIEMPO]) >= 0
+    assert cliente.get("/asincrona").headers[CABECERA_CONSULTAS] == "2"
+    assert cliente.get("/otro-hilo").headers[CABECERA_CONSULTAS] == "0"
+
+    sin_cabeceras = crear_cliente(crear_base, cabeceras=False).get("/sincrona")
+    assert CABECERA_CONSULTAS not in sin_cabeceras.headers and CABECERA_TIEMPO not in sin_cabeceras.headers
+
+def test_avisa_de_n_mas_1_y_presupuesto(crear_base):
+    cliente = crear_cliente(crear_base, presupuesto=50)
+    with Avisos() as mensajes:
+        cliente.get("/sincrona", params={"veces": 3})
+        assert mensajes == []
+        cliente.get("/sincrona", params={"veces": 12})
+    assert len(mensajes) == 1
+    assert "GET /sincrona: 12 consultas" in mensajes[0]
+    assert "12x SELECT id FROM servicios WHERE id = ?" in mensajes[0]
+
+    cliente = crear_cliente(crear_base, presupuesto=2)
+    with Avisos() as mensajes:
+        cliente.get("/sincrona", params={"veces": 3})
+    assert len(mensajes) == 1 and "presupuesto (2)" in mensajes[0]
+
+def test_medir_consultas_fuera_de_peticiones(crear_base):
+    engine, db = crear_base()
+    with medir_consultas() as medicion:
+        db.execute(text("SELECT 1"))
+        db.execute(text("SELECT 1"))
+    db.execute(text("SELECT 1"))
+    assert medicion.total == 2
+    assert medicion.repetidas(umbral=2) == [("SELECT 1", 2)]
+
+def test_fixture_max_consultas(crear_base, max_consultas):
+    cliente = crear_cliente(crear_base)
+    cache_service.clear()
+
+    # Presupuesto de cada endpoint
+    with max_consultas(1):
+        cliente.get("/servicios/")
+    with max_consultas(0):
+        cliente.get("/servicios/")  # servida desde el cache
+    with max_consultas(2):
+        cliente.get("/reservas/listar", params={"limit": 50})
+
+    try:
+        with max_consultas(2):
+            cliente.get("/sincrona", params={"veces": 3})
+        assert False, "debe fallar con más consultas de las permitidas"
+    except AssertionError as e:
+        assert "GET /sincrona: 3 consultas" in str(e)
+
+    try:
+        with max_consultas(5):
+            pass
+        assert False, "sin peticiones medidas debe fallar"
+    except AssertionError as e:
+        assert "ConsultasMiddleware" in str(e)
+    cache_service.clear()
@@ -0,0 +1,84 @@
+"""
+Prueba de las peticiones condicionales (ETag) del catálogo
+
+Con un TestClient sobre una base SQLite temporal comprueba que /servicios/,
+/recursos/, /recursos/disponibles, /horarios/semana/{id} y
+/api/precios/servicio/{id} devuelven ETag, que un If-None-Match coincidente
+recibe 304 sin cuerpo y sin ejecutar SQL, y que cada escritura cambia el ETag.
+"""
+
+from app.condicional import coincide_etag
+from app.models import HorarioRecurso
+from app.services.cache_service import CacheDecorator, cache_service
+
+def revalidar(contar_consultas, engines, cliente, url):
+    """Primera lectura y revalidación con su ETag; la revalidación no consulta la base de datos"""
+    primera = cliente.get(url)
+    assert primera.status_code == 200, primera.text
+    etag = primera.headers["ETag"]
+    assert etag.startswith('W/"')
+    assert primera.headers["Cache-Control"] == "no-cache"
+
+    contador = contar_consultas(*engines)
+    segunda = cliente.get(url, headers={"If-None-Match": etag})
+    assert segunda.status_code == 304, f"{url}: {segunda.status_code}"
+    assert segunda.content == b""
+    assert segunda.headers["ETag"] == etag
+    assert contador.total == 0, f"{url}: {contador.total} consultas en una revalidación"
+    return etag
+
+def test_catalogo_responde_304(crear_cliente_cache, contar_consultas):
+    engines, db, cliente = crear_cliente_cache()
+    db.add(HorarioRecurso(id=1, recurso_id=1, dia_semana=0, hora_inicio="09:00", hora_fin="14:00", created_at="09:00:00"))
+    db.commit()
+
+    for url in ("/servicios/", "/recursos/", "/recursos/disponibles", "/horarios/semana/1", "/api/precios/servicio/1"):
+        revalidar(contar_consultas, engines, cliente, url)
+
+def test_escritura_cambia_el_etag(crear_cliente_cache, contar_consultas):
+    engines, db, cliente = crear_cliente_cache()
+    etag = revalidar(contar_consultas, engines, cliente, "/servicios/")
+
+    cliente.post("/servicios/", json={"nombre": "Masaje", "duracion_minutos": 30, "precio_base": 40.0})
+    respuesta = cliente.get("/servicios/", headers={"If-None-Match": etag})
+    assert respuesta.status_code == 200
+    assert respuesta.json()[-1]["nombre"] == "Masaje"
+    assert respuesta.headers["ETag"] != etag
+
+    etag_recursos = revalidar(contar_consultas, engines, cliente, "/recursos/disponibles")
+    cliente.put("/recursos/1/toggle-disponibilidad")
+    respuesta = cliente.get("/recursos/disponibles", headers={"If-None-Match": etag_recursos})
+    assert respuesta.status_code == 200 and respuesta.json() == []
+
+def test_etag_por_parametros(crear_cliente_cache):
+    engines, db, cliente = crear_cliente_cache()
+    todos = cliente.get("/servicios/").headers["ETag"]
+    primero = cliente.get("/servicios/", params={"limit": 1}).headers["ETag"]
+
+    assert todos != primero
+    assert cliente.get("/servicios/", params={"limit": 1}, headers={"If-None-Match": todos}).status_code == 200
+
+def test_comparacion_debil_de_if_none_match():
+    etag = 'W/"abc"'
+    assert coincide_etag('W/"abc"', etag)
+    assert coincide_etag('"abc"', etag)
+    assert coincide_etag('"otro", W/"abc"', etag)
+    assert coincide_etag("*", etag)
+    assert not coincide_etag('"otro"', etag)
+    assert not coincide_etag(None, etag)
+
+def test_huella_calculada_una_vez_al_guardar():
+    cache_service.clear()
+    llamadas = []
+
+    @CacheDecorator("catalogo_etag", 60, etag=True)
+    def catalogo(version: int):
+        llamadas.append(version)
+        return [{"id": 1, "version": version}]
+
+    huella, valor = catalogo.con_etag(1)
+    assert catalogo(1) == valor == [{"id": 1, "version": 1}]
+    assert catalogo.con_etag(1) == (huella, valor)
+    assert catalogo.con_etag(2)[0] != huella
+    assert llamadas == [1, 2]
+    cache_service.clear()
@@ -0,0 +1,161 @@
+"""
+Prueba de la exportación columnar de reservas (Parquet / Arrow IPC)
+
+Exporta un año de reservas y lo vuelve a leer con pyarrow: esquema, valores,
+particiones estilo Hive (anio=/mes=/dia=), un row group por lote del cursor y
+compresión. Compara tamaño y tiempo con la misma exportación en CSV y
+comprueba que el script informa de los errores sin traza.
+"""
+
+import os
+import subprocess
+import sys
+import tempfile
+from datetime import datetime, timedelta
+
+import pyarrow as pa
+import pyarrow.ipc
+import pyarrow.parquet as pq
+from fastapi import HTTPException
+from sqlalchemy import create_engine, insert
+from sqlalchemy.orm import sessionmaker
+
+from app.db_sqlite_clean import Base
+from app.models.cliente import Cliente
+from app.models.recurso import Recurso
+from app.models.reserva import Reserva
+from app.models.servicio import Servicio
+from app.services.exportacion_service import COLUMNAS_EXPORTACION, ExportacionService
+
+RAIZ = os.path.dirname(os.path.abspath(__file__))
+RESERVAS_POR_DIA = 40
+
+def crear_anio_de_reservas():
+    """Base en fichero con las reservas de 2025 (RESERVAS_POR_DIA cada día)"""
+    ruta = os.path.join(tempfile.mkdtemp(), "exportacion.db")
+    engine = create_engine(f"sqlite:///{ruta}")
+    Base.metadata.create_all(bind=engine)
+    db = sessionmaker(bind=engine)()
+    db.add_all([
+        Cliente(id=1, nombre="Ana", email="ana@test.com"),
+        Cliente(id=2, nombre="Luis", email="luis@test.com"),
+        Servicio(id=1, nombre="Consulta", duracion_minutos=60, precio_base=50.0),
+        Servicio(id=2, nombre="Revisión", duracion_minutos=30, precio_base=25.5),
+        Recurso(id=1, nombre="Sala 1", tipo="sala"),
+        Recurso(id=2, nombre="Sala 2", tipo="sala"),
+    ])
+    db.commit()
+
+    filas = []
+    inicio_anio = datetime(2025, 1, 1, 8, 0)
+    for dia in range(365):
+        for n in range(RESERVAS_POR_DIA):
+            inicio = inicio_anio + timedelta(days=dia, minutes=15 * n)
+            filas.append({
+                "cliente_id": 1 + n % 2, "servicio_id": 1 + n % 2, "recurso_id": 1 + n % 2,
+                "fecha_hora_inicio": inicio, "fecha_hora_fin": inicio + timedelta(minutes=30),
+                "estado": ("confirmada", "pendiente", "cancelada")[n % 3],
+                "created_at": inicio - timedelta(days=3), "updated_at": None,
+            })
+    db.execute(insert(Reserva), filas)
+    db.commit()
+    return db, len(filas)
+
+def test_parquet_ida_y_vuelta():
+    db, total = crear_anio_de_reservas()
+    directorio = tempfile.mkdtemp()
+    resumen = ExportacionService.exportar_reservas_columnar(
+        db, "2025-01-01", "2025-12-31", directorio,
+        formato="parquet", compresion="zstd", particion="mes", tamano_lote=500
+    )
+    assert resumen["total_registros"] == total
+    assert len(resumen["archivos"]) == 12
+    assert sorted(os.listdir(os.path.join(directorio, "anio=2025"))) == [f"mes={mes:02d}" for mes in range(1, 13)]
+
+    esquema = ExportacionService._esquema_arrow(pa)
+    assert esquema.names == [nombre for nombre, _ in COLUMNAS_EXPORTACION]
+    assert esquema.field("fecha_hora_inicio").type == pa.timestamp("us")
+    for archivo in resumen["archivos"]:
+        fichero = pq.ParquetFile(archivo["ruta"])
+        assert fichero.schema_arrow.equals(esquema)
+        # Un row group por lote del cursor (o tramo de lote en el cambio de mes)
+        assert fichero.metadata.num_row_groups == archivo["lotes"]
+        assert fichero.metadata.num_rows == archivo["filas"]
+        assert fichero.metadata.row_group(0).column(0).compression == "ZSTD"
+
+    # Leído como dataset particionado: las columnas de partición salen del directorio
+    tabla = pq.read_table(directorio, partitioning="hive")
+    assert tabla.num_rows == total
+    assert set(tabla.column("mes").to_pylist()) == set(range(1, 13))
+    assert sorted(tabla.column("id").to_pylist()) == list(range(1, total + 1))
+
+    primera = next(fila for fila in tabla.to_pylist() if fila["id"] == 2)
+    assert primera["cliente_nombre"] == "Luis" and primera["servicio_nombre"] == "Revisión"
+    assert primera["recurso_nombre"] == "Sala 2" and primera["precio_base"] == 25.5
+    assert primera["fecha_hora_inicio"] == datetime(2025, 1, 1, 8, 15)
+    assert primera["estado"] == "pendiente" and primera["updated_at"] is None
+
+def test_arrow_ipc_por_dia():
+    db, _ = crear_anio_de_reservas()
+    directorio = tempfile.mkdtemp()
+    resumen = ExportacionService.exportar_reservas_columnar(
+        db, "2025-03-01", "2025-03-03", directorio,
+        formato="arrow", compresion="lz4", particion="dia", tamano_lote=25
+    )
+    assert resumen["total_registros"] == 3 * RESERVAS_POR_DIA
+    assert [archivo["particion"] for archivo in resumen["archivos"]] == [
+        "anio=2025/mes=03/dia=01", "anio=2025/mes=03/dia=02", "anio=2025/mes=03/dia=03"
+    ]
+    for archivo in resumen["archivos"]:
+        with pa.ipc.open_file(archivo["ruta"]) as lector:
+            assert lector.num_record_batches == archivo["lotes"]
+            tabla = lector.read_all()
+        assert tabla.num_rows == RESERVAS_POR_DIA
+        assert tabla.schema.names == [nombre for nombre, _ in COLUMNAS_EXPORTACION]
+
+    # Sin compresión el mismo fichero ocupa más
+    sin_comprimir = ExportacionService.exportar_reservas_columnar(
+        db, "2025-03-01", "2025-03-01", tempfile.mkdtemp(),
+        formato="arrow", compresion="none", particion="ninguna", tamano_lote=25
+    )
+    comprimido = resumen["archivos"][0]["ruta"]
+    assert os.path.getsize(comprimido) < os.path.getsize(sin_comprimir["archivos"][0]["ruta"])
+
+def test_opciones_invalidas():
+    db, _ = crear_anio_de_reservas()
+    for opciones in (
+        {"fecha_inicio": "01/01/2025"},
+        {"formato": "xlsx"},
+        {"formato": "arrow", "compresion": "snappy"},
+        {"particion": "semana"},
+        {"tamano_lote": 0},
+    ):
+        argumentos = {"fecha_inicio": "2025-01-01", "fecha_fin": "2025-01-31", "directorio": tempfile.mkdtemp()}
+        argumentos.update(opciones)
+        try:
+            ExportacionService.exportar_reservas_columnar(db, **argumentos)
+            assert False, f"{opciones} debe rechazarse"
+        except HTTPException as e:
+            assert e.status_code == 400
+
+def test_frente_a_csv():
+    db, total = crear_anio_de_reservas()
+    comparacion = ExportacionService.comparar_con_csv(
+        db, "2025-01-01", "2025-12-31", tempfile.mkdtemp(),
+        formato="parquet", compresion="zstd", particion="mes"
+    )
+    assert comparacion["total_registros"] == comparacion["csv"]["filas"] == total
+    print(f"   CSV: {comparacion['csv']['bytes'] / 1024:.0f} KB en {comparacion['csv']['segundos']:.2f} s; "
+          f"Parquet: {comparacion['parquet']['bytes'] / 1024:.0f} KB en {comparacion['parquet']['segundos']:.2f} s")
+    # El tiempo de escritura lo domina la consulta (parecido en ambos formatos): solo se informa
+    assert comparacion["reduccion_tamano"] > 5, comparacion
+    assert comparacion["aceleracion"] > 0
+
+def test_script_informa_de_errores():
+    resultado = subprocess.run(
+        [sys.executable, "scripts/exportar_reservas_columnar.py", "2025-13-01", "2025-12-31", tempfile.mkdtemp()],
+        cwd=RAIZ, capture_output=True, text=True
+    )
+    assert resultado.returncode == 1
+    assert "Formato de fecha inválido" in resultado.stderr
+    assert "Traceback" not in resultado.stderr
@@ -0,0 +1,165 @@
+"""
+Prueba de índices de las consultas más frecuentes
+
+Ejecuta las consultas reales de los servicios contra una base SQLite en memoria,
+captura el SQL emitido y comprueba con EXPLAIN QUERY PLAN que cada una usa el
+índice esperado (y no recorre la tabla completa).
+"""
+
+import importlib.util
+import os
+from datetime import datetime, timedelta
+
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from app.db_sqlite_clean import Base
+from app import models  # noqa: F401  (registra todas las tablas)
+from app.services.reserva_service import ReservaService
+from app.services.horario_service import HorarioService
+from app.services.precio_service import PrecioService
+from app.services.precio_dinamico_service import PrecioDinamicoService
+from app.services.integracion_service import NotificacionService
+from app.services.prediccion_service import PrediccionService
+
+INICIO = datetime(2025, 6, 2, 10, 0)
+FIN = INICIO + timedelta(hours=1)
+
+# Índices válidos para la comprobación de solapamientos: SQLite elige entre el
+# compuesto y el parcial según el orden de declaración (ambos acotan por recurso)
+INDICES_SOLAPAMIENTO = ("ix_reservas_recurso_estado_inicio_fin", "ix_reservas_activas_recurso_inicio_fin")
+
+# nombre -> (llamada al servicio, índice(s) esperado(s))
+CONSULTAS = {
+    "solapamiento_reserva": (
+        lambda db: ReservaService._has_overlap(db, 1, INICIO, FIN),
+        INDICES_SOLAPAMIENTO
+    ),
+    "solapamiento_horario": (
+        lambda db: db.execute(HorarioService._consulta_reservas_dia(1, INICIO, FIN)).all(),
+        INDICES_SOLAPAMIENTO
+    ),
+    "analitica_servicio": (
+        lambda db: PrediccionService._calcular_factor_estacional(db, 1, 0),
+        "ix_reservas_servicio_inicio"
+    ),
+    "paginacion_reservas": (
+        lambda db: ReservaService.get_reservas_filtradas_cursor(db, limit=10),
+        "ix_reservas_inicio_id"
+    ),
+    "precio_base_servicio": (
+        lambda db: PrecioService.get_precio_base_servicio(db, 1),
+        "ix_precios_servicio_activo_tipo"
+    ),
+    "reglas_activas": (
+        lambda db: PrecioDinamicoService.get_reglas(db, activas_solo=True),
+        "ix_reglas_precios_activa_prioridad"
+    ),
+    "notificaciones_pendientes": (
+        lambda db: NotificacionService.procesar_notificaciones_pendientes(db),
+        "ix_notificaciones_enviada_intentos"
+    ),
+    "horarios_recurso": (
+        lambda db: HorarioService.get_horarios_recurso(db, 1),
+        "ix_horarios_recursos_recurso_dia"
+    ),
+}
+
+def crear_sesion():
+    """Crear una sesión sobre una base SQLite en memoria con el esquema completo"""
+    engine = create_engine(
+        "sqlite://",
+        connect_args={"check_same_thread": False},
+        poolclass=StaticPool
+    )
+    Base.metadata.create_all(bind=engine)
+    return engine, sessionmaker(bind=engine)()
+
+def obtener_planes(nombre):
+    """Ejecutar una consulta de servicio y devolver el plan de cada sentencia emitida"""
+    engine, db = crear_sesion()
+    sentencias = []
+
+    def capturar(conn, cursor, statement, parameters, context, executemany):
+        sentencias.append((statement, parameters))
+
+    event.listen(engine, "before_cursor_execute", capturar)
+    try:
+        llamada, _ = CONSULTAS[nombre]
+        llamada(db)
+    finally:
+        event.remove(engine, "before_cursor_execute", capturar)
+        db.close()
+
+    planes = []
+    with engine.connect() as conn:
+        for statement, parameters in sentencias:
+            filas = conn.exec_driver_sql("EXPLAIN QUERY PLAN " + statement, parameters).fetchall()
+            planes.append([fila[3] for fila in filas])
+    return planes
+
+def verificar_consulta(nombre):
+    """Comprobar que la consulta usa su índice y no hace un SCAN completo"""
+    _, indices = CONSULTAS[nombre]
+    if isinstance(indices, str):
+        indices = (indices,)
+    planes = obtener_planes(nombre)
+    assert planes, f"{nombre}: no se emitió ninguna consulta"
+
+    detalle = " | ".join(paso for plan in planes for paso in plan)
+    assert any(f"INDEX {indice}" in detalle for indice in indices), \
+        f"{nombre}: se esperaba {' o '.join(indices)}, plan: {detalle}"
+    for plan in planes:
+        # Recorrer el resultado de una subconsulta o vista (CO-ROUTINE) no es recorrer una tabla
+        subconsultas = {paso.split()[-1] for paso in plan if paso.startswith("CO-ROUTINE")}
+        for paso in plan:
+            es_scan_tabla = paso.startswith("SCAN") and "INDEX" not in paso
+            assert not (es_scan_tabla and paso.split()[1] not in subconsultas), \
+                f"{nombre}: recorrido completo de tabla: {paso}"
+    return detalle
+
+def test_solapamiento_reserva():
+    verificar_consulta("solapamiento_reserva")
+
+def test_solapamiento_horario():
+    verificar_consulta("solapamiento_horario")
+
+def test_analitica_servicio():
+    verificar_consulta("analitica_servicio")
+
+def test_paginacion_reservas():
+    verificar_consulta("paginacion_reservas")
+
+def test_precio_base_servicio():
+    verificar_consulta("precio_base_servicio")
+
+def test_reglas_activas():
+    verificar_consulta("reglas_activas")
+
+def test_notificaciones_pendientes():
+    verificar_consulta("notificaciones_pendientes")
+
+def test_horarios_recurso():
+    verificar_consulta("horarios_recurso")
+
+def test_migraciones_cubren_indices_de_modelos():
+    """Cada índice compuesto declarado en los modelos debe crearlo alguna migración"""
+    directorio = os.path.join(os.path.dirname(os.path.abspath(__file__)), "migrations", "versions")
+    indices_migraciones = set()
+    for archivo in sorted(os.listdir(directorio)):
+        if not archivo.endswith(".py"):
+            continue
+        spec = importlib.util.spec_from_file_location(archivo[:-3], os.path.join(directorio, archivo))
+        modulo = importlib.util.module_from_spec(spec)
+        spec.loader.exec_module(modulo)
+        indices_migraciones.update(indice[0] for indice in getattr(modulo, "INDICES", []))
+
+    indices_modelos = {
+        indice.name
+        for tabla in Base.metadata.tables.values()
+        for indice in tabla.indexes
+        if len(indice.columns) > 1
+    }
+    faltantes = indices_modelos - indices_migraciones
+    assert not faltantes, f"Índices sin migración: {sorted(faltantes)}"
@@ -0,0 +1,171 @@
+"""
+Prueba de las métricas Prometheus (/metrics)
+
+Comprueba que MetricasMiddleware agrupa las latencias por plantilla de ruta
+(no por URL), con buckets acumulados y código de estado (también los 500),
+que los contadores de varios hilos se suman al exponer, que /metrics incluye
+pools, cache y colas de notificaciones y webhooks en el formato de texto de
+Prometheus, que exige el token si se configura y que el coste del middleware
+por petición es despreciable.
+"""
+
+import asyncio
+import threading
+import time
+from datetime import datetime, timedelta
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app.config import settings
+from app.db_sqlite_clean import get_db_cache, get_db_lectura
+from app.metricas import SIN_RUTA, MetricasMiddleware, RegistroMetricas, formatear, metricas_colas
+from app.models.integracion import (
+    Integracion, Notificacion, TipoIntegracion, TipoNotificacion, Webhook, WebhookLog
+)
+from app.routes import metricas_router, servicio_router
+from app.services.cache_service import cache_service
+
+# Sobrecoste máximo del middleware por petición (segundos); en la práctica unos pocos µs
+SOBRECOSTE_MAXIMO = 50e-6
+
+def crear_cliente(registro):
+    app = FastAPI()
+    app.add_middleware(MetricasMiddleware, registro=registro)
+
+    @app.get("/articulos/{articulo_id}")
+    def articulo(articulo_id: int):
+        return {"id": articulo_id}
+
+    @app.get("/falla")
+    def falla():
+        raise RuntimeError("error de prueba")
+
+    return TestClient(app, raise_server_exceptions=False)
+
+def test_latencias_por_plantilla_de_ruta():
+    registro = RegistroMetricas(buckets=[10, 0.5])
+    cliente = crear_cliente(registro)
+    for articulo_id in (1, 2, 3):
+        cliente.get(f"/articulos/{articulo_id}")
+    cliente.get("/no-existe")
+    assert cliente.get("/falla").status_code == 500
+
+    texto = formatear(registro.familias())
+    ruta = 'metodo="GET",ruta="/articulos/{articulo_id}"'
+    assert "# TYPE reservas_http_duracion_segundos histogram" in texto
+    assert f'reservas_http_duracion_segundos_bucket{{{ruta},le="0.5"}} 3' in texto
+    assert f'reservas_http_duracion_segundos_bucket{{{ruta},le="10"}} 3' in texto
+    assert f'reservas_http_duracion_segundos_bucket{{{ruta},le="+Inf"}} 3' in texto
+    assert f"reservas_http_duracion_segundos_count{{{ruta}}} 3" in texto
+    assert f'reservas_http_respuestas_total{{{ruta},estado="200"}} 3' in texto
+    assert f'reservas_http_respuestas_total{{metodo="GET",ruta="{SIN_RUTA}",estado="404"}} 1' in texto
+    assert 'reservas_http_respuestas_total{metodo="GET",ruta="/falla",estado="500"} 1' in texto
+    assert "/articulos/1" not in texto
+    assert "reservas_http_peticiones_en_curso 0" in texto
+
+def test_suma_los_fragmentos_de_cada_hilo():
+    registro = RegistroMetricas(buckets=[0.1])
+
+    def peticiones():
+        for _ in range(1000):
+            registro.observar("GET", "/x", 200, 0.05)
+
+    hilos = [threading.Thread(target=peticiones) for _ in range(8)]
+    for hilo in hilos:
+        hilo.start()
+    for hilo in hilos:
+        hilo.join()
+
+    assert len(registro._fragmentos) == 8
+    texto = formatear(registro.familias())
+    assert 'reservas_http_duracion_segundos_bucket{metodo="GET",ruta="/x",le="0.1"} 8000' in texto
+    assert 'reservas_http_respuestas_total{metodo="GET",ruta="/x",estado="200"} 8000' in texto
+    suma = float(texto.split('reservas_http_duracion_segundos_sum{metodo="GET",ruta="/x"} ')[1].split()[0])
+    assert abs(suma - 400) < 1e-6
+
+def test_endpoint_metrics_con_pools_cache_y_colas(crear_base):
+    engine, db = crear_base()
+    db.add(Integracion(id=1, nombre="Email", tipo=TipoIntegracion.EMAIL))
+    db.add(Webhook(id=1, nombre="CRM", url="http://crm.local", evento="reserva.creada"))
+    for intentos in (0, 1, 3):
+        db.add(Notificacion(
+            integracion_id=1, tipo=TipoNotificacion.RECORDATORIO, destinatario="ana@test.com",
+            contenido="Recordatorio", intentos=intentos, max_intentos=3
+        ))
+    db.add(Notificacion(
+        integracion_id=1, tipo=TipoNotificacion.RECORDATORIO, destinatario="ana@test.com",
+        contenido="Enviada", enviada=True
+    ))
+    db.add_all([
+        WebhookLog(webhook_id=1, evento_disparado="reserva.creada", exitoso=False),
+        WebhookLog(webhook_id=1, evento_disparado="reserva.creada", exitoso=True),
+        WebhookLog(webhook_id=1, evento_disparado="reserva.creada", exitoso=False,
+                   created_at=datetime.now() - timedelta(days=2)),
+    ])
+    db.commit()
+
+    app = FastAPI()
+    app.add_middleware(MetricasMiddleware)
+    app.include_router(servicio_router)
+    app.include_router(metricas_router)
+    app.dependency_overrides[get_db_lectura] = lambda: db
+    app.dependency_overrides[get_db_cache] = lambda: db
+    cliente = TestClient(app)
+
+    cache_service.clear()
+    metricas_colas(db, intervalo=0)  # recontar con esta base
+    cliente.get("/servicios/")
+    cliente.get("/servicios/")
+    respuesta = cliente.get("/metrics")
+    assert respuesta.status_code == 200
+    assert respuesta.headers["content-type"] == "text/plain; version=0.0.4; charset=utf-8"
+
+    texto = respuesta.text
+    assert 'reservas_http_respuestas_total{metodo="GET",ruta="/servicios/",estado="200"} 2' in texto
+    assert "reservas_http_peticiones_en_curso 1" in texto  # el propio scrape
+    assert '# TYPE reservas_db_pool_conexiones gauge' in texto
+    # Los contadores del cache son los de CacheService (acumulan lo de otras pruebas)
+    listado = cache_service.get_stats_por_prefijo()["servicios_listado"]
+    assert listado["hits"] >= 1 and listado["misses"] >= 1
+    prefijo = 'prefijo="servicios_listado"'
+    assert f'reservas_cache_prefijo_consultas_total{{{prefijo},resultado="hit"}} {listado["hits"]}' in texto
+    assert f'reservas_cache_prefijo_ratio_aciertos{{{prefijo}}} {listado["hit_ratio"]}' in texto
+    assert 'reservas_notificaciones_pendientes{estado="reintentable"} 2' in texto
+    assert 'reservas_notificaciones_pendientes{estado="agotada"} 1' in texto
+    assert "reservas_webhooks_entregas_fallidas 1" in texto
+    for linea in texto.splitlines():
+        assert linea.startswith("# ") or len(linea.rsplit(" ", 1)) == 2, linea
+
+    token = settings.metricas_token
+    settings.metricas_token = "secreto"
+    try:
+        assert cliente.get("/metrics").status_code == 401
+        assert cliente.get("/metrics", headers={"Authorization": "Bearer secreto"}).status_code == 200
+    finally:
+        settings.metricas_token = token
+    cache_service.clear()
+
+def test_sobrecoste_por_peticion():
+    async def vacia(scope, receive, send):
+        await send({"type": "http.response.start", "status": 200, "headers": []})
+        await send({"type": "http.response.body", "body": b""})
+
+    async def recibir():
+        return {"type": "http.request", "body": b""}
+
+    async def enviar(mensaje):
+        pass
+
+    async def medir(app, peticiones=20000):
+        scope = {"type": "http", "method": "GET", "path": "/", "root_path": ""}
+        inicio = time.perf_counter()
+        for _ in range(peticiones):
+            await app(dict(scope), recibir, enviar)
+        return (time.perf_counter() - inicio) / peticiones
+
+    sin_metricas = asyncio.run(medir(vacia))
+    con_metricas = asyncio.run(medir(MetricasMiddleware(vacia, registro=RegistroMetricas())))
+    sobrecoste = con_metricas - sin_metricas
+    print(f"   Sobrecoste por petición: {sobrecoste * 1e6:.1f} µs")
+    assert sobrecoste < SOBRECOSTE_MAXIMO, f"{sobrecoste * 1e6:.1f} µs por petición"
@@ -0,0 +1,191 @@
+"""
+Prueba de la paginación por cursor (keyset) de reservas, pagos y precios
+
+Recorre todas las páginas de cada listado siguiendo la cabecera X-Next-Cursor
+(claves repetidas incluidas) y comprueba que no hay duplicados ni huecos y que
+el orden es el de la clave, que un cursor inválido devuelve 400 y que las
+claves nulas se rechazan. El coste de una página profunda se mide en pasos de
+la máquina virtual de SQLite (determinista): con cursor es el de la primera
+página; con offset crece con la profundidad.
+"""
+
+from datetime import datetime, timedelta
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine, insert
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from app.db_sqlite_clean import Base, get_db, get_db_cache, get_db_lectura
+from app import models  # noqa: F401  (registra todas las tablas)
+from app.models.pago import Pago
+from app.models.precio import Precio
+from app.models.reserva import Reserva
+from app.paginacion import CABECERA_SIGUIENTE_CURSOR, codificar_cursor, paginar_keyset
+from app.routes import pago_router, precio_router, reserva_router
+from app.services.reserva_service import ReservaService
+
+INICIO = datetime(2025, 1, 6, 9, 0)
+
+def crear_datos(reservas=600):
+    engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    Base.metadata.create_all(bind=engine)
+    db = sessionmaker(bind=engine)()
+    db.execute(insert(models.Cliente), [{"id": 1, "nombre": "Ana", "email": "ana@test.com"}])
+    db.execute(insert(models.Servicio), [
+        {"id": servicio_id, "nombre": f"Servicio {servicio_id}", "duracion_minutos": 60, "precio_base": 50.0}
+        for servicio_id in (1, 2)
+    ])
+    db.execute(insert(models.Recurso), [{"id": 1, "nombre": "Sala 1", "tipo": "sala"}])
+    # Varias reservas por hora: la fecha se repite y el id desempata
+    db.execute(insert(Reserva), [
+        {
+            "cliente_id": 1, "servicio_id": 1 + n % 2, "recurso_id": 1,
+            "fecha_hora_inicio": INICIO + timedelta(hours=n // 3),
+            "fecha_hora_fin": INICIO + timedelta(hours=n // 3 + 1),
+            "estado": ("confirmada", "pendiente", "cancelada")[n % 3],
+        }
+        for n in range(reservas)
+    ])
+    db.execute(insert(Pago), [
+        {
+            "reserva_id": 1 + n, "cliente_id": 1, "monto": 10.0 + n, "metodo_pago": "EFECTIVO",
+            "fecha_creacion": INICIO + timedelta(minutes=n // 4),
+        }
+        for n in range(250)
+    ])
+    db.execute(insert(Precio), [
+        {"servicio_id": 1, "nombre": f"Precio {n}", "precio_base": 10.0, "prioridad": n % 5}
+        for n in range(130)
+    ])
+    db.commit()
+    return engine, db
+
+def crear_cliente(db):
+    app = FastAPI()
+    for router in (reserva_router, pago_router, precio_router):
+        app.include_router(router)
+    app.dependency_overrides[get_db] = lambda: db
+    app.dependency_overrides[get_db_lectura] = lambda: db
+    app.dependency_overrides[get_db_cache] = lambda: db
+    return TestClient(app)
+
+def recorrer(cliente, ruta, **params):
+    """Todas las páginas de un listado: (ids en orden, número de páginas)"""
+    ids, paginas, cursor = [], 0, None
+    while True:
+        respuesta = cliente.get(ruta, params={**params, **({"cursor": cursor} if cursor else {})})
+        assert respuesta.status_code == 200, respuesta.text
+        ids.extend(fila["id"] for fila in respuesta.json())
+        paginas += 1
+        cursor = respuesta.headers.get(CABECERA_SIGUIENTE_CURSOR)
+        if not cursor:
+            return ids, paginas
+
+def test_recorre_todas_las_paginas():
+    engine, db = crear_datos()
+    cliente = crear_cliente(db)
+
+    ids, paginas = recorrer(cliente, "/reservas/listar", limit=50)
+    assert ids == sorted(id_ for id_, in db.query(Reserva.id)) and paginas == 12
+
+    # Más recientes primero; empates de fecha por id descendente
+    esperados = [r.id for r in db.query(Reserva).order_by(
+        Reserva.fecha_hora_inicio.desc(), Reserva.id.desc()
+    )]
+    ids, _ = recorrer(cliente, "/reservas/buscar", limit=7)
+    assert ids == esperados
+
+    confirmadas = [r.id for r in db.query(Reserva).filter(Reserva.estado == "confirmada").order_by(
+        Reserva.fecha_hora_inicio.desc(), Reserva.id.desc()
+    )]
+    ids, _ = recorrer(cliente, "/reservas/buscar", limit=9, estado="confirmada", servicio_id=1)
+    assert ids == [i for i in confirmadas if db.get(Reserva, i).servicio_id == 1]
+
+    ids, _ = recorrer(cliente, "/api/pagos/", limit=16)
+    assert ids == [p.id for p in db.query(Pago).order_by(Pago.fecha_creacion.desc(), Pago.id.desc())]
+
+    ids, _ = recorrer(cliente, "/api/precios/", limit=11)
+    assert ids == [p.id for p in db.query(Precio).order_by(Precio.prioridad.desc(), Precio.id.desc())]
+    assert len(ids) == len(set(ids)) == 130
+
+    # skip sigue paginando por offset
+    assert len(cliente.get("/reservas/buscar", params={"skip": 590, "limit": 50}).json()) == 10
+
+def test_cursor_invalido():
+    engine, db = crear_datos(reservas=10)
+    cliente = crear_cliente(db)
+    for ruta in ("/reservas/listar", "/reservas/buscar", "/api/pagos/", "/api/precios/"):
+        # Basura y un cursor con más columnas que cualquier clave
+        for cursor in ("no-es-un-cursor", codificar_cursor([1, 2, 3])):
+            respuesta = cliente.get(ruta, params={"cursor": cursor})
+            assert respuesta.status_code == 400, (ruta, cursor, respuesta.text)
+
+def test_claves_nulas_rechazadas():
+    engine, db = crear_datos(reservas=10)
+    try:
+        paginar_keyset(db.query(Pago), [Pago.fecha_pago, Pago.id], limit=10)
+        assert False, "una clave nullable debe rechazarse"
+    except ValueError as e:
+        assert "NOT NULL" in str(e)
+
+    # Las columnas de la clave no admiten nulos en la base (migración 0005)
+    assert not Pago.__table__.c.fecha_creacion.nullable and not Precio.__table__.c.prioridad.nullable
+    try:
+        db.execute(insert(Precio.__table__), [{"servicio_id": 1, "nombre": "Sin prioridad", "precio_base": 1.0, "prioridad": None}])
+        rechazada = False
+    except IntegrityError as e:
+        db.rollback()
+        rechazada = "NOT NULL" in str(e)
+    assert rechazada, "prioridad NULL debe rechazarse"
+
+class PasosSQLite:
+    """Cuenta pasos de la máquina virtual de SQLite (coste de una consulta, sin ruido de tiempos)"""
+
+    def __init__(self, engine):
+        self.conexion = engine.raw_connection().driver_connection
+
+    def __enter__(self):
+        self.pasos = 0
+
+        def contar():
+            self.pasos += 1
+            return 0
+
+        self.conexion.set_progress_handler(contar, 100)
+        return self
+
+    def __exit__(self, *args):
+        self.conexion.set_progress_handler(None, 0)
+
+def test_pagina_profunda_cuesta_lo_que_la_primera():
+    engine, db = crear_datos(reservas=30000)
+    limite = 20
+
+    def medir(llamada):
+        with PasosSQLite(engine) as medicion:
+            llamada()
+        return medicion.pasos
+
+    for pagina_cursor, pagina_offset in (
+        (
+            lambda cursor: ReservaService.get_all_reservas_cursor(db, limit=limite, cursor=cursor),
+            lambda skip: ReservaService.get_all_reservas(db, skip=skip, limit=limite),
+        ),
+        (
+            lambda cursor: ReservaService.get_reservas_filtradas_cursor(db, limit=limite, cursor=cursor),
+            lambda skip: ReservaService.get_reservas_filtradas(db, skip=skip, limit=limite),
+        ),
+    ):
+        # Cursor de la página 1000 (las 19.980 primeras filas ya vistas)
+        cursor = None
+        for _ in range(999):
+            _, cursor = pagina_cursor(cursor)
+        primera = medir(lambda: pagina_cursor(None))
+        profunda = medir(lambda: pagina_cursor(cursor))
+        offset = medir(lambda: pagina_offset(999 * limite))
+        print(f"   pasos: página 1 {primera}, página 1000 con cursor {profunda}, con offset {offset}")
+        assert profunda <= primera * 1.5 + 5, (primera, profunda)
+        assert offset > primera * 20, (primera, offset)
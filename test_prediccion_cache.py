@@ -0,0 +1,64 @@
+"""
+Prueba del cache de modelos de predicción
+
+Comprueba sobre una base SQLite en memoria que los factores estacionales se
+obtienen con una sola consulta, que una predicción cacheada no consulta la base
+de datos, que las mutaciones de reservas actualizan el modelo sin volver a
+consultar el historial y que el precálculo calienta todos los servicios.
+"""
+
+from app.services.prediccion_service import PrediccionService
+from app.services.reserva_service import ReservaService
+
+def test_factores_estacionales_una_consulta(crear_base, contar_consultas):
+    engine, db = crear_base()
+    contador = contar_consultas(engine)
+
+    factores = PrediccionService._factores_estacionales(db, 1)
+
+    assert contador.total == 1
+    assert len(factores) == 7
+    # Sábado y domingo (5 y 6) tienen el doble de reservas que los laborables
+    assert abs(factores[5] / factores[0] - 2) < 0.2
+    assert abs(sum(factores) - 7) < 1e-9
+
+def test_prediccion_cacheada_sin_consultas(crear_base, contar_consultas):
+    engine, db = crear_base()
+    contador = contar_consultas(engine)
+
+    primera = PrediccionService.prediccion_arima_simple(db, 1, 30)
+    consultas_ajuste = contador.total
+    segunda = PrediccionService.prediccion_arima_simple(db, 1, 30)
+
+    assert consultas_ajuste <= 2
+    assert contador.total == consultas_ajuste
+    assert primera["predicciones"] == segunda["predicciones"]
+
+def test_mutacion_actualiza_modelo_sin_reajustar(crear_base, contar_consultas):
+    engine, db = crear_base()
+    PrediccionService.prediccion_arima_simple(db, 1, 7)
+
+    ReservaService.cancel_reserva(db, 1)
+    contador = contar_consultas(engine)
+    incremental = PrediccionService.prediccion_arima_simple(db, 1, 7)
+
+    # La cancelación se aplicó al estado cacheado: no se vuelve a consultar el historial
+    assert contador.total == 0
+    reajustado = PrediccionService._obtener_modelo(db, 1, "arima", forzar=True)
+    assert incremental["datos_historicos"] == reajustado["datos_historicos"]
+    assert abs(incremental["parametros_modelo"]["pendiente_tendencia"] - round(reajustado["pendiente"], 4)) < 1e-9
+
+def test_precalculo_todos_los_servicios(crear_base, contar_consultas):
+    engine, db = crear_base()
+
+    resultado = PrediccionService.precalcular_modelos(db)
+
+    assert resultado["servicios"] == 2
+    assert resultado["modelos_calculados"] == 4
+    # El servicio sin historial solo ajusta el modelo estacional (todo ceros)
+    assert {o["algoritmo"] for o in resultado["modelos_omitidos"]} == {"arima", "ml"}
+
+    contador = contar_consultas(engine)
+    PrediccionService.prediccion_estacional_avanzada(db, 1, 30)
+    PrediccionService.prediccion_machine_learning_simple(db, 1, 30)
+    assert contador.total == 0
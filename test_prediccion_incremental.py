@@ -0,0 +1,178 @@
+"""
+Prueba del estado incremental de las predicciones
+
+Comprueba que EstadoPrediccion (app/prediccion_numerica.py) da los mismos
+ajustes que las funciones por lotes del núcleo NumPy tras construirse, tras
+aplicar reservas nuevas y canceladas en O(1) y tras avanzar de día con
+reservas futuras, y que las modificaciones de reservas lo mantienen igual que
+un estado reconstruido desde la base de datos, también con varios workers
+(que se envían los cambios en lugar de descartar su estado).
+"""
+
+import os
+import pickle
+import tempfile
+from datetime import date, timedelta
+
+import numpy as np
+
+from app.prediccion_numerica import (
+    EstadoPrediccion, serie_diaria_densa, estado_desde_filas, medias_moviles, ajuste_polinomico,
+    evaluar_polinomio, metricas_ajuste, factores_dia_semana, matriz_mes_dia_semana
+)
+from app.schemas.reserva import ReservaUpdate
+from app.services import prediccion_service
+from app.services.cache_compartido import CacheCompartido
+from app.services.cache_service import CacheService
+from app.services.prediccion_service import CANAL_RESERVAS, PREFIJO_CACHE_ESTADO, PrediccionService
+from app.services.reserva_service import ReservaService
+
+HOY = date(2025, 6, 18)
+
+def serie_aleatoria(semilla=3, dias=365):
+    valores = np.random.default_rng(semilla).poisson(3, dias).astype(float)
+    return serie_diaria_densa(
+        [((HOY - timedelta(days=dias - i)).isoformat(), v) for i, v in enumerate(valores)],
+        HOY - timedelta(days=dias), HOY - timedelta(days=1)
+    )
+
+def comprobar_igual_que_lotes(estado):
+    """Comparar el estado con los ajustes por lotes sobre su serie"""
+    serie = estado.serie
+
+    arima = serie.ultimos(120).valores
+    medias = medias_moviles(arima, 7)
+    pendiente, intercepto = ajuste_polinomico(medias, 1)
+    ajuste = estado.ajuste_arima()
+    assert estado.dias_con_reservas_arima() == np.count_nonzero(arima)
+    assert np.isclose(ajuste["pendiente"], pendiente, atol=1e-9)
+    assert np.isclose(ajuste["intercepto"], intercepto, atol=1e-9)
+    assert np.isclose(ajuste["ultimo_promedio"], medias[-1])
+    assert np.isclose(ajuste["desviacion"], arima.std(ddof=1))
+
+    assert np.allclose(estado.factores_dia_semana(), factores_dia_semana(serie.ultimos(90)))
+    assert np.allclose(estado.matriz_mes_dia_semana(), matriz_mes_dia_semana(serie))
+
+    y = serie.ultimos(180).valores
+    coeficientes = ajuste_polinomico(y, 2)
+    cuadratico = estado.ajuste_cuadratico()
+    assert estado.dias_con_reservas_ml() == np.count_nonzero(y)
+    assert np.allclose(cuadratico["coeficientes"], coeficientes, rtol=1e-6, atol=1e-9)
+    assert np.allclose(
+        cuadratico["metricas"], metricas_ajuste(y, evaluar_polinomio(coeficientes, np.arange(len(y)))),
+        rtol=1e-6, atol=1e-9
+    )
+
+def test_estado_inicial_igual_que_lotes():
+    comprobar_igual_que_lotes(EstadoPrediccion(serie_aleatoria()))
+
+def test_reservas_nuevas_y_canceladas():
+    estado = EstadoPrediccion(serie_aleatoria())
+    rng = np.random.default_rng(11)
+    for _ in range(2000):
+        fecha = HOY - timedelta(days=int(rng.integers(1, 400)))
+        # Más altas que bajas para no dejar días en negativo
+        estado.registrar(fecha, 1 if rng.random() < 0.6 else -1)
+
+    comprobar_igual_que_lotes(estado)
+    # Un estado nuevo con la serie resultante da exactamente lo mismo
+    comprobar_igual_que_lotes(EstadoPrediccion(estado.serie))
+
+def test_avanzar_incorpora_reservas_futuras():
+    estado = EstadoPrediccion(serie_aleatoria())
+    estado.registrar(HOY, 5)
+    estado.registrar(HOY + timedelta(days=2), 4)
+    estado.registrar(HOY + timedelta(days=40), 2)
+    estado.registrar(HOY + timedelta(days=2), -1)
+
+    estado.avanzar(HOY + timedelta(days=3))
+
+    assert estado.hoy == HOY + timedelta(days=3)
+    assert estado.serie.valores[-3:].tolist() == [5, 0, 3]
+    assert estado.futuras == {HOY + timedelta(days=40): 2}
+    comprobar_igual_que_lotes(estado)
+
+    # Un salto mayor que la ventana conserva solo las reservas que caen dentro
+    estado.avanzar(HOY + timedelta(days=400))
+    assert estado.serie.valores.sum() == 2 and not estado.futuras
+
+def test_estado_desde_filas_y_serializable():
+    filas = [("2025-06-10", 2), ("2025-06-17", 1), (HOY, 4), ("2025-07-01", 3)]
+    estado = estado_desde_filas(filas, HOY, 365)
+
+    assert estado.serie.valores.sum() == 3
+    assert estado.futuras == {HOY: 4, date(2025, 7, 1): 3}
+
+    copia = pickle.loads(pickle.dumps(estado))
+    copia.registrar(date(2025, 6, 1), 1)
+    assert copia.serie.valores.sum() == 4 and estado.serie.valores.sum() == 3
+
+def test_modificaciones_de_reservas_sin_consultas(crear_base, contar_consultas):
+    engine, db = crear_base()
+    antes = PrediccionService._obtener_modelo(db, 1, "estacional")["total_reservas"]
+    reserva = ReservaService.get_reserva(db, 5)
+
+    # Mover una reserva fuera de la ventana ML (180 días) y eliminar otra
+    ReservaService.update_reserva(db, 5, ReservaUpdate(
+        fecha_hora_inicio=reserva.fecha_hora_inicio - timedelta(days=200),
+        fecha_hora_fin=reserva.fecha_hora_fin - timedelta(days=200)
+    ))
+    ReservaService.delete_reserva(db, 9)
+
+    contador = contar_consultas(engine)
+    ml = PrediccionService._obtener_modelo(db, 1, "ml")
+    estacional = PrediccionService._obtener_modelo(db, 1, "estacional")
+    assert contador.total == 0
+
+    reconstruido = PrediccionService._obtener_modelo(db, 1, "ml", forzar=True)
+    assert np.allclose([ml[c] for c in "abc"], [reconstruido[c] for c in "abc"], rtol=1e-9, atol=1e-12)
+    assert ml["datos_entrenamiento"] == reconstruido["datos_entrenamiento"]
+    assert estacional == PrediccionService._obtener_modelo(db, 1, "estacional", forzar=True)
+    assert estacional["total_reservas"] == antes - 1
+
+def test_reservas_se_aplican_en_otros_workers(crear_base, contar_consultas):
+    engine, db = crear_base()
+    compartido = CacheCompartido(os.path.join(tempfile.mkdtemp(), "cache.db"))
+    worker_a, worker_b = (
+        CacheService(limpieza_automatica=False, compartido=compartido, intervalo_sincronizacion=0)
+        for _ in range(2)
+    )
+    global_original = prediccion_service.cache_service
+    try:
+        for worker in (worker_a, worker_b):
+            worker.suscribir(CANAL_RESERVAS, PrediccionService.aplicar_reserva_de_otro_worker)
+            prediccion_service.cache_service = worker
+            antes = PrediccionService._obtener_modelo(db, 1, "estacional")["total_reservas"]
+
+        # La reserva llega al worker B: actualiza su estado en O(1) y publica el cambio.
+        # El manejador aplica el cambio al cache global del módulo: el del worker activo
+        reserva = ReservaService.get_reserva(db, 5)
+        ReservaService.delete_reserva(db, 5)
+        contador = contar_consultas(engine)
+        assert PrediccionService._obtener_modelo(db, 1, "estacional")["total_reservas"] == antes - 1
+
+        prediccion_service.cache_service = worker_a
+        estado_a = worker_a.get(PREFIJO_CACHE_ESTADO, servicio_id=1)
+        assert estado_a is not None, "A conserva su estado y aplica el cambio"
+        assert PrediccionService._obtener_modelo(db, 1, "estacional")["total_reservas"] == antes - 1
+        assert worker_a.get(PREFIJO_CACHE_ESTADO, servicio_id=1) is estado_a
+        assert contador.total == 0
+
+        # Sin estado en el worker que registra, el cambio llega igualmente a los demás
+        prediccion_service.cache_service = worker_c = CacheService(
+            limpieza_automatica=False, compartido=compartido, intervalo_sincronizacion=0
+        )
+        assert PrediccionService.registrar_reserva(1, reserva.fecha_hora_inicio, "confirmada") is False
+        prediccion_service.cache_service = worker_b
+        assert PrediccionService._obtener_modelo(db, 1, "estacional")["total_reservas"] == antes
+        assert contador.total == 0
+
+        # Un estado reconstruido no vuelve a aplicar los cambios ya publicados
+        worker_c.suscribir(CANAL_RESERVAS, PrediccionService.aplicar_reserva_de_otro_worker)
+        prediccion_service.cache_service = worker_c
+        assert PrediccionService._obtener_modelo(db, 1, "estacional")["total_reservas"] == antes - 1
+        assert contador.total == 1
+        worker_c.sincronizar()
+        assert PrediccionService._obtener_modelo(db, 1, "estacional")["total_reservas"] == antes - 1
+    finally:
+        prediccion_service.cache_service = global_original
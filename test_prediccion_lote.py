@@ -0,0 +1,137 @@
+"""
+Prueba del lote de predicciones de demanda
+
+Comprueba sobre una base SQLite en memoria que el lote carga todos los
+servicios con una sola consulta, que el ajuste en varios procesos da el mismo
+resultado que en uno, que las predicciones guardadas coinciden con las de
+PrediccionService y que el lote calienta el cache de modelos (salvo si se
+desactiva, como en el supervisor de varios workers).
+"""
+
+from datetime import datetime, timedelta, date
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from app.db_sqlite_clean import Base
+from app.models import Cliente, Servicio, Recurso, Reserva, PrediccionDemanda
+from app.services.cache_service import cache_service
+from app.services.prediccion_service import PrediccionService
+from app.services.prediccion_lote_service import PrediccionLoteService
+
+SERVICIOS = 4
+
+def crear_datos():
+    """Crear una base en memoria con 150 días de reservas para varios servicios"""
+    engine = create_engine(
+        "sqlite://",
+        connect_args={"check_same_thread": False},
+        poolclass=StaticPool
+    )
+    Base.metadata.create_all(bind=engine)
+    db = sessionmaker(bind=engine)()
+
+    db.add_all([Cliente(id=1, nombre="Ana", email="ana@test.com"), Recurso(id=1, nombre="Sala 1", tipo="sala")])
+    db.add_all([
+        Servicio(id=servicio_id, nombre=f"Servicio {servicio_id}", duracion_minutos=60, precio_base=50.0)
+        for servicio_id in range(1, SERVICIOS + 2)  # el último sin historial
+    ])
+
+    hoy = datetime.now().replace(hour=8, minute=0, second=0, microsecond=0)
+    reserva_id = 1
+    for servicio_id in range(1, SERVICIOS + 1):
+        for dia in range(1, 151):
+            inicio_dia = hoy - timedelta(days=dia)
+            for hora in range(servicio_id + (2 if inicio_dia.weekday() >= 5 else 0)):
+                inicio = inicio_dia + timedelta(hours=hora)
+                db.add(Reserva(
+                    id=reserva_id, cliente_id=1, servicio_id=servicio_id, recurso_id=1,
+                    fecha_hora_inicio=inicio, fecha_hora_fin=inicio + timedelta(hours=1),
+                    estado="confirmada"
+                ))
+                reserva_id += 1
+    db.commit()
+    cache_service.clear()
+    return engine, db
+
+def predicciones_guardadas(db):
+    return sorted(
+        (p.servicio_id, p.algoritmo, p.fecha, p.prediccion) for p in db.query(PrediccionDemanda).all()
+    )
+
+def test_lote_una_consulta_de_carga(contar_consultas):
+    engine, db = crear_datos()
+    contador = contar_consultas(engine)
+
+    PrediccionLoteService._filas_servicios(db, list(range(1, SERVICIOS + 2)))
+
+    assert contador.total == 1
+
+def test_lote_guarda_predicciones_de_todos_los_servicios():
+    engine, db = crear_datos()
+
+    resultado = PrediccionLoteService.ejecutar(db, dias_futuros=14, procesos=1)
+
+    assert resultado["servicios"] == SERVICIOS + 1
+    # Todos ajustan los tres modelos salvo el servicio sin historial (solo estacional)
+    assert resultado["modelos_calculados"] == SERVICIOS * 3 + 1
+    assert resultado["predicciones_guardadas"] == (SERVICIOS * 3 + 1) * 14
+    assert db.query(PrediccionDemanda).count() == resultado["predicciones_guardadas"]
+
+    # Las predicciones guardadas coinciden con las calculadas bajo demanda
+    cache_service.clear()
+    servidas = PrediccionLoteService.get_predicciones_servicio(db, 2, "ml")
+    directas = PrediccionService.prediccion_machine_learning_simple(db, 2, 14)
+    assert [(p["fecha"], p["prediccion"]) for p in servidas["predicciones"]] == \
+        [(p["fecha"], p["prediccion"]) for p in directas["predicciones"]]
+
+    por_fecha = PrediccionLoteService.get_predicciones_fecha(db, date.today(), "estacional")
+    assert len(por_fecha["servicios"]) == SERVICIOS + 1
+
+def test_lote_paralelo_igual_que_secuencial():
+    engine, db = crear_datos()
+
+    PrediccionLoteService.ejecutar(db, dias_futuros=7, procesos=1)
+    secuencial = predicciones_guardadas(db)
+    resultado = PrediccionLoteService.ejecutar(db, dias_futuros=7, procesos=2)
+
+    assert resultado["procesos"] == 2
+    assert predicciones_guardadas(db) == secuencial
+
+def test_lote_calienta_cache_de_modelos(contar_consultas):
+    engine, db = crear_datos()
+    PrediccionLoteService.ejecutar(db, dias_futuros=7, procesos=1)
+    contador = contar_consultas(engine)
+
+    for servicio_id in range(1, SERVICIOS + 1):
+        PrediccionService.prediccion_arima_simple(db, servicio_id, 7)
+        PrediccionService.prediccion_estacional_avanzada(db, servicio_id, 7)
+
+    assert contador.total == 0
+
+def test_lote_sin_calentar_cache(contar_consultas):
+    engine, db = crear_datos()
+    resultado = PrediccionLoteService.ejecutar(db, dias_futuros=7, procesos=1, calentar_cache=False)
+    assert db.query(PrediccionDemanda).count() == resultado["predicciones_guardadas"] > 0
+    contador = contar_consultas(engine)
+
+    # La primera predicción del servicio reconstruye su estado desde la base de datos
+    PrediccionService.prediccion_arima_simple(db, 1, 7)
+    assert contador.total > 0
+
+def test_lote_parcial_conserva_otros_servicios():
+    engine, db = crear_datos()
+    PrediccionLoteService.ejecutar(db, dias_futuros=7, procesos=1)
+    antes = db.query(PrediccionDemanda).filter(PrediccionDemanda.servicio_id != 1).count()
+
+    PrediccionLoteService.ejecutar(db, dias_futuros=3, procesos=1, servicio_ids=[1])
+
+    assert db.query(PrediccionDemanda).filter(PrediccionDemanda.servicio_id != 1).count() == antes
+    assert db.query(PrediccionDemanda).filter(PrediccionDemanda.servicio_id == 1).count() == 3 * 3
+
+def test_procesos_automaticos_segun_tamano_del_lote():
+    assert PrediccionLoteService._num_procesos(0, 10) == 1
+    assert PrediccionLoteService._num_procesos(4, 10) == 4
+    assert PrediccionLoteService._num_procesos(4, 2) == 2
+    assert PrediccionLoteService._num_procesos(0, 0) == 1
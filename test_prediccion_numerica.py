@@ -0,0 +1,104 @@
+"""
+Prueba de precisión del núcleo numérico de predicciones
+
+Ajusta series sintéticas con parámetros conocidos y comprueba que el núcleo
+NumPy (app/prediccion_numerica.py) los recupera: relleno de días sin reservas,
+medias móviles, tendencia lineal, regresión cuadrática y factores por día de
+la semana y mes.
+"""
+
+from datetime import date, timedelta
+
+import numpy as np
+
+from app.prediccion_numerica import (
+    serie_diaria_densa, medias_moviles, ajuste_polinomico, evaluar_polinomio,
+    metricas_ajuste, factores_dia_semana, matriz_mes_dia_semana, factores_mes_dia_semana
+)
+
+INICIO = date(2025, 1, 6)  # lunes
+
+def test_serie_densa_rellena_dias_sin_reservas():
+    filas = [("2025-01-06", 3), (date(2025, 1, 8), 5), ("2025-01-20", 7)]
+    serie = serie_diaria_densa(filas, INICIO, INICIO + timedelta(days=9))
+
+    assert len(serie) == 10
+    assert serie.valores.tolist() == [3, 0, 5, 0, 0, 0, 0, 0, 0, 0]
+    assert serie.dias_con_reservas == 2
+    assert serie.dias_semana[:7].tolist() == [0, 1, 2, 3, 4, 5, 6]
+    assert serie.ultimos(3).inicio == INICIO + timedelta(days=7)
+
+def test_medias_moviles_igual_que_ventanas_explicitas():
+    valores = np.random.default_rng(1).poisson(4, 200).astype(float)
+    ventana = 7
+
+    esperadas = [valores[i - ventana:i].mean() for i in range(ventana, len(valores))]
+
+    assert np.allclose(medias_moviles(valores, ventana), esperadas)
+    assert len(medias_moviles(valores[:5], ventana)) == 0
+
+def test_tendencia_lineal_exacta():
+    x = np.arange(120)
+    pendiente, intercepto = ajuste_polinomico(0.25 * x + 3, 1)
+
+    assert abs(pendiente - 0.25) < 1e-9
+    assert abs(intercepto - 3) < 1e-9
+
+def test_cuadratica_exacta_y_extrapolacion():
+    x = np.arange(180)
+    y = 0.002 * x ** 2 - 0.3 * x + 12
+    coeficientes = ajuste_polinomico(y, 2)
+
+    assert np.allclose(coeficientes, [0.002, -0.3, 12], atol=1e-8)
+    # Extrapolar 30 días fuera del rango de entrenamiento
+    x_futuro = np.arange(180, 210)
+    assert np.allclose(evaluar_polinomio(coeficientes, x_futuro), 0.002 * x_futuro ** 2 - 0.3 * x_futuro + 12)
+
+def test_cuadratica_con_ruido():
+    rng = np.random.default_rng(7)
+    x = np.arange(180)
+    y_real = 0.001 * x ** 2 + 0.05 * x + 5
+    y = y_real + rng.normal(0, 0.5, len(x))
+
+    coeficientes = ajuste_polinomico(y, 2)
+    mse, rmse, r2 = metricas_ajuste(y, evaluar_polinomio(coeficientes, x))
+
+    assert abs(coeficientes[0] - 0.001) < 1e-4
+    assert abs(rmse - 0.5) < 0.1
+    assert r2 > 0.95
+    assert abs(mse - rmse ** 2) < 1e-12
+
+def test_serie_constante_r2_cero():
+    y = np.full(90, 4.0)
+    coeficientes = ajuste_polinomico(y, 2)
+    mse, _, r2 = metricas_ajuste(y, evaluar_polinomio(coeficientes, np.arange(90)))
+
+    assert mse < 1e-20
+    assert r2 == 0.0
+
+def test_factores_dia_semana():
+    # Fines de semana con el triple de reservas que los laborables
+    valores = np.array([3.0 if (INICIO + timedelta(days=i)).weekday() >= 5 else 1.0 for i in range(91)])
+    serie = serie_diaria_densa(
+        [((INICIO + timedelta(days=i)).isoformat(), v) for i, v in enumerate(valores)],
+        INICIO, INICIO + timedelta(days=90)
+    )
+
+    factores = factores_dia_semana(serie)
+
+    assert abs(factores.sum() - 7) < 1e-9
+    assert np.allclose(factores[5:], 3 * factores[0])
+    assert np.allclose(factores_dia_semana(serie_diaria_densa([], INICIO, INICIO)), 1.0)
+
+def test_factores_mes_dia_semana():
+    fin = INICIO + timedelta(days=364)
+    filas = [((INICIO + timedelta(days=i)).isoformat(), (INICIO + timedelta(days=i)).month) for i in range(365)]
+    serie = serie_diaria_densa(filas, INICIO, fin)
+
+    matriz = matriz_mes_dia_semana(serie)
+    factores = factores_mes_dia_semana(matriz)
+
+    assert matriz.sum() == serie.valores.sum()
+    # Los factores de cada mes son relativos a su media
+    assert np.allclose(factores.mean(axis=1), 1.0)
+    assert np.allclose(factores_mes_dia_semana(np.zeros((12, 7))), 1.0)
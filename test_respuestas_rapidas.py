@@ -0,0 +1,124 @@
+"""
+Prueba de las respuestas rápidas (orjson) de los listados grandes
+
+Con un TestClient sobre una base SQLite temporal comprueba que
+`?rapido=true` en /reservas/listar, /api/pagos/, /api/precios/ y la
+disponibilidad de horarios devuelve exactamente el mismo JSON y la misma
+cabecera de cursor que el camino normal, sin cargar objetos ORM en la sesión.
+"""
+
+import os
+import tempfile
+from datetime import datetime, timedelta
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import NullPool
+
+from app.database import Base
+from app.database_async import get_db_async_cache, get_db_async_lectura
+from app.db_sqlite_clean import get_db, get_db_cache, get_db_lectura
+from app.models import Cliente, HorarioRecurso, Precio, Recurso, Reserva, Servicio
+from app.models.pago import EstadoPago, MetodoPago, Pago
+from app.respuestas import ORJSONResponse
+from app.routes import horario_router, pago_router, precio_router, reserva_router
+from app.services.cache_service import cache_service
+
+INICIO = datetime(2030, 1, 7, 9, 0)
+
+def crear_cliente(filas=30):
+    ruta = os.path.join(tempfile.mkdtemp(), "rapidas.db")
+    engine = create_engine(f"sqlite:///{ruta}", connect_args={"check_same_thread": False})
+    Base.metadata.create_all(bind=engine)
+    sesiones = sessionmaker(bind=engine)
+    db = sesiones()
+    db.add_all([
+        Cliente(id=1, nombre="Ana", email="ana@ejemplo.com"),
+        Servicio(id=1, nombre="Consulta", duracion_minutos=60, precio_base=50.0),
+        Recurso(id=1, nombre="Sala 1", tipo="sala"),
+        HorarioRecurso(
+            id=1, recurso_id=1, dia_semana=INICIO.weekday(), hora_inicio="08:00", hora_fin="20:00", created_at="09:00:00"
+        ),
+    ])
+    for i in range(1, filas + 1):
+        inicio = INICIO + timedelta(days=7 * (i // 10), hours=i % 10)
+        db.add(Reserva(
+            id=i, cliente_id=1, servicio_id=1, recurso_id=1, fecha_hora_inicio=inicio,
+            fecha_hora_fin=inicio + timedelta(minutes=45), estado="confirmada" if i % 3 else "cancelada",
+            created_at=INICIO - timedelta(days=i), updated_at=INICIO if i % 2 else None
+        ))
+        db.add(Pago(
+            id=i, reserva_id=i, cliente_id=1, monto=50.0 + i / 3, estado=list(EstadoPago)[i % 6],
+            metodo_pago=list(MetodoPago)[i % 4], descripcion=f"Pago ñ {i}" if i % 2 else None,
+            fecha_creacion=INICIO - timedelta(hours=i // 2), factura_generada=bool(i % 2)
+        ))
+        db.add(Precio(
+            id=i, servicio_id=1, tipo_precio="hora", nombre=f"Tarifa {i}", precio_base=10.0 + i * 0.1,
+            moneda="EUR", activo=True, prioridad=i % 4, fecha_inicio=INICIO, created_at=INICIO
+        ))
+    db.commit()
+    db.close()
+
+    # Sin pool: TestClient abre un bucle de eventos por petición
+    motor_async = create_async_engine(f"sqlite+aiosqlite:///{ruta}", poolclass=NullPool)
+    async def sesion_async():
+        async with async_sessionmaker(motor_async)() as sesion:
+            yield sesion
+
+    app = FastAPI()
+    for router in (reserva_router, pago_router, precio_router, horario_router):
+        app.include_router(router)
+    sesion = sesiones()
+    app.dependency_overrides[get_db] = lambda: sesion
+    app.dependency_overrides[get_db_lectura] = lambda: sesion
+    app.dependency_overrides[get_db_cache] = lambda: sesion
+    app.dependency_overrides[get_db_async_lectura] = sesion_async
+    app.dependency_overrides[get_db_async_cache] = sesion_async
+    cache_service.clear()
+    return sesion, TestClient(app)
+
+def comparar(cliente, sesion, url, **params):
+    """Mismo estado, cuerpo JSON y cursor con y sin `rapido`; el camino rápido no carga objetos ORM"""
+    normal = cliente.get(url, params=params)
+    sesion.expunge_all()
+    rapida = cliente.get(url, params={**params, "rapido": "true"})
+    assert normal.status_code == rapida.status_code == 200, rapida.text
+    assert rapida.json() == normal.json(), url
+    assert rapida.headers.get("X-Next-Cursor") == normal.headers.get("X-Next-Cursor")
+    assert rapida.headers["content-type"] == "application/json"
+    assert len(sesion.identity_map) == 0, f"{url}: el camino rápido cargó objetos ORM"
+    return rapida
+
+def test_listados_identicos_por_cursor():
+    sesion, cliente = crear_cliente()
+    for url in ("/reservas/listar", "/api/pagos/", "/api/precios/"):
+        primera = comparar(cliente, sesion, url, limit=12)
+        assert len(primera.json()) == 12
+        segunda = comparar(cliente, sesion, url, limit=12, cursor=primera.headers["X-Next-Cursor"])
+        assert {fila["id"] for fila in segunda.json()}.isdisjoint({fila["id"] for fila in primera.json()})
+
+def test_listados_identicos_por_offset():
+    sesion, cliente = crear_cliente()
+    for url in ("/reservas/listar", "/api/pagos/", "/api/precios/"):
+        comparar(cliente, sesion, url, skip=5, limit=10)
+    comparar(cliente, sesion, "/api/pagos/", estado="completado")
+
+def test_disponibilidad_rapida_identica():
+    sesion, cliente = crear_cliente()
+    fecha = INICIO.strftime("%Y-%m-%d")
+    normal = cliente.get("/horarios/disponibilidad/1", params={"fecha": fecha})
+    rapida = cliente.get("/horarios/disponibilidad/1", params={"fecha": fecha, "rapido": "true"})
+    assert rapida.status_code == 200 and rapida.json() == normal.json()
+    assert rapida.json()["total_slots"] > 0
+
+    cuerpo = {"recurso_id": 1, "fecha": fecha}
+    normal = cliente.post("/horarios/disponibilidad", json=cuerpo)
+    rapida = cliente.post("/horarios/disponibilidad", params={"rapido": "true"}, json=cuerpo)
+    assert rapida.json() == normal.json()
+
+def test_orjson_serializa_como_la_api():
+    cuerpo = ORJSONResponse({"fecha": INICIO, "texto": "ñ", "importe": 1.5, "nulo": None, 1: "clave"}).body
+    assert cuerpo == b'{"fecha":"2030-01-07T09:00:00","texto":"\xc3\xb1","importe":1.5,"nulo":null,"1":"clave"}'
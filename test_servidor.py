@@ -0,0 +1,141 @@
+"""
+Prueba del lanzador de producción y del apagado ordenado
+
+Comprueba que la configuración de uvicorn sale de los ajustes `servidor_*`
+(workers, uvloop/httptools, keep-alive, backlog, sin reload), que el apagado
+espera a los recálculos del cache en curso, que detener el precálculo
+nocturno no espera a la próxima noche, que con varios workers sin ruta se crea
+un cache compartido temporal y que `python -m app.servidor` arranca varios
+workers y se apaga limpiamente con SIGTERM.
+"""
+
+import asyncio
+import os
+import signal
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+import httpx
+
+from app.config import settings
+from app.servidor import (
+    apagado_ordenado, configuracion_uvicorn, implementacion, num_workers, preparar_cache_compartido, HTTPS, LOOPS
+)
+from app.services.cache_service import cache_service
+from app.services.prediccion_lote_service import PrecalculoNocturno
+
+RAIZ = os.path.dirname(os.path.abspath(__file__))
+
+def test_configuracion_desde_ajustes():
+    configuracion = configuracion_uvicorn(workers=3)
+    assert configuracion["workers"] == 3 and configuracion["reload"] is False
+    assert configuracion["app"] == settings.servidor_app
+    assert configuracion["timeout_keep_alive"] == settings.servidor_keep_alive
+    assert configuracion["backlog"] == settings.servidor_backlog
+    assert configuracion["timeout_graceful_shutdown"] == settings.servidor_apagado_segundos
+    assert configuracion["limit_concurrency"] is None  # 0 = sin límite
+    assert configuracion["loop"] in LOOPS and configuracion["http"] in HTTPS
+    assert num_workers(0) >= 1
+
+    assert implementacion("asyncio", LOOPS) == "asyncio"
+    try:
+        implementacion("tornado", LOOPS)
+        assert False, "una implementación desconocida debe rechazarse"
+    except ValueError:
+        pass
+
+def test_apagado_espera_recalculos_del_cache():
+    cache_service.clear()
+    hilo = threading.Thread(
+        target=cache_service.get_or_compute,
+        args=("prueba_apagado", lambda: time.sleep(0.3) or {"valor": 1}),
+        daemon=True
+    )
+    hilo.start()
+    time.sleep(0.05)
+    assert cache_service.get_stats()["in_flight"] == 1
+
+    asyncio.run(apagado_ordenado(plazo=5))
+    assert cache_service.get_stats()["in_flight"] == 0
+    assert cache_service.get("prueba_apagado") == {"valor": 1}
+    cache_service.clear()
+
+def test_parar_precalculo_no_espera_a_la_noche():
+    precalculo = PrecalculoNocturno()
+    ejecuciones = []
+    precalculo.ejecutar = lambda: ejecuciones.append(time.time())
+    precalculo.start(session_factory=None)
+    time.sleep(0.1)
+    assert ejecuciones, "el precálculo se ejecuta al arrancar"
+
+    inicio = time.perf_counter()
+    assert precalculo.stop(plazo=5) is True
+    assert time.perf_counter() - inicio < 1
+    assert len(ejecuciones) == 1
+
+def test_cache_compartido_temporal_con_varios_workers(monkeypatch):
+    monkeypatch.setattr(settings, "cache_compartido_ruta", "")
+    monkeypatch.delenv("CACHE_COMPARTIDO_RUTA", raising=False)
+    assert preparar_cache_compartido(1) is None
+    assert "CACHE_COMPARTIDO_RUTA" not in os.environ
+
+    directorio = preparar_cache_compartido(2)
+    assert os.path.isdir(directorio)
+    assert os.environ["CACHE_COMPARTIDO_RUTA"] == os.path.join(directorio, "cache.db")
+    os.rmdir(directorio)
+
+    monkeypatch.setattr(settings, "cache_compartido_ruta", "/srv/cache.db")
+    assert preparar_cache_compartido(4) is None
+
+def puerto_libre():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+def test_lanzador_varios_workers_y_sigterm():
+    directorio = tempfile.mkdtemp()
+    puerto = puerto_libre()
+    entorno = {
+        **os.environ, "PYTHONPATH": RAIZ, "DATABASE_URL": f"sqlite:///{directorio}/servidor.db",
+        "HOST": "127.0.0.1", "PORT": str(puerto), "SERVIDOR_APP": "app.main_sqlite:app",
+        "PREDICCION_PRECALCULO_ACTIVO": "false",
+    }
+    entorno.pop("CACHE_COMPARTIDO_RUTA", None)
+    migracion = subprocess.run(
+        [sys.executable, "-m", "alembic", "-c", "alembic.sqlite.ini", "upgrade", "head"],
+        cwd=RAIZ, env=entorno, capture_output=True, text=True
+    )
+    assert migracion.returncode == 0, migracion.stderr
+
+    with open(os.path.join(directorio, "servidor.log"), "w+") as log:
+        proceso = subprocess.Popen(
+            [sys.executable, "-m", "app.servidor", "--workers", "2"],
+            cwd=RAIZ, env=entorno, stdout=log, stderr=subprocess.STDOUT
+        )
+        try:
+            limite = time.time() + 60
+            while True:
+                assert proceso.poll() is None, "el servidor terminó al arrancar"
+                try:
+                    respuesta = httpx.get(f"http://127.0.0.1:{puerto}/health", timeout=1)
+                    break
+                except httpx.TransportError:
+                    assert time.time() < limite, "el servidor no respondió a tiempo"
+                    time.sleep(0.2)
+            assert respuesta.status_code == 200
+            assert httpx.get(f"http://127.0.0.1:{puerto}/servicios/").json() == []
+        finally:
+            proceso.send_signal(signal.SIGTERM)
+            codigo = proceso.wait(timeout=settings.servidor_apagado_segundos + 10)
+        log.seek(0)
+        salida = log.read()
+
+    assert codigo == 0, salida
+    assert "2 workers" in salida
+    temporal = salida.split("cache compartido temporal en ")[1].split()[0]
+    assert not os.path.exists(os.path.dirname(temporal)), "el cache temporal se borra al terminar"
+    assert salida.count("Application shutdown complete") == 2, salida
@@ -0,0 +1,100 @@
+"""
+Prueba de las sesiones de solo lectura
+
+Comprueba que sobre un fichero SQLite las lecturas usan un pool propio en WAL
+y query_only que ve lo confirmado por el escritor sin bloquearlo, que una
+réplica configurada tiene su propio engine, que las lecturas que se cachean
+no van a la réplica, que sin alternativa se comparte el engine principal y
+que una sesión de lectura rechaza escrituras.
+"""
+
+import asyncio
+import os
+import tempfile
+
+from sqlalchemy import text
+from sqlalchemy.engine import make_url
+from sqlalchemy.exc import OperationalError
+
+from app import database
+from app.config import settings
+from app.database import SessionLectura, crear_engine, crear_engine_lectura, elegir_engine_cache
+from app.database_async import cerrar_engines_async, sesiones_async_cache, sesiones_async_lectura
+from app.models import Cliente
+
+def crear_engines():
+    ruta = os.path.join(tempfile.mkdtemp(), "lectura.db")
+    escritura = crear_engine(f"sqlite:///{ruta}")
+    with escritura.begin() as conexion:
+        conexion.execute(text("CREATE TABLE reservas (id INTEGER PRIMARY KEY, estado TEXT)"))
+    return escritura, crear_engine_lectura(escritura)
+
+def test_pool_de_lectura_sobre_el_fichero():
+    escritura, lectura = crear_engines()
+    assert lectura is not escritura
+    assert lectura.url.database == escritura.url.database
+
+    with lectura.connect() as conexion:
+        assert conexion.execute(text("PRAGMA journal_mode")).scalar() == "wal"
+        try:
+            conexion.execute(text("INSERT INTO reservas (estado) VALUES ('pendiente')"))
+            assert False, "el pool de lectura no debe escribir"
+        except OperationalError as e:
+            assert "readonly" in str(e)
+
+def test_lectura_larga_no_bloquea_al_escritor():
+    escritura, lectura = crear_engines()
+    with lectura.connect() as informe:
+        # Transacción de lectura abierta (como un informe pesado)
+        informe.execute(text("BEGIN"))
+        assert informe.execute(text("SELECT count(*) FROM reservas")).scalar() == 0
+
+        with escritura.begin() as conexion:
+            conexion.execute(text("INSERT INTO reservas (estado) VALUES ('confirmada')"))
+
+        # El informe conserva su instantánea; la siguiente lectura ve el commit
+        assert informe.execute(text("SELECT count(*) FROM reservas")).scalar() == 0
+        informe.execute(text("COMMIT"))
+        assert informe.execute(text("SELECT count(*) FROM reservas")).scalar() == 1
+
+def test_replica_configurada():
+    escritura, _ = crear_engines()
+    replica = os.path.join(tempfile.mkdtemp(), "replica.db")
+    anterior = settings.database_replica_url
+    settings.database_replica_url = f"sqlite:///{replica}"
+    try:
+        lectura = crear_engine_lectura(escritura)
+    finally:
+        settings.database_replica_url = anterior
+    assert lectura.url.database == replica
+
+def test_lecturas_cacheadas_sin_replica():
+    escritura, lectura = crear_engines()
+    assert elegir_engine_cache(escritura, lectura) is lectura, "el pool WAL ve cada commit al momento"
+
+    anterior = settings.database_replica_url
+    settings.database_replica_url = f"sqlite:///{os.path.join(tempfile.mkdtemp(), 'replica.db')}"
+    try:
+        assert elegir_engine_cache(escritura, lectura) is escritura
+        principal = sesiones_async_cache().kw["bind"]
+        assert principal is not sesiones_async_lectura().kw["bind"]
+        assert principal.url.database == make_url(settings.database_url).database
+    finally:
+        settings.database_replica_url = anterior
+        asyncio.run(cerrar_engines_async())
+
+def test_sin_alternativa_comparte_engine():
+    memoria = crear_engine("sqlite://")
+    assert crear_engine_lectura(memoria) is memoria
+
+def test_sesion_de_lectura_rechaza_escrituras():
+    sesion = SessionLectura()
+    try:
+        sesion.add(Cliente(nombre="Ana", email="ana@ejemplo.com"))
+        sesion.flush()
+        assert False, "una sesión de lectura no debe escribir"
+    except RuntimeError as e:
+        assert "solo lectura" in str(e)
+    finally:
+        sesion.close()
+    assert database.get_db_lectura is not database.get_db